@@ -0,0 +1,5 @@
+"""
+Бенчмарки final_movies.
+
+Запуск: python -m benchmarks.<модуль> --help (из корня проекта).
+"""
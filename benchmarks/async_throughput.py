@@ -0,0 +1,175 @@
+"""
+Пропускная способность обработки запросов «поиск + запись лога»: синхронный путь
+(search_movies и log_search по очереди) против async_api, где несколько сессий
+работают одновременно, а лог каждого поиска пишется параллельно со следующим поиском.
+
+По умолчанию используются встроенные заменители MySQL и MongoDB; --latency-ms
+добавляет к каждому запросу в MySQL и каждой записи в MongoDB задержку сети,
+которой у заменителей нет (на ожидании сети потоки не держат GIL, как и у настоящих драйверов).
+С --backend live замеры идут на серверах из .env.
+
+Пример:
+    python -m benchmarks.async_throughput --requests 400 --concurrency 8 --latency-ms 2
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, UTC
+from typing import Any, Dict, Iterator, List, Optional
+
+from benchmarks.hotpaths import standin_backend
+
+CRITERIA = (
+    ("rating", {"rating": "PG"}),
+    ("keyword", {"keyword": "ac"}),
+    ("genre_year", {"genre_id": 1, "year_from": 2000, "year_to": 2010}),
+    ("rating", {"rating": "R"}),
+)
+
+
+@contextmanager
+def simulated_latency(seconds: float) -> Iterator[None]:
+    """
+    Добавляет задержку к запросам MySQL (execute_select_query) и записям логов (insert_one).
+    """
+    from final_movies import log_writer, mysql_connector
+
+    if seconds <= 0:
+        yield
+        return
+    execute = mysql_connector.execute_select_query
+    collection = log_writer.get_collection()
+    insert_one = collection.insert_one
+
+    def slow_execute(*args: Any, **kwargs: Any) -> Any:
+        time.sleep(seconds)
+        return execute(*args, **kwargs)
+
+    def slow_insert(*args: Any, **kwargs: Any) -> Any:
+        time.sleep(seconds)
+        return insert_one(*args, **kwargs)
+
+    mysql_connector.execute_select_query = slow_execute
+    collection.insert_one = slow_insert
+    try:
+        yield
+    finally:
+        mysql_connector.execute_select_query = execute
+        collection.insert_one = insert_one
+
+
+def run_sync(requests: int) -> float:
+    """
+    Обрабатывает запросы по одному; возвращает затраченное время (сек.).
+    """
+    from final_movies.log_writer import log_search
+    from final_movies.mysql_connector import search_movies
+
+    started = time.perf_counter()
+    for i in range(requests):
+        search_type, filters = CRITERIA[i % len(CRITERIA)]
+        rows = search_movies(**filters)
+        log_search(search_type, filters, len(rows))
+    return time.perf_counter() - started
+
+
+def run_async(requests: int, concurrency: int) -> float:
+    """
+    Обрабатывает запросы в concurrency одновременных сессиях async_api; возвращает время (сек.).
+    """
+    from final_movies.async_api import AsyncSearchSession, close_async_pools
+
+    async def session(indexes: range) -> None:
+        async with AsyncSearchSession() as search_session:
+            for i in indexes:
+                search_type, filters = CRITERIA[i % len(CRITERIA)]
+                await search_session.search(search_type, **filters)
+
+    async def main() -> None:
+        await asyncio.gather(*(session(range(s, requests, concurrency)) for s in range(concurrency)))
+
+    started = time.perf_counter()
+    try:
+        asyncio.run(main())
+    finally:
+        close_async_pools()
+    return time.perf_counter() - started
+
+
+def run(
+    requests: int,
+    concurrency: int,
+    latency_ms: float = 0.0,
+    backend: str = "standin",
+    films: int = 10000,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """
+    Замеряет оба пути на одних и тех же данных.
+
+    :return: Метаданные запуска и результаты sync/async (время, запросов в секунду)
+    """
+    # Кэш результатов свёл бы замер к обращениям к памяти, а фоновый писатель — к постановке в очередь
+    os.environ["SEARCH_CACHE"] = "0"
+    os.environ["SEARCH_BACKEND"] = "sql"
+    os.environ["MONGO_LOG_ASYNC"] = "0"
+    context = standin_backend(films, 0, 16, seed) if backend == "standin" else nullcontext()
+    results: Dict[str, Dict[str, float]] = {}
+    with context, simulated_latency(latency_ms / 1000):
+        for name, measure in (
+            ("sync", lambda: run_sync(requests)),
+            (f"async x{concurrency}", lambda: run_async(requests, concurrency)),
+        ):
+            seconds = measure()
+            results[name] = {"seconds": seconds, "requests_per_second": requests / seconds}
+    return {
+        "meta": {
+            "backend": backend,
+            "requests": requests,
+            "concurrency": concurrency,
+            "latency_ms": latency_ms,
+            "films": films,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": datetime.now(UTC).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    baseline = results["sync"]["requests_per_second"]
+    for name, result in results.items():
+        print(
+            f"{name:12} {result['seconds']:8.2f} s | {result['requests_per_second']:9.1f} req/s | "
+            f"x{result['requests_per_second'] / baseline:.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Async vs sync search + log throughput benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="Simulated round trip added to every MySQL query and Mongo write")
+    parser.add_argument("--backend", choices=("standin", "live"), default="standin")
+    parser.add_argument("--films", type=int, default=10000, help="standin: catalog size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.requests, args.concurrency, args.latency_ms, args.backend, args.films, args.seed)
+    print_results(report["results"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
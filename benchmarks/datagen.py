@@ -0,0 +1,412 @@
+"""
+Генератор синтетических данных в масштабе Sakila для нагрузочных тестов.
+
+Заполняет таблицы film, category и film_category заданным количеством фильмов,
+жанров и связей, а также коллекцию поисковых логов MongoDB документами
+в формате log_search. Генерация детерминирована (--seed).
+
+Пример:
+    python -m benchmarks.datagen --films 1000000 --genres 24 --logs 200000
+    python -m benchmarks.datagen --films 200000 --method load-data --truncate
+"""
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+import tempfile
+import itertools
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Слова для названий в стиле Sakila ("ACADEMY DINOSAUR", "ACE GOLDFINGER")
+TITLE_ADJECTIVES = (
+    "ACADEMY ACE ADAPTATION AFFAIR AFRICAN AGENT AIRPLANE AIRPORT ALABAMA ALADDIN "
+    "ALAMO ALASKA ALI ALLEY ALONE AMADEUS AMELIE AMERICAN AMISTAD ANACONDA ANALYZE "
+    "ANGELS ANNIE ANONYMOUS ANTHEM ANTITRUST ANYTHING APACHE APOCALYPSE APOLLO "
+    "ARABIA ARACHNOPHOBIA ARGONAUTS ARIZONA ARK ARMAGEDDON ARMY ARSENIC ARTIST "
+    "ATLANTIS ATTACKS ATTRACTION AUTUMN BABY BACKLASH BADMAN BAKED BALLOON BALLROOM "
+    "BANG BANGER BARBARELLA BAREFOOT BASIC BEACH BEAR BEAST BEAUTY BED BEDAZZLED "
+    "BEETHOVEN BEHAVIOR BENEATH BERETS BETRAYED BEVERLY BIKINI BILKO BINGO BIRCH "
+    "BIRD BIRDCAGE BIRDS BLACKOUT BLADE BLANKET BLINDNESS BLOOD BLUES BOILED BONNIE "
+    "BOOGIE BOONDOCK BORN BORROWERS BOULEVARD BOUND BOWFINGER BRANNIGAN BRAVEHEART "
+    "BREAKFAST BREAKING BRIDE BRIGHT BRINGING BROOKLYN BROTHERHOOD BUBBLE BUCKET"
+).split()
+TITLE_NOUNS = (
+    "DINOSAUR GOLDFINGER HARPER EGG SPIRITED DREAM HOCUS HOLIDAY CLUB LAWRENCE "
+    "EXORCIST POLISH CORE MADIGAN FIGHT FLASH SECRETS CHOCOLATE ARCHAEOLOGY "
+    "DIVORCE HOOK RUGRATS ROBBERS SCORPION SHAKESPEARE FIRE CAMP EXPRESS FUGITIVE "
+    "GUMP TRUMAN VOYAGE WIZARD ZORRO TOMORROW TRADING SUNRISE SPICE SPY SAINTS "
+    "PRIDE RANGER RIVER ROOF SAVANNAH SEA SHANE SIMON SLEEPY SNATCH SOLDIERS SONG "
+    "SPLASH STAGE STAR STONE STORM STRANGER SUIT SUMMER SUPERFLY TALENTED TEEN "
+    "TELEGRAPH TEXAS THEORY TIES TITANIC TOOTSIE TOWN TRAIN TREASURE TRIP TROJAN "
+    "TUXEDO TWISTED UNBREAKABLE UNION UPTOWN VACATION VALLEY VANISHING VELVET "
+    "VIRGIN VOLCANO WAGON WAR WASH WEEKEND WEST WHALE WIFE WILD WINDOW WISDOM "
+    "WOMEN WONDERLAND WORKER WRATH YOUTH ZHIVAGO ZOOLANDER"
+).split()
+DESCRIPTION_TEMPLATES = (
+    "A {a} Story of a {b} And a {c} who must {d} a {e} in {f}",
+    "A {a} Drama of a {b} And a {c} who must {d} a {e} in {f}",
+    "A {a} Documentary of a {b} And a {c} who must {d} a {e} in {f}",
+)
+DESCRIPTION_WORDS = {
+    "a": "Epic Fateful Astounding Beautiful Brilliant Emotional Insightful Touching".split(),
+    "b": "Dentist Monkey Boat Astronaut Cat Feminist Hunter Waitress Robot".split(),
+    "c": "Moose Explorer Lumberjack Pioneer Sumo Wrestler Teacher Pastry Chef".split(),
+    "d": "Chase Defeat Find Outgun Overcome Meet Kill Battle Sink Discover".split(),
+    "e": "Hunter Crocodile Database Administrator Mad Scientist Forensic Psychologist".split(),
+    "f": "Ancient India,A Shark Tank,The Gulf of Mexico,A Baloon,Soviet Georgia".split(","),
+}
+
+# Жанры Sakila (дальше — синтетические названия)
+SAKILA_GENRES = (
+    "Action Animation Children Classics Comedy Documentary Drama Family Foreign "
+    "Games Horror Music New Sci-Fi Sports Travel"
+).split()
+EXTRA_GENRES = (
+    "Western Thriller Romance Mystery Fantasy Crime War History Biography Noir "
+    "Musical Adventure Superhero Satire Mockumentary Anime"
+).split()
+
+# Распределение рейтингов MPAA (близко к пропорциям Sakila)
+RATING_WEIGHTS = {"G": 178, "PG": 194, "PG-13": 223, "R": 195, "NC-17": 210}
+
+# category.category_id в Sakila — TINYINT UNSIGNED
+MAX_GENRES = 255
+
+
+def generate_genres(count: int) -> List[Tuple[int, str]]:
+    """
+    Возвращает список жанров (category_id, name): сначала жанры Sakila, затем синтетические.
+    """
+    if not 1 <= count <= MAX_GENRES:
+        raise ValueError(f"Genre count must be between 1 and {MAX_GENRES}")
+    names = list(SAKILA_GENRES) + list(EXTRA_GENRES)
+    names += [f"Genre {n}" for n in range(len(names) + 1, count + 1)]
+    return [(idx, name) for idx, name in enumerate(names[:count], start=1)]
+
+
+def generate_title(index: int) -> str:
+    """
+    Детерминированно строит уникальное название по номеру фильма.
+    Пока хватает словаря — два слова, как в Sakila, затем добавляется номер части.
+    """
+    sequel, pair = divmod(index, len(TITLE_ADJECTIVES) * len(TITLE_NOUNS))
+    adjective, noun = divmod(pair, len(TITLE_NOUNS))
+    title = f"{TITLE_ADJECTIVES[adjective]} {TITLE_NOUNS[noun]}"
+    return f"{title} {sequel + 1}" if sequel else title
+
+
+def random_year(rng: random.Random, year_from: int = 1950, year_to: int = 2025) -> int:
+    """
+    Год выпуска: распределение смещено к последним десятилетиям.
+    """
+    return min(year_to, int(rng.triangular(year_from, year_to + 1, year_to - 5)))
+
+
+def generate_films(
+    count: int, rng: random.Random, start_id: int = 1
+) -> Iterator[Tuple[int, str, str, int, str]]:
+    """
+    Генерирует фильмы (film_id, title, description, release_year, rating).
+
+    :param count: Количество фильмов
+    :param rng: Генератор случайных чисел (для воспроизводимости)
+    :param start_id: Первый film_id (чтобы не пересекаться с существующими строками)
+    """
+    # Названия перемешиваются, чтобы порядок вставки не совпадал с алфавитным
+    order = list(range(count))
+    rng.shuffle(order)
+    ratings = list(RATING_WEIGHTS)
+    cum_weights = list(itertools.accumulate(RATING_WEIGHTS.values()))
+    for offset, title_index in enumerate(order):
+        description = rng.choice(DESCRIPTION_TEMPLATES).format(
+            **{key: rng.choice(words) for key, words in DESCRIPTION_WORDS.items()}
+        )
+        yield (
+            start_id + offset,
+            generate_title(title_index),
+            description,
+            random_year(rng),
+            rng.choices(ratings, cum_weights=cum_weights)[0],
+        )
+
+
+def generate_film_categories(
+    film_ids: Sequence[int],
+    genre_ids: Sequence[int],
+    rng: random.Random,
+    max_genres_per_film: int = 1,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Генерирует связи (film_id, category_id): от 1 до max_genres_per_film жанров на фильм.
+    Популярность жанров неравномерна (первые жанры встречаются чаще).
+    """
+    # Накопленные веса: выбор за O(log n) вместо пересчёта весов на каждой строке
+    cum_weights = list(
+        itertools.accumulate(1.0 / (rank + 1) ** 0.5 for rank in range(len(genre_ids)))
+    )
+    limit = max(1, min(max_genres_per_film, len(genre_ids)))
+    for film_id in film_ids:
+        chosen = set()
+        for _ in range(rng.randint(1, limit)):
+            chosen.add(rng.choices(genre_ids, cum_weights=cum_weights)[0])
+        for genre_id in sorted(chosen):
+            yield film_id, genre_id
+
+
+def generate_search_logs(
+    count: int,
+    genres: Sequence[Tuple[int, str]],
+    rng: random.Random,
+    days: int = 90,
+    distinct_searches: int = 5000,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Генерирует документы поисковых логов в формате log_search.
+    Частоты запросов подчиняются закону Ципфа: немногие запросы очень популярны.
+
+    :param count: Количество документов
+    :param genres: Жанры (category_id, name) для поиска по жанру
+    :param days: Глубина истории в днях
+    :param distinct_searches: Размер пула различных запросов
+    """
+    pool: List[Tuple[str, Dict[str, Any], int]] = []
+    for _ in range(distinct_searches):
+        kind = rng.choices(("keyword", "genre_year", "rating"), (6, 3, 1))[0]
+        if kind == "keyword":
+            word = rng.choice(TITLE_ADJECTIVES + TITLE_NOUNS).lower()
+            params: Dict[str, Any] = {"keyword": word[: rng.randint(3, len(word))]}
+        elif kind == "genre_year":
+            genre_id, genre_name = rng.choice(genres)
+            year_from = random_year(rng)
+            params = {
+                "genre_name": genre_name,
+                "genre_id": genre_id,
+                "year_from": year_from,
+                "year_to": min(2025, year_from + rng.randint(0, 20)),
+            }
+        else:
+            params = {"rating": rng.choice(list(RATING_WEIGHTS))}
+        pool.append((kind, params, rng.randint(0, 300)))
+
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(pool))))
+    now = datetime.now(UTC)
+    for _ in range(count):
+        kind, params, results_count = rng.choices(pool, cum_weights=cum_weights)[0]
+        yield {
+            "timestamp": now - timedelta(seconds=rng.uniform(0, days * 86400)),
+            "search_type": kind,
+            "params": dict(params),
+            "results_count": results_count,
+        }
+
+
+def batched(iterable: Iterator[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Разбивает поток на списки по size элементов.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _insert_rows(connection: Any, query: str, rows: Iterator[Tuple], batch_size: int) -> int:
+    """
+    Вставляет строки многострочными INSERT (pymysql.executemany склеивает VALUES).
+    """
+    total = 0
+    with connection.cursor() as cursor:
+        for batch in batched(rows, batch_size):
+            cursor.executemany(query, batch)
+            total += len(batch)
+    return total
+
+
+def _load_data_rows(connection: Any, table: str, columns: str, rows: Iterator[Tuple]) -> int:
+    """
+    Загружает строки через LOAD DATA LOCAL INFILE (нужен local_infile на сервере и клиенте).
+    """
+    total = 0
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False) as f:
+        writer = csv.writer(f, lineterminator="\n")
+        for row in rows:
+            writer.writerow(row)
+            total += 1
+        path = f.name
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                f"LINES TERMINATED BY '\\n' ({columns})",
+                (path,),
+            )
+    finally:
+        os.unlink(path)
+    return total
+
+
+def load_mysql(
+    connection: Any,
+    films: int,
+    genres: int,
+    max_genres_per_film: int = 1,
+    seed: int = 42,
+    batch_size: int = 5000,
+    method: str = "insert",
+    truncate: bool = False,
+) -> Dict[str, int]:
+    """
+    Заполняет film, category и film_category синтетическими данными.
+
+    Без truncate фильмы добавляются после существующих (film_id > MAX(film_id)),
+    а жанры Sakila с теми же ID переиспользуются.
+
+    :param connection: Соединение pymysql (autocommit)
+    :param method: "insert" — многострочные INSERT, "load-data" — LOAD DATA LOCAL INFILE
+    :return: Количество вставленных фильмов, жанров и связей
+    """
+    rng = random.Random(seed)
+    genre_rows = generate_genres(genres)
+    with connection.cursor() as cursor:
+        if truncate:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            for table in ("film_category", "film", "category"):
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        cursor.execute("SELECT COALESCE(MAX(film_id), 0) AS max_id FROM film")
+        row = cursor.fetchone()
+        start_id = (row["max_id"] if isinstance(row, dict) else row[0]) + 1
+        cursor.execute("SELECT MIN(language_id) AS language_id FROM language")
+        row = cursor.fetchone()
+        language_id = (row["language_id"] if isinstance(row, dict) else row[0]) or 1
+
+    inserted_genres = _insert_rows(
+        connection,
+        "INSERT IGNORE INTO category (category_id, name) VALUES (%s, %s)",
+        iter(genre_rows),
+        batch_size,
+    )
+
+    film_rows = (
+        (film_id, title, description, year, language_id, rating)
+        for film_id, title, description, year, rating in generate_films(films, rng, start_id)
+    )
+    film_ids = range(start_id, start_id + films)
+    link_rows = generate_film_categories(
+        film_ids, [genre_id for genre_id, _ in genre_rows], rng, max_genres_per_film
+    )
+
+    if method == "load-data":
+        inserted_films = _load_data_rows(
+            connection, "film",
+            "film_id, title, description, release_year, language_id, rating", film_rows,
+        )
+        inserted_links = _load_data_rows(
+            connection, "film_category", "film_id, category_id", link_rows
+        )
+    else:
+        inserted_films = _insert_rows(
+            connection,
+            "INSERT INTO film (film_id, title, description, release_year, language_id, rating) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            film_rows,
+            batch_size,
+        )
+        inserted_links = _insert_rows(
+            connection,
+            "INSERT INTO film_category (film_id, category_id) VALUES (%s, %s)",
+            link_rows,
+            batch_size,
+        )
+    return {"films": inserted_films, "genres": inserted_genres, "links": inserted_links}
+
+
+def load_mongo(
+    collection: Any,
+    count: int,
+    genres: Sequence[Tuple[int, str]],
+    seed: int = 42,
+    batch_size: int = 5000,
+) -> int:
+    """
+    Заполняет коллекцию поисковых логов синтетическими документами (insert_many пачками).
+    """
+    rng = random.Random(seed)
+    total = 0
+    for batch in batched(generate_search_logs(count, genres, rng), batch_size):
+        collection.insert_many(batch, ordered=False)
+        total += len(batch)
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetic Sakila-scale dataset generator")
+    parser.add_argument("--films", type=int, default=100000)
+    parser.add_argument("--genres", type=int, default=16)
+    parser.add_argument("--max-genres-per-film", type=int, default=1)
+    parser.add_argument("--logs", type=int, default=0, help="Synthetic search log documents")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--method", choices=("insert", "load-data"), default="insert")
+    parser.add_argument(
+        "--truncate", action="store_true",
+        help="Delete existing film, category and film_category rows first",
+    )
+    parser.add_argument("--skip-mysql", action="store_true")
+    parser.add_argument("--rollups", action="store_true", help="Rebuild rollups after loading logs")
+    args = parser.parse_args(argv)
+
+    genre_rows = generate_genres(args.genres)
+
+    if not args.skip_mysql:
+        from final_movies.mysql_connector import get_mysql_connection
+
+        started = time.perf_counter()
+        connection = get_mysql_connection()
+        if args.method == "load-data":
+            connection.close()
+            import pymysql
+
+            # LOAD DATA LOCAL требует явного разрешения на стороне клиента
+            connection = pymysql.connect(
+                host=os.getenv("MYSQL_HOST"),
+                user=os.getenv("MYSQL_USER"),
+                password=os.getenv("MYSQL_PASSWORD"),
+                database=os.getenv("MYSQL_DATABASE"),
+                autocommit=True,
+                local_infile=True,
+            )
+        try:
+            counts = load_mysql(
+                connection, args.films, args.genres, args.max_genres_per_film,
+                args.seed, args.batch_size, args.method, args.truncate,
+            )
+        finally:
+            connection.close()
+        elapsed = time.perf_counter() - started
+        print(f"✅ MySQL: {counts} in {elapsed:.1f}s ({counts['films'] / elapsed:,.0f} films/s)")
+
+    if args.logs:
+        from final_movies.log_writer import get_collection, get_rollup_collection
+        from final_movies.log_rollups import backfill_rollups
+
+        started = time.perf_counter()
+        collection = get_collection()
+        if collection is None:
+            print("❌ MongoDB is not available.")
+            return 1
+        inserted = load_mongo(collection, args.logs, genre_rows, args.seed, args.batch_size)
+        print(f"✅ MongoDB: {inserted} search logs in {time.perf_counter() - started:.1f}s")
+        if args.rollups:
+            print(f"✅ Rollups: {backfill_rollups(collection, get_rollup_collection())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Сравнение поиска по ключевому слову через LIKE '%...%' и через FULLTEXT-индекс
+при разных объёмах каталога. Требует MySQL из .env (SQLite-заменитель не поддерживает
+MATCH ... AGAINST); с --populate перед каждым размером таблицы film, film_category
+и category очищаются и заполняются данными datagen, а индекс создаётся заново.
+
+Пример:
+    python -m benchmarks.fulltext --sizes 10000,100000,1000000 --populate --output fulltext.json
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks import datagen
+from benchmarks.hotpaths import Case, measure
+
+# Слово-префикс, целое слово и два слова — как в типичных запросах из логов
+KEYWORDS = ("acad", "dinosaur", "academy dinosaur")
+
+
+def build_cases(keywords: Sequence[str]) -> List[Case]:
+    from final_movies import mysql_connector as db
+
+    def search(mode: str, keyword: str) -> Any:
+        os.environ["KEYWORD_SEARCH_MODE"] = mode
+        return db.search_movies(keyword=keyword)
+
+    cases = []
+    for keyword in keywords:
+        for mode in ("like", "fulltext"):
+            cases.append(Case(f"{mode}[{keyword}]", lambda m=mode, k=keyword: search(m, k)))
+    return cases
+
+
+def run(
+    sizes: Sequence[int],
+    iterations: int,
+    genres: int = 16,
+    seed: int = 42,
+    populate: bool = False,
+    keywords: Sequence[str] = KEYWORDS,
+) -> Dict[str, Any]:
+    """
+    Выполняет замеры LIKE и FULLTEXT для каждого объёма данных.
+
+    :return: Метаданные запуска и сводки по ключам вида "режим[слово]@размер"
+    """
+    from final_movies import mysql_connector
+    from final_movies.schema_admin import ensure_fulltext_index, verify_fulltext_index
+
+    # Кэши результатов и каталог в памяти исказили бы сравнение
+    os.environ["SEARCH_CACHE"] = "0"
+    os.environ["SEARCH_BACKEND"] = "sql"
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for size in sizes:
+            if populate:
+                with mysql_connector.get_mysql_connection() as connection:
+                    datagen.load_mysql(connection, size, genres, seed=seed, truncate=True)
+            ensure_fulltext_index()
+            if not verify_fulltext_index()["used"]:
+                raise RuntimeError("FULLTEXT index is not used by MATCH ... AGAINST")
+            for case in build_cases(keywords):
+                results[f"{case.name}@{size}"] = measure(case, iterations)
+    finally:
+        os.environ.pop("KEYWORD_SEARCH_MODE", None)
+    return {
+        "meta": {
+            "sizes": list(sizes),
+            "iterations": iterations,
+            "keywords": list(keywords),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": datetime.now(UTC).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def print_speedups(results: Dict[str, Dict[str, Any]]) -> None:
+    for name, like in results.items():
+        if not name.startswith("like["):
+            continue
+        fulltext = results.get("fulltext" + name[len("like"):])
+        if fulltext is None:
+            continue
+        speedup = like["p50_ms"] / fulltext["p50_ms"] if fulltext["p50_ms"] else float("inf")
+        print(
+            f"{name[len('like'):]:32} LIKE p50 {like['p50_ms']:9.2f} ms | "
+            f"FULLTEXT p50 {fulltext['p50_ms']:9.2f} ms | x{speedup:.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="LIKE vs FULLTEXT keyword search benchmark")
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated film counts")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--populate", action="store_true",
+                        help="Truncate and reload film/category data for every size")
+    parser.add_argument("--genres", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keywords", help="Comma-separated keywords")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    keywords = [k.strip() for k in args.keywords.split(",")] if args.keywords else KEYWORDS
+    report = run(sizes, args.iterations, args.genres, args.seed, args.populate, keywords)
+    print_speedups(report["results"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
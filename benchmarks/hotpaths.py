@@ -0,0 +1,306 @@
+"""
+Бенчмарк горячих путей приложения при разных объёмах данных:
+- поиск фильмов (search_movies, первая страница search_movies_page);
+- каталог жанров и таблица жанров (одним запросом и по жанру);
+- запись поисковых логов (log_search и пакетный SearchLogWriter);
+- статистика поиска (ТОП по агрегатам, последние запросы, ТОП за период).
+
+По умолчанию данные создаются во встроенных заменителях (SQLite вместо MySQL
+и коллекция в памяти вместо MongoDB). С --backend live замеры идут на серверах
+из .env; --populate перед каждым размером очищает и заново заполняет их данными datagen.
+
+Для каждого замера выводятся p50/p95/p99, пропускная способность (оп/с)
+и пиковое выделение памяти Python (tracemalloc).
+
+Пример:
+    python -m benchmarks.hotpaths run --sizes 1000,10000,100000 --output hotpaths.json
+    python -m benchmarks.hotpaths compare hotpaths.json baseline.json --tolerance 0.25
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from benchmarks import datagen
+from benchmarks.stats import summarize, find_regressions
+
+# Метрики, по которым compare ищет регрессии
+COMPARE_METRICS = ("p50_ms", "p95_ms")
+LOG_BATCH = 500
+
+
+@dataclass
+class Case:
+    """
+    Один замер: функция без аргументов и число операций, выполняемых за вызов.
+    """
+
+    name: str
+    func: Callable[[], Any]
+    ops: int = 1
+
+
+def _quiet(func: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    Оборачивает функцию вывода: печать подавляется, а сообщение об ошибке
+    (функции статистики перехватывают исключения и печатают ❌) превращается в исключение.
+    """
+    def wrapper() -> Any:
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            result = func()
+        if "❌" in buffer.getvalue():
+            raise RuntimeError(buffer.getvalue().strip())
+        return result
+
+    return wrapper
+
+
+def build_cases(genre_id: int = 1, keyword: str = "academy") -> List[Case]:
+    """
+    Формирует список замеров для подключённых MySQL и MongoDB (или их заменителей).
+    """
+    from final_movies import mysql_connector as db
+    from final_movies import log_writer, log_stats
+    from final_movies.formatter import display_genre_table
+
+    def genre_catalog() -> Any:
+        db.invalidate_genre_cache()
+        return db.get_genre_catalog()
+
+    def genre_table_per_genre() -> Any:
+        # Прежний путь: два запроса на каждый жанр
+        return display_genre_table([{"genre_id": g["genre_id"], "name": g["name"]}
+                                    for g in db.get_all_genres()])
+
+    def log_search_sync() -> None:
+        log_writer.log_search("keyword", {"keyword": keyword}, 10)
+
+    def log_writer_batch() -> None:
+        writer = log_writer.SearchLogWriter(
+            log_writer.get_collection(), log_writer.get_rollup_collection(),
+            batch_size=LOG_BATCH, flush_interval=10,
+        )
+        writer.start()
+        for n in range(LOG_BATCH):
+            writer.submit({
+                "timestamp": datetime.now(UTC),
+                "search_type": "rating",
+                "params": {"rating": ("G", "PG", "R")[n % 3]},
+                "results_count": n,
+            })
+        writer.shutdown()
+
+    return [
+        Case("search_keyword", lambda: db.search_movies(keyword=keyword)),
+        Case("search_genre_year", lambda: db.search_movies(genre_id=genre_id, year_from=2000, year_to=2010)),
+        Case("search_rating", lambda: db.search_movies(rating="PG")),
+        Case("search_page_first", lambda: db.search_movies_page(rating="PG", page_size=10, with_total=True)),
+        Case("genre_catalog", genre_catalog),
+        Case("genre_table", _quiet(lambda: display_genre_table(genre_catalog()))),
+        Case("genre_table_per_genre", _quiet(genre_table_per_genre)),
+        Case("log_search_sync", log_search_sync),
+        Case("log_writer_batch", log_writer_batch, ops=LOG_BATCH),
+        Case("stats_top", _quiet(lambda: log_stats.display_top_searches(5))),
+        Case("stats_last_unique", _quiet(lambda: log_stats.display_last_unique_searches(5))),
+        Case("stats_top_period", _quiet(lambda: log_stats.display_top_searches_for_period(7, 5))),
+    ]
+
+
+def measure(case: Case, iterations: int, warmup: int = 2) -> Dict[str, Any]:
+    """
+    Выполняет замер: прогрев, iterations вызовов с таймером и один вызов под tracemalloc.
+    """
+    for _ in range(warmup):
+        case.func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        case.func()
+        samples.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        case.func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    summary = summarize(samples)
+    summary["throughput_ops"] = case.ops * len(samples) / sum(samples) if sum(samples) else 0.0
+    summary["peak_memory_kb"] = peak / 1024
+    return summary
+
+
+@contextmanager
+def standin_backend(films: int, logs: int, genres: int, seed: int) -> Iterator[None]:
+    """
+    Подключает заменители MySQL и MongoDB, заполненные данными нужного объёма.
+    """
+    from benchmarks.standins import SakilaStandIn, install_mongo_standin, populate_search_logs
+    from final_movies import mysql_connector, log_writer
+
+    sakila = SakilaStandIn().populate(films, genres, seed=seed)
+    try:
+        sakila.install()
+        logs_collection, rollups = install_mongo_standin()
+        populate_search_logs(logs_collection, rollups, logs, genres, seed)
+        yield
+    finally:
+        mysql_connector.set_connection_pool(None)
+        mysql_connector.invalidate_genre_cache()
+        with log_writer._mongo_lock:
+            log_writer._mongo_ready = False
+            log_writer._collection = log_writer._rollup_collection = None
+        sakila.close()
+
+
+@contextmanager
+def live_backend(films: int, logs: int, genres: int, seed: int, populate: bool) -> Iterator[None]:
+    """
+    Использует серверы из .env; с populate предварительно перезаписывает их данные.
+    """
+    from final_movies import mysql_connector
+    from final_movies.log_writer import get_collection, get_rollup_collection
+    from final_movies.log_rollups import backfill_rollups
+
+    if populate:
+        with mysql_connector.get_mysql_connection() as connection:
+            datagen.load_mysql(connection, films, genres, seed=seed, truncate=True)
+        get_collection().delete_many({})
+        datagen.load_mongo(get_collection(), logs, datagen.generate_genres(genres), seed)
+        backfill_rollups(get_collection(), get_rollup_collection())
+    mysql_connector.invalidate_genre_cache()
+    yield
+
+
+def run(
+    sizes: Sequence[int],
+    iterations: int,
+    backend: str = "standin",
+    log_ratio: float = 1.0,
+    genres: int = 16,
+    seed: int = 42,
+    populate: bool = False,
+    only: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Выполняет все замеры для каждого объёма данных.
+
+    :param sizes: Количество фильмов (логов — sizes * log_ratio)
+    :param backend: "standin" — встроенные заменители, "live" — серверы из .env
+    :param only: Имена замеров для выполнения (по умолчанию — все)
+    :return: Метаданные запуска и сводки по ключам вида "имя@размер"
+    """
+    # Логи пишутся синхронно, чтобы log_search не запускал фоновый поток;
+    # кэш результатов и каталог в памяти подменили бы замеряемые SQL-пути
+    os.environ["MONGO_LOG_ASYNC"] = "0"
+    os.environ["SEARCH_CACHE"] = "0"
+    os.environ["SEARCH_BACKEND"] = "sql"
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        logs = int(size * log_ratio)
+        if backend == "live":
+            context = live_backend(size, logs, genres, seed, populate)
+        else:
+            context = standin_backend(size, logs, genres, seed)
+        with context:
+            for case in build_cases():
+                if only and case.name not in only:
+                    continue
+                results[f"{case.name}@{size}"] = measure(case, iterations)
+    return {
+        "meta": {
+            "backend": backend,
+            "sizes": list(sizes),
+            "iterations": iterations,
+            "log_ratio": log_ratio,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": datetime.now(UTC).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    for name, s in results.items():
+        print(
+            f"{name:32} p50 {s['p50_ms']:9.2f} ms | p95 {s['p95_ms']:9.2f} ms | "
+            f"p99 {s['p99_ms']:9.2f} ms | {s['throughput_ops']:10.1f} op/s | "
+            f"peak {s['peak_memory_kb']:9.1f} KiB"
+        )
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> int:
+    """
+    Печатает регрессии относительно базовых результатов; код возврата 1, если они есть.
+    """
+    regressions = find_regressions(
+        current["results"], baseline["results"], tolerance, COMPARE_METRICS
+    )
+    for line in regressions:
+        print(f"❌ Regression: {line}")
+    if not regressions:
+        print("✅ No regressions.")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Search and stats hot path benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks")
+    run_parser.add_argument("--sizes", default="1000,10000", help="Comma-separated film counts")
+    run_parser.add_argument("--iterations", type=int, default=30)
+    run_parser.add_argument("--backend", choices=("standin", "live"), default="standin")
+    run_parser.add_argument("--populate", action="store_true",
+                            help="live: truncate and reload MySQL/MongoDB data for every size")
+    run_parser.add_argument("--log-ratio", type=float, default=1.0, help="Search logs per film")
+    run_parser.add_argument("--genres", type=int, default=16)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--only", help="Comma-separated case names")
+    run_parser.add_argument("--output", help="Write JSON results to this file")
+    run_parser.add_argument("--baseline", help="Compare against a saved JSON result")
+    run_parser.add_argument("--tolerance", type=float, default=0.25)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two saved results")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        with open(args.baseline, encoding="utf-8") as f:
+            return compare(current, json.load(f), args.tolerance)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    only = [name.strip() for name in args.only.split(",")] if args.only else None
+    report = run(
+        sizes, args.iterations, args.backend, args.log_ratio,
+        args.genres, args.seed, args.populate, only,
+    )
+    print_results(report["results"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            return compare(report, json.load(f), args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
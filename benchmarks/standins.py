@@ -0,0 +1,556 @@
+"""
+Встроенные заменители MySQL и MongoDB для бенчмарков и тестов.
+
+- SQLite-соединение с интерфейсом pymysql (курсоры-контекстные менеджеры,
+  параметры %s, DictCursor-строки, ошибки pymysql) и схемой Sakila
+  (film, category, film_category, language);
+- коллекция MongoDB в памяти, поддерживающая операции, которые использует
+  final_movies: insert/bulk_write/find/aggregate/индексы.
+
+Заменители покрывают только нужное приложению подмножество возможностей
+и не претендуют на полную совместимость.
+"""
+import os
+import re
+import copy
+import json
+import random
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import pymysql
+import pymysql.cursors
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+
+from benchmarks import datagen
+
+SAKILA_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS language (
+        language_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS category (
+        category_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS film (
+        film_id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT,
+        release_year INTEGER,
+        language_id INTEGER NOT NULL DEFAULT 1,
+        rating TEXT DEFAULT 'G',
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS film_category (
+        film_id INTEGER NOT NULL,
+        category_id INTEGER NOT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (film_id, category_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_title ON film (title);
+    CREATE INDEX IF NOT EXISTS fk_film_category_category ON film_category (category_id);
+"""
+
+# Плейсхолдер pymysql (%s) вне строковых литералов; %% — экранированный процент;
+# <=> — сравнение MySQL, безопасное для NULL
+_PLACEHOLDER = re.compile(r"%s|%%|<=>|'(?:[^']|'')*'")
+
+
+def _translate_query(query: str) -> str:
+    """
+    Переводит запрос из стиля pymysql (%s) в стиль sqlite3 (?), а <=> — в IS.
+    """
+    def replace(match: "re.Match[str]") -> str:
+        token = match.group(0)
+        if token == "%s":
+            return "?"
+        if token == "%%":
+            return "%"
+        if token == "<=>":
+            return "IS"
+        return token
+
+    return _PLACEHOLDER.sub(replace, query)
+
+
+def _convert_error(error: sqlite3.Error) -> pymysql.MySQLError:
+    """
+    Преобразует ошибку sqlite3 в ближайшее исключение pymysql.
+    """
+    if isinstance(error, sqlite3.OperationalError) and "locked" in str(error):
+        return pymysql.OperationalError(str(error))
+    return pymysql.ProgrammingError(str(error))
+
+
+class SQLiteCursor:
+    """
+    Курсор SQLite с интерфейсом курсора pymysql.
+    """
+
+    def __init__(self, connection: "SQLiteConnection", dict_rows: bool) -> None:
+        self._cursor = connection.raw.cursor()
+        self._dict_rows = dict_rows
+        self.connection = connection
+
+    def __enter__(self) -> "SQLiteCursor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def description(self) -> Any:
+        return self._cursor.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def _row(self, row: Optional[tuple]) -> Any:
+        if row is None or not self._dict_rows:
+            return row
+        names = [column[0] for column in self._cursor.description]
+        return dict(zip(names, row))
+
+    def execute(self, query: str, params: Sequence[Any] = ()) -> int:
+        try:
+            self._cursor.execute(_translate_query(query), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _convert_error(e) from e
+        return self._cursor.rowcount
+
+    def executemany(self, query: str, rows: Iterable[Sequence[Any]]) -> int:
+        try:
+            self._cursor.executemany(_translate_query(query), [tuple(r) for r in rows])
+        except sqlite3.Error as e:
+            raise _convert_error(e) from e
+        return self._cursor.rowcount
+
+    def fetchone(self) -> Any:
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = 1) -> List[Any]:
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self) -> List[Any]:
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self) -> Iterator[Any]:
+        return (self._row(row) for row in self._cursor)
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    Соединение SQLite с интерфейсом соединения pymysql (autocommit, DictCursor по умолчанию).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.raw = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.raw.execute("PRAGMA journal_mode=WAL")
+        self.open = True
+
+    def cursor(self, cursor_class: Any = None) -> SQLiteCursor:
+        dict_rows = cursor_class is None or issubclass(cursor_class, pymysql.cursors.DictCursorMixin)
+        return SQLiteCursor(self, dict_rows)
+
+    def ping(self, reconnect: bool = False) -> None:
+        if not self.open:
+            raise pymysql.InterfaceError("Connection is closed")
+
+    def close(self) -> None:
+        self.open = False
+        self.raw.close()
+
+    def __enter__(self) -> "SQLiteConnection":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class SakilaStandIn:
+    """
+    Временная база SQLite со схемой Sakila, заполненная синтетическими данными datagen.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix="sakila-", suffix=".sqlite3")
+            os.close(handle)
+            self._owned = True
+        else:
+            self._owned = False
+        self.path = path
+        with self.connect() as connection:
+            connection.raw.executescript(SAKILA_SCHEMA)
+            connection.raw.execute("INSERT OR IGNORE INTO language (language_id, name) VALUES (1, 'English')")
+
+    def connect(self) -> SQLiteConnection:
+        """
+        Фабрика соединений (подходит для MySQLConnectionPool).
+        """
+        return SQLiteConnection(self.path)
+
+    def populate(
+        self, films: int, genres: int = 16, max_genres_per_film: int = 1, seed: int = 42
+    ) -> "SakilaStandIn":
+        """
+        Заполняет базу фильмами, жанрами и связями из datagen.
+        """
+        rng = random.Random(seed)
+        genre_rows = datagen.generate_genres(genres)
+        with self.connect() as connection:
+            raw = connection.raw
+            raw.execute("BEGIN")
+            raw.executemany("INSERT OR REPLACE INTO category (category_id, name) VALUES (?, ?)", genre_rows)
+            start_id = raw.execute("SELECT COALESCE(MAX(film_id), 0) + 1 FROM film").fetchone()[0]
+            raw.executemany(
+                "INSERT INTO film (film_id, title, description, release_year, rating) VALUES (?, ?, ?, ?, ?)",
+                datagen.generate_films(films, rng, start_id),
+            )
+            raw.executemany(
+                "INSERT INTO film_category (film_id, category_id) VALUES (?, ?)",
+                datagen.generate_film_categories(
+                    range(start_id, start_id + films),
+                    [genre_id for genre_id, _ in genre_rows],
+                    rng,
+                    max_genres_per_film,
+                ),
+            )
+            raw.execute("COMMIT")
+        return self
+
+    def install(self, max_size: int = 5) -> Any:
+        """
+        Подключает базу к final_movies.mysql_connector как общий пул соединений.
+
+        :return: Установленный пул
+        """
+        from final_movies import mysql_connector
+
+        pool = mysql_connector.MySQLConnectionPool(self.connect, min_size=0, max_size=max_size)
+        mysql_connector.set_connection_pool(pool)
+        mysql_connector.invalidate_genre_cache()
+        return pool
+
+    def close(self) -> None:
+        """
+        Удаляет временный файл базы.
+        """
+        if self._owned:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.unlink(self.path + suffix)
+
+
+# --- MongoDB ---
+
+
+def _get_field(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _matches(doc: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    for key, condition in (query or {}).items():
+        value = _get_field(doc, key)
+        if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+            for op, arg in condition.items():
+                if op == "$type":
+                    if arg == "string" and not isinstance(value, str):
+                        return False
+                elif op == "$in":
+                    if value not in arg:
+                        return False
+                elif value is None:
+                    return False
+                elif op == "$gte" and not value >= arg:
+                    return False
+                elif op == "$gt" and not value > arg:
+                    return False
+                elif op == "$lte" and not value <= arg:
+                    return False
+                elif op == "$lt" and not value < arg:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _sort_docs(docs: List[Dict[str, Any]], spec: Sequence[Tuple[str, int]]) -> List[Dict[str, Any]]:
+    for key, direction in reversed(list(spec)):
+        docs.sort(key=lambda d: (_get_field(d, key) is not None, _get_field(d, key)), reverse=direction < 0)
+    return docs
+
+
+def _evaluate(expression: Any, doc: Dict[str, Any]) -> Any:
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _get_field(doc, expression[1:])
+    if isinstance(expression, dict):
+        return {key: _evaluate(value, doc) for key, value in expression.items()}
+    return expression
+
+
+def _apply_update(doc: Dict[str, Any], update: Dict[str, Any], inserted: bool) -> None:
+    for op, fields in update.items():
+        for key, value in fields.items():
+            if op == "$set" or (op == "$setOnInsert" and inserted):
+                doc[key] = copy.deepcopy(value)
+            elif op == "$inc":
+                doc[key] = doc.get(key, 0) + value
+            elif op == "$max":
+                if key not in doc or doc[key] is None or value > doc[key]:
+                    doc[key] = value
+            elif op == "$min":
+                if key not in doc or doc[key] is None or value < doc[key]:
+                    doc[key] = value
+
+
+class _Result:
+    def __init__(self, **counts: Any) -> None:
+        self.__dict__.update(counts)
+
+
+class InMemoryCursor:
+    """
+    Курсор find() с поддержкой sort/limit/batch_size.
+    """
+
+    def __init__(self, docs: List[Dict[str, Any]]) -> None:
+        self._docs = docs
+        self._limit = 0
+
+    def sort(self, key: Any, direction: int = 1) -> "InMemoryCursor":
+        spec = [(key, direction)] if isinstance(key, str) else list(key)
+        _sort_docs(self._docs, spec)
+        return self
+
+    def limit(self, count: int) -> "InMemoryCursor":
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int) -> "InMemoryCursor":
+        return self
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        docs = self._docs[: self._limit] if self._limit else self._docs
+        return iter(copy.deepcopy(docs))
+
+
+class _InMemoryDatabase:
+    def command(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        return {"ok": 1}
+
+
+class InMemoryCollection:
+    """
+    Потокобезопасная коллекция MongoDB в памяти.
+    """
+
+    def __init__(self, name: str = "collection") -> None:
+        self.name = name
+        self.database = _InMemoryDatabase()
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[str, Any]] = {"_id_": {"key": [("_id", 1)]}}
+        self._lock = threading.RLock()
+
+    def with_options(self, **kwargs: Any) -> "InMemoryCollection":
+        return self
+
+    def insert_one(self, doc: Dict[str, Any]) -> _Result:
+        with self._lock:
+            doc.setdefault("_id", ObjectId())
+            self._docs[doc["_id"]] = copy.deepcopy(doc)
+            return _Result(inserted_id=doc["_id"])
+
+    def insert_many(self, docs: Iterable[Dict[str, Any]], ordered: bool = True) -> _Result:
+        ids = [self.insert_one(doc).inserted_id for doc in docs]
+        return _Result(inserted_ids=ids)
+
+    def _find_one_raw(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if set(query) == {"_id"} and not isinstance(query["_id"], dict):
+            return self._docs.get(query["_id"])
+        return next((doc for doc in self._docs.values() if _matches(doc, query)), None)
+
+    def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> _Result:
+        with self._lock:
+            doc = self._find_one_raw(query)
+            if doc is None:
+                if not upsert:
+                    return _Result(matched_count=0, modified_count=0, upserted_id=None)
+                doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+                doc.setdefault("_id", ObjectId())
+                _apply_update(doc, update, inserted=True)
+                self._docs[doc["_id"]] = doc
+                return _Result(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+            _apply_update(doc, update, inserted=False)
+            return _Result(matched_count=1, modified_count=1, upserted_id=None)
+
+    def replace_one(self, query: Dict[str, Any], replacement: Dict[str, Any], upsert: bool = False) -> _Result:
+        with self._lock:
+            doc = self._find_one_raw(query)
+            if doc is None and not upsert:
+                return _Result(matched_count=0, modified_count=0)
+            new_doc = copy.deepcopy(replacement)
+            new_doc["_id"] = doc["_id"] if doc is not None else query.get("_id", ObjectId())
+            if doc is not None:
+                del self._docs[doc["_id"]]
+            self._docs[new_doc["_id"]] = new_doc
+            return _Result(matched_count=int(doc is not None), modified_count=int(doc is not None))
+
+    def bulk_write(self, requests: Sequence[Any], ordered: bool = True) -> _Result:
+        modified = upserted = 0
+        for request in requests:
+            if isinstance(request, UpdateOne):
+                result = self.update_one(request._filter, request._doc, upsert=request._upsert)
+                upserted += int(result.upserted_id is not None)
+            elif isinstance(request, ReplaceOne):
+                result = self.replace_one(request._filter, request._doc, upsert=request._upsert)
+            else:
+                raise TypeError(f"Unsupported bulk operation: {request!r}")
+            modified += result.modified_count
+        return _Result(modified_count=modified, upserted_count=upserted)
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Any = None) -> InMemoryCursor:
+        with self._lock:
+            return InMemoryCursor([doc for doc in self._docs.values() if _matches(doc, query)])
+
+    def find_one(self, query: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return next(iter(self.find(query).limit(1)), None)
+
+    def count_documents(self, query: Dict[str, Any]) -> int:
+        with self._lock:
+            return sum(1 for doc in self._docs.values() if _matches(doc, query))
+
+    def estimated_document_count(self) -> int:
+        return len(self._docs)
+
+    def delete_many(self, query: Dict[str, Any]) -> _Result:
+        with self._lock:
+            doomed = [key for key, doc in self._docs.items() if _matches(doc, query)]
+            for key in doomed:
+                del self._docs[key]
+            return _Result(deleted_count=len(doomed))
+
+    def drop(self) -> None:
+        with self._lock:
+            self._docs.clear()
+
+    def aggregate(self, pipeline: Sequence[Dict[str, Any]], **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            docs = list(self._docs.values())
+        for stage in pipeline:
+            (op, arg), = stage.items()
+            if op == "$match":
+                docs = [doc for doc in docs if _matches(doc, arg)]
+            elif op == "$sort":
+                docs = _sort_docs(docs, list(arg.items()))
+            elif op == "$limit":
+                docs = docs[:arg]
+            elif op == "$group":
+                docs = self._group(docs, arg)
+            else:
+                raise NotImplementedError(f"Unsupported aggregation stage: {op}")
+        return iter(copy.deepcopy(docs))
+
+    @staticmethod
+    def _group(docs: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+        groups: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            group_id = _evaluate(spec["_id"], doc)
+            key = json.dumps(group_id, default=str)
+            group = groups.setdefault(key, {"_id": group_id})
+            for field, accumulator in spec.items():
+                if field == "_id":
+                    continue
+                (op, expression), = accumulator.items()
+                value = _evaluate(expression, doc)
+                if op == "$sum":
+                    group[field] = group.get(field, 0) + value
+                elif op == "$max":
+                    if field not in group or value > group[field]:
+                        group[field] = value
+                elif op == "$min":
+                    if field not in group or value < group[field]:
+                        group[field] = value
+                elif op == "$first":
+                    group.setdefault(field, value)
+                elif op == "$last":
+                    group[field] = value
+                else:
+                    raise NotImplementedError(f"Unsupported accumulator: {op}")
+        return list(groups.values())
+
+    def create_index(self, keys: Any, **kwargs: Any) -> str:
+        spec = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        name = kwargs.pop("name", None) or "_".join(f"{k}_{d}" for k, d in spec)
+        with self._lock:
+            self._indexes[name] = {"key": spec, **kwargs}
+        return name
+
+    def index_information(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy(self._indexes)
+
+    def drop_index(self, name: str) -> None:
+        with self._lock:
+            self._indexes.pop(name, None)
+
+
+def install_mongo_standin(
+    logs: Optional[InMemoryCollection] = None, rollups: Optional[InMemoryCollection] = None
+) -> Tuple[InMemoryCollection, InMemoryCollection]:
+    """
+    Подключает коллекции в памяти к final_movies.log_writer вместо MongoDB.
+
+    :return: Пара (коллекция логов, коллекция агрегатов)
+    """
+    from final_movies import log_writer
+
+    logs = logs or InMemoryCollection("search_logs")
+    rollups = rollups or InMemoryCollection("search_logs_rollup")
+    with log_writer._mongo_lock:
+        log_writer._collection = logs
+        log_writer._rollup_collection = rollups
+        log_writer._mongo_ready = True
+        log_writer._indexes_ready = False
+    return logs, rollups
+
+
+def populate_search_logs(
+    logs: InMemoryCollection,
+    rollups: Optional[InMemoryCollection],
+    count: int,
+    genres: int = 16,
+    seed: int = 42,
+) -> None:
+    """
+    Заполняет коллекции логов (и агрегатов) синтетическими документами datagen.
+    """
+    from final_movies.log_rollups import backfill_rollups
+
+    datagen.load_mongo(logs, count, datagen.generate_genres(genres), seed)
+    if rollups is not None:
+        backfill_rollups(logs, rollups)
+
+
+__all__ = [
+    "SakilaStandIn",
+    "SQLiteConnection",
+    "InMemoryCollection",
+    "install_mongo_standin",
+    "populate_search_logs",
+]
@@ -0,0 +1,133 @@
+"""
+Бенчмарк времени запуска: импорт final_movies.main и время до первого меню.
+
+Каждый замер выполняется в отдельном процессе. Адреса MySQL и MongoDB
+подменяются на недоступные, поэтому любой сетевой запрос при старте
+сразу проявится как рост времени (или ошибка).
+
+Пример:
+    python -m benchmarks.startup --runs 20 --output startup.json
+    python -m benchmarks.startup --baseline startup.json --tolerance 0.25
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Dict, List, Optional
+
+from benchmarks.stats import summarize, find_regressions
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MENU_MARKER = "=== Movie Finder ==="
+
+
+def isolated_env() -> Dict[str, str]:
+    """
+    Окружение для дочернего процесса: базы данных указывают на недоступный адрес
+    (TEST-NET-1), а .env не подхватывается из рабочего каталога.
+    """
+    env = dict(os.environ)
+    env.update(
+        MYSQL_HOST="192.0.2.1",
+        MONGO_URI="mongodb://192.0.2.1:27017/?serverSelectionTimeoutMS=500",
+        MONGO_DB="bench",
+        MONGO_COLLECTION="bench",
+        PYTHONUNBUFFERED="1",
+        PYTHONPATH=PROJECT_ROOT,
+    )
+    return env
+
+
+def measure_import(module: str = "final_movies.main", timeout: float = 30.0) -> float:
+    """
+    Замеряет время импорта модуля в чистом процессе (сек.).
+    """
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - started)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env=isolated_env(),
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def measure_first_menu(timeout: float = 30.0) -> float:
+    """
+    Замеряет время от запуска процесса до вывода главного меню (сек.).
+    """
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "final_movies.main"],
+        cwd=PROJECT_ROOT,
+        env=isolated_env(),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        for line in proc.stdout:
+            if MENU_MARKER in line:
+                elapsed = time.perf_counter() - started
+                break
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError("Main menu did not appear in time")
+        else:
+            raise RuntimeError("Process exited before showing the main menu")
+        proc.communicate("5\n", timeout=timeout)
+        return elapsed
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+def run(runs: int) -> Dict[str, Dict[str, float]]:
+    """
+    Выполняет все замеры запуска.
+    """
+    return {
+        "import_main": summarize([measure_import() for _ in range(runs)]),
+        "first_menu": summarize([measure_first_menu() for _ in range(runs)]),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against a saved JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run(args.runs)
+    for name, summary in results.items():
+        print(
+            f"{name:12} median {summary['median_ms']:8.1f} ms | "
+            f"p95 {summary['p95_ms']:8.1f} ms | min {summary['min_ms']:8.1f} ms"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
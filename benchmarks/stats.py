@@ -0,0 +1,56 @@
+"""
+Общие функции бенчмарков: сводка по замерам и поиск регрессий относительно базовых результатов.
+"""
+import statistics
+from typing import Any, Dict, List, Sequence
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    """
+    Перцентиль отсортированной выборки (ближайший ранг).
+    """
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Сводка по замерам (сек.): минимум, медиана, p50/p95/p99, максимум — в миллисекундах.
+    """
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def find_regressions(
+    current: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+    metrics: Sequence[str] = ("median_ms",),
+) -> List[str]:
+    """
+    Сравнивает метрики с базовыми и возвращает описания регрессий.
+    Замеры, которых нет в базовых результатах, пропускаются.
+    """
+    regressions = []
+    for name, summary in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in metrics:
+            if metric not in summary or metric not in base:
+                continue
+            limit = base[metric] * (1 + tolerance)
+            if summary[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {summary[metric]:.2f} > {limit:.2f} "
+                    f"(baseline {base[metric]:.2f})"
+                )
+    return regressions
@@ -1,19 +1,21 @@
-from typing import Dict, Tuple
-from dotenv import load_dotenv
+from typing import Dict, Optional, Tuple
 from final_movies.mysql_connector import (
-    search_movies,  # Основная функция поиска фильмов
-    get_all_genres,  # Получение всех жанров из базы данных
+    search_movies_paged,  # Постраничный (ленивый) поиск фильмов
+    get_genre_catalog,  # Каталог жанров с годами и количеством фильмов
 )
 
 # Логирование поискового запроса
 from final_movies.log_writer import log_search
 
+# Подсказки по похожим названиям при опечатках
+from final_movies.fuzzy_search import suggest_titles
+
+# Автодополнение названий по Tab в поле ввода ключевого слова
+from final_movies.autocomplete import title_completion
+
 # Функция постраничного вывода результатов
 from final_movies.formatter import paginate_results, display_ratings_table, display_genre_table
 
-# Загружаем переменные окружения
-load_dotenv()
-
 # Словарь с расшифровкой кодов MPAA
 available_ratings: Dict[str, str] = {
      "G": "👶 General Audiences – All ages admitted",
@@ -51,12 +53,12 @@ def select_genre() -> Tuple[int, Tuple[int, int], str]:
     :rtype: Tuple[int, Tuple[int, int], str]
 
     """
-    # Получаем список всех жанров из базы данных
-    genres = get_all_genres()
+    # Получаем каталог жанров (годы и количество фильмов — одним запросом)
+    genres = get_genre_catalog()
 
     # Формируем и отображаем таблицу жанров, а также получаем вспомогательные данные
     # Возвращаемый словарь: {genre_id: (min_year, max_year, genre_name)}
-    genre_data = display_genre_table(genres)  # вынесено всё отображение и подсчёты
+    genre_data = display_genre_table(genres)  # вынесено всё отображение
 
     # Извлекаем список допустимых идентификаторов жанров
     valid_ids = genre_data.keys()
@@ -105,29 +107,58 @@ def get_year_range(min_year: int, max_year: int) -> Tuple[int, int]:
         print("Invalid year range. Try again.")
 
 
+def select_suggestion(keyword: str) -> Optional[str]:
+    """
+    Предлагает похожие названия для ключевого слова, по которому ничего не найдено,
+    и возвращает выбранное пользователем (None — подсказок нет или выбор пропущен).
+
+    :param keyword: Ключевое слово, по которому ничего не найдено
+    """
+    suggestions = suggest_titles(keyword)
+    if not suggestions:
+        return None
+
+    print("💡 Did you mean:")
+    for idx, (title, score) in enumerate(suggestions, 1):
+        print(f"{idx}. {title} ({score:.0%} match)")
+
+    choice = get_user_input("Select a suggestion by number (Enter to skip): ")
+    if choice.isdigit() and 1 <= int(choice) <= len(suggestions):
+        return suggestions[int(choice) - 1][0]
+    return None
+
+
 def search_by_keyword_workflow() -> None:
     """
     Запрашивает ключевое слово у пользователя и выполняет поиск фильмов.
 
     После поиска записывает запрос и отображает результаты с пагинацией.
-    Если ничего не найдено — выводит соответствующее сообщение.
+    Если ничего не найдено — выводит соответствующее сообщение и предлагает
+    похожие названия (на случай опечатки); выбранное название ищется сразу.
     """
-    keyword = get_user_input("Enter keyword to search for movies: ")
+    # Если терминал поддерживает readline, названия дополняются по Tab
+    with title_completion() as completion:
+        hint = " (Tab to autocomplete titles)" if completion else ""
+        keyword = get_user_input(f"Enter keyword to search for movies{hint}: ")
 
     # Проверка: если пользователь не ввёл ничего (или только пробелы), завершаем функцию
     if not keyword:
         print("⚠️ Keyword cannot be empty.")
         return
 
-    # Поиск по ключевому слову
-    movies = search_movies(keyword=keyword)
+    while True:
+        # Поиск по ключевому слову
+        movies = search_movies_paged(keyword=keyword)
 
-    # Логирование поискового запроса
-    log_search("keyword", {"keyword": keyword.lower()}, len(movies))
+        # Логирование поискового запроса
+        log_search("keyword", {"keyword": keyword.lower()}, len(movies))
 
-    if not movies:
+        if movies:
+            break
         print("🔍 Nothing found for your request.")
-        return
+        keyword = select_suggestion(keyword)
+        if keyword is None:
+            return
 
     # Отображение результатов с постраничной навигацией
     paginate_results(movies)
@@ -147,7 +178,7 @@ def search_by_genre_and_year_workflow() -> None:
     year_from, year_to = get_year_range(min_year, max_year)
 
     # Поиск фильмов по параметрам
-    movies = search_movies(genre_id=genre_id, year_from=year_from, year_to=year_to)
+    movies = search_movies_paged(genre_id=genre_id, year_from=year_from, year_to=year_to)
 
     # Логирование запроса
     log_search(
@@ -211,7 +242,7 @@ def search_by_rating_workflow() -> None:
         return
 
     # Выполняем поиск фильмов с выбранным рейтингом
-    movies = search_movies(rating=selected_rating)
+    movies = search_movies_paged(rating=selected_rating)
 
     # Записываем информацию о поиске в лог-файл
     log_search("rating", {"rating": selected_rating}, len(movies))
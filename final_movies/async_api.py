@@ -0,0 +1,180 @@
+"""
+Асинхронный API поиска и логирования для сервисов на asyncio.
+
+Драйверы pymysql и pymongo блокирующие, поэтому у каждого хранилища свой пул
+исполнителей (AsyncStorePool): вызовы MySQL выполняются в потоках пула MySQL,
+число которых равно размеру пула соединений (поток никогда не ждёт соединение),
+а записи в MongoDB — в отдельном пуле размера MONGO_ASYNC_WORKERS. Медленная запись
+лога не занимает потоки поиска, и поиск с записью лога выполняются одновременно.
+
+AsyncSearchSession выполняет поиск параллельно с записью лога предыдущего поиска:
+    async with AsyncSearchSession() as session:
+        rows = await session.search("rating", rating="PG")
+        rows = await session.search("keyword", keyword="academy")
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from final_movies import log_writer, mysql_connector
+from final_movies.config import env_int
+from final_movies.movie_row import MovieRow
+
+
+class AsyncStorePool:
+    """
+    Ограниченный пул потоков одного хранилища с awaitable-интерфейсом.
+    """
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=f"async-{name}")
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0}
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Выполняет блокирующую функцию в потоке пула и возвращает её результат.
+        """
+        with self._lock:
+            self._stats["submitted"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+        except BaseException:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        with self._lock:
+            self._stats["completed"] += 1
+        return result
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["in_flight"] = snapshot["submitted"] - snapshot["completed"] - snapshot["failed"]
+        snapshot["max_workers"] = self.max_workers
+        return snapshot
+
+
+_mysql_pool: Optional[AsyncStorePool] = None
+_mongo_pool: Optional[AsyncStorePool] = None
+_pools_lock = threading.Lock()
+
+
+def get_mysql_async_pool() -> AsyncStorePool:
+    """
+    Общий пул асинхронных вызовов MySQL (по одному потоку на соединение пула).
+    """
+    global _mysql_pool
+    if _mysql_pool is None:
+        with _pools_lock:
+            if _mysql_pool is None:
+                _mysql_pool = AsyncStorePool("mysql", mysql_connector.get_connection_pool().max_size)
+    return _mysql_pool
+
+
+def get_mongo_async_pool() -> AsyncStorePool:
+    """
+    Общий пул асинхронных записей в MongoDB (MONGO_ASYNC_WORKERS потоков, по умолчанию 4).
+    """
+    global _mongo_pool
+    if _mongo_pool is None:
+        with _pools_lock:
+            if _mongo_pool is None:
+                _mongo_pool = AsyncStorePool("mongo", env_int("MONGO_ASYNC_WORKERS", 4))
+    return _mongo_pool
+
+
+def close_async_pools() -> None:
+    """
+    Дожидается выполняющихся вызовов и закрывает пулы (следующее обращение создаст новые).
+    """
+    global _mysql_pool, _mongo_pool
+    with _pools_lock:
+        pools, _mysql_pool, _mongo_pool = (_mysql_pool, _mongo_pool), None, None
+    for pool in pools:
+        if pool is not None:
+            pool.close()
+
+
+def get_async_pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {
+        pool.name: pool.stats() for pool in (_mysql_pool, _mongo_pool) if pool is not None
+    }
+
+
+async def search_movies(**filters: Any) -> List[MovieRow]:
+    """
+    Асинхронный search_movies (те же параметры и результат).
+    """
+    return await get_mysql_async_pool().run(mysql_connector.search_movies, **filters)
+
+
+async def search_movies_many(criteria: Sequence[Dict[str, Any]]) -> List[List[MovieRow]]:
+    """
+    Асинхронный search_movies_many.
+    """
+    return await get_mysql_async_pool().run(mysql_connector.search_movies_many, criteria)
+
+
+async def get_genre_catalog() -> List[Dict[str, Any]]:
+    return await get_mysql_async_pool().run(mysql_connector.get_genre_catalog)
+
+
+async def get_all_genres() -> List[Dict[str, Any]]:
+    return await get_mysql_async_pool().run(mysql_connector.get_all_genres)
+
+
+async def log_search(search_type: str, params: Dict[str, Any], results_count: int) -> bool:
+    """
+    Записывает поисковый лог в MongoDB; завершается, когда запись сохранена.
+
+    :return: True, если запись сохранена (без MongoDB — False, как пропуск в log_search)
+    """
+    entry = log_writer.build_log_entry(search_type, params, results_count)
+    return await get_mongo_async_pool().run(log_writer.write_log_entry, entry)
+
+
+class AsyncSearchSession:
+    """
+    Последовательность поисков, в которой запись лога каждого поиска выполняется
+    одновременно со следующим поиском, а не перед ним.
+    """
+
+    def __init__(self) -> None:
+        self._pending_log: Optional[asyncio.Task] = None
+
+    async def search(self, search_type: str, **filters: Any) -> List[MovieRow]:
+        """
+        Выполняет поиск и ставит запись его лога в фон; лог предыдущего поиска
+        дописывается параллельно с этим поиском.
+        """
+        rows, _ = await asyncio.gather(search_movies(**filters), self.flush())
+        params = {name: value for name, value in filters.items() if value is not None}
+        self._pending_log = asyncio.create_task(log_search(search_type, params, len(rows)))
+        return rows
+
+    async def flush(self) -> None:
+        """
+        Дожидается записи лога последнего поиска (ошибка записи не прерывает сессию).
+        """
+        pending, self._pending_log = self._pending_log, None
+        if pending is not None:
+            try:
+                await pending
+            except Exception as e:
+                logging.error(f"❌ Failed to save log entry: {e}")
+
+    async def __aenter__(self) -> "AsyncSearchSession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.flush()
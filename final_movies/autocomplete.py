@@ -0,0 +1,169 @@
+"""
+Автодополнение названий фильмов по префиксу.
+
+Названия хранятся в двух отсортированных массивах ключей в нижнем регистре:
+сами названия и «хвосты» названий, начинающиеся с каждого следующего слова
+(чтобы «dino» дополнялось до «ACADEMY DINOSAUR»). Диапазон ключей с заданным
+префиксом находится двоичным поиском, поэтому ответ не зависит от размера каталога
+и занимает доли миллисекунды. Сначала возвращаются названия, начинающиеся
+с префикса, затем — содержащие слово с таким началом.
+
+API (complete_titles) не зависит от терминала; title_completion подключает
+автодополнение по Tab к input(), если доступен модуль readline и ввод идёт с терминала.
+"""
+import re
+import sys
+import bisect
+import logging
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pymysql
+
+from final_movies.change_tracker import poll_changes
+from final_movies.mysql_connector import get_film_titles
+
+_WORD_START = re.compile(r"\s+(?=\S)")
+
+
+class TitleCompleter:
+    """
+    Неизменяемый индекс префиксов по набору уникальных названий.
+    """
+
+    def __init__(self, titles: Iterable[str]) -> None:
+        self.titles: List[str] = sorted(set(titles), key=str.lower)
+        self._title_keys = [title.lower() for title in self.titles]
+        words = []
+        for title_id, key in enumerate(self._title_keys):
+            for match in _WORD_START.finditer(key):
+                words.append((key[match.end():], title_id))
+        words.sort()
+        self._word_keys = [key for key, _ in words]
+        self._word_ids = array("I", (title_id for _, title_id in words))
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Возвращает до limit названий, начинающихся с prefix (без учёта регистра),
+        а затем названий, где с prefix начинается одно из следующих слов.
+        """
+        prefix = prefix.lstrip().lower()
+        if not prefix or limit <= 0:
+            return []
+
+        start = bisect.bisect_left(self._title_keys, prefix)
+        seen = []
+        for title_id in range(start, min(start + limit, len(self._title_keys))):
+            if not self._title_keys[title_id].startswith(prefix):
+                break
+            seen.append(title_id)
+
+        if len(seen) < limit:
+            found = set(seen)
+            position = bisect.bisect_left(self._word_keys, prefix)
+            while position < len(self._word_keys) and len(seen) < limit:
+                if not self._word_keys[position].startswith(prefix):
+                    break
+                title_id = self._word_ids[position]
+                if title_id not in found:
+                    found.add(title_id)
+                    seen.append(title_id)
+                position += 1
+        return [self.titles[title_id] for title_id in seen]
+
+
+_completer: Optional[TitleCompleter] = None
+_completer_lock = threading.Lock()
+
+
+def get_title_completer() -> TitleCompleter:
+    """
+    Возвращает общий индекс автодополнения (строится при первом обращении
+    по get_film_titles). Ошибки MySQL не перехватываются.
+    """
+    global _completer
+    poll_changes()
+    if _completer is None:
+        with _completer_lock:
+            if _completer is None:
+                _completer = TitleCompleter(get_film_titles())
+                logging.info(f"Title autocomplete index built: {len(_completer)} titles")
+    return _completer
+
+
+def invalidate_title_completer() -> None:
+    global _completer
+    with _completer_lock:
+        _completer = None
+
+
+def on_title_source_change(changes: List[Any], current: Dict[str, Any]) -> None:
+    """
+    Подписчик трекера изменений: индекс перестраивается при следующем обращении.
+    """
+    invalidate_title_completer()
+
+
+def complete_titles(prefix: str, limit: int = 10) -> List[str]:
+    """
+    Названия фильмов, дополняющие prefix. Если индекс недоступен, дополнений нет.
+    """
+    try:
+        return get_title_completer().complete(prefix, limit)
+    except (pymysql.MySQLError, ConnectionError) as e:
+        logging.warning(f"Title autocomplete unavailable: {e}")
+        return []
+
+
+def _load_readline() -> Any:
+    """
+    Модуль readline, если ввод идёт с терминала и модуль доступен (его нет, например, в Windows).
+    """
+    if not sys.stdin.isatty():
+        return None
+    try:
+        import readline
+    except ImportError:
+        return None
+    return readline
+
+
+@contextmanager
+def title_completion(limit: int = 20) -> Iterator[bool]:
+    """
+    На время блока включает дополнение названий по Tab в input().
+    Введённая строка целиком считается префиксом (названия содержат пробелы).
+
+    :return: (значение блока) True, если автодополнение включено; без поддержки
+             терминала блок выполняется как есть и получает False
+    """
+    readline = _load_readline()
+    if readline is None:
+        yield False
+        return
+
+    matches: List[str] = []
+
+    def completer(text: str, state: int) -> Optional[str]:
+        if state == 0:
+            matches[:] = complete_titles(text, limit)
+        return matches[state] if state < len(matches) else None
+
+    previous_completer = readline.get_completer()
+    previous_delims = readline.get_completer_delims()
+    readline.set_completer(completer)
+    readline.set_completer_delims("")
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")  # readline на базе libedit (macOS)
+    else:
+        readline.parse_and_bind("tab: complete")
+    try:
+        yield True
+    finally:
+        readline.set_completer(previous_completer)
+        readline.set_completer_delims(previous_delims)
@@ -0,0 +1,258 @@
+"""
+Прогрев кэшей после запуска по истории популярных запросов.
+
+Из коллекции агрегатов (см. log_rollups) берутся ТОП-N поисков в том виде,
+в каком их записал log_search, и выполняются заранее в небольшом пуле потоков:
+первая страница и общее количество попадают в кэш поиска (см. search_cache) под теми же
+ключами, что запрашивают меню и HTTP API, а MySQL — в тёплый буферный пул.
+Перед этим загружаются каталог жанров и, при SEARCH_BACKEND=memory, каталог в памяти.
+
+Число потоков ограничено (и всегда оставляет интерактивным запросам хотя бы одно
+соединение пула), а общее время — бюджетом: запросы, не начатые до его истечения,
+пропускаются.
+"""
+import sys
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pymysql
+from pymongo.errors import PyMongoError
+
+from final_movies.config import env_flag, env_float, env_int
+from final_movies.log_rollups import top_rollups
+from final_movies.log_writer import get_rollup_collection
+from final_movies.mysql_connector import (
+    get_catalog_engine,
+    get_connection_pool,
+    get_genre_catalog,
+    is_catalog_engine_enabled,
+    search_movies_page,
+)
+from final_movies.formatter import print_pretty_table
+
+logger = logging.getLogger(__name__)
+
+# Размеры первой страницы: меню (search_movies_paged) и HTTP API (/search) по умолчанию
+WARMUP_PAGE_SIZES = (10, 20)
+
+
+@dataclass
+class WarmupReport:
+    """
+    Итог прогрева: выполненные, пропущенные и неудавшиеся запросы.
+    """
+
+    warmed: List[Dict[str, Any]] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: List[Dict[str, Any]] = field(default_factory=list)
+    prefetched: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"warmed {len(self.warmed)} searches, skipped {len(self.skipped)}, "
+            f"failed {len(self.failed)}, prefetched {', '.join(self.prefetched) or 'nothing'} "
+            f"in {self.elapsed:.2f}s"
+        )
+
+
+def search_filters(search_type: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Преобразует параметры из лога поиска в фильтры search_movies_page
+    (None — тип поиска не поддерживается или параметры неполные).
+    """
+    if search_type == "keyword" and params.get("keyword"):
+        return {"keyword": params["keyword"]}
+    if search_type == "genre_year" and params.get("genre_id") is not None:
+        return {
+            "genre_id": params["genre_id"],
+            "year_from": params.get("year_from"),
+            "year_to": params.get("year_to"),
+        }
+    if search_type == "rating" and params.get("rating"):
+        return {"rating": params["rating"]}
+    return None
+
+
+def popular_searches(limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Возвращает до limit самых частых поисков как (подпись, фильтры search_movies_page).
+    Без MongoDB список пуст.
+    """
+    # log_stats показывает отчёт прогрева, поэтому импортируется лениво
+    from final_movies.log_stats import format_search_label
+
+    rollups = get_rollup_collection()
+    if rollups is None:
+        return []
+    searches = []
+    for entry in top_rollups(rollups, limit):
+        filters = search_filters(entry.get("search_type"), entry.get("params") or {})
+        if filters is not None:
+            searches.append((format_search_label(entry["search_type"], entry["params"]), filters))
+    return searches
+
+
+def _prefetch(report: WarmupReport) -> None:
+    """
+    Загружает каталог жанров и каталог в памяти (если он выбран).
+    """
+    steps = [("genres", get_genre_catalog)]
+    if is_catalog_engine_enabled():
+        steps.insert(0, ("catalog", get_catalog_engine))
+    for name, step in steps:
+        try:
+            step()
+            report.prefetched.append(name)
+        except (pymysql.MySQLError, ConnectionError) as e:
+            report.failed.append({"search": name, "error": str(e)})
+
+
+def _worker_limit(concurrency: int) -> int:
+    """
+    Ограничивает число потоков так, чтобы в пуле MySQL оставалось свободное соединение.
+    """
+    return max(1, min(concurrency, get_connection_pool().max_size - 1))
+
+
+def warm_caches(
+    top: int = 20,
+    concurrency: int = 2,
+    budget: float = 10.0,
+    searches: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+) -> WarmupReport:
+    """
+    Выполняет прогрев и возвращает отчёт.
+
+    :param top: Сколько популярных запросов прогревать
+    :param concurrency: Максимальное число одновременных запросов
+    :param budget: Бюджет времени (сек.); запросы, не начатые в срок, пропускаются
+    :param searches: Готовый список (подпись, фильтры) вместо чтения из MongoDB
+    """
+    started = time.perf_counter()
+    deadline = started + budget
+    report = WarmupReport()
+    lock = threading.Lock()
+
+    _prefetch(report)
+    if searches is None:
+        try:
+            searches = popular_searches(top)
+        except (PyMongoError, EnvironmentError) as e:
+            logger.warning(f"Warm-up could not read popular searches: {e}")
+            searches = []
+
+    def warm(label: str, filters: Dict[str, Any]) -> None:
+        if time.perf_counter() >= deadline:
+            with lock:
+                report.skipped.append(label)
+            return
+        begin = time.perf_counter()
+        try:
+            # Количество считается один раз: его ключ не зависит от размера страницы.
+            # Ошибки пробрасываются, чтобы неудачный прогрев не выглядел как пустой результат
+            for page_size in WARMUP_PAGE_SIZES:
+                page = search_movies_page(
+                    **filters, page_size=page_size, with_total=True, raise_errors=True
+                )
+        except (pymysql.MySQLError, ConnectionError) as e:
+            with lock:
+                report.failed.append({"search": label, "error": str(e)})
+            return
+        with lock:
+            report.warmed.append(
+                {"search": label, "rows": page.total, "ms": (time.perf_counter() - begin) * 1000}
+            )
+
+    if searches:
+        with ThreadPoolExecutor(
+            max_workers=_worker_limit(concurrency), thread_name_prefix="cache-warmup"
+        ) as executor:
+            for label, filters in searches[:top]:
+                executor.submit(warm, label, filters)
+
+    report.elapsed = time.perf_counter() - started
+    logger.info(f"Cache warm-up: {report.summary()}")
+    return report
+
+
+_last_report: Optional[WarmupReport] = None
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def is_warmup_enabled() -> bool:
+    """
+    Прогрев при запуске включается настройкой CACHE_WARMUP=1.
+    """
+    return env_flag("CACHE_WARMUP", False)
+
+
+def start_cache_warmup() -> Optional[threading.Thread]:
+    """
+    Запускает прогрев в фоновом потоке (параметры — CACHE_WARMUP_TOP,
+    CACHE_WARMUP_CONCURRENCY, CACHE_WARMUP_BUDGET). Меню доступно сразу,
+    не дожидаясь окончания прогрева.
+
+    :return: Поток прогрева или None, если прогрев выключен или уже запущен
+    """
+    global _warmup_thread
+    if not is_warmup_enabled() or _warmup_thread is not None:
+        return None
+
+    def run() -> None:
+        global _last_report
+        try:
+            _last_report = warm_caches(
+                top=env_int("CACHE_WARMUP_TOP", 20),
+                concurrency=env_int("CACHE_WARMUP_CONCURRENCY", 2),
+                budget=env_float("CACHE_WARMUP_BUDGET", 10.0),
+            )
+        except Exception as e:
+            logger.error(f"❌ Cache warm-up failed: {e}")
+
+    _warmup_thread = threading.Thread(target=run, name="cache-warmup", daemon=True)
+    _warmup_thread.start()
+    return _warmup_thread
+
+
+def get_last_warmup_report() -> Optional[WarmupReport]:
+    """
+    Отчёт последнего фонового прогрева (None, если он не выполнялся или ещё идёт).
+    """
+    return _last_report
+
+
+def print_report(report: WarmupReport) -> None:
+    """
+    Выводит отчёт о прогреве таблицей.
+    """
+    rows = [[w["search"], w["rows"], f"{w['ms']:.1f}"] for w in report.warmed]
+    rows += [[label, "-", "skipped (budget)"] for label in report.skipped]
+    rows += [[f["search"], "-", f"failed: {f['error']}"] for f in report.failed]
+    if rows:
+        print_pretty_table(["Search", "Rows", "Time, ms"], rows, title="=== Cache Warm-up ===")
+    print(f"✅ Cache warm-up: {report.summary()}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки: python -m final_movies.cache_warmup --top 20
+    """
+    parser = argparse.ArgumentParser(description="Warm search caches from popular searches")
+    parser.add_argument("--top", type=int, default=env_int("CACHE_WARMUP_TOP", 20))
+    parser.add_argument("--concurrency", type=int, default=env_int("CACHE_WARMUP_CONCURRENCY", 2))
+    parser.add_argument("--budget", type=float, default=env_float("CACHE_WARMUP_BUDGET", 10.0))
+    args = parser.parse_args(argv)
+
+    report = warm_caches(top=args.top, concurrency=args.concurrency, budget=args.budget)
+    print_report(report)
+    return 1 if report.failed and not report.warmed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
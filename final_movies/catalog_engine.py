@@ -0,0 +1,471 @@
+"""
+Колоночный каталог фильмов в памяти для поиска без обращений к MySQL.
+
+Каталог (film + film_category) загружается один раз и хранится компактно:
+- строки отсортированы по (release_year, title, film_id) — как ORDER BY в search_movies,
+  поэтому диапазон лет превращается в непрерывный отрезок строк;
+- год — array('h'), рейтинг — код в array('B'), film_id — array('I');
+- названия — один буфер UTF-8 с разделителем и массив смещений
+  (и такой же буфер названий в нижнем регистре для поиска по ключевому слову);
+- принадлежность жанру и рейтингу — битовые множества (int) по номерам строк.
+
+Столбцы могут быть как массивами в памяти, так и memoryview поверх снимка
+на диске (см. catalog_snapshot). Фильтры search_movies выполняются побитовыми
+операциями над множествами, а результат материализуется только для выбранных строк.
+"""
+import re
+import bisect
+import threading
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from final_movies.movie_row import MovieRow
+from final_movies.query_builder import GenreFilter, RatingFilter, genre_values, rating_values, year_value
+
+# Год NULL хранится как значение меньше любого реального (NULL сортируется первым, как в MySQL)
+NULL_YEAR = -1
+# Разделитель названий в буфере: нулевой байт не встречается внутри символов UTF-8
+TITLE_SEPARATOR = b"\x00"
+
+
+def _bits_from_indexes(indexes: Iterable[int], size: int) -> int:
+    """
+    Строит битовое множество из номеров строк через bytearray (без O(n) сдвигов на каждый бит).
+    """
+    buffer = bytearray((size + 7) // 8)
+    for index in indexes:
+        buffer[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _like_to_regex(pattern: str) -> "re.Pattern[str]":
+    """
+    Переводит шаблон SQL LIKE (% и _, экранирование обратной косой чертой) в регулярное выражение.
+    """
+    parts = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.DOTALL)
+
+
+def _pack_titles(titles: Iterable[str]) -> Tuple[bytes, array]:
+    """
+    Склеивает названия в буфер UTF-8 с разделителями и возвращает его вместе со смещениями.
+    """
+    offsets = array("I", [0])
+    chunks = []
+    for title in titles:
+        encoded = title.encode("utf-8") + TITLE_SEPARATOR
+        chunks.append(encoded)
+        offsets.append(offsets[-1] + len(encoded))
+    return b"".join(chunks), offsets
+
+
+@dataclass
+class CatalogData:
+    """
+    Столбцы каталога. Буферы названий — bytes или mmap; смещения названий
+    отсчитываются от titles_base / lower_base внутри буфера.
+    """
+
+    film_ids: Sequence[int]
+    years: Sequence[int]
+    rating_codes: Sequence[int]
+    ratings: List[Optional[str]]
+    titles: Any
+    title_offsets: Sequence[int]
+    lower_titles: Any
+    lower_offsets: Sequence[int]
+    genre_bits: Dict[int, int]
+    rating_bits: List[int]
+    genre_names: Dict[int, str] = field(default_factory=dict)
+    watermark: Optional[str] = None
+    titles_base: int = 0
+    lower_base: int = 0
+
+
+class CatalogEngine:
+    """
+    Неизменяемый снимок каталога с поиском по фильтрам search_movies.
+    """
+
+    def __init__(self, data: CatalogData) -> None:
+        self.data = data
+        self.film_ids = data.film_ids
+        self.years = data.years
+        self.rating_codes = data.rating_codes
+        self.ratings = data.ratings
+        self.genre_bits = data.genre_bits
+        self.rating_bits = data.rating_bits
+        self.genre_names = data.genre_names
+        self.watermark = data.watermark
+        self._titles, self._title_offsets, self._titles_base = (
+            data.titles, data.title_offsets, data.titles_base
+        )
+        self._lower, self._lower_offsets, self._lower_base = (
+            data.lower_titles, data.lower_offsets, data.lower_base
+        )
+        self.all_bits = (1 << len(data.film_ids)) - 1
+        self._duplicates: Optional[Set[int]] = None
+        self._duplicates_lock = threading.Lock()
+
+    @classmethod
+    def from_rows(
+        cls,
+        films: Iterable[Sequence[Any]],
+        links: Iterable[Sequence[Any]],
+        genre_names: Optional[Dict[int, str]] = None,
+        watermark: Optional[str] = None,
+    ) -> "CatalogEngine":
+        """
+        Строит каталог из строк (film_id, title, release_year, rating),
+        связей (film_id, category_id) и названий жанров (category_id -> name).
+        """
+        rows = sorted(
+            (
+                (NULL_YEAR if year is None else int(year), title or "", rating, int(film_id))
+                for film_id, title, year, rating in films
+            ),
+            key=lambda row: (row[0], row[1], row[3]),
+        )
+        ratings: List[Optional[str]] = []
+        rating_index: Dict[Optional[str], int] = {}
+        film_ids, years, rating_codes = array("I"), array("h"), array("B")
+        rating_rows: List[List[int]] = []
+        for index, (year, _, rating, film_id) in enumerate(rows):
+            if rating not in rating_index:
+                rating_index[rating] = len(ratings)
+                ratings.append(rating)
+                rating_rows.append([])
+            film_ids.append(film_id)
+            years.append(year)
+            rating_codes.append(rating_index[rating])
+            rating_rows[rating_index[rating]].append(index)
+
+        position = {film_id: index for index, film_id in enumerate(film_ids)}
+        genre_rows: Dict[int, List[int]] = {}
+        for film_id, category_id in links:
+            index = position.get(int(film_id))
+            if index is not None:
+                genre_rows.setdefault(int(category_id), []).append(index)
+
+        titles, title_offsets = _pack_titles(row[1] for row in rows)
+        lower_titles, lower_offsets = _pack_titles(row[1].lower() for row in rows)
+        return cls(CatalogData(
+            film_ids=film_ids,
+            years=years,
+            rating_codes=rating_codes,
+            ratings=ratings,
+            titles=titles,
+            title_offsets=title_offsets,
+            lower_titles=lower_titles,
+            lower_offsets=lower_offsets,
+            genre_bits={
+                genre_id: _bits_from_indexes(indexes, len(film_ids))
+                for genre_id, indexes in genre_rows.items()
+            },
+            rating_bits=[_bits_from_indexes(indexes, len(film_ids)) for indexes in rating_rows],
+            genre_names=dict(genre_names or {}),
+            watermark=watermark,
+        ))
+
+    def __len__(self) -> int:
+        return len(self.film_ids)
+
+    def title(self, index: int) -> str:
+        base, offsets = self._titles_base, self._title_offsets
+        return self._titles[base + offsets[index]:base + offsets[index + 1] - 1].decode("utf-8")
+
+    def row(self, index: int) -> MovieRow:
+        """
+        Строка результата в формате search_movies.
+        """
+        year = self.years[index]
+        return MovieRow(
+            self.title(index),
+            None if year == NULL_YEAR else year,
+            self.ratings[self.rating_codes[index]],
+        )
+
+    def key(self, index: int) -> Tuple[Optional[int], str, int]:
+        """
+        Ключ keyset-пагинации строки: (release_year, title, film_id).
+        """
+        year = self.years[index]
+        return None if year == NULL_YEAR else year, self.title(index), self.film_ids[index]
+
+    def rows(self) -> Iterator[Tuple[int, str, Optional[int], Optional[str]]]:
+        """
+        Строки каталога (film_id, title, release_year, rating) — для пересборки без запроса к MySQL.
+        """
+        for index in range(len(self)):
+            year = self.years[index]
+            yield (
+                self.film_ids[index],
+                self.title(index),
+                None if year == NULL_YEAR else year,
+                self.ratings[self.rating_codes[index]],
+            )
+
+    def links(self) -> Iterator[Tuple[int, int]]:
+        """
+        Связи (film_id, category_id), восстановленные из битовых множеств жанров.
+        """
+        for genre_id, bits in self.genre_bits.items():
+            for index in self._iter_indexes(bits):
+                yield self.film_ids[index], genre_id
+
+    def genre_catalog(self) -> List[Dict[str, Any]]:
+        """
+        Каталог жанров в формате get_genre_catalog: жанры с фильмами,
+        годы выпуска и количество фильмов, по алфавиту.
+        """
+        # Строки с годом NULL идут первыми — MIN/MAX в SQL их не учитывают
+        dated = self.all_bits ^ ((1 << bisect.bisect_right(self.years, NULL_YEAR)) - 1)
+        catalog = []
+        for genre_id, bits in self.genre_bits.items():
+            if not bits or genre_id not in self.genre_names:
+                continue
+            with_year = bits & dated
+            catalog.append({
+                "genre_id": genre_id,
+                "name": self.genre_names[genre_id],
+                "min_year": self.years[(with_year & -with_year).bit_length() - 1] if with_year else None,
+                "max_year": self.years[with_year.bit_length() - 1] if with_year else None,
+                "film_count": bits.bit_count(),
+            })
+        return sorted(catalog, key=lambda g: g["name"])
+
+    # --- фильтры ---
+
+    def _keyword_bits(self, keyword: str) -> int:
+        needle = keyword.lower()
+        if "%" in needle or "_" in needle or "\\" in needle:
+            # Ключевое слово подставляется в LIKE как есть — поддерживаем его подстановочные знаки
+            pattern = _like_to_regex(needle)
+            return _bits_from_indexes(
+                (i for i in range(len(self)) if pattern.search(self.title(i).lower())), len(self)
+            )
+        encoded = needle.encode("utf-8")
+        if TITLE_SEPARATOR in encoded:
+            return 0
+
+        def matches() -> Iterator[int]:
+            buffer, offsets, base = self._lower, self._lower_offsets, self._lower_base
+            end = base + offsets[len(self)]
+            position = buffer.find(encoded, base, end)
+            while position != -1:
+                index = bisect.bisect_right(offsets, position - base) - 1
+                yield index
+                # Одно совпадение на название достаточно — переходим к следующему
+                position = buffer.find(encoded, base + offsets[index + 1], end)
+
+        return _bits_from_indexes(matches(), len(self))
+
+    def _year_bits(self, year_from: Optional[int], year_to: Optional[int]) -> int:
+        # Открытая граница не пропускает год NULL — как сравнение с NULL в SQL
+        low = bisect.bisect_left(self.years, year_from) if year_from is not None else (
+            bisect.bisect_right(self.years, NULL_YEAR)
+        )
+        high = bisect.bisect_right(self.years, year_to) if year_to is not None else len(self)
+        if high <= low:
+            return 0
+        return ((1 << high) - 1) ^ ((1 << low) - 1)
+
+    def select(
+        self,
+        keyword: Optional[str] = None,
+        genre_id: GenreFilter = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        rating: RatingFilter = None,
+    ) -> int:
+        """
+        Битовое множество строк, удовлетворяющих фильтрам (семантика query_builder.build_conditions).
+        """
+        bits = self.all_bits
+        genres = genre_values(genre_id)
+        if genres:
+            selected = 0
+            for genre in genres:
+                selected |= self.genre_bits.get(genre, 0)
+            bits &= selected
+        ratings = rating_values(rating)
+        if ratings:
+            selected = 0
+            for value in ratings:
+                if value in self.ratings:
+                    selected |= self.rating_bits[self.ratings.index(value)]
+            bits &= selected
+        if bits and (year_from is not None or year_to is not None):
+            bits &= self._year_bits(year_value(year_from), year_value(year_to))
+        if bits and keyword:
+            bits &= self._keyword_bits(keyword)
+        return bits
+
+    def _iter_indexes(self, bits: int, start: int = 0, reverse: bool = False) -> Iterator[int]:
+        """
+        Номера установленных битов по возрастанию (от start) или по убыванию (до start).
+        Битовое множество разбирается 64-битными словами, пустые слова пропускаются.
+        """
+        if not bits:
+            return
+        words = array("Q")
+        words.frombytes(bits.to_bytes((len(self) + 63) // 64 * 8, "little"))
+        if not reverse:
+            first = start >> 6
+            for w in range(first, len(words)):
+                word = words[w]
+                if w == first:
+                    word &= ~((1 << (start & 63)) - 1) & 0xFFFFFFFFFFFFFFFF
+                while word:
+                    low = word & -word
+                    yield (w << 6) + low.bit_length() - 1
+                    word ^= low
+        else:
+            last = start >> 6
+            for w in range(min(last, len(words) - 1), -1, -1):
+                word = words[w]
+                if w == last:
+                    word &= (1 << ((start & 63) + 1)) - 1
+                while word:
+                    high = word.bit_length() - 1
+                    yield (w << 6) + high
+                    word ^= 1 << high
+
+    @property
+    def duplicates(self) -> Set[int]:
+        """
+        Номера строк, у которых есть строка с тем же (title, release_year, rating)
+        и меньшим film_id. Вычисляется один раз при первом обращении.
+        """
+        if self._duplicates is None:
+            with self._duplicates_lock:
+                if self._duplicates is None:
+                    duplicates: Set[int] = set()
+                    run: Any = None
+                    seen: Set[int] = set()
+                    for index in range(len(self)):
+                        group = (self.years[index], self.title(index))
+                        if group != run:
+                            run, seen = group, set()
+                        code = self.rating_codes[index]
+                        if code in seen:
+                            duplicates.add(index)
+                        seen.add(code)
+                    self._duplicates = duplicates
+        return self._duplicates
+
+    def _is_representative(self, index: int, bits: int) -> bool:
+        """
+        Строка представляет свой ключ (title, release_year, rating) в результате —
+        среди выбранных строк с этим ключом у неё наименьший film_id
+        (как условие query_builder.duplicate_condition).
+        """
+        if index not in self.duplicates:
+            return True
+        year, title, code = self.years[index], self.title(index), self.rating_codes[index]
+        other = index - 1
+        while other >= 0 and self.years[other] == year and self.title(other) == title:
+            if self.rating_codes[other] == code and bits >> other & 1:
+                return False
+            other -= 1
+        return True
+
+    def _distinct(self, indexes: Iterable[int], bits: int) -> Iterator[int]:
+        """
+        Оставляет из выбранных строк только представителей своих ключей — аналог условия NOT EXISTS
+        из query_builder.duplicate_condition.
+        """
+        for index in indexes:
+            if self._is_representative(index, bits):
+                yield index
+
+    def search(self, **filters: Any) -> List[MovieRow]:
+        """
+        Результат search_movies: уникальные строки в порядке (release_year, title, film_id).
+        """
+        return list(self.iter_search(**filters))
+
+    def iter_search(self, **filters: Any) -> Iterator[MovieRow]:
+        """
+        То же, что search, но строки создаются по мере чтения.
+        """
+        bits = self.select(**filters)
+        for index in self._distinct(self._iter_indexes(bits), bits):
+            yield self.row(index)
+
+    def count(self, **filters: Any) -> int:
+        """
+        Количество строк результата search_movies (как COUNT(*) в count_movies).
+        """
+        bits = self.select(**filters)
+        repeated = sum(
+            1 for index in self.duplicates
+            if bits >> index & 1 and not self._is_representative(index, bits)
+        )
+        return bits.bit_count() - repeated
+
+    def _position(self, key: Sequence[Any], after: bool) -> int:
+        """
+        Позиция первой строки с ключом (release_year, title, film_id) больше (after) или не меньше заданного.
+        """
+        year, title, film_id = key
+        wanted = (NULL_YEAR if year is None else int(year), title, int(film_id))
+        search = bisect.bisect_right if after else bisect.bisect_left
+        return search(
+            range(len(self)), wanted,
+            key=lambda i: (self.years[i], self.title(i), self.film_ids[i]),
+        )
+
+    def page(
+        self,
+        after: Optional[Sequence[Any]] = None,
+        before: Optional[Sequence[Any]] = None,
+        limit: int = 10,
+        **filters: Any,
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Keyset-страница: до limit строк строго после ключа after (по возрастанию)
+        или строго до before (по убыванию, как ORDER BY ... DESC).
+        Строки — (title, release_year, rating, film_id), как у query_builder.page_query.
+        """
+        bits = self.select(**filters)
+        if before is not None:
+            start = self._position(before, after=False) - 1
+            if start < 0:
+                return []
+            indexes = self._iter_indexes(bits, start, reverse=True)
+        else:
+            start = self._position(after, after=True) if after is not None else 0
+            if start >= len(self):
+                return []
+            indexes = self._iter_indexes(bits, start)
+        rows = []
+        for index in self._distinct(indexes, bits):
+            if len(rows) >= limit:
+                break
+            rows.append((*self.row(index).as_tuple(), self.film_ids[index]))
+        return rows
+
+    def key_at(self, offset: int, **filters: Any) -> Optional[Tuple[Optional[int], str, int]]:
+        """
+        Ключ (release_year, title, film_id) строки результата с номером offset (с нуля) или None.
+        """
+        bits = self.select(**filters)
+        for position, index in enumerate(self._distinct(self._iter_indexes(bits), bits)):
+            if position == offset:
+                return self.key(index)
+        return None
@@ -0,0 +1,222 @@
+"""
+Снимок каталога на диске для мгновенного «тёплого» старта.
+
+Файл содержит столбцы CatalogEngine фиксированной ширины, таблицы смещений
+названий и битовые множества жанров/рейтингов. При запуске файл отображается
+в память только для чтения (mmap), поэтому несколько процессов на одном хосте
+разделяют одни и те же страницы, а загрузка не требует чтения каталога из MySQL.
+
+Формат (заголовок и таблица секций — little-endian, столбцы — в порядке байт
+платформы, который записан в заголовке):
+    заголовок: магия, версия схемы, порядок байт, число строк,
+               SHA-1 водяного знака источника, число секций;
+    таблица секций: имя, смещение, длина;
+    секции (выровнены по 8 байт): meta (JSON), film_id, year, rating,
+    t_off, titles, l_off, lower, gbits, rbits.
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+from array import array
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional, Tuple
+
+from final_movies.catalog_engine import CatalogData, CatalogEngine
+
+MAGIC = b"MFCATSNP"
+# Версия 2: строки упорядочены по (release_year, title, film_id)
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct("<8sHBBI20sI")
+SECTION = struct.Struct("<8sQQ")
+ALIGNMENT = 8
+_BYTEORDER = 1 if sys.byteorder == "little" else 2
+
+
+class SnapshotError(ValueError):
+    """
+    Файл снимка повреждён, имеет другую версию схемы или порядок байт.
+    """
+
+
+def watermark_digest(watermark: Optional[str]) -> bytes:
+    return hashlib.sha1((watermark or "").encode("utf-8")).digest()
+
+
+def _column_bytes(column: Any, typecode: str) -> bytes:
+    if isinstance(column, memoryview):
+        return column.tobytes()
+    if getattr(column, "typecode", None) == typecode:
+        return column.tobytes()
+    return array(typecode, column).tobytes()
+
+
+def write_snapshot(engine: CatalogEngine, path: str) -> str:
+    """
+    Записывает каталог в файл снимка. Файл заменяется атомарно,
+    поэтому процессы, уже отобразившие старую версию, продолжают с ней работать.
+
+    :return: Путь к записанному файлу
+    """
+    data = engine.data
+    count = len(engine)
+    bitmap_size = (count + 7) // 8
+    genre_ids = sorted(data.genre_bits)
+    meta = {
+        "watermark": data.watermark,
+        "ratings": data.ratings,
+        "genre_ids": genre_ids,
+        "genre_names": {str(k): v for k, v in data.genre_names.items()},
+        "created_at": datetime.now(UTC).isoformat(),
+    }
+    titles_end = data.titles_base + data.title_offsets[count]
+    lower_end = data.lower_base + data.lower_offsets[count]
+    sections: List[Tuple[bytes, bytes]] = [
+        (b"meta", json.dumps(meta).encode("utf-8")),
+        (b"film_id", _column_bytes(data.film_ids, "I")),
+        (b"year", _column_bytes(data.years, "h")),
+        (b"rating", _column_bytes(data.rating_codes, "B")),
+        (b"t_off", _column_bytes(data.title_offsets, "I")),
+        (b"titles", bytes(data.titles[data.titles_base:titles_end])),
+        (b"l_off", _column_bytes(data.lower_offsets, "I")),
+        (b"lower", bytes(data.lower_titles[data.lower_base:lower_end])),
+        (b"gbits", b"".join(data.genre_bits[g].to_bytes(bitmap_size, "little") for g in genre_ids)),
+        (b"rbits", b"".join(bits.to_bytes(bitmap_size, "little") for bits in data.rating_bits)),
+    ]
+
+    offset = HEADER.size + SECTION.size * len(sections)
+    table, payload = [], []
+    for name, blob in sections:
+        padding = -offset % ALIGNMENT
+        payload.append(b"\x00" * padding)
+        offset += padding
+        table.append(SECTION.pack(name, offset, len(blob)))
+        payload.append(blob)
+        offset += len(blob)
+    header = HEADER.pack(
+        MAGIC, SNAPSHOT_VERSION, _BYTEORDER, 0, count, watermark_digest(data.watermark), len(sections)
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.writelines(table)
+        f.writelines(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _parse_header(buffer: Any) -> Tuple[int, bytes, int]:
+    """
+    Проверяет заголовок и возвращает (число строк, SHA-1 водяного знака, число секций).
+    """
+    if len(buffer) < HEADER.size:
+        raise SnapshotError("Snapshot is truncated")
+    magic, version, byteorder, _, count, digest, section_count = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise SnapshotError("Not a catalog snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    if byteorder != _BYTEORDER:
+        raise SnapshotError("Snapshot byte order does not match this platform")
+    return count, digest, section_count
+
+
+def _read_sections(buffer: Any, section_count: int) -> Dict[bytes, Tuple[int, int]]:
+    sections = {}
+    for i in range(section_count):
+        name, offset, length = SECTION.unpack_from(buffer, HEADER.size + i * SECTION.size)
+        if offset + length > len(buffer):
+            raise SnapshotError(f"Section {name!r} is out of bounds")
+        sections[name.rstrip(b"\x00")] = (offset, length)
+    return sections
+
+
+def snapshot_is_current(path: str, watermark: Optional[str]) -> bool:
+    """
+    Проверяет по заголовку (без чтения всего файла), что снимок существует,
+    совместим и построен по источнику с тем же водяным знаком.
+    """
+    try:
+        with open(path, "rb") as f:
+            _, digest, _ = _parse_header(f.read(HEADER.size))
+    except (OSError, SnapshotError):
+        return False
+    return digest == watermark_digest(watermark)
+
+
+def open_snapshot(path: str) -> CatalogEngine:
+    """
+    Отображает снимок в память только для чтения и возвращает CatalogEngine поверх него.
+    Столбцы — memoryview страниц файла; копируются только битовые множества.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    views: List[memoryview] = []
+    try:
+        try:
+            count, _, section_count = _parse_header(mapped)
+            sections = _read_sections(mapped, section_count)
+            view = memoryview(mapped)
+            views.append(view)
+
+            def section(name: bytes) -> Tuple[int, int]:
+                if name not in sections:
+                    raise SnapshotError(f"Section {name!r} is missing")
+                return sections[name]
+
+            def column(name: bytes, typecode: str) -> memoryview:
+                offset, length = section(name)
+                views.append(view[offset:offset + length].cast(typecode))
+                return views[-1]
+
+            offset, length = section(b"meta")
+            meta = json.loads(bytes(view[offset:offset + length]))
+            bitmap_size = (count + 7) // 8
+
+            def bitmaps(name: bytes, amount: int) -> List[int]:
+                offset, length = section(name)
+                if length != amount * bitmap_size:
+                    raise SnapshotError(f"Section {name!r} has unexpected size")
+                return [
+                    int.from_bytes(view[offset + i * bitmap_size:offset + (i + 1) * bitmap_size], "little")
+                    for i in range(amount)
+                ]
+
+            film_ids = column(b"film_id", "I")
+            if len(film_ids) != count:
+                raise SnapshotError("Row count does not match the header")
+            genre_ids = meta["genre_ids"]
+            data = CatalogData(
+                film_ids=film_ids,
+                years=column(b"year", "h"),
+                rating_codes=column(b"rating", "B"),
+                ratings=meta["ratings"],
+                titles=mapped,
+                title_offsets=column(b"t_off", "I"),
+                lower_titles=mapped,
+                lower_offsets=column(b"l_off", "I"),
+                genre_bits=dict(zip(genre_ids, bitmaps(b"gbits", len(genre_ids)))),
+                rating_bits=bitmaps(b"rbits", len(meta["ratings"])),
+                genre_names={int(k): v for k, v in meta["genre_names"].items()},
+                watermark=meta["watermark"],
+                titles_base=section(b"titles")[0],
+                lower_base=section(b"lower")[0],
+            )
+        except SnapshotError:
+            raise
+        except (KeyError, ValueError, TypeError, struct.error) as e:
+            raise SnapshotError(f"Corrupted snapshot: {e}") from e
+    except BaseException:
+        # Отображение нельзя закрыть, пока на него ссылаются memoryview столбцов
+        for exported in reversed(views):
+            exported.release()
+        mapped.close()
+        raise
+    return CatalogEngine(data)
@@ -0,0 +1,385 @@
+"""
+Отслеживание изменений каталога Sakila по водяным знакам таблиц.
+
+Для film, film_category и category одним запросом читаются количество строк,
+контрольная сумма ключей и MAX(last_update). Подписчики (кэш жанров, каталог в памяти,
+кэши поиска) получают уведомление только об изменившихся таблицах, от которых они
+зависят, и могут догрузить лишь изменённые строки (last_update >= прежнего максимума);
+индексы WATERMARK_INDEXES делают MAX(last_update) и эту догрузку индексными.
+
+Количество строк и сумма ключей требуют просмотра таблиц, поэтому обычный опрос
+читает только индексный MAX(last_update) (read_last_updates): вставки и обновления
+его меняют, и тогда водяные знаки читаются полностью. Удаления last_update не меняют —
+их выявляет полное чтение не чаще раза в CHANGE_FULL_POLL_INTERVAL секунд.
+
+Опрос выполняется не чаще раза в CHANGE_POLL_INTERVAL секунд: по требованию при обращении
+к кэшируемым данным или, если включены кэши поиска либо каталог в памяти, фоновым
+потоком меню и HTTP-сервиса (start_change_polling), чтобы поиск его не ждал.
+"""
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pymysql
+import pymysql.cursors
+
+from final_movies.config import env_flag, env_float
+
+# Таблицы каталога и выражение контрольной суммы их ключей
+# (category_id в Sakila — TINYINT, поэтому film_id * 256 + category_id однозначно)
+TRACKED_TABLES: Dict[str, str] = {
+    "film": "film_id",
+    "film_category": "film_id * 256 + category_id",
+    "category": "category_id",
+}
+
+# Индексы по last_update для MAX(last_update) и догрузки изменённых строк:
+# имя -> (таблица, столбцы); category слишком мала, чтобы индексировать
+WATERMARK_INDEXES = {
+    "idx_film_last_update": ("film", ("last_update",)),
+    "idx_film_category_last_update": ("film_category", ("last_update",)),
+}
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """
+    Водяной знак таблицы: количество строк, сумма ключей и время последнего изменения.
+    """
+
+    row_count: int
+    key_sum: int
+    last_update: Optional[str]
+
+
+@dataclass(frozen=True)
+class TableChange:
+    """
+    Изменение водяного знака таблицы между двумя опросами.
+    """
+
+    table: str
+    previous: Watermark
+    current: Watermark
+
+
+Listener = Callable[[List[TableChange], Dict[str, Watermark]], None]
+
+
+def read_watermarks() -> Dict[str, Watermark]:
+    """
+    Читает водяные знаки всех отслеживаемых таблиц одним запросом.
+    Ошибки MySQL не перехватываются.
+    """
+    from final_movies.mysql_connector import get_connection_pool
+
+    query = " UNION ALL ".join(
+        f"SELECT '{table}', COUNT(*), COALESCE(SUM({key}), 0), MAX(last_update) FROM {table}"
+        for table, key in TRACKED_TABLES.items()
+    )
+    with get_connection_pool().connection() as connection:
+        with connection.cursor(pymysql.cursors.Cursor) as cursor:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+    return {
+        table: Watermark(int(count), int(key_sum), None if last is None else str(last))
+        for table, count, key_sum, last in rows
+    }
+
+
+def read_last_updates() -> Dict[str, Optional[str]]:
+    """
+    Читает MAX(last_update) отслеживаемых таблиц одним запросом — по индексам
+    WATERMARK_INDEXES без просмотра таблиц. Ошибки MySQL не перехватываются.
+    """
+    from final_movies.mysql_connector import get_connection_pool
+
+    query = " UNION ALL ".join(
+        f"SELECT '{table}', MAX(last_update) FROM {table}" for table in TRACKED_TABLES
+    )
+    with get_connection_pool().connection() as connection:
+        with connection.cursor(pymysql.cursors.Cursor) as cursor:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+    return {table: None if last is None else str(last) for table, last in rows}
+
+
+def format_watermark(watermarks: Dict[str, Watermark]) -> str:
+    """
+    Строковое представление водяных знаков (хранится в каталоге и снимке на диске).
+    """
+    return json.dumps(
+        {table: [w.row_count, w.key_sum, w.last_update] for table, w in sorted(watermarks.items())}
+    )
+
+
+def parse_watermark(value: Optional[str]) -> Dict[str, Watermark]:
+    """
+    Разбирает строку format_watermark; неизвестный формат даёт пустой словарь.
+    """
+    try:
+        return {table: Watermark(*fields) for table, fields in json.loads(value or "").items()}
+    except (ValueError, TypeError, AttributeError):
+        return {}
+
+
+def changed_rows_query(
+    table: str, columns: Sequence[str], since: Optional[str]
+) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Запрос строк таблицы, изменённых не раньше since (None — все строки).
+    """
+    query = f"SELECT {', '.join(columns)} FROM {table}"
+    if since is None:
+        return query, ()
+    return query + " WHERE last_update >= %s", (since,)
+
+
+def fetch_changed_rows(
+    table: str, columns: Sequence[str], since: Optional[str]
+) -> List[Tuple[Any, ...]]:
+    """
+    Возвращает строки таблицы, изменённые не раньше since (включительно:
+    last_update хранится с точностью до секунды, повторная обработка безопасна).
+    """
+    from final_movies.mysql_connector import get_connection_pool
+
+    query, params = changed_rows_query(table, columns, since)
+    with get_connection_pool().connection() as connection:
+        with connection.cursor(pymysql.cursors.Cursor) as cursor:
+            cursor.execute(query, params)
+            return list(cursor.fetchall())
+
+
+class ChangeTracker:
+    """
+    Опрашивает водяные знаки таблиц и уведомляет подписчиков об изменениях.
+    Первый опрос только запоминает исходное состояние.
+
+    С probe (дешёвое чтение MAX(last_update)) полные водяные знаки читаются, только
+    если probe показал изменение или с прошлого полного чтения прошло full_interval секунд.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 5.0,
+        reader: Callable[[], Dict[str, Watermark]] = read_watermarks,
+        probe: Optional[Callable[[], Dict[str, Optional[str]]]] = None,
+        full_interval: float = 60.0,
+    ) -> None:
+        self.poll_interval = poll_interval
+        self.full_interval = full_interval
+        self._reader = reader
+        self._probe = probe
+        self._last_full: Optional[float] = None
+        self._listeners: List[Tuple[frozenset, Listener]] = []
+        self._watermarks: Dict[str, Watermark] = {}
+        self._last_poll: Optional[float] = None
+        self._lock = threading.Lock()
+        self._poller: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.polls = 0
+        self.full_polls = 0
+        self.changes = 0
+
+    @property
+    def watermarks(self) -> Dict[str, Watermark]:
+        return dict(self._watermarks)
+
+    def subscribe(self, tables: Sequence[str], listener: Listener) -> None:
+        """
+        Подписывает listener на изменения указанных таблиц.
+        Он вызывается со списком изменений и текущими водяными знаками всех таблиц.
+        """
+        self._listeners.append((frozenset(tables), listener))
+
+    def poll(self) -> List[TableChange]:
+        """
+        Читает водяные знаки и уведомляет подписчиков изменившихся таблиц.
+
+        :return: Список изменений (пустой при первом опросе)
+        """
+        current = self._read()
+        with self._lock:
+            previous, self._watermarks = self._watermarks, current
+            self._last_poll = time.monotonic()
+            self.polls += 1
+        changes = [
+            TableChange(table, previous[table], mark)
+            for table, mark in current.items()
+            if table in previous and previous[table] != mark
+        ]
+        if changes:
+            self.changes += len(changes)
+            changed = {change.table for change in changes}
+            logging.info(f"Catalog changes detected in: {', '.join(sorted(changed))}")
+            for tables, listener in self._listeners:
+                if tables & changed:
+                    try:
+                        listener([c for c in changes if c.table in tables], current)
+                    except Exception as e:
+                        logging.error(f"Change listener {listener!r} failed: {e}")
+        return changes
+
+    def _read(self) -> Dict[str, Watermark]:
+        """
+        Водяные знаки для сравнения: прежние, если probe не видит изменений
+        и полное чтение ещё не требуется, иначе — прочитанные полностью.
+        """
+        previous = self._watermarks
+        if self._probe is not None and previous and self._last_full is not None:
+            if time.monotonic() - self._last_full < self.full_interval:
+                latest = self._probe()
+                if all(latest.get(table) == mark.last_update for table, mark in previous.items()):
+                    return previous
+        current = self._reader()
+        self._last_full = time.monotonic()
+        self.full_polls += 1
+        return current
+
+    def maybe_poll(self) -> List[TableChange]:
+        """
+        Выполняет опрос, если с предыдущего прошло не меньше poll_interval секунд.
+        Пока один поток опрашивает, остальные не ждут и работают с текущими данными.
+        При фоновом опросе (start_background) ничего не делает.
+        """
+        if self._poller is not None:
+            return []
+        last = self._last_poll
+        if last is not None and time.monotonic() - last < self.poll_interval:
+            return []
+        if not self._lock.acquire(blocking=False):
+            return []
+        try:
+            # Опрос мог завершиться в другом потоке, пока мы проверяли интервал
+            if self._last_poll is not last:
+                return []
+            self._last_poll = time.monotonic()
+        finally:
+            self._lock.release()
+        return self.poll()
+
+    def start_background(self) -> Optional[threading.Thread]:
+        """
+        Запускает опрос в фоновом потоке: сразу и затем раз в poll_interval секунд.
+
+        :return: Поток опроса или None, если он уже запущен или интервал не положителен
+        """
+        with self._lock:
+            if self._poller is not None or self.poll_interval <= 0:
+                return None
+            self._stop.clear()
+            thread = self._poller = threading.Thread(
+                target=self._run_background, name="change-tracker", daemon=True
+            )
+        thread.start()
+        return thread
+
+    def _run_background(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except (pymysql.MySQLError, ConnectionError) as e:
+                logging.warning(f"Change tracking poll failed: {e}")
+            except Exception as e:
+                logging.error(f"❌ Change tracking poll failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def stop_background(self, timeout: Optional[float] = None) -> None:
+        """
+        Останавливает фоновый опрос (дальше опрос снова выполняется по требованию).
+        """
+        thread = self._poller
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        with self._lock:
+            self._poller = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "background": self._poller is not None,
+            "polls": self.polls,
+            "full_polls": self.full_polls,
+            "changes": self.changes,
+            "watermarks": {t: vars(w) for t, w in self._watermarks.items()},
+        }
+
+
+_tracker: Optional[ChangeTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_change_tracker() -> ChangeTracker:
+    """
+    Возвращает общий трекер изменений каталога (интервал — CHANGE_POLL_INTERVAL,
+    полное чтение водяных знаков — не реже CHANGE_FULL_POLL_INTERVAL) с подписанными каталогом в памяти, кэшами жанров и результатов поиска
+    и индексами названий (подсказки и автодополнение).
+    """
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                from final_movies import autocomplete, fuzzy_search, mysql_connector, search_cache
+
+                tracker = ChangeTracker(
+                    env_float("CHANGE_POLL_INTERVAL", 5.0),
+                    probe=read_last_updates,
+                    full_interval=env_float("CHANGE_FULL_POLL_INTERVAL", 60.0),
+                )
+                # Сначала обновляется каталог в памяти: кэши заполняются уже из нового
+                tracker.subscribe(TRACKED_TABLES, mysql_connector.on_catalog_change)
+                tracker.subscribe(TRACKED_TABLES, mysql_connector.on_genre_source_change)
+                tracker.subscribe(search_cache.SOURCE_TABLES, search_cache.on_search_source_change)
+                tracker.subscribe(("film",), fuzzy_search.on_title_source_change)
+                tracker.subscribe(("film",), autocomplete.on_title_source_change)
+                _tracker = tracker
+    return _tracker
+
+
+def set_change_tracker(tracker: Optional[ChangeTracker]) -> None:
+    """
+    Подменяет общий трекер (None — создать заново при следующем обращении);
+    фоновый опрос прежнего трекера останавливается.
+    """
+    global _tracker
+    with _tracker_lock:
+        previous, _tracker = _tracker, tracker
+    if previous is not None and previous is not tracker:
+        previous.stop_background()
+
+
+def start_change_polling() -> Optional[threading.Thread]:
+    """
+    Запускает фоновый опрос общего трекера, чтобы поиск не выполнял запросы водяных
+    знаков сам. Опрос нужен, только если включён кэш результатов поиска (SEARCH_CACHE)
+    или каталог в памяти (SEARCH_BACKEND=memory, в том числе со снимком); без них
+    кэш жанров и индексы названий проверяют изменения по требованию.
+    CHANGE_POLL_BACKGROUND=0 выключает фоновый опрос.
+
+    :return: Поток опроса или None, если он выключен, не нужен или уже запущен
+    """
+    from final_movies.mysql_connector import is_catalog_engine_enabled
+    from final_movies.search_cache import is_search_cache_enabled
+
+    if not env_flag("CHANGE_POLL_BACKGROUND", True):
+        return None
+    if not (is_search_cache_enabled() or is_catalog_engine_enabled()):
+        return None
+    return get_change_tracker().start_background()
+
+
+def poll_changes() -> List[TableChange]:
+    """
+    Опрашивает изменения, если пора (см. ChangeTracker.maybe_poll).
+    Недоступность MySQL не считается ошибкой — данные просто не обновляются.
+    """
+    try:
+        return get_change_tracker().maybe_poll()
+    except (pymysql.MySQLError, ConnectionError) as e:
+        logging.warning(f"Change tracking poll failed: {e}")
+        return []
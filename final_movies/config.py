@@ -0,0 +1,63 @@
+import os
+import logging
+import threading
+from typing import Optional
+
+# Загрузка переменных окружения
+from dotenv import load_dotenv
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_environment() -> None:
+    """
+    Загружает переменные окружения из .env один раз за время работы процесса.
+    Вызывается лениво — перед первым подключением к БД, а не при импорте модулей.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            load_dotenv()
+            _env_loaded = True
+
+
+def get_env(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Возвращает значение переменной окружения (с учётом .env).
+    """
+    load_environment()
+    return os.getenv(name, default)
+
+
+def env_float(name: str, default: float) -> float:
+    """
+    Читает дробную настройку из окружения, возвращая default при отсутствии или ошибке.
+    """
+    value = get_env(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logging.warning(f"Invalid value for {name}: {value!r}, using {default}")
+        return default
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    Читает целочисленную настройку из окружения, возвращая default при отсутствии или ошибке.
+    """
+    return int(env_float(name, default))
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """
+    Читает логическую настройку из окружения ("0", "false", "no", "off" — выключено).
+    """
+    value = get_env(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
@@ -0,0 +1,160 @@
+"""
+Выгрузка результатов поиска в CSV или JSON Lines с постоянным расходом памяти.
+
+Строки берутся из search_movies_iter (серверный курсор, чтение порциями)
+и сразу пишутся в файл; при расширении .gz или флаге --gzip файл сжимается.
+Файл сначала пишется во временный и заменяется атомарно, поэтому прерванная
+выгрузка не оставляет обрезанного результата.
+
+Пример:
+    python -m final_movies.export --rating PG-13 --format csv --output pg13.csv.gz
+"""
+import os
+import sys
+import csv
+import gzip
+import json
+import time
+import logging
+import argparse
+from typing import Any, Dict, IO, Iterable, List, Mapping, Optional
+
+import pymysql
+
+from final_movies.mysql_connector import search_movies_iter
+
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_COLUMNS = ("title", "release_year", "rating")
+
+
+def write_rows(
+    rows: Iterable[Mapping[str, Any]],
+    stream: IO[str],
+    fmt: str,
+    progress_every: int = 0,
+) -> int:
+    """
+    Пишет строки в текстовый поток в формате csv или jsonl.
+
+    :param progress_every: Каждые N строк писать в журнал промежуточную скорость (0 — не писать)
+    :return: Количество записанных строк
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    started = time.perf_counter()
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row: Mapping[str, Any]) -> None:
+            stream.write(json.dumps(dict(row), ensure_ascii=False, default=str))
+            stream.write("\n")
+
+    for row in rows:
+        write(row)
+        count += 1
+        if progress_every and count % progress_every == 0:
+            elapsed = time.perf_counter() - started
+            logging.info(f"Exported {count} rows ({count / elapsed:.0f} rows/s)")
+    return count
+
+
+def _open_output(path: str, compress: bool) -> IO[str]:
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_search(
+    path: str,
+    fmt: Optional[str] = None,
+    compress: Optional[bool] = None,
+    chunk_size: int = 1000,
+    progress_every: int = 0,
+    **filters: Any,
+) -> Dict[str, Any]:
+    """
+    Выгружает результат поиска с фильтрами search_movies в файл.
+
+    :param path: Путь к файлу ("-" — стандартный вывод, без сжатия)
+    :param fmt: "csv" или "jsonl" (по умолчанию — по расширению файла, иначе csv)
+    :param compress: Сжимать gzip (по умолчанию — если путь оканчивается на .gz)
+    :return: Словарь с путём, количеством строк, временем и скоростью (строк/с)
+    """
+    base = path[:-3] if path.endswith(".gz") else path
+    if fmt is None:
+        fmt = "jsonl" if base.endswith((".jsonl", ".ndjson")) else "csv"
+    if compress is None:
+        compress = path.endswith(".gz")
+
+    started = time.perf_counter()
+    rows = search_movies_iter(chunk_size=chunk_size, **filters)
+    if path == "-":
+        count = write_rows(rows, sys.stdout, fmt, progress_every)
+    else:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with _open_output(tmp_path, compress) as stream:
+                count = write_rows(rows, stream, fmt, progress_every)
+            os.replace(tmp_path, path)
+        except BaseException:
+            rows.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    elapsed = time.perf_counter() - started
+    return {
+        "path": path,
+        "format": fmt,
+        "compressed": bool(compress) and path != "-",
+        "rows": count,
+        "seconds": elapsed,
+        "rows_per_second": count / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки: python -m final_movies.export --rating PG-13 --output pg13.csv
+    """
+    parser = argparse.ArgumentParser(description="Stream movie search results to CSV or JSON Lines")
+    parser.add_argument("--output", required=True, help="Output file (.csv, .jsonl, optionally .gz; - for stdout)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="Default: from the file extension")
+    parser.add_argument("--gzip", action="store_true", default=None, help="Compress (default: for .gz files)")
+    parser.add_argument("--keyword")
+    parser.add_argument("--genre-id", type=int)
+    parser.add_argument("--year-from", type=int)
+    parser.add_argument("--year-to", type=int)
+    parser.add_argument("--rating")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--progress-every", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    try:
+        result = export_search(
+            args.output,
+            fmt=args.format,
+            compress=args.gzip,
+            chunk_size=args.chunk_size,
+            progress_every=args.progress_every,
+            keyword=args.keyword,
+            genre_id=args.genre_id,
+            year_from=args.year_from,
+            year_to=args.year_to,
+            rating=args.rating,
+        )
+    except (pymysql.MySQLError, ConnectionError, OSError) as e:
+        print(f"❌ Export failed: {e}", file=sys.stderr)
+        return 1
+    print(
+        f"✅ Exported {result['rows']} rows to {result['path']} in {result['seconds']:.2f}s "
+        f"({result['rows_per_second']:.0f} rows/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,16 @@
-from typing import List, Dict, Any, Optional, Tuple
+import time
+from typing import List, Dict, Any, Optional, Tuple, Union
 from prettytable import PrettyTable
-from final_movies.mysql_connector import get_min_max_years_for_genre, get_genre_movie_count
+from final_movies.mysql_connector import (
+    PagedSearch,
+    get_min_max_years_for_genre,
+    get_genre_movie_count,
+)
+from final_movies.query_metrics import get_registry
 
 
 def paginate_results(
-    results: List[Dict[str, Any]],
+    results: Union[List[Dict[str, Any]], PagedSearch],
     page_size: int = 10,
     columns: Optional[List[str]] = None,
 ) -> None:
@@ -17,18 +23,33 @@ def paginate_results(
     - 'g <номер>': переход к указанной странице
     - 'q': выход из режима просмотра
 
+    Вместо готового списка можно передать PagedSearch — тогда страницы
+    загружаются из БД по требованию (в том числе при переходе 'g <номер>').
+
     :param results: Список фильмов (каждый — словарь с полями title, release_year, rating и т.п.)
-    :param page_size: Количество фильмов, выводимых на одной странице (по умолчанию 10)
+        или ленивый результат PagedSearch
+    :param page_size: Количество фильмов, выводимых на одной странице (по умолчанию 10);
+        для PagedSearch используется его собственный размер страницы
     :param columns: Названия колонок таблицы (если не указаны — используются стандартные)
     :return: None
     """
-    # Проверка, что пришёл список — если нет, выводим предупреждение и выходим
-    if not isinstance(results, list):
+    if isinstance(results, PagedSearch):
+        # Ленивый режим: страницы запрашиваются у PagedSearch
+        page_size = results.page_size
+        get_page = results.get_page
+    elif isinstance(results, list):
+        def get_page(index: int) -> List[Dict[str, Any]]:
+            return results[index * page_size:(index + 1) * page_size]
+    else:
+        # Пришёл не список и не PagedSearch — выводим предупреждение и выходим
         print("⚠️ Invalid data passed to paginate_results: expected a list.")
         return
 
     # Вычисляем количество страниц, округляя вверх
-    total_pages = (len(results) + page_size - 1) // page_size
+    total = len(results)
+    # Для приблизительного подсчёта показываем количество со знаком «~»
+    total_label = f"~{total}" if getattr(results, "total_is_approximate", False) else total
+    total_pages = (total + page_size - 1) // page_size
     if total_pages == 0:
         print("⚠️ No data to display.")
         return
@@ -36,10 +57,11 @@ def paginate_results(
     page = 0  # Начинаем с первой страницы (индекс 0)
 
     while True:
-        # Определяем срез списка для текущей страницы
+        # Получаем строки текущей страницы
         start = page * page_size
-        end = start + page_size
-        page_results = results[start:end]
+        fetch_started = time.perf_counter()
+        page_results = get_page(page)
+        render_started = time.perf_counter()
 
         # Создаём объект PrettyTable и задаём заголовки колонок
         table = PrettyTable()
@@ -57,10 +79,15 @@ def paginate_results(
 
         # Выводим информацию о количестве фильмов, текущей странице и таблицу
         print(
-            f"\n=== Found {len(results)} movies | Page {page + 1} of {total_pages} ==="
+            f"\n=== Found {total_label} movies | Page {page + 1} of {total_pages} ==="
         )
         print(table)
 
+        # Время загрузки и отрисовки страницы — в реестр метрик (без ожидания ввода)
+        registry = get_registry()
+        registry.observe("page_fetch", render_started - fetch_started)
+        registry.observe("page_render", time.perf_counter() - render_started)
+
         # Запрашиваем команду у пользователя
         command = (
             input(
@@ -126,6 +153,9 @@ def display_genre_table(
     Отображает таблицу жанров с количеством фильмов и годами выпуска.
     Также возвращает словарь с подробной информацией по каждому жанру.
 
+    Ожидает строки каталога жанров (get_genre_catalog) с полями min_year, max_year
+    и film_count; если их нет, данные запрашиваются отдельно для каждого жанра.
+
     :param genres: Список жанров (каждый жанр — словарь с genre_id и name)
     :return: Словарь: genre_id → (min_year, max_year, name)
     """
@@ -137,10 +167,15 @@ def display_genre_table(
     for g in genres:
         genre_id = g["genre_id"]  # ID жанра
         name = g["name"]  # Название жанра
-        # Получаем минимальный и максимальный год выпуска фильмов данного жанра
-        min_year, max_year = get_min_max_years_for_genre(genre_id)
-        # Получаем количество фильмов в данном жанре
-        count = get_genre_movie_count(genre_id)
+        if "film_count" in g:
+            # Данные уже посчитаны в каталоге жанров
+            min_year, max_year = g["min_year"], g["max_year"]
+            count = g["film_count"]
+        else:
+            # Получаем минимальный и максимальный год выпуска фильмов данного жанра
+            min_year, max_year = get_min_max_years_for_genre(genre_id)
+            # Получаем количество фильмов в данном жанре
+            count = get_genre_movie_count(genre_id)
         genre_data[genre_id] = (min_year, max_year, name)  # Сохраняем в словарь
         # Формируем строку таблицы с жанром, годами и количеством фильмов
         rows.append([genre_id, name, f"{min_year}-{max_year}", count])
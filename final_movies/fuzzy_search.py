@@ -0,0 +1,228 @@
+"""
+Поиск с учётом опечаток по триграммному индексу названий фильмов.
+
+Название разбивается на слова, каждое слово дополняется пробелами (как в pg_trgm:
+"  academy ") и раскладывается на триграммы. Индекс хранит для каждой триграммы
+упорядоченные номера названий, где она встречается. Триграммы запроса просматриваются
+от редких к частым: кандидатов дают только самые редкие из них (названию, набравшему
+min_similarity, не обойти их все), и не больше max_candidates названий; слишком частые
+триграммы (длиннее max_posting) кандидатов не дают. Остальные триграммы лишь проверяются
+у найденных кандидатов двоичным поиском. Оценка — доля триграмм запроса, найденных
+в названии; при равенстве выше короткие названия (коэффициент Жаккара).
+
+Индекс строится в памяти процесса фоновым потоком при запуске меню (или при первой
+подсказке, если он ещё не построен) и перестраивается в фоне трекером изменений
+при изменении таблицы film; пока он строится, подсказок нет или используется прежний индекс.
+"""
+import re
+import math
+import bisect
+import logging
+import threading
+from array import array
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from final_movies.config import env_float, env_int
+from final_movies.change_tracker import poll_changes
+from final_movies.mysql_connector import get_film_titles
+
+_WORD = re.compile(r"\w+")
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """
+    Множество триграмм текста (без учёта регистра, по словам, с дополнением пробелами).
+    """
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    """
+    Неизменяемый триграммный индекс по набору уникальных названий.
+    """
+
+    def __init__(self, titles: Iterable[str]) -> None:
+        self.titles: List[str] = sorted(set(titles))
+        self._sizes = array("I")
+        postings: Dict[str, array] = {}
+        for title_id, title in enumerate(self.titles):
+            grams = trigrams(title)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array("I")
+                posting.append(title_id)
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        min_similarity: float = 0.3,
+        max_candidates: int = 200,
+        max_posting: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Возвращает до limit названий, похожих на query, с оценкой сходства (0..1).
+
+        :param min_similarity: Минимальная доля триграмм запроса, найденных в названии
+        :param max_candidates: Сколько названий-кандидатов оценивать
+        :param max_posting: Триграммы, встречающиеся в большем числе названий, не дают кандидатов
+        """
+        grams = trigrams(query)
+        if not grams:
+            return []
+        postings = sorted(
+            (self._postings[gram] for gram in grams if gram in self._postings), key=len
+        )
+        # Название с required общими триграммами содержит хотя бы одну из
+        # len(grams) - required + 1 самых редких (отсутствующие в индексе — самые редкие),
+        # поэтому только они дают кандидатов
+        required = max(1, math.ceil(min_similarity * len(grams) - 1e-9))
+        probing = len(postings) - required + 1
+        if probing <= 0:
+            return []
+
+        shared: Dict[int, int] = {}
+        for position, posting in enumerate(postings):
+            collect = (
+                position < probing
+                and len(shared) < max_candidates
+                and (max_posting is None or len(posting) <= max_posting)
+            )
+            if collect:
+                for title_id in posting:
+                    if title_id in shared:
+                        shared[title_id] += 1
+                    elif len(shared) < max_candidates:
+                        shared[title_id] = 1
+            else:
+                for title_id in shared:
+                    found = bisect.bisect_left(posting, title_id)
+                    if found < len(posting) and posting[found] == title_id:
+                        shared[title_id] += 1
+
+        scored = []
+        for title_id, count in shared.items():
+            # Названия, не набравшие min_similarity, не показываются
+            if count < required:
+                continue
+            containment = count / len(grams)
+            jaccard = count / (len(grams) + self._sizes[title_id] - count)
+            scored.append((-containment, -jaccard, self.titles[title_id], containment))
+        scored.sort()
+        return [(title, score) for _, _, title, score in scored[:limit]]
+
+
+_index: Optional[TrigramIndex] = None
+_index_lock = threading.Lock()
+_index_version = 0  # увеличивается при изменении названий; устаревшая сборка повторяется
+_build_thread: Optional[threading.Thread] = None
+
+
+def get_trigram_index() -> Optional[TrigramIndex]:
+    """
+    Возвращает общий триграммный индекс названий (None — ещё не построен).
+    """
+    poll_changes()
+    return _index
+
+
+def build_trigram_index() -> TrigramIndex:
+    """
+    Строит индекс по get_film_titles и делает его общим; если названия изменились
+    во время сборки, индекс собирается заново.
+    Ошибки MySQL не перехватываются.
+    """
+    return _build(background=False)
+
+
+def _build(background: bool) -> TrigramIndex:
+    global _index, _build_thread
+    while True:
+        with _index_lock:
+            version = _index_version
+        index = TrigramIndex(get_film_titles())
+        with _index_lock:
+            if version == _index_version:
+                _index = index
+                if background:
+                    # Изменение после этой точки запустит новую сборку
+                    _build_thread = None
+                break
+    logging.info(f"Trigram index built: {len(index)} titles")
+    return index
+
+
+def start_trigram_index_build() -> Optional[threading.Thread]:
+    """
+    Запускает построение индекса в фоновом потоке, чтобы первая подсказка его не ждала.
+
+    :return: Поток построения или None, если построение уже идёт
+    """
+    global _build_thread
+    with _index_lock:
+        if _build_thread is not None:
+            return None
+        thread = _build_thread = threading.Thread(
+            target=_run_build, name="trigram-index", daemon=True
+        )
+    thread.start()
+    return thread
+
+
+def _run_build() -> None:
+    global _build_thread
+    try:
+        _build(background=True)
+    except Exception as e:
+        logging.warning(f"Fuzzy suggestions unavailable: {e}")
+        with _index_lock:
+            _build_thread = None
+
+
+def invalidate_trigram_index() -> None:
+    global _index, _index_version
+    with _index_lock:
+        _index = None
+        _index_version += 1
+
+
+def on_title_source_change(changes: List[Any], current: Dict[str, Any]) -> None:
+    """
+    Подписчик трекера изменений: индекс перестраивается в фоне, а до замены
+    подсказки строятся по прежнему.
+    """
+    global _index_version
+    with _index_lock:
+        _index_version += 1
+    start_trigram_index_build()
+
+
+def suggest_titles(keyword: str, limit: int = 5) -> List[Tuple[str, float]]:
+    """
+    Подсказки «возможно, вы имели в виду» для ключевого слова
+    (порог сходства, число кандидатов и предел частоты триграмм — FUZZY_MIN_SIMILARITY,
+    FUZZY_MAX_CANDIDATES и FUZZY_MAX_POSTING).
+    Пока индекс не построен (построение запускается в фоне), подсказок нет.
+    """
+    index = get_trigram_index()
+    if index is None:
+        start_trigram_index_build()
+        logging.info("Fuzzy suggestions skipped: trigram index is still building")
+        return []
+    return index.search(
+        keyword,
+        limit=limit,
+        min_similarity=env_float("FUZZY_MIN_SIMILARITY", 0.3),
+        max_candidates=env_int("FUZZY_MAX_CANDIDATES", 200),
+        max_posting=env_int("FUZZY_MAX_POSTING", 20000),
+    )
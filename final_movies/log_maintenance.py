@@ -0,0 +1,180 @@
+import sys
+import logging
+import argparse
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import PyMongoError
+
+from final_movies.config import get_env, env_float
+
+logger = logging.getLogger(__name__)
+
+# Имя индекса по времени (он же TTL-индекс, если задан срок хранения)
+TIMESTAMP_INDEX = "timestamp_1"
+SEARCH_TYPE_INDEX = "search_type_1_timestamp_1"
+
+
+def get_retention_days() -> Optional[float]:
+    """
+    Срок хранения сырых логов в днях из MONGO_LOG_RETENTION_DAYS (None — хранить всегда).
+    """
+    days = env_float("MONGO_LOG_RETENTION_DAYS", 0)
+    return days if days > 0 else None
+
+
+def is_retention_configured() -> bool:
+    """
+    Проверяет, задан ли MONGO_LOG_RETENTION_DAYS явно (в том числе значением 0 — «хранить всегда»).
+    """
+    return bool((get_env("MONGO_LOG_RETENTION_DAYS") or "").strip())
+
+
+def ensure_log_indexes(
+    logs: Any, retention_days: Optional[float] = None, manage_ttl: bool = True
+) -> Dict[str, Any]:
+    """
+    Создаёт индексы коллекции сырых логов (операция идемпотентна):
+    - по timestamp (при заданном сроке хранения — TTL-индекс);
+    - по (search_type, timestamp).
+
+    При изменении срока хранения существующий индекс обновляется через collMod.
+
+    :param logs: MongoDB-коллекция сырых поисковых логов
+    :param retention_days: Срок хранения в днях (None — без TTL)
+    :param manage_ttl: False — не трогать TTL существующего индекса по timestamp
+        (срок хранения мог задать администратор через ensure-indexes)
+    :return: Описание созданных/обновлённых индексов
+    """
+    expire_after = int(retention_days * 86400) if retention_days else None
+    existing = logs.index_information().get(TIMESTAMP_INDEX)
+    action = "unchanged"
+
+    if existing is not None and not manage_ttl:
+        expire_after = existing.get("expireAfterSeconds")
+    elif existing is not None:
+        current_expire = existing.get("expireAfterSeconds")
+        if current_expire != expire_after:
+            if current_expire is not None and expire_after is not None:
+                # Меняем срок хранения без пересоздания индекса
+                logs.database.command(
+                    "collMod",
+                    logs.name,
+                    index={"name": TIMESTAMP_INDEX, "expireAfterSeconds": expire_after},
+                )
+                action = "updated"
+            else:
+                # TTL включается или выключается — индекс нужно пересоздать
+                logs.drop_index(TIMESTAMP_INDEX)
+                existing = None
+                action = "recreated"
+
+    if existing is None:
+        options: Dict[str, Any] = {"name": TIMESTAMP_INDEX}
+        if expire_after is not None:
+            options["expireAfterSeconds"] = expire_after
+        logs.create_index([("timestamp", ASCENDING)], **options)
+        if action == "unchanged":
+            action = "created"
+
+    logs.create_index(
+        [("search_type", ASCENDING), ("timestamp", ASCENDING)], name=SEARCH_TYPE_INDEX
+    )
+    return {"timestamp_index": action, "expire_after_seconds": expire_after}
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """
+    Разбирает ISO-строку времени из старых логов в datetime (UTC).
+    Возвращает None, если строку разобрать нельзя.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed
+
+
+def migrate_timestamps(
+    collection: Any, field: str = "timestamp", batch_size: int = 1000
+) -> Dict[str, int]:
+    """
+    Переводит строковые ISO-метки времени в BSON datetime пачками bulk_write.
+    Повторный запуск безопасен: обрабатываются только документы со строковым полем.
+
+    :param collection: MongoDB-коллекция (сырые логи или агрегаты)
+    :param field: Имя поля с меткой времени ("timestamp" или "last_seen")
+    :param batch_size: Размер пачки обновлений
+    :return: Счётчики converted и skipped
+    """
+    converted = skipped = 0
+    batch: List[UpdateOne] = []
+    cursor = collection.find({field: {"$type": "string"}}, {field: 1}).batch_size(batch_size)
+    for doc in cursor:
+        parsed = parse_timestamp(doc[field])
+        if parsed is None:
+            skipped += 1
+            continue
+        # Условие по старому значению защищает от перезаписи параллельных изменений
+        batch.append(
+            UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: parsed}})
+        )
+        if len(batch) >= batch_size:
+            converted += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        converted += collection.bulk_write(batch, ordered=False).modified_count
+    if skipped:
+        logger.warning(f"⚠️ {skipped} documents have unparsable {field} values.")
+    return {"converted": converted, "skipped": skipped}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки:
+    python -m final_movies.log_maintenance ensure-indexes [--retention-days N]
+    python -m final_movies.log_maintenance migrate-timestamps [--batch-size N]
+    """
+    parser = argparse.ArgumentParser(description="Search log maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    indexes = subparsers.add_parser("ensure-indexes", help="Create search log indexes")
+    indexes.add_argument(
+        "--retention-days", type=float, default=None,
+        help="TTL for raw search logs (default: MONGO_LOG_RETENTION_DAYS, 0 disables TTL)",
+    )
+    migrate = subparsers.add_parser(
+        "migrate-timestamps", help="Convert ISO string timestamps to BSON datetimes"
+    )
+    migrate.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    from final_movies.log_writer import get_collection, get_rollup_collection
+
+    logs = get_collection()
+    if logs is None:
+        print("❌ MongoDB is not available.")
+        return 1
+    try:
+        if args.command == "ensure-indexes":
+            retention = args.retention_days
+            if retention is None:
+                retention = get_retention_days()
+            result = ensure_log_indexes(logs, retention or None)
+            print(f"✅ Indexes ready: {result}")
+        else:
+            logs_result = migrate_timestamps(logs, "timestamp", args.batch_size)
+            rollups_result = migrate_timestamps(
+                get_rollup_collection(), "last_seen", args.batch_size
+            )
+            print(f"✅ Logs: {logs_result}; rollups: {rollups_result}")
+    except PyMongoError as e:
+        print(f"❌ Maintenance failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import sys
+import json
+import hashlib
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, UpdateOne
+from pymongo.errors import PyMongoError
+
+
+def search_fingerprint(search_type: str, params: Dict[str, Any]) -> str:
+    """
+    Вычисляет отпечаток поискового запроса — ключ записи в коллекции агрегатов.
+    Порядок ключей в params не влияет на результат.
+
+    :param search_type: Тип поиска ("keyword", "genre_year", "rating")
+    :param params: Параметры поиска
+    :return: Шестнадцатеричный SHA-1 отпечаток
+    """
+    payload = json.dumps(
+        {"search_type": search_type, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def build_rollup_updates(entries: Iterable[Dict[str, Any]]) -> List[UpdateOne]:
+    """
+    Формирует upsert-операции для коллекции агрегатов по пачке поисковых логов.
+    Одинаковые запросы внутри пачки сворачиваются в одну операцию.
+
+    :param entries: Документы поисковых логов (search_type, params, timestamp, results_count)
+    :return: Список операций UpdateOne для bulk_write
+    """
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        fingerprint = search_fingerprint(entry["search_type"], entry["params"])
+        item = grouped.get(fingerprint)
+        if item is None:
+            grouped[fingerprint] = {
+                "search_type": entry["search_type"],
+                "params": entry["params"],
+                "count": 1,
+                "last_seen": entry["timestamp"],
+                "results_count": entry["results_count"],
+            }
+            continue
+        item["count"] += 1
+        if entry["timestamp"] >= item["last_seen"]:
+            item["last_seen"] = entry["timestamp"]
+            item["results_count"] = entry["results_count"]
+
+    return [
+        UpdateOne(
+            {"_id": fingerprint},
+            {
+                "$inc": {"count": item["count"]},
+                "$max": {"last_seen": item["last_seen"]},
+                "$set": {"results_count": item["results_count"]},
+                "$setOnInsert": {
+                    "search_type": item["search_type"],
+                    "params": item["params"],
+                },
+            },
+            upsert=True,
+        )
+        for fingerprint, item in grouped.items()
+    ]
+
+
+def ensure_rollup_indexes(rollups: Any) -> None:
+    """
+    Создаёт индексы коллекции агрегатов для выборок ТОП-N (операция идемпотентна).
+
+    :param rollups: MongoDB-коллекция агрегатов
+    """
+    rollups.create_index([("count", DESCENDING), ("last_seen", DESCENDING)], name="count_desc")
+    rollups.create_index([("last_seen", DESCENDING)], name="last_seen_desc")
+
+
+def top_rollups(rollups: Any, limit: int) -> List[Dict[str, Any]]:
+    """
+    Возвращает самые частые запросы (сканирование индекса по count).
+    """
+    cursor = rollups.find({}).sort([("count", DESCENDING), ("last_seen", DESCENDING)])
+    return list(cursor.limit(limit))
+
+
+def recent_rollups(rollups: Any, limit: int) -> List[Dict[str, Any]]:
+    """
+    Возвращает последние уникальные запросы (сканирование индекса по last_seen).
+    """
+    return list(rollups.find({}).sort("last_seen", DESCENDING).limit(limit))
+
+
+def backfill_rollups(logs: Any, rollups: Any, batch_size: int = 1000) -> int:
+    """
+    Полностью перестраивает коллекцию агрегатов по существующим сырым логам.
+    Повторный запуск даёт тот же результат (документы заменяются, а не увеличиваются).
+
+    :param logs: MongoDB-коллекция сырых поисковых логов
+    :param rollups: MongoDB-коллекция агрегатов
+    :param batch_size: Размер пачки для bulk_write
+    :return: Количество записанных агрегатов
+    """
+    ensure_rollup_indexes(rollups)
+    pipeline = [
+        {"$sort": {"timestamp": ASCENDING}},
+        {
+            "$group": {
+                "_id": {"search_type": "$search_type", "params": "$params"},
+                "count": {"$sum": 1},
+                "last_seen": {"$max": "$timestamp"},
+                "results_count": {"$last": "$results_count"},
+            }
+        },
+    ]
+
+    written = 0
+    batch: List[ReplaceOne] = []
+    for entry in logs.aggregate(pipeline, allowDiskUse=True):
+        search_type = entry["_id"]["search_type"]
+        params = entry["_id"]["params"]
+        fingerprint = search_fingerprint(search_type, params)
+        doc = {
+            "_id": fingerprint,
+            "search_type": search_type,
+            "params": params,
+            "count": entry["count"],
+            "last_seen": entry["last_seen"],
+            "results_count": entry["results_count"],
+        }
+        batch.append(ReplaceOne({"_id": fingerprint}, doc, upsert=True))
+        if len(batch) >= batch_size:
+            rollups.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        rollups.bulk_write(batch, ordered=False)
+        written += len(batch)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки: python -m final_movies.log_rollups backfill
+    """
+    parser = argparse.ArgumentParser(description="Search popularity rollup maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill = subparsers.add_parser("backfill", help="Rebuild rollups from raw search logs")
+    backfill.add_argument("--batch-size", type=int, default=1000)
+    backfill.add_argument(
+        "--drop", action="store_true", help="Drop existing rollups before rebuilding"
+    )
+    args = parser.parse_args(argv)
+
+    from final_movies.log_writer import get_collection, get_rollup_collection
+
+    collection, rollup_collection = get_collection(), get_rollup_collection()
+    if collection is None or rollup_collection is None:
+        print("❌ MongoDB is not available.")
+        return 1
+    try:
+        if args.drop:
+            rollup_collection.drop()
+        written = backfill_rollups(collection, rollup_collection, args.batch_size)
+    except PyMongoError as e:
+        print(f"❌ Backfill failed: {e}")
+        return 1
+    print(f"✅ Rollups rebuilt: {written} unique searches.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
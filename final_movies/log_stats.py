@@ -1,15 +1,26 @@
 # Импорт библиотек и модулей
-from dotenv import load_dotenv  # Для загрузки переменных окружения из .env-файла
-from final_movies.log_writer import collection  # MongoDB-коллекция для хранения логов поиска
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, List, Optional
+
+from final_movies.log_writer import (
+    get_collection,  # MongoDB-коллекция сырых поисковых логов
+    get_rollup_collection,  # MongoDB-коллекция агрегатов поисковых запросов
+)
+from final_movies.log_rollups import top_rollups, recent_rollups  # Выборки ТОП-N из агрегатов
 from final_movies.mysql_connector import get_all_genres  # Функция для получения жанров из базы MySQL
 from final_movies.all_searches import available_ratings  # Словарь с расшифровкой MPAA рейтингов
+from final_movies.formatter import print_pretty_table  # Вывод таблиц
+from final_movies.query_metrics import get_registry, export_prometheus  # Метрики SQL-запросов
+from final_movies.search_cache import get_search_cache_stats  # Статистика кэша результатов поиска
+from final_movies.cache_warmup import get_last_warmup_report  # Итог прогрева кэшей при запуске
 
-# Загружаем переменные окружения
-load_dotenv()
 
-# Загружаем жанры из базы и создаём отображение genre_id -> name
-genres = get_all_genres()
-genre_map = {g["genre_id"]: g["name"] for g in genres}
+def get_genre_map() -> Dict[int, str]:
+    """
+    Возвращает отображение genre_id -> name.
+    Жанры запрашиваются из базы при первом обращении и берутся из кэша каталога жанров.
+    """
+    return {g["genre_id"]: g["name"] for g in get_all_genres()}
 
 
 def format_search_label(search_type: str, params: dict) -> str:
@@ -35,24 +46,33 @@ def format_search_label(search_type: str, params: dict) -> str:
         return f"{search_type}: {params}"
 
 
-def display_top_searches(limit: int = 5) -> None:
+def get_top_searches(limit: int = 5, days: Optional[int] = None) -> List[Dict[str, Any]]:
     """
-    Выводит ТОП самых популярных поисковых запросов, независимо от их типа.
+    ТОП самых популярных поисковых запросов, независимо от их типа.
 
-    Группирует по типу и параметрам поиска, сортирует по количеству запросов
-    и отображает ограниченное число самых частых записей.
+    Без days читает заранее агрегированные счётчики из коллекции агрегатов
+    (ведётся log_search) по индексу count — без группировки сырых логов.
+    С days агрегирует сырые логи, начиная с диапазонного условия по timestamp:
+    $match использует индекс по времени, поэтому сканируются только записи
+    за выбранный период, а не вся история.
 
-    :param limit: Максимальное количество записей для отображения
+    :param limit: Максимальное количество записей
+    :param days: Длина периода в днях (None — за всё время)
+    :return: Список словарей search_type, params, label, count
     """
-    print("\n=== Top Popular Searches (All Types) ===")
-
-    try:
+    if days is None:
+        results = [
+            (entry["search_type"], entry["params"], entry["count"])
+            for entry in top_rollups(get_rollup_collection(), limit)
+        ]
+    else:
+        since = datetime.now(UTC) - timedelta(days=days)
         # MongoDB aggregation stage:
-        # 1. Группировка по search_type и параметрам запроса
-        # 2. Подсчёт количества повторений
-        # 3. Сортировка по убыванию
-        # 4. Ограничение количества результатов
+        # 1. Отбор логов за период (по индексу timestamp)
+        # 2. Группировка по search_type и параметрам запроса
+        # 3. Сортировка по убыванию количества и ограничение результатов
         stage = [
+            {"$match": {"timestamp": {"$gte": since}}},
             {
                 "$group": {
                     "_id": {"search_type": "$search_type", "params": "$params"},
@@ -62,16 +82,55 @@ def display_top_searches(limit: int = 5) -> None:
             {"$sort": {"count": -1}},
             {"$limit": limit},
         ]
+        results = [
+            (entry["_id"]["search_type"], entry["_id"]["params"], entry["count"])
+            for entry in get_collection().aggregate(stage)
+        ]
+    return [
+        {
+            "search_type": search_type,
+            "params": params,
+            "label": format_search_label(search_type, params),
+            "count": count,
+        }
+        for search_type, params, count in results
+    ]
+
+
+def get_last_unique_searches(limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Последние уникальные поисковые запросы по типу и параметрам.
+
+    Каждая уникальная комбинация search_type + параметры возвращается
+    с количеством результатов последнего такого запроса. Данные читаются
+    из коллекции агрегатов по индексу last_seen.
 
-        results = collection.aggregate(stage)
+    :param limit: Максимальное количество уникальных запросов
+    :return: Список словарей search_type, params, label, results_count
+    """
+    return [
+        {
+            "search_type": entry["search_type"],
+            "params": entry["params"],
+            "label": format_search_label(entry["search_type"], entry["params"]),
+            "results_count": entry["results_count"],
+        }
+        for entry in recent_rollups(get_rollup_collection(), limit)
+    ]
 
+
+def display_top_searches(limit: int = 5) -> None:
+    """
+    Выводит ТОП самых популярных поисковых запросов, независимо от их типа (см. get_top_searches).
+
+    :param limit: Максимальное количество записей для отображения
+    """
+    print("\n=== Top Popular Searches (All Types) ===")
+
+    try:
         # Вывод результатов в консоль
-        for idx, entry in enumerate(results, 1):
-            search_type = entry["_id"]["search_type"]
-            params = entry["_id"]["params"]
-            count = entry["count"]
-            label = format_search_label(search_type, params)
-            print(f"{idx}. {label}, count: {count}")
+        for idx, entry in enumerate(get_top_searches(limit), 1):
+            print(f"{idx}. {entry['label']}, count: {entry['count']}")
 
     except Exception as e:
         print(f"❌ Error fetching logs: {e}")
@@ -79,42 +138,100 @@ def display_top_searches(limit: int = 5) -> None:
 
 def display_last_unique_searches(limit: int = 5) -> None:
     """
-    Показывает последние уникальные поисковые запросы по типу и параметрам.
-
-    Каждая уникальная комбинация search_type + параметры отображается
-    с датой последнего запроса и количеством результатов.
+    Показывает последние уникальные поисковые запросы по типу и параметрам
+    (см. get_last_unique_searches).
 
     :param limit: Максимальное количество уникальных запросов для отображения
     """
     print("\n=== Last Unique Searches ===")
 
     try:
-        # Aggregation stage:
-        # 1. Группировка по типу и параметрам запроса
-        # 2. Получение последнего timestamp и первого количества результатов
-        # 3. Сортировка по дате (timestamp)
-        # 4. Лимитирование количества записей
-        stage = [
-            {
-                "$group": {
-                    "_id": {"search_type": "$search_type", "params": "$params"},
-                    "latest_timestamp": {"$max": "$timestamp"},
-                    "results_count": {"$max": "$results_count"},
-                }
-            },
-            {"$sort": {"latest_timestamp": -1}},
-            {"$limit": limit},
-        ]
+        # Вывод уникальных запросов
+        for idx, entry in enumerate(get_last_unique_searches(limit), 1):
+            print(f"{idx}. {entry['label']}, {entry['results_count']} results")
 
-        results = collection.aggregate(stage)
+    except Exception as e:
+        print(f"❌ Error fetching logs: {e}")
 
-        # Вывод уникальных запросов
-        for idx, entry in enumerate(results, 1):
-            search_type = entry["_id"]["search_type"]
-            params = entry["_id"]["params"]
-            results_count = entry["results_count"]
-            label = format_search_label(search_type, params)
-            print(f"{idx}. {label}, {results_count} results")
+
+def display_top_searches_for_period(days: int = 7, limit: int = 5) -> None:
+    """
+    Выводит ТОП поисковых запросов за последние days дней (по сырым логам, см. get_top_searches).
+
+    :param days: Длина периода в днях
+    :param limit: Максимальное количество записей для отображения
+    """
+    print(f"\n=== Top Searches (Last {days} Days) ===")
+
+    try:
+        for idx, entry in enumerate(get_top_searches(limit, days), 1):
+            print(f"{idx}. {entry['label']}, count: {entry['count']}")
 
     except Exception as e:
         print(f"❌ Error fetching logs: {e}")
+
+
+def display_query_metrics(limit: int = 10) -> None:
+    """
+    Выводит метрики SQL-запросов текущего сеанса: самые затратные запросы
+    с разбивкой времени по фазам, время загрузки и отрисовки страниц,
+    статистику кэша результатов поиска и его прогрева, последние медленные запросы.
+    Если задан QUERY_METRICS_FILE, метрики также сохраняются в текстовом формате Prometheus.
+
+    :param limit: Максимальное количество запросов в таблице
+    """
+    registry = get_registry()
+    queries = registry.query_summary()[:limit]
+    if not queries:
+        print("\n⚠️ No queries recorded yet.")
+        return
+
+    rows = [
+        [
+            q["fingerprint"],
+            q["query"][:50],
+            q["calls"],
+            q["rows"],
+            f"{q['p50_ms']:.1f}/{q['p95_ms']:.1f}",
+            f"{q['avg_connect_ms']:.1f}/{q['avg_execute_ms']:.1f}/{q['avg_fetch_ms']:.1f}",
+            q["slow"],
+            q["errors"],
+        ]
+        for q in queries
+    ]
+    print_pretty_table(
+        ["Fingerprint", "Query", "Calls", "Rows", "p50/p95 ms", "Conn/Exec/Fetch ms", "Slow", "Errors"],
+        rows,
+        title="=== Query Metrics (this session) ===",
+    )
+
+    for name, summary in registry.operation_summary().items():
+        print(
+            f"{name}: {summary['count']} times, p50 {summary['p50_ms']:.1f} ms, "
+            f"p95 {summary['p95_ms']:.1f} ms"
+        )
+
+    cache = get_search_cache_stats()
+    if cache:
+        print(
+            f"Search cache: {cache['entries']} entries, {cache['bytes'] / 1024:.0f} KiB, "
+            f"hit ratio {cache['hit_ratio']:.0%} ({cache['hits']} hits, {cache['coalesced']} coalesced, "
+            f"{cache['misses']} misses), {cache['evictions']} evicted, {cache['expirations']} expired"
+        )
+
+    warmup = get_last_warmup_report()
+    if warmup:
+        print(f"Cache warm-up: {warmup.summary()}")
+
+    slow = registry.slow_queries()
+    if slow:
+        print(f"\n🐢 Slow queries (>= {registry.slow_threshold * 1000:.0f} ms):")
+        for entry in slow[-5:]:
+            print(f"{entry['fingerprint']}: {entry['total_ms']:.1f} ms, {entry['rows']} rows")
+
+    try:
+        path = export_prometheus()
+        if path:
+            print(f"✅ Metrics exported to {path}")
+    except OSError as e:
+        print(f"❌ Error exporting metrics: {e}")
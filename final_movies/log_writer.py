@@ -1,11 +1,18 @@
-import os
+import time
+import queue
+import atexit
 import logging
+import threading
 from datetime import datetime, UTC
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-from dotenv import load_dotenv
 from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from pymongo.errors import BulkWriteError, PyMongoError
+from pymongo.write_concern import WriteConcern
+
+from final_movies.config import get_env, env_int, env_float, env_flag
+from final_movies.log_rollups import build_rollup_updates, ensure_rollup_indexes
+from final_movies.log_maintenance import ensure_log_indexes, get_retention_days, is_retention_configured
 
 # --- Настройка логирования ---
 logging.basicConfig(
@@ -14,49 +21,482 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# --- Загрузка переменных окружения ---
-load_dotenv()
+# --- Ленивое подключение к MongoDB ---
+# Клиент и коллекции создаются при первом обращении, а не при импорте модуля
+_mongo_lock = threading.Lock()
+_mongo_ready = False
+_client: Optional[MongoClient] = None
+_collection: Any = None
+_rollup_collection: Any = None
+# Индексы логов создаются один раз за процесс: фоновым писателем или при первой синхронной записи
+_indexes_lock = threading.Lock()
+_indexes_ready = False
 
-# --- Проверка переменных окружения ---
-mongo_uri = os.getenv("MONGO_URI")
-mongo_db = os.getenv("MONGO_DB")
-mongo_collection = os.getenv("MONGO_COLLECTION")
 
-if not all([mongo_uri, mongo_db, mongo_collection]):
-    raise EnvironmentError("❌ One or more MongoDB environment variables are missing.")
+def _connect_mongo() -> None:
+    """
+    Создаёт клиент MongoDB и коллекции логов один раз (потокобезопасно).
 
-# --- Подключение к MongoDB ---
-try:
-    client = MongoClient(mongo_uri, retryWrites=True)
-    db = client[mongo_db]
-    collection = db[mongo_collection]
-    logger.info("✅ Connected to MongoDB")
-except PyMongoError as e:
-    logger.error(f"❌ Failed to connect to MongoDB: {e}")
-    collection = None  # Позволяет использовать fallback при логировании
+    :raises EnvironmentError: если не заданы переменные окружения MongoDB
+    """
+    global _mongo_ready, _client, _collection, _rollup_collection, _indexes_ready
+    if _mongo_ready:
+        return
+    with _mongo_lock:
+        if _mongo_ready:
+            return
 
+        # --- Проверка переменных окружения ---
+        mongo_uri = get_env("MONGO_URI")
+        mongo_db = get_env("MONGO_DB")
+        mongo_collection = get_env("MONGO_COLLECTION")
+        # Коллекция агрегатов популярности запросов (по умолчанию <MONGO_COLLECTION>_rollup)
+        mongo_rollup_collection = get_env("MONGO_ROLLUP_COLLECTION") or f"{mongo_collection}_rollup"
 
+        if not all([mongo_uri, mongo_db, mongo_collection]):
+            raise EnvironmentError("❌ One or more MongoDB environment variables are missing.")
 
-def log_search(search_type: str, params: Dict[str, Any], results_count: int) -> None:
+        try:
+            _client = MongoClient(mongo_uri, retryWrites=True)
+            db = _client[mongo_db]
+            _collection = db[mongo_collection]
+            _rollup_collection = db[mongo_rollup_collection]
+            _indexes_ready = False
+            logger.info("✅ Connected to MongoDB")
+        except PyMongoError as e:
+            logger.error(f"❌ Failed to connect to MongoDB: {e}")
+            _collection = None  # Позволяет использовать fallback при логировании
+            _rollup_collection = None
+        _mongo_ready = True
+
+
+def get_collection() -> Any:
     """
-    Сохраняет лог о поисковом запросе в MongoDB.
+    Возвращает MongoDB-коллекцию сырых поисковых логов (None, если MongoDB недоступна).
 
-    :param search_type: Тип выполненного поиска (например, "keyword", "rating", "genre_year")
-    :param params: Словарь параметров поиска (в зависимости от типа запроса)
-    :param results_count: Количество фильмов, найденных по данному запросу
+    :raises EnvironmentError: если не заданы переменные окружения MongoDB
+    """
+    _connect_mongo()
+    return _collection
+
+
+def get_rollup_collection() -> Any:
     """
-    log_entry = {
-        "timestamp": datetime.now(UTC).isoformat(),  # текущий UTC в ISO-формате
+    Возвращает MongoDB-коллекцию агрегатов популярности (None, если MongoDB недоступна).
+
+    :raises EnvironmentError: если не заданы переменные окружения MongoDB
+    """
+    _connect_mongo()
+    return _rollup_collection
+
+
+def parse_write_concern(value: Optional[str]) -> Optional[WriteConcern]:
+    """
+    Преобразует строку настройки MONGO_LOG_WRITE_CONCERN в WriteConcern.
+
+    :param value: "0", "1", "majority" и т.п.; пустое значение — настройки коллекции
+    :return: WriteConcern или None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    return WriteConcern(w=int(value) if value.isdigit() else value)
+
+
+def ensure_search_log_indexes(logs: Any, rollups: Any = None) -> None:
+    """
+    Создаёт индексы сырых логов и агрегатов один раз за процесс.
+    TTL индекса по времени меняется, только если MONGO_LOG_RETENTION_DAYS задан явно.
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    with _indexes_lock:
+        if _indexes_ready:
+            return
+        try:
+            ensure_log_indexes(logs, get_retention_days(), manage_ttl=is_retention_configured())
+            if rollups is not None:
+                ensure_rollup_indexes(rollups)
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Failed to create search log indexes: {e}")
+        _indexes_ready = True
+
+
+def update_rollups(
+    rollups: Any, entries: List[Dict[str, Any]], write_concern: Optional[WriteConcern] = None
+) -> None:
+    """
+    Обновляет коллекцию агрегатов популярности ($inc count, $max last_seen)
+    по пачке поисковых логов одним bulk_write.
+    """
+    if write_concern is not None:
+        rollups = rollups.with_options(write_concern=write_concern)
+    rollups.bulk_write(build_rollup_updates(entries), ordered=False)
+
+
+# Служебные маркеры очереди фонового писателя
+_FLUSH = object()
+_STOP = object()
+
+
+class SearchLogWriter:
+    """
+    Фоновый писатель поисковых логов.
+
+    log_search лишь кладёт запись в ограниченную очередь в памяти, а отдельный
+    поток записывает накопленные записи в MongoDB пачками через insert_many —
+    по достижении batch_size записей или раз в flush_interval секунд.
+    Если очередь переполнена, запись отбрасывается (счётчик dropped).
+    Вместе с сырыми логами обновляется коллекция агрегатов популярности.
+    """
+
+    def __init__(
+        self,
+        target: Any,
+        rollup_target: Any = None,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10000,
+        write_concern: Optional[WriteConcern] = None,
+        ensure_indexes: bool = False,
+    ) -> None:
+        """
+        :param target: MongoDB-коллекция для записи логов
+        :param rollup_target: MongoDB-коллекция агрегатов (None — не вести агрегаты)
+        :param batch_size: Максимальный размер пачки для insert_many
+        :param flush_interval: Максимальная задержка записи (сек.)
+        :param max_queue_size: Ёмкость очереди в памяти
+        :param write_concern: WriteConcern для вставки (None — настройки коллекции)
+        :param ensure_indexes: Создать индексы логов и агрегатов при запуске потока
+        """
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.write_concern = write_concern
+        self.ensure_indexes = ensure_indexes
+        self._target = target
+        self._rollup_target = rollup_target
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+
+        # Счётчики для мониторинга
+        self._stats: Dict[str, float] = {
+            "queued": 0,
+            "flushed": 0,
+            "dropped": 0,
+            "failed": 0,
+            "flushes": 0,
+            "flush_latency_total": 0.0,
+            "flush_latency_max": 0.0,
+            "last_flush_latency": 0.0,
+        }
+
+    def start(self) -> None:
+        """
+        Запускает фоновый поток записи (повторный вызов ничего не делает).
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="search-log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """
+        Ставит запись в очередь без ожидания.
+
+        :param entry: Документ поискового лога
+        :return: True — запись принята, False — отброшена (очередь заполнена или писатель остановлен)
+        """
+        if self._stopping.is_set():
+            with self._lock:
+                self._stats["dropped"] += 1
+            return False
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            logger.warning("⚠️ Search log queue is full — entry dropped.")
+            return False
+        with self._lock:
+            self._stats["queued"] += 1
+        return True
+
+    def _collect_batch(self) -> List[Dict[str, Any]]:
+        """
+        Собирает пачку записей: до batch_size штук или до истечения flush_interval.
+        """
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and not self._stopping.is_set():
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _FLUSH or item is _STOP:
+                # Маркер — записать накопленное, не дожидаясь таймера
+                deadline = 0
+                continue
+            batch.append(item)
+        return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        Записывает пачку в MongoDB одним insert_many и обновляет счётчики.
+        Любая ошибка записи учитывается в failed и не останавливает фоновый поток.
+        """
+        started = time.perf_counter()
+        written = 0
+        try:
+            target = self._target
+            if self.write_concern is not None:
+                target = target.with_options(write_concern=self.write_concern)
+            try:
+                target.insert_many(batch, ordered=False)
+                inserted = batch
+            except BulkWriteError as bulk_err:
+                # Неупорядоченная вставка сохраняет все записи, кроме перечисленных в writeErrors
+                rejected = {error["index"] for error in bulk_err.details.get("writeErrors", [])}
+                inserted = [entry for i, entry in enumerate(batch) if i not in rejected]
+                written = bulk_err.details.get("nInserted", len(inserted))
+                logger.error(
+                    f"❌ Failed to save {len(batch) - written} of {len(batch)} log entries: {bulk_err}"
+                )
+            else:
+                written = len(batch)
+            if self._rollup_target is not None and inserted:
+                update_rollups(self._rollup_target, inserted, self.write_concern)
+        except PyMongoError as insert_err:
+            logger.error(f"❌ Failed to save {len(batch)} log entries: {insert_err}")
+        except Exception:
+            # Например, bson.errors.InvalidDocument для параметра, который нельзя закодировать
+            logger.exception(f"❌ Failed to save {len(batch) - written} log entries")
+        latency = time.perf_counter() - started
+
+        with self._done:
+            self._stats["flushed"] += written
+            self._stats["failed"] += len(batch) - written
+            self._stats["flushes"] += 1
+            self._stats["flush_latency_total"] += latency
+            self._stats["flush_latency_max"] = max(self._stats["flush_latency_max"], latency)
+            self._stats["last_flush_latency"] = latency
+            self._done.notify_all()
+
+    def _bootstrap_indexes(self) -> None:
+        """
+        Создаёт индексы сырых логов (включая TTL) и агрегатов в фоновом потоке.
+        """
+        ensure_search_log_indexes(self._target, self._rollup_target)
+
+    def _run(self) -> None:
+        """
+        Основной цикл фонового потока.
+        """
+        if self.ensure_indexes:
+            self._bootstrap_indexes()
+        while True:
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+            elif self._stopping.is_set() and self._queue.empty():
+                break
+
+    def _pending(self) -> float:
+        return self._stats["queued"] - self._stats["flushed"] - self._stats["failed"]
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Просит фоновый поток записать очередь немедленно и ждёт завершения.
+
+        :param timeout: Максимальное время ожидания (сек.)
+        :return: True, если все принятые записи обработаны
+        """
+        try:
+            self._queue.put_nowait(_FLUSH)
+        except queue.Full:
+            pass  # Очередь полна — поток и так пишет без паузы
+        deadline = time.monotonic() + timeout
+        with self._done:
+            while self._pending() > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """
+        Останавливает приём записей, дописывает очередь и завершает поток.
+
+        :param timeout: Максимальное время ожидания записи (сек.)
+        """
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("⚠️ Search log writer did not finish in time.")
+        else:
+            # Поток не запускался — дописываем очередь в текущем потоке
+            self._run()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Возвращает снимок счётчиков: queued, flushed, dropped, failed,
+        задержки записи и текущую глубину очереди.
+        """
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["queue_depth"] = self._queue.qsize()
+        flushes = snapshot["flushes"]
+        snapshot["flush_latency_avg"] = (
+            snapshot["flush_latency_total"] / flushes if flushes else 0.0
+        )
+        return snapshot
+
+
+_writer: Optional[SearchLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer() -> SearchLogWriter:
+    """
+    Возвращает общий фоновый писатель логов, создавая и запуская его при первом обращении.
+    Параметры берутся из переменных окружения MONGO_LOG_*.
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                writer = SearchLogWriter(
+                    get_collection(),
+                    get_rollup_collection(),
+                    batch_size=env_int("MONGO_LOG_BATCH_SIZE", 100),
+                    flush_interval=env_float("MONGO_LOG_FLUSH_INTERVAL", 1.0),
+                    max_queue_size=env_int("MONGO_LOG_QUEUE_SIZE", 10000),
+                    write_concern=parse_write_concern(get_env("MONGO_LOG_WRITE_CONCERN")),
+                    ensure_indexes=True,
+                )
+                writer.start()
+                atexit.register(writer.shutdown)
+                _writer = writer
+    return _writer
+
+
+def shutdown_log_writer(timeout: float = 5.0) -> None:
+    """
+    Дописывает накопленные логи и останавливает фоновый писатель (если он запускался).
+    """
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.shutdown(timeout)
+
+
+def get_log_writer_stats() -> Dict[str, Any]:
+    """
+    Возвращает счётчики фонового писателя (пустой словарь, если он не запускался).
+    """
+    writer = _writer
+    return writer.stats() if writer is not None else {}
+
+
+def is_async_logging_enabled() -> bool:
+    """
+    Проверяет, включена ли фоновая запись логов (MONGO_LOG_ASYNC, по умолчанию включена).
+    """
+    return env_flag("MONGO_LOG_ASYNC", True)
+
+
+def build_log_entry(search_type: str, params: Dict[str, Any], results_count: int) -> Dict[str, Any]:
+    """
+    Документ поискового лога для MongoDB.
+    """
+    return {
+        "timestamp": datetime.now(UTC),  # текущий UTC (хранится как BSON datetime)
         "search_type": search_type,
         "params": params,
         "results_count": results_count,
     }
 
+
+def _get_log_collection() -> Any:
+    """
+    Коллекция логов или None (с предупреждением), если MongoDB не настроена или недоступна.
+    """
+    try:
+        collection = get_collection()
+    except EnvironmentError as env_err:
+        logger.warning(f"⚠️ Skipping MongoDB log — {env_err}")
+        return None
+
     if collection is None:
         logger.warning("⚠️ Skipping MongoDB log — no active collection.")
-        return
+    return collection
 
+
+def _insert_log_entry(collection: Any, log_entry: Dict[str, Any]) -> bool:
+    rollup_collection = get_rollup_collection()
+    # Синхронная запись (MONGO_LOG_ASYNC=0) идёт без фонового писателя — индексы создаём здесь
+    ensure_search_log_indexes(collection, rollup_collection)
     try:
         collection.insert_one(log_entry)
+        if rollup_collection is not None:
+            update_rollups(rollup_collection, [log_entry])
+        return True
     except PyMongoError as insert_err:
         logger.error(f"❌ Failed to save log entry: {insert_err}")
+        return False
+
+
+def write_log_entry(log_entry: Dict[str, Any]) -> bool:
+    """
+    Записывает документ лога в MongoDB синхронно, минуя фонового писателя
+    (для вызывающих, которые сами выполняют запись вне основного потока).
+
+    :return: True, если запись сохранена
+    """
+    collection = _get_log_collection()
+    if collection is None:
+        return False
+    return _insert_log_entry(collection, log_entry)
+
+
+def log_search(search_type: str, params: Dict[str, Any], results_count: int) -> None:
+    """
+    Сохраняет лог о поисковом запросе в MongoDB.
+
+    По умолчанию запись ставится в очередь фонового писателя и не задерживает
+    вывод результатов; при MONGO_LOG_ASYNC=0 запись выполняется синхронно.
+
+    :param search_type: Тип выполненного поиска (например, "keyword", "rating", "genre_year")
+    :param params: Словарь параметров поиска (в зависимости от типа запроса)
+    :param results_count: Количество фильмов, найденных по данному запросу
+    """
+    log_entry = build_log_entry(search_type, params, results_count)
+
+    collection = _get_log_collection()
+    if collection is None:
+        return
+
+    if is_async_logging_enabled():
+        get_log_writer().submit(log_entry)
+        return
+
+    _insert_log_entry(collection, log_entry)
@@ -5,12 +5,29 @@ from final_movies.all_searches import (
     search_by_rating_workflow,  # Поиск по рейтингу MPAA
 )
 
+# Остановка фонового писателя поисковых логов
+from final_movies.log_writer import shutdown_log_writer
+
 # Импорт функций для отображения логов и статистики
 from final_movies.log_stats import (
     display_top_searches,  # Отображение самых популярных запросов
     display_last_unique_searches,  # Отображение последних уникальных запросов
+    display_top_searches_for_period,  # Популярные запросы за последние дни
+    display_query_metrics,  # Метрики SQL-запросов текущего сеанса
 )
 
+# Экспорт метрик SQL-запросов в файл Prometheus при выходе
+from final_movies.query_metrics import export_prometheus
+
+# Фоновый прогрев кэшей популярными запросами (CACHE_WARMUP=1)
+from final_movies.cache_warmup import start_cache_warmup
+
+# Фоновое построение триграммного индекса подсказок «Did you mean»
+from final_movies.fuzzy_search import start_trigram_index_build
+
+# Фоновый опрос изменений каталога (водяные знаки не читаются на пути поиска)
+from final_movies.change_tracker import start_change_polling
+
 
 # Главная точка входа — меню поиска фильмов
 def main() -> None:
@@ -21,66 +38,89 @@ def main() -> None:
     просматривать статистику поисковых запросов или выйти из программы.
 
     Обрабатывает исключения для предотвращения аварийного завершения,
-    выводя информативные сообщения об ошибках.
+    выводя информативные сообщения об ошибках. При выходе дописывает
+    накопленные поисковые логи в MongoDB. Если включён прогрев кэшей,
+    он выполняется в фоне, пока пользователь работает с меню; так же в фоне
+    строится индекс подсказок при опечатках и опрашиваются изменения каталога.
     """
-    while True:
-        # Главное меню
-        print("\n=== Movie Finder ===")
-        print("1. Search movies by keyword")
-        print("2. Search movies by genre and year range")
-        print("3. Search movies by MPAA rating")
-        print("4. Show search activity")
-        print("5. Exit")
-
-        # Получение пользовательского выбора
+    start_change_polling()
+    start_cache_warmup()
+    start_trigram_index_build()
+    try:
+        while True:
+            # Главное меню
+            print("\n=== Movie Finder ===")
+            print("1. Search movies by keyword")
+            print("2. Search movies by genre and year range")
+            print("3. Search movies by MPAA rating")
+            print("4. Show search activity")
+            print("5. Exit")
+
+            # Получение пользовательского выбора
+            try:
+                choice = input("Select an option (1-5): ").strip()
+            except (KeyboardInterrupt, EOFError):
+                print("\nInput interrupted. Exiting Movie Finder. Goodbye!")
+                break
+
+            if choice == "1":
+                # Запуск поиска по ключевому слову
+                search_by_keyword_workflow()
+            elif choice == "2":
+                # Запуск поиска по жанру и диапазону лет
+                search_by_genre_and_year_workflow()
+            elif choice == "3":
+                # Запуск поиска по рейтингу MPAA
+                search_by_rating_workflow()
+            elif choice == "4":
+                # Подменю логов поиска
+                while True:
+                    print("\n=== Search Activity Menu ===")
+                    print("1. Show TOP 5 Popular Searches")
+                    print("2. Show 5 Last Unique Searches")
+                    print("3. Show TOP 5 Searches (Last 7 Days)")
+                    print("4. Show Query Metrics")
+                    print("5. Back to Main Menu")
+
+                    try:
+                        sub_choice = input("Select an option (1-5): ").strip()
+                    except (KeyboardInterrupt, EOFError):
+                        print("\nInput interrupted. Returning to Main Menu.")
+                        break
+
+                    if sub_choice == "1":
+                        # Показать топ 5 популярных поисков
+                        display_top_searches()
+                    elif sub_choice == "2":
+                        # Показать 5 последних уникальных поисков
+                        display_last_unique_searches()
+                    elif sub_choice == "3":
+                        # Показать топ 5 поисков за последние 7 дней
+                        display_top_searches_for_period()
+                    elif sub_choice == "4":
+                        # Показать метрики SQL-запросов
+                        display_query_metrics()
+                    elif sub_choice == "5":
+                        # Вернуться в главное меню
+                        break
+                    else:
+                        # Обработка неверного ввода
+                        print("Invalid option. Please try again.")
+            elif choice == "5":
+                # Завершение программы
+                print("Exiting Movie Finder. Goodbye!")
+                break
+            else:
+                # Обработка неверного ввода
+                print("Invalid option. Please try again.")
+    finally:
+        # Дописываем накопленные поисковые логи перед выходом
+        shutdown_log_writer()
+        # Сохраняем метрики запросов, если задан QUERY_METRICS_FILE
         try:
-            choice = input("Select an option (1-5): ").strip()
-        except (KeyboardInterrupt, EOFError):
-            print("\nInput interrupted. Exiting Movie Finder. Goodbye!")
-            break
-
-        if choice == "1":
-            # Запуск поиска по ключевому слову
-            search_by_keyword_workflow()
-        elif choice == "2":
-            # Запуск поиска по жанру и диапазону лет
-            search_by_genre_and_year_workflow()
-        elif choice == "3":
-            # Запуск поиска по рейтингу MPAA
-            search_by_rating_workflow()
-        elif choice == "4":
-            # Подменю логов поиска
-            while True:
-                print("\n=== Search Activity Menu ===")
-                print("1. Show TOP 5 Popular Searches")
-                print("2. Show 5 Last Unique Searches")
-                print("3. Back to Main Menu")
-
-                try:
-                    sub_choice = input("Select an option (1-3): ").strip()
-                except (KeyboardInterrupt, EOFError):
-                    print("\nInput interrupted. Returning to Main Menu.")
-                    break
-
-                if sub_choice == "1":
-                    # Показать топ 5 популярных поисков
-                    display_top_searches()
-                elif sub_choice == "2":
-                    # Показать 5 последних уникальных поисков
-                    display_last_unique_searches()
-                elif sub_choice == "3":
-                    # Вернуться в главное меню
-                    break
-                else:
-                    # Обработка неверного ввода
-                    print("Invalid option. Please try again.")
-        elif choice == "5":
-            # Завершение программы
-            print("Exiting Movie Finder. Goodbye!")
-            break
-        else:
-            # Обработка неверного ввода
-            print("Invalid option. Please try again.")
+            export_prometheus()
+        except OSError as e:
+            print(f"❌ Error exporting metrics: {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+"""
+Компактная неизменяемая строка результата поиска фильмов.
+
+DictCursor создаёт для каждой строки отдельный словарь с собственной хеш-таблицей
+ключей — на больших выборках это основная часть занятой памяти. MovieRow хранит
+три значения в __slots__ (без __dict__) и строится из кортежа обычного курсора,
+но остаётся отображением: поддерживает row["title"], .get, keys/values/items,
+dict(row) и сравнение со словарями, поэтому formatter, экспорт и тесты работают
+с ним так же, как со строками DictCursor.
+"""
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional, Sequence, Tuple
+
+MOVIE_ROW_FIELDS: Tuple[str, ...] = ("title", "release_year", "rating")
+
+
+class MovieRow(Mapping):
+    """
+    Строка (title, release_year, rating) с доступом как к словарю.
+    """
+
+    __slots__ = MOVIE_ROW_FIELDS
+
+    def __init__(self, title: str, release_year: Optional[int], rating: Optional[str]) -> None:
+        set_value = object.__setattr__
+        set_value(self, "title", title)
+        set_value(self, "release_year", release_year)
+        set_value(self, "rating", rating)
+
+    @classmethod
+    def from_tuple(cls, values: Sequence[Any]) -> "MovieRow":
+        """
+        Строит строку из кортежа курсора; лишние столбцы (например, relevance) отбрасываются.
+        """
+        return cls(values[0], values[1], values[2])
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in MOVIE_ROW_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(MOVIE_ROW_FIELDS)
+
+    def __len__(self) -> int:
+        return len(MOVIE_ROW_FIELDS)
+
+    def __contains__(self, key: object) -> bool:
+        return key in MOVIE_ROW_FIELDS
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("MovieRow is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("MovieRow is immutable")
+
+    def as_tuple(self) -> Tuple[Any, ...]:
+        return self.title, self.release_year, self.rating
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, MovieRow):
+            return self.as_tuple() == other.as_tuple()
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return hash(self.as_tuple())
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return MovieRow, self.as_tuple()
+
+    def __repr__(self) -> str:
+        return f"MovieRow(title={self.title!r}, release_year={self.release_year!r}, rating={self.rating!r})"
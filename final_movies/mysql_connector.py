@@ -1,24 +1,58 @@
 import os
+import re
+import json
+import time
+import base64
+import atexit
 import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Optional, Dict, Any, List, Tuple
-
-# Загрузка переменных окружения
-from dotenv import load_dotenv
+from typing import Optional, Dict, Any, List, Sequence, Set, Tuple, Callable, Iterator
 
 # Импорт библиотеки для работы с MySQL
 import pymysql
 import pymysql.cursors
 
+# Ленивое чтение настроек из окружения (.env загружается при первом обращении)
+from final_movies.config import load_environment, get_env, env_float, env_int, env_flag
+from final_movies.catalog_engine import CatalogEngine
+from final_movies.movie_row import MovieRow
+from final_movies.query_builder import (
+    GenreFilter,
+    RatingFilter,
+    SearchFilters,
+    batch_query,
+    count_query,
+    page_query,
+    seek_query,
+    select_query,
+)
+from final_movies.change_tracker import (
+    Watermark,
+    fetch_changed_rows,
+    format_watermark,
+    parse_watermark,
+    poll_changes,
+    read_watermarks,
+)
+from final_movies.catalog_snapshot import (
+    SnapshotError,
+    open_snapshot,
+    snapshot_is_current,
+    write_snapshot,
+)
+from final_movies.query_metrics import get_registry, is_query_metrics_enabled
+from final_movies.search_cache import SearchKey, get_search_cache, is_search_cache_enabled, make_search_key
+
 
 # Настройка базового логирования
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
 )
 
-# Загружаем переменные окружения из .env
-load_dotenv()
-
 
 def get_mysql_connection() -> pymysql.connections.Connection:
     """
@@ -27,6 +61,7 @@ def get_mysql_connection() -> pymysql.connections.Connection:
 
     :return: Объект подключения к базе данных
     """
+    load_environment()
     try:
         # Подключение к БД с помощью параметров из окружения
         return pymysql.connect(
@@ -49,51 +84,509 @@ def is_nonempty_result(result: Any) -> bool:
     return result is not None and isinstance(result, list) and len(result) > 0
 
 
+class _PoolEntry:
+    """
+    Служебная запись пула: соединение и его временные метки.
+    """
+
+    __slots__ = ("connection", "created_at", "last_used")
+
+    def __init__(self, connection: pymysql.connections.Connection) -> None:
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class MySQLConnectionPool:
+    """
+    Ограниченный потокобезопасный пул соединений MySQL.
+
+    Соединения создаются по требованию (но не больше max_size), переиспользуются
+    между запросами и закрываются, если простаивают дольше max_idle секунд
+    или живут дольше max_lifetime секунд. Перед выдачей соединение, простоявшее
+    дольше health_check_after секунд, проверяется через ping().
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any] = get_mysql_connection,
+        min_size: int = 1,
+        max_size: int = 5,
+        max_idle: float = 300.0,
+        max_lifetime: float = 3600.0,
+        checkout_timeout: float = 10.0,
+        health_check_after: float = 30.0,
+    ) -> None:
+        """
+        :param connection_factory: Функция, создающая новое соединение
+        :param min_size: Сколько соединений держать открытыми даже при простое
+        :param max_size: Максимальное число одновременно открытых соединений
+        :param max_idle: Максимальное время простоя соединения (сек.)
+        :param max_lifetime: Максимальное время жизни соединения (сек.)
+        :param checkout_timeout: Сколько ждать свободного соединения (сек.)
+        :param health_check_after: Простой, после которого соединение пингуется (сек.)
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if not 0 <= min_size <= max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._factory = connection_factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle: deque = deque()  # Свободные соединения (LIFO — «тёплые» сверху)
+        self._in_use: Dict[int, _PoolEntry] = {}  # id(connection) -> запись
+        self._size = 0  # Открытые соединения + зарезервированные под создание
+        self._closed = False
+
+        # Метрики пула
+        self._metrics: Dict[str, float] = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "timeouts": 0,
+            "creations": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+        }
+
+    def _is_expired(self, entry: _PoolEntry, now: float) -> bool:
+        """
+        Проверяет, истёк ли срок жизни или простоя соединения.
+        Соединения в пределах min_size не закрываются по простою.
+        """
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            return True
+        if self.max_idle and now - entry.last_used > self.max_idle:
+            return self._size > self.min_size
+        return False
+
+    def _close_entry(self, entry: _PoolEntry) -> None:
+        """
+        Закрывает соединение, игнорируя ошибки закрытия.
+        """
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, entry: _PoolEntry, now: float) -> bool:
+        """
+        Проверяет соединение через ping(), если оно долго простаивало.
+        """
+        if now - entry.last_used < self.health_check_after:
+            return True
+        try:
+            entry.connection.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logging.warning(f"MySQL pool health check failed: {e}")
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """
+        Выдаёт соединение из пула, при необходимости создавая новое
+        или ожидая освобождения занятого.
+
+        :param timeout: Время ожидания (по умолчанию checkout_timeout)
+        :return: Объект подключения к базе данных
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_started = time.monotonic()
+
+        while True:
+            stale: List[_PoolEntry] = []
+            entry: Optional[_PoolEntry] = None
+            create = False
+
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("MySQL connection pool is closed")
+
+                while True:
+                    now = time.monotonic()
+                    # Берём «тёплое» соединение, отбрасывая просроченные
+                    while self._idle:
+                        candidate = self._idle.pop()
+                        if self._is_expired(candidate, now):
+                            self._size -= 1
+                            self._metrics["recycled"] += 1
+                            stale.append(candidate)
+                            continue
+                        entry = candidate
+                        break
+                    if entry is not None:
+                        break
+                    # Свободных нет — резервируем место под новое соединение
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+                    # Пул исчерпан — ждём освобождения
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._metrics["timeouts"] += 1
+                        raise ConnectionError(
+                            f"MySQL connection pool exhausted (max_size={self.max_size})"
+                        )
+                    if not waited:
+                        waited = True
+                        self._metrics["waits"] += 1
+                    self._cond.wait(remaining)
+
+                if waited:
+                    self._metrics["wait_time_total"] += time.monotonic() - wait_started
+
+            # Сетевые операции выполняем вне блокировки
+            for old in stale:
+                self._close_entry(old)
+
+            if create:
+                try:
+                    entry = _PoolEntry(self._factory())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._metrics["creations"] += 1
+            elif not self._is_healthy(entry, time.monotonic()):
+                self._close_entry(entry)
+                with self._cond:
+                    self._size -= 1
+                    self._metrics["health_check_failures"] += 1
+                    self._cond.notify()
+                continue
+
+            with self._cond:
+                self._in_use[id(entry.connection)] = entry
+                self._metrics["checkouts"] += 1
+            return entry.connection
+
+    def release(self, connection: Any, discard: bool = False) -> None:
+        """
+        Возвращает соединение в пул.
+
+        :param connection: Соединение, ранее полученное через acquire()
+        :param discard: Закрыть соединение вместо возврата (например, после сетевой ошибки)
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                return
+            now = time.monotonic()
+            entry.last_used = now
+            expired = self.max_lifetime and now - entry.created_at > self.max_lifetime
+            if discard or expired or self._closed:
+                self._size -= 1
+                if expired and not discard:
+                    self._metrics["recycled"] += 1
+                self._cond.notify()
+            else:
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._close_entry(entry)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Контекстный менеджер: выдаёт соединение и возвращает его в пул.
+        Соединение с сетевой ошибкой (OperationalError/InterfaceError) закрывается.
+
+        :param timeout: Время ожидания соединения (по умолчанию checkout_timeout)
+        """
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except (pymysql.OperationalError, pymysql.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def prefill(self) -> None:
+        """
+        Открывает соединения до min_size (например, при прогреве приложения).
+        """
+        connections = []
+        try:
+            # Удерживаем min_size соединений одновременно, чтобы пул их создал
+            for _ in range(self.min_size):
+                connections.append(self.acquire())
+        finally:
+            for conn in connections:
+                self.release(conn)
+
+    def close(self) -> None:
+        """
+        Закрывает пул и все свободные соединения.
+        Занятые соединения закрываются при возврате.
+        """
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_entry(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Возвращает снимок метрик пула.
+
+        :return: Словарь с размерами пула и счётчиками (checkouts, waits, creations и т.д.)
+        """
+        with self._cond:
+            snapshot = dict(self._metrics)
+            snapshot.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                min_size=self.min_size,
+                max_size=self.max_size,
+            )
+            return snapshot
+
+
+_pool: Optional[MySQLConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> MySQLConnectionPool:
+    """
+    Возвращает общий пул соединений, создавая его при первом обращении.
+    Размеры и тайм-ауты пула берутся из переменных окружения MYSQL_POOL_*.
+
+    :return: Пул соединений MySQL
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = MySQLConnectionPool(
+                    min_size=env_int("MYSQL_POOL_MIN_SIZE", 1),
+                    max_size=env_int("MYSQL_POOL_MAX_SIZE", 5),
+                    max_idle=env_float("MYSQL_POOL_MAX_IDLE", 300.0),
+                    max_lifetime=env_float("MYSQL_POOL_MAX_LIFETIME", 3600.0),
+                    checkout_timeout=env_float("MYSQL_POOL_TIMEOUT", 10.0),
+                    health_check_after=env_float("MYSQL_POOL_HEALTH_CHECK_AFTER", 30.0),
+                )
+                atexit.register(pool.close)
+                _pool = pool
+    return _pool
+
+
+def set_connection_pool(pool: Optional[MySQLConnectionPool]) -> None:
+    """
+    Подменяет общий пул соединений (например, для тестов или другой БД).
+    Предыдущий пул закрывается.
+
+    :param pool: Новый пул или None, чтобы пересоздать пул из окружения при следующем запросе
+    """
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    if previous is not None and previous is not pool:
+        previous.close()
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Возвращает метрики общего пула соединений.
+    """
+    return get_connection_pool().stats()
+
+
 # Обёртка для выполнения SQL-запросов с безопасной обработкой ошибок
-def execute_select_query(query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+_deadline = threading.local()
+_SELECT_KEYWORD = re.compile(r"^\s*\(?\s*SELECT\b", re.IGNORECASE)
+
+
+@contextmanager
+def query_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Ограничивает общее время запросов execute_select_query в текущем потоке
+    (например, одного HTTP-запроса): ожидание соединения пула не дольше оставшегося
+    времени, а сам SELECT прерывает сервер по подсказке MAX_EXECUTION_TIME.
+    После истечения срока запросы не выполняются (TimeoutError).
+
+    :param seconds: Бюджет времени в секундах (None — без ограничения)
+    """
+    previous = getattr(_deadline, "at", None)
+    _deadline.at = None if seconds is None else time.monotonic() + seconds
+    try:
+        yield
+    finally:
+        _deadline.at = previous
+
+
+def _remaining_query_time() -> Optional[float]:
+    deadline = getattr(_deadline, "at", None)
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Query deadline exceeded")
+    return remaining
+
+
+def with_max_execution_time(query: str, seconds: float) -> str:
+    """
+    Добавляет к SELECT подсказку оптимизатора MAX_EXECUTION_TIME (в миллисекундах);
+    для UNION она действует на весь запрос. Другие запросы возвращаются без изменений.
+    """
+    milliseconds = max(1, int(seconds * 1000))
+    return _SELECT_KEYWORD.sub(
+        lambda match: f"{match.group(0)} /*+ MAX_EXECUTION_TIME({milliseconds}) */", query, count=1
+    )
+
+
+def execute_select_query(
+    query: str,
+    params: Tuple = (),
+    row_factory: Optional[Callable[[Sequence[Any]], Any]] = None,
+    raise_errors: bool = False,
+) -> List[Any]:
     """
     Универсальный исполнитель SQL-запросов SELECT.
-    Выполняет запрос и возвращает результат в виде списка словарей.
+    Выполняет запрос на соединении из пула и возвращает результат в виде списка словарей.
 
     :param query: SQL-запрос
     :param params: параметры запроса (для подстановки)
-    :return: список словарей с результатами запроса
+    :param row_factory: Если задан — строки читаются обычным (кортежным) курсором
+        и преобразуются этой функцией вместо создания словарей
+    :param raise_errors: Пробрасывать ошибки MySQL (после записи в журнал) вместо
+        пустого результата — чтобы вызывающий код не закэшировал неудачный запрос
+    :return: список словарей (или объектов row_factory) с результатами запроса
+    :raises TimeoutError: если истёк срок query_deadline
     """
+    remaining = _remaining_query_time()
+    statement = query if remaining is None else with_max_execution_time(query, remaining)
+    # Отметки времени фаз: получение соединения, выполнение, выборка строк
+    started = connected = executed = time.perf_counter()
+    result: Any = []
+    error = True
     try:
-        with get_mysql_connection() as connection:
-            with connection.cursor() as cursor:
-                cursor.execute(query, params)
+        with get_connection_pool().connection(remaining) as connection:
+            connected = executed = time.perf_counter()
+            cursor_class = pymysql.cursors.Cursor if row_factory is not None else None
+            with connection.cursor(cursor_class) as cursor:
+                cursor.execute(statement, params)
+                executed = time.perf_counter()
                 result = cursor.fetchall()
-                return result if isinstance(result, list) else []
+                if row_factory is not None:
+                    result = [row_factory(row) for row in result or ()]
+                result = result if isinstance(result, list) else []
+                error = False
     except pymysql.ProgrammingError as e:
         logging.error(f"SQL execution error: {e}")
-        return []
+        if raise_errors:
+            raise
     except pymysql.MySQLError as e:
         logging.error(f"MySQL error: {e}")
-        return []
+        if raise_errors:
+            raise
+    finally:
+        if is_query_metrics_enabled():
+            finished = time.perf_counter()
+            get_registry().record_query(
+                query,
+                params,
+                connect=connected - started,
+                execute=executed - connected,
+                fetch=max(0.0, finished - executed),
+                rows=len(result),
+                error=error,
+            )
+    return result
 
 
-@lru_cache(maxsize=1)
-def get_all_genres() -> List[Dict[str, Any]]:
+def get_genre_catalog() -> List[Dict[str, Any]]:
     """
-    Возвращает список всех жанров, у которых есть хотя бы один фильм.
-    Использует кэширование, чтобы не выполнять запрос повторно.
+    Возвращает каталог жанров одним сгруппированным запросом:
+    для каждого жанра, у которого есть хотя бы один фильм, — его ID, название,
+    минимальный и максимальный год выпуска и количество фильмов.
 
-    :return: Список жанров (genre_id и name)
+    Результат кэшируется; кэш сбрасывается трекером изменений, когда меняются
+    film, film_category или category (см. change_tracker), или invalidate_genre_cache.
+
+    :return: Список словарей (genre_id, name, min_year, max_year, film_count)
     """
+    poll_changes()
+    return _load_genre_catalog()
+
+
+@lru_cache(maxsize=1)
+def _load_genre_catalog() -> List[Dict[str, Any]]:
+    engine = _active_catalog_engine()
+    if engine is not None:
+        return engine.genre_catalog()
+
     query = """
-        SELECT c.category_id AS genre_id, c.name
+        SELECT c.category_id AS genre_id, c.name,
+               MIN(f.release_year) AS min_year,
+               MAX(f.release_year) AS max_year,
+               COUNT(DISTINCT f.film_id) AS film_count
         FROM category c
-        WHERE EXISTS (
-            SELECT 1
-            FROM film_category fc
-            WHERE fc.category_id = c.category_id
-        )
+        JOIN film_category fc ON fc.category_id = c.category_id
+        JOIN film f ON f.film_id = fc.film_id
+        GROUP BY c.category_id, c.name
         ORDER BY c.name;
     """
     return execute_select_query(query)
 
 
+def get_all_genres() -> List[Dict[str, Any]]:
+    """
+    Возвращает список всех жанров, у которых есть хотя бы один фильм.
+    Берётся из кэшированного каталога жанров, поэтому не выполняет запрос повторно.
+
+    :return: Список жанров (genre_id и name)
+    """
+    return [{"genre_id": g["genre_id"], "name": g["name"]} for g in get_genre_catalog()]
+
+
+def invalidate_genre_cache() -> None:
+    """
+    Сбрасывает кэш каталога жанров (и списка жанров, который из него строится).
+    """
+    _load_genre_catalog.cache_clear()
+
+
+def on_genre_source_change(changes: List[Any], current: Dict[str, Watermark]) -> None:
+    """
+    Подписчик трекера изменений: сбрасывает кэш каталога жанров.
+    """
+    invalidate_genre_cache()
+
+
+# Запросы по одному жанру (их планы проверяет schema_admin indexes)
+GENRE_YEARS_QUERY = """
+    SELECT MIN(f.release_year) AS min_year, MAX(f.release_year) AS max_year
+    FROM film f
+    JOIN film_category fc ON f.film_id = fc.film_id
+    WHERE fc.category_id = %s
+"""
+GENRE_COUNT_QUERY = """
+    SELECT COUNT(DISTINCT f.film_id) AS count
+    FROM film f
+    JOIN film_category fc ON f.film_id = fc.film_id
+    WHERE fc.category_id = %s
+"""
+
+
 def get_min_max_years_for_genre(genre_id: int) -> Tuple[Optional[int], Optional[int]]:
     """
     Определяет минимальный и максимальный год выпуска фильмов для заданного жанра.
@@ -101,13 +594,7 @@ def get_min_max_years_for_genre(genre_id: int) -> Tuple[Optional[int], Optional[
     :param genre_id: ID жанра (category_id)
     :return: кортеж из двух элементов (min_year, max_year), либо (None, None) при отсутствии данных
     """
-    query = """
-        SELECT MIN(f.release_year) AS min_year, MAX(f.release_year) AS max_year
-        FROM film f
-        JOIN film_category fc ON f.film_id = fc.film_id
-        WHERE fc.category_id = %s
-    """
-    result = execute_select_query(query, (genre_id,))
+    result = execute_select_query(GENRE_YEARS_QUERY, (genre_id,))
     if is_nonempty_result(result):
         return result[0]["min_year"], result[0]["max_year"]
     return None, None
@@ -120,70 +607,890 @@ def get_genre_movie_count(genre_id: int) -> int:
     :param genre_id: ID жанра
     :return: число фильмов в жанре
     """
-    query = """
-        SELECT COUNT(DISTINCT f.film_id) AS count
-        FROM film f
-        JOIN film_category fc ON f.film_id = fc.film_id
-        WHERE fc.category_id = %s
-    """
-    result = execute_select_query(query, (genre_id,))
+    result = execute_select_query(GENRE_COUNT_QUERY, (genre_id,))
     if is_nonempty_result(result):
         return result[0]["count"]
     return 0
 
 
+_catalog_engine: Optional[CatalogEngine] = None
+_catalog_engine_lock = threading.Lock()
+
+
+def is_catalog_engine_enabled() -> bool:
+    """
+    Выбран ли поиск по каталогу в памяти (SEARCH_BACKEND=memory; по умолчанию — sql).
+    """
+    return (get_env("SEARCH_BACKEND") or "sql").strip().lower() == "memory"
+
+
+def get_catalog_watermark() -> str:
+    """
+    Водяной знак источника каталога (см. change_tracker.read_watermarks):
+    меняется при любой вставке, удалении или изменении строк film,
+    film_category и category.
+    """
+    return format_watermark(read_watermarks())
+
+
+def build_catalog_engine(watermark: Optional[str] = None) -> CatalogEngine:
+    """
+    Загружает каталог фильмов, связей с жанрами и названий жанров и строит CatalogEngine.
+    Ошибки MySQL не перехватываются: пустой каталог нельзя отличить от сбоя.
+    """
+    with get_connection_pool().connection() as connection:
+        # Кортежи вместо словарей: меньше памяти при загрузке всего каталога
+        with connection.cursor(pymysql.cursors.Cursor) as cursor:
+            cursor.execute("SELECT film_id, title, release_year, rating FROM film")
+            films = cursor.fetchall()
+            cursor.execute("SELECT film_id, category_id FROM film_category")
+            links = cursor.fetchall()
+            cursor.execute("SELECT category_id, name FROM category")
+            genre_names = dict(cursor.fetchall())
+    return CatalogEngine.from_rows(films, links, genre_names, watermark)
+
+
+def load_catalog_engine(current: Optional[CatalogEngine] = None) -> CatalogEngine:
+    """
+    Возвращает актуальный каталог в памяти.
+
+    Сначала сверяется водяной знак источника: если он не изменился, остаётся
+    текущий каталог или используется снимок CATALOG_SNAPSHOT_PATH (mmap, без
+    чтения каталога из MySQL). Иначе каталог загружается из MySQL и снимок
+    перестраивается. Если MySQL недоступен, используется имеющийся снимок.
+
+    :param current: Уже загруженный каталог (для проверки актуальности)
+    """
+    path = get_env("CATALOG_SNAPSHOT_PATH")
+    try:
+        watermark = get_catalog_watermark()
+    except (pymysql.MySQLError, ConnectionError) as e:
+        if current is not None:
+            return current
+        if path and os.path.exists(path):
+            logging.warning(f"MySQL unavailable, using catalog snapshot as is: {e}")
+            return open_snapshot(path)
+        raise
+
+    if current is not None and current.watermark == watermark:
+        return current
+    if path and snapshot_is_current(path, watermark):
+        try:
+            return open_snapshot(path)
+        except (OSError, SnapshotError) as e:
+            logging.warning(f"Catalog snapshot is unreadable, rebuilding: {e}")
+
+    return _publish_catalog_engine(build_catalog_engine(watermark))
+
+
+def _publish_catalog_engine(engine: CatalogEngine) -> CatalogEngine:
+    """
+    Сохраняет каталог в снимок CATALOG_SNAPSHOT_PATH (если задан) и переходит
+    на отображённый файл: его страницы разделяются между процессами.
+    """
+    path = get_env("CATALOG_SNAPSHOT_PATH")
+    if not path:
+        return engine
+    try:
+        write_snapshot(engine, path)
+        return open_snapshot(path)
+    except (OSError, SnapshotError) as e:
+        logging.warning(f"Could not write catalog snapshot {path}: {e}")
+        return engine
+
+
+def _verify_keys(keys: Any, mark: Watermark) -> bool:
+    keys = list(keys)
+    return len(keys) == mark.row_count and sum(keys) == mark.key_sum
+
+
+def refresh_catalog_engine(engine: CatalogEngine, current: Dict[str, Watermark]) -> CatalogEngine:
+    """
+    Обновляет каталог до водяных знаков current, догружая только строки,
+    изменённые после водяного знака каталога (last_update >= прежнего максимума).
+
+    Количество строк и сумма ключей после обновления сверяются с current:
+    расхождение означает удаления или перенос ключей — тогда каталог
+    загружается полностью.
+    """
+    known = parse_watermark(engine.watermark)
+    watermark = format_watermark(current)
+    if set(known) != set(current):
+        return build_catalog_engine(watermark)
+
+    films = {row[0]: row for row in engine.rows()}
+    links = set(engine.links())
+    genre_names = dict(engine.genre_names)
+    consistent = True
+    if known["film"] != current["film"]:
+        for row in fetch_changed_rows(
+            "film", ("film_id", "title", "release_year", "rating"), known["film"].last_update
+        ):
+            films[row[0]] = row
+        consistent &= _verify_keys(films, current["film"])
+    if known["film_category"] != current["film_category"]:
+        links.update(
+            (film_id, category_id)
+            for film_id, category_id in fetch_changed_rows(
+                "film_category", ("film_id", "category_id"), known["film_category"].last_update
+            )
+        )
+        consistent &= _verify_keys(
+            (film_id * 256 + category_id for film_id, category_id in links), current["film_category"]
+        )
+    if known["category"] != current["category"]:
+        genre_names.update(
+            fetch_changed_rows("category", ("category_id", "name"), known["category"].last_update)
+        )
+        consistent &= _verify_keys(genre_names, current["category"])
+
+    if not consistent:
+        logging.info("Catalog rows were deleted or re-keyed, reloading the catalog")
+        return build_catalog_engine(watermark)
+    return CatalogEngine.from_rows(films.values(), links, genre_names, watermark)
+
+
+def on_catalog_change(changes: List[Any], current: Dict[str, Watermark]) -> None:
+    """
+    Подписчик трекера изменений: инкрементально обновляет загруженный каталог в памяти.
+    """
+    global _catalog_engine
+    with _catalog_engine_lock:
+        engine = _catalog_engine
+        if engine is None or engine.watermark == format_watermark(current):
+            return
+        _catalog_engine = _publish_catalog_engine(refresh_catalog_engine(engine, current))
+        logging.info(f"Catalog engine refreshed: {len(_catalog_engine)} films")
+
+
+def get_catalog_engine() -> CatalogEngine:
+    """
+    Возвращает общий каталог в памяти, загружая его при первом обращении.
+    Дальнейшие изменения таблиц подхватываются трекером изменений
+    (не чаще раза в CHANGE_POLL_INTERVAL секунд) без полной перезагрузки.
+    """
+    global _catalog_engine
+    # Опрос до первой загрузки фиксирует исходные водяные знаки трекера:
+    # изменения, сделанные во время загрузки, будут замечены следующим опросом
+    poll_changes()
+    if _catalog_engine is None:
+        with _catalog_engine_lock:
+            if _catalog_engine is None:
+                _catalog_engine = load_catalog_engine()
+                logging.info(f"Catalog engine loaded: {len(_catalog_engine)} films")
+    return _catalog_engine
+
+
+def invalidate_catalog_engine() -> None:
+    """
+    Сбрасывает каталог в памяти (например, после изменения таблиц film/film_category).
+    """
+    global _catalog_engine
+    with _catalog_engine_lock:
+        _catalog_engine = None
+
+
+def get_film_titles() -> List[str]:
+    """
+    Возвращает уникальные названия фильмов (для индексов подсказок и автодополнения):
+    из каталога в памяти, если он используется, иначе одним запросом к MySQL.
+    Ошибки MySQL не перехватываются.
+    """
+    if is_catalog_engine_enabled():
+        return sorted({title for _, title, _, _ in get_catalog_engine().rows()})
+    with get_connection_pool().connection() as connection:
+        with connection.cursor(pymysql.cursors.Cursor) as cursor:
+            cursor.execute("SELECT DISTINCT title FROM film ORDER BY title")
+            return [row[0] for row in cursor.fetchall()]
+
+
+def _active_catalog_engine() -> Optional[CatalogEngine]:
+    """
+    Каталог в памяти, если он выбран настройкой и загружается; иначе None (поиск через SQL).
+    """
+    if not is_catalog_engine_enabled():
+        return None
+    try:
+        return get_catalog_engine()
+    except (pymysql.MySQLError, ConnectionError) as e:
+        logging.warning(f"Catalog engine unavailable, falling back to SQL: {e}")
+        return None
+
+
+# Стоп-слова InnoDB по умолчанию (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD):
+# в индекс они не попадают, поэтому такие слова ищутся через LIKE
+FULLTEXT_STOPWORDS = frozenset(
+    "a about an are as at be by com de en for from how i in is it la of on or "
+    "that the this to was what when where who will with und www".split()
+)
+_FULLTEXT_TOKEN = re.compile(r"\w+")
+
+
+def get_keyword_search_mode() -> str:
+    """
+    Режим поиска по ключевому слову (KEYWORD_SEARCH_MODE): "like" — подстрока
+    в названии (по умолчанию), "fulltext" — FULLTEXT-индекс по началам слов.
+    """
+    mode = (get_env("KEYWORD_SEARCH_MODE") or "like").strip().lower()
+    return mode if mode in ("like", "fulltext") else "like"
+
+
+def fulltext_columns() -> Tuple[str, ...]:
+    """
+    Столбцы FULLTEXT-индекса: title или, при FULLTEXT_INCLUDE_DESCRIPTION=1, title и description.
+    """
+    return ("title", "description") if env_flag("FULLTEXT_INCLUDE_DESCRIPTION", False) else ("title",)
+
+
+def build_fulltext_query(keyword: Optional[str]) -> Optional[str]:
+    """
+    Преобразует ключевое слово в запрос MATCH ... AGAINST в BOOLEAN MODE:
+    каждое слово обязательно и ищется по префиксу ("+acad* +din*").
+
+    :return: Строка запроса или None, если поиск нужно выполнить через LIKE
+             (режим like, слова короче FULLTEXT_MIN_TOKEN_SIZE или стоп-слова)
+    """
+    if not keyword or get_keyword_search_mode() != "fulltext":
+        return None
+    tokens = _FULLTEXT_TOKEN.findall(keyword.lower())
+    min_size = env_int("FULLTEXT_MIN_TOKEN_SIZE", 3)
+    if not tokens or any(len(t) < min_size or t in FULLTEXT_STOPWORDS for t in tokens):
+        return None
+    return " ".join(f"+{token}*" for token in tokens)
+
+
+def build_search_filters(
+    keyword: Optional[str] = None,
+    genre_id: GenreFilter = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    rating: RatingFilter = None,
+) -> SearchFilters:
+    """
+    Нормализует параметры поиска для query_builder (с учётом KEYWORD_SEARCH_MODE).
+    Используется и полным поиском, и постраничным, и подсчётом результатов.
+    """
+    return SearchFilters.from_params(
+        keyword, genre_id, year_from, year_to, rating,
+        fulltext=build_fulltext_query(keyword),
+        fulltext_columns=fulltext_columns(),
+    )
+
+
 def search_movies(
     keyword: Optional[str] = None,
-    genre_id: Optional[int] = None,
+    genre_id: GenreFilter = None,
     year_from: Optional[int] = None,
     year_to: Optional[int] = None,
-    rating: Optional[str] = None,
-) -> List[Dict[str, Any]]:
+    rating: RatingFilter = None,
+) -> List[MovieRow]:
     """
     Выполняет поиск фильмов по одному или нескольким критериям:
     - по ключевому слову в названии
-    - по ID жанра
-    - по диапазону годов выпуска
-    - по рейтингу MPAA.
+    - по ID жанра (одному или нескольким)
+    - по диапазону годов выпуска (границы можно задавать по отдельности)
+    - по рейтингу MPAA (одному или нескольким).
 
     Все параметры являются необязательными и могут комбинироваться.
+    При KEYWORD_SEARCH_MODE=fulltext ключевое слово ищется по FULLTEXT-индексу
+    (начала слов), а результаты упорядочены по релевантности.
 
     :param keyword: Часть названия фильма (без учёта регистра)
-    :param genre_id: ID жанра
-    :param year_from: начальный год
-    :param year_to: конечный год
-    :param rating: рейтинг (G, PG, PG-13, R, NC-17)
+    :param genre_id: ID жанра или список ID (подходит любой из жанров)
+    :param year_from: начальный год (включительно)
+    :param year_to: конечный год (включительно)
+    :param rating: рейтинг (G, PG, PG-13, R, NC-17) или список рейтингов
     :return: список фильмов, соответствующих фильтрам
     """
-    query = """
-        SELECT DISTINCT f.title, f.release_year, f.rating
-        FROM film f
-        LEFT JOIN film_category fc ON f.film_id = fc.film_id
-        WHERE 1=1
+    if is_search_cache_enabled():
+        poll_changes()
+        key = search_key(keyword, genre_id, year_from, year_to, rating)
+        try:
+            return get_search_cache().get_or_load(
+                key,
+                lambda: _search_movies_uncached(
+                    keyword, genre_id, year_from, year_to, rating, raise_errors=True
+                ),
+            )
+        except pymysql.MySQLError:
+            # Ошибка уже записана в журнал; пустой результат не кэшируется
+            return []
+    return _search_movies_uncached(keyword, genre_id, year_from, year_to, rating)
+
+
+def search_key(
+    keyword: Optional[str] = None,
+    genre_id: GenreFilter = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    rating: RatingFilter = None,
+) -> SearchKey:
+    """
+    Ключ кэша результатов с учётом настроек, от которых зависят результаты и их порядок
+    (KEYWORD_SEARCH_MODE и SEARCH_BACKEND).
+    """
+    return make_search_key(
+        keyword, genre_id, year_from, year_to, rating,
+        mode=get_keyword_search_mode(),
+        backend="memory" if is_catalog_engine_enabled() else "sql",
+    )
+
+
+def _search_movies_uncached(
+    keyword: Optional[str],
+    genre_id: GenreFilter,
+    year_from: Optional[int],
+    year_to: Optional[int],
+    rating: RatingFilter,
+    raise_errors: bool = False,
+) -> List[MovieRow]:
+    """
+    Поиск фильмов без кэша результатов: каталог в памяти или SQL.
+    """
+    engine = _active_catalog_engine()
+    if engine is not None:
+        return engine.search(
+            keyword=keyword, genre_id=genre_id, year_from=year_from, year_to=year_to, rating=rating
+        )
+
+    query, params = select_query(build_search_filters(keyword, genre_id, year_from, year_to, rating))
+    return execute_select_query(
+        query, params, row_factory=MovieRow.from_tuple, raise_errors=raise_errors
+    )
+
+
+SEARCH_CRITERIA = ("keyword", "genre_id", "year_from", "year_to", "rating")
+
+
+def search_movies_many(
+    criteria: Sequence[Dict[str, Any]],
+    batch_size: int = 50,
+) -> List[List[MovieRow]]:
+    """
+    Выполняет несколько поисков search_movies за одно обращение к базе.
+
+    Одинаковые критерии выполняются один раз; остальные объединяются в запрос
+    UNION ALL (не больше batch_size веток в одном запросе), строки которого
+    раскладываются обратно по номеру ветки. Включённый кэш результатов и каталог
+    в памяти используются так же, как в search_movies.
+
+    :param criteria: Список словарей с параметрами search_movies
+        (например, [{"rating": "PG"}, {"genre_id": 3, "year_from": 2000}])
+    :param batch_size: Наибольшее число веток UNION ALL в одном запросе
+    :return: Результаты в порядке criteria (каждый — как у search_movies)
+    :raises TypeError: если в критериях есть неизвестные параметры
+    """
+    unique: Dict[SearchFilters, int] = {}
+    positions = []
+    for params in criteria:
+        unknown = set(params) - set(SEARCH_CRITERIA)
+        if unknown:
+            raise TypeError(f"Unknown search criteria: {', '.join(sorted(unknown))}")
+        positions.append(unique.setdefault(build_search_filters(**params), len(unique)))
+    batch = list(unique)
+    results: List[Optional[List[MovieRow]]] = [None] * len(batch)
+
+    cache = None
+    keys = [search_key(f.keyword, f.genre_ids, f.year_from, f.year_to, f.ratings) for f in batch]
+    if is_search_cache_enabled():
+        poll_changes()
+        cache = get_search_cache()
+        for index, key in enumerate(keys):
+            results[index] = cache.get(key)
+
+    pending = [index for index, rows in enumerate(results) if rows is None]
+    engine = _active_catalog_engine() if pending else None
+    failed: Set[int] = set()
+    if engine is not None:
+        for index in pending:
+            filters = batch[index]
+            results[index] = engine.search(
+                keyword=filters.keyword, genre_id=filters.genre_ids,
+                year_from=filters.year_from, year_to=filters.year_to, rating=filters.ratings,
+            )
+    else:
+        for start in range(0, len(pending), max(1, batch_size)):
+            chunk = pending[start:start + max(1, batch_size)]
+            for index in chunk:
+                results[index] = []
+            query, params = batch_query([batch[index] for index in chunk])
+            try:
+                rows = execute_select_query(
+                    query, params, row_factory=tuple, raise_errors=cache is not None
+                )
+            except pymysql.MySQLError:
+                # Пустые результаты неудачного запроса не кэшируются
+                failed.update(chunk)
+                continue
+            # Столбец tag — номер ветки в chunk, за ним столбцы строки MovieRow
+            for row in rows:
+                results[chunk[row[0]]].append(MovieRow.from_tuple(row[1:]))
+
+    if cache is not None:
+        for index in pending:
+            if index not in failed:
+                cache.put(keys[index], results[index])
+    return [list(results[index]) for index in positions]
+
+
+def search_movies_iter(
+    keyword: Optional[str] = None,
+    genre_id: GenreFilter = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    rating: RatingFilter = None,
+    chunk_size: int = 1000,
+) -> Iterator[MovieRow]:
+    """
+    Потоковый вариант search_movies для больших выборок (выгрузки, отчёты).
+
+    Строки читаются небуферизованным серверным курсором (SSCursor) порциями
+    по chunk_size, поэтому в памяти одновременно находится не больше одной порции.
+    Пока генератор не исчерпан, он занимает соединение пула; если чтение прервано,
+    соединение закрывается, а не дочитывается. Кэш результатов не используется,
+    ошибки MySQL не перехватываются.
+
+    :param chunk_size: Сколько строк читать из сокета за один раз
+    :return: генератор строк в порядке search_movies
+    """
+    engine = _active_catalog_engine()
+    if engine is not None:
+        yield from engine.iter_search(
+            keyword=keyword, genre_id=genre_id, year_from=year_from, year_to=year_to, rating=rating
+        )
+        return
+
+    query, params = select_query(build_search_filters(keyword, genre_id, year_from, year_to, rating))
+    pool = get_connection_pool()
+    started = time.perf_counter()
+    connection = pool.acquire()
+    connected = executed = time.perf_counter()
+    rows = 0
+    finished = error = False
+    try:
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(query, params)
+        executed = time.perf_counter()
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            rows += len(chunk)
+            for row in chunk:
+                yield MovieRow.from_tuple(row)
+        cursor.close()
+        finished = True
+    except Exception:
+        error = True
+        raise
+    finally:
+        # Недочитанный небуферизованный результат занимает соединение — его проще закрыть
+        pool.release(connection, discard=not finished)
+        if is_query_metrics_enabled():
+            get_registry().record_query(
+                query,
+                params,
+                connect=connected - started,
+                execute=executed - connected,
+                fetch=max(0.0, time.perf_counter() - executed),
+                rows=rows,
+                error=error,
+            )
+
+
+# Ключ строки в порядке страниц: (release_year, title, film_id),
+# при ранжировании FULLTEXT — (relevance, release_year, title, film_id)
+PageKey = Tuple[Any, ...]
+
+
+def encode_page_cursor(key: Sequence[Any]) -> str:
     """
-    params = []
+    Кодирует ключ строки (см. PageKey) в непрозрачный курсор страницы.
+    """
+    payload = json.dumps(list(key), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_page_cursor(cursor: str, ranked: bool = False) -> PageKey:
+    """
+    Декодирует курсор страницы обратно в ключ строки.
+
+    :param ranked: Ожидается ключ с релевантностью (поиск по FULLTEXT)
+    :raises ValueError: если курсор повреждён или выдан для другого порядка строк
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if ranked:
+            relevance, release_year, title, film_id = key
+            if not isinstance(relevance, (int, float)):
+                raise TypeError("unexpected cursor relevance")
+        else:
+            release_year, title, film_id = key
+        if not isinstance(title, str) or not isinstance(film_id, int):
+            raise TypeError("unexpected cursor fields")
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Invalid page cursor: {cursor!r}") from e
+    return tuple(key)
+
+
+def _page_key(row: Sequence[Any]) -> PageKey:
+    """
+    Ключ строки страницы (title, release_year, rating, film_id[, relevance]).
+    """
+    key = (row[1], row[0], row[3])
+    return (row[4], *key) if len(row) > 4 else key
+
+
+@dataclass(frozen=True)
+class SearchPage:
+    """
+    Одна страница результатов поиска с курсорами для перехода к соседним страницам.
+    """
+
+    rows: List[MovieRow]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_approximate: bool = False
+
+
+def count_movies(
+    keyword: Optional[str] = None,
+    genre_id: GenreFilter = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    rating: RatingFilter = None,
+    approximate: bool = False,
+    raise_errors: bool = False,
+) -> Tuple[int, bool]:
+    """
+    Подсчитывает количество строк результата search_movies (фильмы с одинаковыми
+    title, release_year и rating считаются один раз, как и на страницах).
+
+    При approximate=True и отсутствии фильтров берётся оценка числа строк
+    из information_schema (без сканирования таблицы film).
+
+    :param raise_errors: Пробрасывать ошибки MySQL вместо нулевого результата
+    :return: кортеж (количество, признак приблизительного значения)
+    """
+    if is_search_cache_enabled():
+        poll_changes()
+        key = search_key(keyword, genre_id, year_from, year_to, rating) + ("count", approximate)
+        try:
+            # Кэш хранит списки строк — подсчёт кладётся туда одной строкой
+            (count,) = get_search_cache().get_or_load(
+                key,
+                lambda: [_count_movies_uncached(
+                    keyword, genre_id, year_from, year_to, rating, approximate, raise_errors=True
+                )],
+            )
+            return count
+        except pymysql.MySQLError:
+            if raise_errors:
+                raise
+            return 0, False
+    return _count_movies_uncached(
+        keyword, genre_id, year_from, year_to, rating, approximate, raise_errors=raise_errors
+    )
+
+
+def _count_movies_uncached(
+    keyword: Optional[str],
+    genre_id: GenreFilter,
+    year_from: Optional[int],
+    year_to: Optional[int],
+    rating: RatingFilter,
+    approximate: bool,
+    raise_errors: bool = False,
+) -> Tuple[int, bool]:
+    engine = _active_catalog_engine()
+    if engine is not None:
+        count = engine.count(
+            keyword=keyword, genre_id=genre_id, year_from=year_from, year_to=year_to, rating=rating
+        )
+        return count, False
+
+    filters = build_search_filters(keyword, genre_id, year_from, year_to, rating)
+    if approximate and filters.is_empty():
+        estimate = execute_select_query(
+            """
+            SELECT TABLE_ROWS AS total
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'film'
+            """,
+            raise_errors=raise_errors,
+        )
+        if is_nonempty_result(estimate) and estimate[0]["total"] is not None:
+            return int(estimate[0]["total"]), True
+
+    query, params = count_query(filters)
+    result = execute_select_query(query, params, raise_errors=raise_errors)
+    if is_nonempty_result(result):
+        return int(result[0]["total"]), False
+    return 0, False
+
+
+def search_movies_page(
+    keyword: Optional[str] = None,
+    genre_id: GenreFilter = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    rating: RatingFilter = None,
+    cursor: Optional[str] = None,
+    direction: str = "next",
+    page_size: int = 10,
+    with_total: bool = False,
+    approximate_total: bool = False,
+    raise_errors: bool = False,
+) -> SearchPage:
+    """
+    Возвращает одну страницу результатов search_movies, используя keyset-пагинацию
+    по (release_year, title, film_id) вместо выборки всего результата. При
+    KEYWORD_SEARCH_MODE=fulltext страницы, как и search_movies, упорядочены
+    сначала по релевантности, и она входит в курсор.
 
-    # Фильтр по ключевому слову в названии
-    if keyword:
-        query += " AND LOWER(f.title) LIKE %s"
-        params.append(f"%{keyword.lower()}%")
+    :param cursor: Курсор страницы (None — первая страница)
+    :param direction: "next" — строки после курсора, "prev" — строки перед курсором
+    :param page_size: Размер страницы
+    :param with_total: Дополнительно посчитать общее количество результатов
+    :param approximate_total: Разрешить приблизительный подсчёт (см. count_movies)
+    :param raise_errors: Пробрасывать ошибки MySQL вместо пустой страницы
+        (например, чтобы HTTP API ответил 503, а не пустым результатом)
+    :return: SearchPage со строками страницы и курсорами соседних страниц
 
-    # Фильтр по жанру (category_id)
-    if genre_id:
-        query += " AND fc.category_id = %s"
-        params.append(genre_id)
+    При SEARCH_CACHE=1 строки страницы и общее количество берутся из кэша результатов.
+    """
+    if direction not in ("next", "prev"):
+        raise ValueError(f"Unknown page direction: {direction!r}")
+
+    backwards = direction == "prev" and cursor is not None
+    if is_search_cache_enabled():
+        # Страницы кэшируются по фильтрам, курсору, направлению и размеру страницы
+        # (лишняя строка «есть ли следующая страница» хранится вместе со страницей)
+        poll_changes()
+        key = search_key(keyword, genre_id, year_from, year_to, rating) + (
+            "page", cursor, backwards, page_size,
+        )
+        try:
+            rows = get_search_cache().get_or_load(
+                key,
+                lambda: _load_page_rows(
+                    keyword, genre_id, year_from, year_to, rating,
+                    cursor, backwards, page_size + 1, raise_errors=True,
+                ),
+            )
+        except pymysql.MySQLError:
+            if raise_errors:
+                raise
+            rows = []
+    else:
+        rows = _load_page_rows(
+            keyword, genre_id, year_from, year_to, rating, cursor, backwards, page_size + 1,
+            raise_errors=raise_errors,
+        )
+    # Строки — (title, release_year, rating, film_id[, relevance])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first = encode_page_cursor(_page_key(rows[0]))
+        last = encode_page_cursor(_page_key(rows[-1]))
+        if backwards:
+            prev_cursor = first if has_more else None
+            next_cursor = last
+        else:
+            next_cursor = last if has_more else None
+            prev_cursor = first if cursor is not None else None
+
+    total, approximate = None, False
+    if with_total:
+        total, approximate = count_movies(
+            keyword, genre_id, year_from, year_to, rating,
+            approximate=approximate_total, raise_errors=raise_errors,
+        )
+
+    return SearchPage(
+        [MovieRow.from_tuple(row) for row in rows], next_cursor, prev_cursor, total, approximate
+    )
+
+
+def _load_page_rows(
+    keyword: Optional[str],
+    genre_id: GenreFilter,
+    year_from: Optional[int],
+    year_to: Optional[int],
+    rating: RatingFilter,
+    cursor: Optional[str],
+    backwards: bool,
+    limit: int,
+    raise_errors: bool = False,
+) -> List[Tuple[Any, ...]]:
+    """
+    Строки keyset-страницы (title, release_year, rating, film_id[, relevance])
+    из каталога в памяти или SQL; при backwards — в обратном порядке.
+    """
+    engine = _active_catalog_engine()
+    if engine is not None:
+        position = decode_page_cursor(cursor) if cursor is not None else None
+        return engine.page(
+            after=None if backwards else position,
+            before=position if backwards else None,
+            limit=limit,
+            keyword=keyword, genre_id=genre_id, year_from=year_from, year_to=year_to, rating=rating,
+        )
+    # Keyset-условие: строки строго после/до позиции курсора.
+    # С FULLTEXT строки ранжируются по релевантности, и она входит в ключ курсора
+    filters = build_search_filters(keyword, genre_id, year_from, year_to, rating)
+    query, params = page_query(
+        filters,
+        position=(
+            decode_page_cursor(cursor, ranked=bool(filters.fulltext)) if cursor is not None else None
+        ),
+        backwards=backwards,
+        limit=limit,
+    )
+    return execute_select_query(query, params, row_factory=tuple, raise_errors=raise_errors)
+
+
+def _seek_page_cursor(filters: Dict[str, Any], offset: int) -> Optional[str]:
+    """
+    Находит курсор, после которого начинается строка с номером offset
+    (лёгкий запрос только по ключевым колонкам — для переходов «g <номер>»).
+    """
+    if offset <= 0:
+        return None
+    if is_search_cache_enabled():
+        poll_changes()
+        key = search_key(**filters) + ("seek", offset)
+        try:
+            (cursor,) = get_search_cache().get_or_load(
+                key, lambda: [_seek_page_cursor_uncached(filters, offset, raise_errors=True)]
+            )
+            return cursor
+        except pymysql.MySQLError:
+            return None
+    return _seek_page_cursor_uncached(filters, offset)
+
+
+def _seek_page_cursor_uncached(
+    filters: Dict[str, Any], offset: int, raise_errors: bool = False
+) -> Optional[str]:
+    engine = _active_catalog_engine()
+    if engine is not None:
+        key = engine.key_at(offset - 1, **filters)
+        return encode_page_cursor(key) if key else None
+    query, params = seek_query(build_search_filters(**filters), offset - 1)
+    result = execute_select_query(query, params, row_factory=tuple, raise_errors=raise_errors)
+    return encode_page_cursor(result[0]) if result else None
 
-    # Фильтрация по диапазону лет
-    if year_from is not None and year_to is not None:
-        query += " AND f.release_year BETWEEN %s AND %s"
-        params.extend([year_from, year_to])
 
-    # Фильтр по рейтингу
-    if rating:
-        query += " AND f.rating = %s"
-        params.append(rating)
+class PagedSearch:
+    """
+    Ленивый результат поиска: страницы запрашиваются из БД по мере просмотра.
+
+    Поддерживает len() (общее количество результатов считается отдельным запросом
+    один раз) и get_page(index) для произвольного номера страницы.
+    """
+
+    # Сколько страниц подряд допустимо «пролистать» курсорами вместо OFFSET-перехода
+    MAX_WALK_PAGES = 3
+
+    def __init__(
+        self,
+        page_size: int = 10,
+        approximate_total: bool = False,
+        **filters: Any,
+    ) -> None:
+        self.page_size = page_size
+        self.approximate_total = approximate_total
+        self.filters = filters
+        self._total: Optional[int] = None
+        self.total_is_approximate = False
+        self._cursors: Dict[int, Optional[str]] = {0: None}  # страница -> курсор её начала
+        self._pages: Dict[int, List[MovieRow]] = {}
+
+    @property
+    def total(self) -> int:
+        """
+        Общее количество результатов (вычисляется при первом обращении).
+        """
+        if self._total is None:
+            self._total, self.total_is_approximate = count_movies(
+                approximate=self.approximate_total, **self.filters
+            )
+        return self._total
+
+    def __len__(self) -> int:
+        return self.total
+
+    @property
+    def page_count(self) -> int:
+        """
+        Количество страниц с учётом размера страницы.
+        """
+        return (self.total + self.page_size - 1) // self.page_size
+
+    def _fetch(self, index: int, cursor: Optional[str]) -> List[MovieRow]:
+        page = search_movies_page(cursor=cursor, page_size=self.page_size, **self.filters)
+        self._pages[index] = page.rows
+        if page.next_cursor is not None:
+            self._cursors[index + 1] = page.next_cursor
+        return page.rows
+
+    def get_page(self, index: int) -> List[MovieRow]:
+        """
+        Возвращает строки страницы с номером index (с нуля).
 
-    # Сортировка результатов
-    query += " ORDER BY f.release_year, f.title"
+        Соседние страницы догружаются по keyset-курсорам, дальние переходы
+        выполняются одним запросом-«поиском» позиции.
+        """
+        if index < 0:
+            return []
+        if index in self._pages:
+            return self._pages[index]
+        if index in self._cursors:
+            return self._fetch(index, self._cursors[index])
 
-    return execute_select_query(query, tuple(params))
+        nearest = max(i for i in self._cursors if i < index)
+        if index - nearest <= self.MAX_WALK_PAGES:
+            for i in range(nearest, index):
+                if i not in self._pages and not self._fetch(i, self._cursors[i]):
+                    return []
+                if i + 1 not in self._cursors:
+                    return []
+            return self._fetch(index, self._cursors[index])
+
+        cursor = _seek_page_cursor(self.filters, index * self.page_size)
+        if cursor is None:
+            return []
+        self._cursors[index] = cursor
+        return self._fetch(index, cursor)
+
+
+def search_movies_paged(
+    keyword: Optional[str] = None,
+    genre_id: GenreFilter = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    rating: RatingFilter = None,
+    page_size: int = 10,
+    approximate_total: bool = False,
+) -> PagedSearch:
+    """
+    Создаёт ленивый постраничный поиск с теми же фильтрами, что и search_movies.
+    Запросы к БД выполняются только при обращении к страницам или к количеству.
+
+    :return: объект PagedSearch
+    """
+    return PagedSearch(
+        page_size=page_size,
+        approximate_total=approximate_total,
+        keyword=keyword,
+        genre_id=genre_id,
+        year_from=year_from,
+        year_to=year_to,
+        rating=rating,
+    )
@@ -0,0 +1,324 @@
+"""
+Построение SQL-запросов поиска фильмов с учётом плана выполнения.
+
+- film_category участвует в запросе только при фильтре по жанру, и то как
+  полусоединение (f.film_id IN (SELECT ...)): строки фильма не размножаются
+  по жанрам;
+- повторы (title, release_year, rating) у разных film_id убираются не DISTINCT,
+  а условием «нет подходящего фильма с тем же ключом и меньшим film_id»: строку
+  результата представляет фильм с наименьшим film_id, поэтому порядок
+  (release_year, title, film_id) однозначен и служит ключом keyset-пагинации,
+  а COUNT(*) с тем же условием считает ровно строки результата;
+- границы лет задаются по отдельности (>= / <=), обе вместе — BETWEEN;
+- жанр и рейтинг принимают одно значение или несколько (= / IN);
+- индексируемые столбцы в условиях не оборачиваются в функции, а порядок
+  (release_year, title, film_id) совпадает с составными индексами SEARCH_INDEXES
+  (film_id — неявное продолжение вторичных индексов InnoDB),
+  поэтому при их наличии строки читаются по индексу без filesort.
+
+Модуль не обращается к базе: функции возвращают пары (SQL, параметры).
+"""
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Составные индексы, на которые рассчитаны запросы поиска: имя -> (таблица, столбцы)
+SEARCH_INDEXES = {
+    "idx_film_year_title": ("film", ("release_year", "title", "film_id")),
+    "idx_film_rating_year_title": ("film", ("rating", "release_year", "title", "film_id")),
+    "idx_film_category_category_film": ("film_category", ("category_id", "film_id")),
+}
+
+SEARCH_COLUMNS = "f.title, f.release_year, f.rating"
+SEARCH_ORDER = "f.release_year, f.title, f.film_id"
+# Столбцы ключа keyset-пагинации (без релевантности)
+KEYSET_COLUMNS = ("f.release_year", "f.title", "f.film_id")
+
+Query = Tuple[str, Tuple[Any, ...]]
+GenreFilter = Union[None, int, Iterable[int]]
+RatingFilter = Union[None, str, Iterable[str]]
+
+
+def genre_values(genre_id: GenreFilter) -> Tuple[int, ...]:
+    """
+    Жанры фильтра как упорядоченный кортеж без повторов (0 и None — нет фильтра).
+    """
+    if genre_id is None or isinstance(genre_id, (int, str)):
+        values = [genre_id] if genre_id else []
+    else:
+        values = [value for value in genre_id if value]
+    return tuple(sorted({int(value) for value in values}))
+
+
+def rating_values(rating: RatingFilter) -> Tuple[str, ...]:
+    """
+    Рейтинги фильтра как упорядоченный кортеж без повторов (пустые значения отбрасываются).
+    """
+    if rating is None or isinstance(rating, str):
+        values = [rating] if rating else []
+    else:
+        values = [value for value in rating if value]
+    return tuple(sorted(set(values)))
+
+
+def year_value(year: Any) -> Optional[int]:
+    return None if year is None else int(year)
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """
+    Нормализованные фильтры search_movies.
+
+    fulltext — запрос MATCH ... AGAINST в BOOLEAN MODE по столбцам fulltext_columns;
+    без него ключевое слово ищется как подстрока названия (LIKE).
+    """
+
+    keyword: Optional[str] = None
+    genre_ids: Tuple[int, ...] = ()
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    ratings: Tuple[str, ...] = ()
+    fulltext: Optional[str] = None
+    fulltext_columns: Tuple[str, ...] = ("title",)
+
+    @classmethod
+    def from_params(
+        cls,
+        keyword: Optional[str] = None,
+        genre_id: GenreFilter = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        rating: RatingFilter = None,
+        fulltext: Optional[str] = None,
+        fulltext_columns: Sequence[str] = ("title",),
+    ) -> "SearchFilters":
+        return cls(
+            keyword=keyword or None,
+            genre_ids=genre_values(genre_id),
+            year_from=year_value(year_from),
+            year_to=year_value(year_to),
+            ratings=rating_values(rating),
+            fulltext=fulltext if keyword else None,
+            fulltext_columns=tuple(fulltext_columns),
+        )
+
+    def is_empty(self) -> bool:
+        return not (
+            self.keyword or self.genre_ids or self.ratings
+            or self.year_from is not None or self.year_to is not None
+        )
+
+    @property
+    def match(self) -> str:
+        return self.match_for("f")
+
+    def match_for(self, alias: str) -> str:
+        columns = ", ".join(f"{alias}.{column}" for column in self.fulltext_columns)
+        return f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)"
+
+
+def _in_list(column: str, values: Sequence[Any]) -> str:
+    if len(values) == 1:
+        return f"{column} = %s"
+    return f"{column} IN ({', '.join(['%s'] * len(values))})"
+
+
+def build_conditions(filters: SearchFilters) -> Tuple[List[str], List[Any]]:
+    """
+    Условия WHERE поиска и их параметры (в порядке условий), включая отбор
+    представителя повторяющихся строк (см. duplicate_condition).
+    """
+    conditions: List[str] = []
+    params: List[Any] = []
+
+    # Ключевое слово: FULLTEXT-индекс или подстрока в названии
+    if filters.fulltext:
+        conditions.append(filters.match)
+        params.append(filters.fulltext)
+    elif filters.keyword:
+        conditions.append("LOWER(f.title) LIKE %s")
+        params.append(f"%{filters.keyword.lower()}%")
+
+    # Рейтинг — первый столбец idx_film_rating_year_title, за ним диапазон лет
+    if filters.ratings:
+        conditions.append(_in_list("f.rating", filters.ratings))
+        params.extend(filters.ratings)
+
+    if filters.year_from is not None and filters.year_to is not None:
+        conditions.append("f.release_year BETWEEN %s AND %s")
+        params.extend([filters.year_from, filters.year_to])
+    elif filters.year_from is not None:
+        conditions.append("f.release_year >= %s")
+        params.append(filters.year_from)
+    elif filters.year_to is not None:
+        conditions.append("f.release_year <= %s")
+        params.append(filters.year_to)
+
+    # Жанр — полусоединение по индексу film_category(category_id), без размножения строк
+    if filters.genre_ids:
+        conditions.append(_genre_condition("f", filters.genre_ids))
+        params.extend(filters.genre_ids)
+
+    condition, duplicate_params = duplicate_condition(filters)
+    conditions.append(condition)
+    params.extend(duplicate_params)
+    return conditions, params
+
+
+def _genre_condition(alias: str, genre_ids: Sequence[int]) -> str:
+    return (
+        f"{alias}.film_id IN (SELECT fc.film_id FROM film_category fc WHERE "
+        + _in_list("fc.category_id", genre_ids)
+        + ")"
+    )
+
+
+def duplicate_condition(filters: SearchFilters) -> Query:
+    """
+    Условие «строка f — представитель своего ключа (title, release_year, rating)»:
+    среди подходящих под фильтры фильмов с тем же ключом у f наименьший film_id.
+
+    Год, рейтинг, название (а с ним LIKE и FULLTEXT только по title) у повторов
+    совпадают с f, поэтому в подзапросе повторяются лишь фильтры, которые могут
+    отличаться: жанр и FULLTEXT по нескольким столбцам. Поиск повторов идёт по
+    индексу (release_year, title).
+    """
+    conditions = [
+        "d.release_year <=> f.release_year",
+        "d.title = f.title",
+        "d.rating <=> f.rating",
+        "d.film_id < f.film_id",
+    ]
+    params: List[Any] = []
+    if filters.fulltext and tuple(filters.fulltext_columns) != ("title",):
+        conditions.append(filters.match_for("d"))
+        params.append(filters.fulltext)
+    if filters.genre_ids:
+        conditions.append(_genre_condition("d", filters.genre_ids))
+        params.extend(filters.genre_ids)
+    return "NOT EXISTS (SELECT 1 FROM film d WHERE " + " AND ".join(conditions) + ")", tuple(params)
+
+
+def from_where(conditions: Sequence[str]) -> str:
+    """
+    Часть запроса FROM ... WHERE ... для условий build_conditions.
+    """
+    if not conditions:
+        return " FROM film f"
+    return " FROM film f WHERE " + " AND ".join(conditions)
+
+
+def select_query(filters: SearchFilters) -> Query:
+    """
+    Запрос search_movies: уникальные (title, release_year, rating) в порядке
+    (release_year, title, film_id). С FULLTEXT — сначала самые релевантные;
+    столбец relevance идёт последним.
+    """
+    conditions, params = build_conditions(filters)
+    if filters.fulltext:
+        query = (
+            f"SELECT {SEARCH_COLUMNS}, {filters.match} AS relevance"
+            + from_where(conditions)
+            + f" ORDER BY relevance DESC, {SEARCH_ORDER}"
+        )
+        return query, (filters.fulltext, *params)
+    query = f"SELECT {SEARCH_COLUMNS}" + from_where(conditions) + f" ORDER BY {SEARCH_ORDER}"
+    return query, tuple(params)
+
+
+def count_query(filters: SearchFilters) -> Query:
+    """
+    Количество строк результата search_movies: фильмы по фильтрам без повторов ключа.
+    """
+    conditions, params = build_conditions(filters)
+    return "SELECT COUNT(*) AS total" + from_where(conditions), tuple(params)
+
+
+def page_query(
+    filters: SearchFilters,
+    position: Optional[Sequence[Any]] = None,
+    backwards: bool = False,
+    limit: int = 10,
+) -> Query:
+    """
+    Keyset-страница: до limit строк строго после position или строго до неё
+    при backwards (тогда в обратном порядке).
+
+    Порядок — как у select_query: (release_year, title, film_id), а с FULLTEXT —
+    сначала по убыванию релевантности. Позиция — ключ строки в том же порядке:
+    (release_year, title, film_id) или (relevance, release_year, title, film_id).
+    Строки — (title, release_year, rating, film_id[, relevance]): по крайним строится курсор.
+    """
+    conditions, params = build_conditions(filters)
+    keyset = ", ".join(KEYSET_COLUMNS)
+    operator = "<" if backwards else ">"
+    if position is not None and filters.fulltext:
+        # Релевантность убывает: «после» — меньшая релевантность или та же и больший ключ
+        relevance, *key = position
+        relevance_operator = ">" if backwards else "<"
+        conditions.append(
+            f"({filters.match} {relevance_operator} %s"
+            f" OR ({filters.match} = %s AND ({keyset}) {operator} (%s, %s, %s)))"
+        )
+        params.extend([filters.fulltext, relevance, filters.fulltext, relevance, *key])
+    elif position is not None:
+        conditions.append(f"({keyset}) {operator} (%s, %s, %s)")
+        params.extend(position)
+    order = " DESC" if backwards else ""
+    order_by = [column + order for column in KEYSET_COLUMNS]
+    select = f"SELECT {SEARCH_COLUMNS}, f.film_id"
+    if filters.fulltext:
+        select += f", {filters.match} AS relevance"
+        order_by.insert(0, "relevance" + (" ASC" if backwards else " DESC"))
+        params.insert(0, filters.fulltext)
+    query = select + from_where(conditions) + " ORDER BY " + ", ".join(order_by) + " LIMIT %s"
+    return query, (*params, limit)
+
+
+def seek_query(filters: SearchFilters, offset: int) -> Query:
+    """
+    Ключ строки с номером offset (с нуля) в порядке page_query — только ключевые столбцы:
+    (release_year, title, film_id) или, с FULLTEXT, (relevance, release_year, title, film_id).
+    """
+    conditions, params = build_conditions(filters)
+    if filters.fulltext:
+        query = (
+            f"SELECT {filters.match} AS relevance, {', '.join(KEYSET_COLUMNS)}"
+            + from_where(conditions)
+            + f" ORDER BY relevance DESC, {SEARCH_ORDER} LIMIT 1 OFFSET %s"
+        )
+        return query, (filters.fulltext, *params, offset)
+    query = (
+        f"SELECT {', '.join(KEYSET_COLUMNS)}"
+        + from_where(conditions)
+        + f" ORDER BY {SEARCH_ORDER} LIMIT 1 OFFSET %s"
+    )
+    return query, (*params, offset)
+
+
+def batch_query(batch: Sequence[SearchFilters]) -> Query:
+    """
+    Несколько запросов search_movies одним запросом UNION ALL.
+
+    Каждая ветка помечена номером запроса в столбце tag и возвращает
+    (tag, title, release_year, rating, relevance, film_id); у веток без FULLTEXT relevance = 0.
+    Общая сортировка (tag, relevance DESC, release_year, title, film_id) группирует строки
+    по запросам и внутри группы повторяет порядок select_query.
+    """
+    branches = []
+    params: List[Any] = []
+    for tag, filters in enumerate(batch):
+        conditions, branch_params = build_conditions(filters)
+        if filters.fulltext:
+            relevance = filters.match
+            params.extend([tag, filters.fulltext])
+        else:
+            relevance = "0"
+            params.append(tag)
+        branches.append(
+            f"SELECT %s AS tag, {SEARCH_COLUMNS}, {relevance} AS relevance, f.film_id"
+            + from_where(conditions)
+        )
+        params.extend(branch_params)
+    query = " UNION ALL ".join(branches) + " ORDER BY tag, relevance DESC, release_year, title, film_id"
+    return query, tuple(params)
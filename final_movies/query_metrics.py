@@ -0,0 +1,338 @@
+"""
+Инструментирование SQL-запросов: гистограммы времени по фазам (connect/execute/fetch),
+количество строк, журнал медленных запросов и экспорт в текстовом формате Prometheus.
+
+Запросы группируются по нормализованному отпечатку (литералы и плейсхолдеры
+заменены на "?"), а параметры сохраняются только в виде хеша.
+"""
+import os
+import re
+import time
+import bisect
+import hashlib
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from final_movies.config import env_flag, env_float, get_env
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм (сек.), как у клиентов Prometheus по умолчанию
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_PHASES = ("connect", "execute", "fetch", "total")
+METRIC_PREFIX = "movie_finder"
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Приводит SQL к каноническому виду: литералы и плейсхолдеры заменяются на "?",
+    списки значений сворачиваются, пробелы схлопываются.
+    """
+    normalized = _STRING_LITERAL.sub("?", query)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _VALUE_LIST.sub("(?+)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+@lru_cache(maxsize=256)
+def fingerprint_query(query: str) -> Tuple[str, str]:
+    """
+    Возвращает (короткий отпечаток, нормализованный запрос).
+    Запросы строятся из небольшого числа шаблонов, поэтому результат кэшируется.
+    """
+    normalized = normalize_query(query)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16], normalized
+
+
+def hash_params(params: Any) -> str:
+    """
+    Хеш параметров запроса: позволяет сопоставить повторы, не сохраняя значения.
+    """
+    return hashlib.sha256(repr(params).encode("utf-8")).hexdigest()[:16]
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами (накопительная, как в Prometheus).
+    Не потокобезопасна сама по себе — защищается блокировкой реестра.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, fraction: float) -> float:
+        """
+        Оценка квантиля по верхней границе корзины (для последней — по максимуму).
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        Пары (le, накопленное количество) для экспорта, включая "+Inf".
+        """
+        result, seen = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            result.append((repr(bound), seen))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class _QueryStats:
+    __slots__ = ("query", "phases", "rows", "errors", "slow", "last_params_hash")
+
+    def __init__(self, query: str) -> None:
+        self.query = query
+        self.phases = {phase: Histogram() for phase in QUERY_PHASES}
+        self.rows = 0
+        self.errors = 0
+        self.slow = 0
+        self.last_params_hash = ""
+
+
+class MetricsRegistry:
+    """
+    Потокобезопасный реестр метрик процесса: статистика по отпечаткам запросов,
+    гистограммы прочих операций (например, отрисовки страницы) и последние медленные запросы.
+    """
+
+    def __init__(self, slow_threshold: Optional[float] = None, slow_log_size: int = 50) -> None:
+        self._lock = threading.Lock()
+        self._queries: Dict[str, _QueryStats] = {}
+        self._operations: Dict[str, Histogram] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+        self._slow_threshold = slow_threshold
+
+    @property
+    def slow_threshold(self) -> float:
+        """
+        Порог медленного запроса (сек.); по умолчанию QUERY_SLOW_MS из окружения.
+        """
+        if self._slow_threshold is None:
+            self._slow_threshold = env_float("QUERY_SLOW_MS", 500) / 1000
+        return self._slow_threshold
+
+    def record_query(
+        self,
+        query: str,
+        params: Any,
+        connect: float,
+        execute: float,
+        fetch: float,
+        rows: int,
+        error: bool = False,
+    ) -> None:
+        """
+        Учитывает выполненный запрос; медленные запросы пишутся в журнал.
+        """
+        fingerprint, normalized = fingerprint_query(query)
+        params_hash = hash_params(params)
+        total = connect + execute + fetch
+        slow = total >= self.slow_threshold
+        with self._lock:
+            stats = self._queries.get(fingerprint)
+            if stats is None:
+                stats = self._queries[fingerprint] = _QueryStats(normalized)
+            for phase, value in zip(QUERY_PHASES, (connect, execute, fetch, total)):
+                stats.phases[phase].observe(value)
+            stats.rows += rows
+            stats.errors += int(error)
+            stats.slow += int(slow)
+            stats.last_params_hash = params_hash
+            if slow:
+                self._slow.append({
+                    "fingerprint": fingerprint,
+                    "query": normalized,
+                    "params_hash": params_hash,
+                    "connect_ms": connect * 1000,
+                    "execute_ms": execute * 1000,
+                    "fetch_ms": fetch * 1000,
+                    "total_ms": total * 1000,
+                    "rows": rows,
+                    "at": time.time(),
+                })
+        if slow:
+            logger.warning(
+                f"🐢 Slow query {fingerprint} ({total * 1000:.1f} ms: connect {connect * 1000:.1f}, "
+                f"execute {execute * 1000:.1f}, fetch {fetch * 1000:.1f}; rows {rows}; "
+                f"params {params_hash}): {normalized}"
+            )
+
+    def observe(self, operation: str, seconds: float) -> None:
+        """
+        Учитывает длительность произвольной операции (например, render_page).
+        """
+        with self._lock:
+            histogram = self._operations.get(operation)
+            if histogram is None:
+                histogram = self._operations[operation] = Histogram()
+            histogram.observe(seconds)
+
+    def query_summary(self) -> List[Dict[str, Any]]:
+        """
+        Сводка по запросам, отсортированная по суммарному времени (самые дорогие — первыми).
+        """
+        with self._lock:
+            rows = []
+            for fingerprint, stats in self._queries.items():
+                total = stats.phases["total"]
+                rows.append({
+                    "fingerprint": fingerprint,
+                    "query": stats.query,
+                    "calls": total.count,
+                    "errors": stats.errors,
+                    "slow": stats.slow,
+                    "rows": stats.rows,
+                    "total_ms": total.sum * 1000,
+                    "p50_ms": total.quantile(0.5) * 1000,
+                    "p95_ms": total.quantile(0.95) * 1000,
+                    "max_ms": total.max * 1000,
+                    **{
+                        f"avg_{phase}_ms": stats.phases[phase].sum / total.count * 1000
+                        for phase in ("connect", "execute", "fetch")
+                    },
+                })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def operation_summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "p50_ms": h.quantile(0.5) * 1000,
+                    "p95_ms": h.quantile(0.95) * 1000,
+                    "max_ms": h.max * 1000,
+                }
+                for name, h in self._operations.items()
+            }
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._queries.clear()
+            self._operations.clear()
+            self._slow.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Метрики в текстовом формате экспозиции Prometheus.
+        """
+        name = f"{METRIC_PREFIX}_query_duration_seconds"
+        lines = [
+            f"# HELP {name} SQL query duration by phase.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            queries = list(self._queries.items())
+            for fingerprint, stats in queries:
+                for phase, histogram in stats.phases.items():
+                    labels = f'fingerprint="{fingerprint}",phase="{phase}"'
+                    lines.extend(_histogram_lines(name, labels, histogram))
+
+            for metric, help_text, attr in (
+                ("query_rows_total", "Rows returned by SQL queries.", "rows"),
+                ("query_errors_total", "Failed SQL queries.", "errors"),
+                ("slow_queries_total", "SQL queries above the slow query threshold.", "slow"),
+            ):
+                lines.append(f"# HELP {METRIC_PREFIX}_{metric} {help_text}")
+                lines.append(f"# TYPE {METRIC_PREFIX}_{metric} counter")
+                for fingerprint, stats in queries:
+                    lines.append(
+                        f'{METRIC_PREFIX}_{metric}{{fingerprint="{fingerprint}"}} {getattr(stats, attr)}'
+                    )
+
+            info = f"{METRIC_PREFIX}_query_info"
+            lines.append(f"# HELP {info} Normalized SQL text for each fingerprint.")
+            lines.append(f"# TYPE {info} gauge")
+            for fingerprint, stats in queries:
+                lines.append(
+                    f'{info}{{fingerprint="{fingerprint}",query="{_escape_label(stats.query)}"}} 1'
+                )
+
+            name = f"{METRIC_PREFIX}_operation_duration_seconds"
+            lines.append(f"# HELP {name} Duration of instrumented operations.")
+            lines.append(f"# TYPE {name} histogram")
+            for operation, histogram in self._operations.items():
+                lines.extend(_histogram_lines(name, f'operation="{_escape_label(operation)}"', histogram))
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    lines = [f'{name}_bucket{{{labels},le="{le}"}} {count}' for le, count in histogram.cumulative()]
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum!r}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """
+    Возвращает общий реестр метрик процесса.
+    """
+    return _registry
+
+
+def is_query_metrics_enabled() -> bool:
+    """
+    Включено ли инструментирование запросов (QUERY_METRICS, по умолчанию — да).
+    """
+    return env_flag("QUERY_METRICS", True)
+
+
+def export_prometheus(path: Optional[str] = None) -> Optional[str]:
+    """
+    Записывает метрики в текстовый файл Prometheus (например, для node_exporter textfile).
+    Путь по умолчанию — QUERY_METRICS_FILE; если он не задан, ничего не делает.
+    Файл заменяется атомарно.
+
+    :return: Путь к записанному файлу или None
+    """
+    path = path or get_env("QUERY_METRICS_FILE")
+    if not path:
+        return None
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(_registry.to_prometheus())
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,373 @@
+"""
+Обслуживание схемы MySQL, которую использует поиск.
+
+FULLTEXT-индекс для KEYWORD_SEARCH_MODE=fulltext создаётся и проверяется командами:
+    python -m final_movies.schema_admin fulltext ensure
+    python -m final_movies.schema_admin fulltext verify
+    python -m final_movies.schema_admin fulltext drop
+Столбцы индекса берутся из FULLTEXT_INCLUDE_DESCRIPTION (или флага --description),
+чтобы совпадать с выражением MATCH(...) в запросах поиска.
+
+Составные индексы, на которые рассчитаны запросы поиска и запросы по жанру
+(SEARCH_INDEXES), и индексы по last_update для опроса изменений (WATERMARK_INDEXES)
+проверяются и создаются командами:
+    python -m final_movies.schema_admin indexes advise
+    python -m final_movies.schema_admin indexes apply
+apply создаёт только недостающие индексы, а затем повторно проверяет план каждого
+запроса через EXPLAIN и выводит время запросов до и после.
+"""
+import sys
+import time
+import argparse
+import statistics
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pymysql
+
+from final_movies.change_tracker import WATERMARK_INDEXES, changed_rows_query
+from final_movies.mysql_connector import (
+    GENRE_COUNT_QUERY,
+    GENRE_YEARS_QUERY,
+    fulltext_columns,
+    get_connection_pool,
+)
+from final_movies.query_builder import (
+    SEARCH_INDEXES,
+    SearchFilters,
+    count_query,
+    page_query,
+    select_query,
+)
+
+
+def fulltext_index_name(columns: Sequence[str]) -> str:
+    return "ft_film_" + "_".join(columns)
+
+
+def _execute(query: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+    """
+    Выполняет служебный запрос (DDL или выборку); ошибки MySQL не перехватываются.
+    """
+    with get_connection_pool().connection() as connection:
+        with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+            cursor.execute(query, tuple(params))
+            return list(cursor.fetchall())
+
+
+def find_indexes(table: str = "film", index_type: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Возвращает индексы таблицы (при заданном index_type — только такого типа,
+    например 'BTREE' или 'FULLTEXT'): имя -> столбцы в порядке индекса.
+    """
+    query = """
+        SELECT INDEX_NAME AS index_name, COLUMN_NAME AS column_name
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """
+    params: List[Any] = [table]
+    if index_type:
+        query += " AND INDEX_TYPE = %s"
+        params.append(index_type)
+    rows = _execute(query + " ORDER BY INDEX_NAME, SEQ_IN_INDEX", params)
+    indexes: Dict[str, List[str]] = {}
+    for row in rows:
+        indexes.setdefault(row["index_name"], []).append(row["column_name"])
+    return indexes
+
+
+def find_fulltext_indexes(table: str = "film") -> Dict[str, List[str]]:
+    """
+    Возвращает FULLTEXT-индексы таблицы: имя -> столбцы в порядке индекса.
+    """
+    return find_indexes(table, "FULLTEXT")
+
+
+def index_covers(existing: Sequence[str], wanted: Sequence[str], primary_key: Sequence[str] = ()) -> bool:
+    """
+    Подходит ли существующий индекс вместо нужного: его столбцы начинаются со столбцов wanted.
+    Вторичный индекс InnoDB неявно продолжается первичным ключом, поэтому,
+    например, индекс (category_id) при ключе (film_id, category_id) работает как (category_id, film_id).
+    """
+    effective = list(existing) + [column for column in primary_key if column not in existing]
+    return effective[:len(wanted)] == list(wanted)
+
+
+@dataclass
+class IndexAdvice:
+    """
+    Рекомендуемый индекс и индекс схемы, который его уже заменяет (covered_by).
+    """
+
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    covered_by: Optional[str] = None
+
+    @property
+    def missing(self) -> bool:
+        return self.covered_by is None
+
+    @property
+    def ddl(self) -> str:
+        return f"CREATE INDEX {self.name} ON {self.table} ({', '.join(self.columns)})"
+
+
+def advise_indexes() -> List[IndexAdvice]:
+    """
+    Сравнивает индексы film и film_category с SEARCH_INDEXES, на которые рассчитаны
+    запросы поиска (query_builder) и запросы по жанру, и с WATERMARK_INDEXES трекера изменений.
+    """
+    advice = []
+    schema: Dict[str, Dict[str, List[str]]] = {}
+    for name, (table, columns) in {**SEARCH_INDEXES, **WATERMARK_INDEXES}.items():
+        if table not in schema:
+            schema[table] = find_indexes(table, "BTREE")
+        indexes = schema[table]
+        primary_key = indexes.get("PRIMARY", [])
+        covered_by = next(
+            (
+                existing_name for existing_name, existing in indexes.items()
+                if index_covers(existing, columns, () if existing_name == "PRIMARY" else primary_key)
+            ),
+            None,
+        )
+        advice.append(IndexAdvice(name, table, tuple(columns), covered_by))
+    return advice
+
+
+def ensure_search_indexes() -> List[str]:
+    """
+    Создаёт недостающие индексы SEARCH_INDEXES и WATERMARK_INDEXES (повторный вызов ничего не меняет).
+
+    :return: Имена созданных индексов
+    """
+    created = []
+    for advice in advise_indexes():
+        if advice.missing:
+            _execute(advice.ddl)
+            created.append(advice.name)
+    return created
+
+
+def workload_queries(genre_id: int = 1) -> Dict[str, Tuple[str, Tuple[Any, ...], bool]]:
+    """
+    Типичные запросы приложения для проверки планов: имя -> (SQL, параметры, допустим ли filesort).
+    Filesort допустим, когда порядок (release_year, title, film_id) нельзя взять из индекса
+    (после полусоединения по жанру).
+    """
+    def search(**filters: Any) -> Tuple[str, Tuple[Any, ...]]:
+        return select_query(SearchFilters.from_params(**filters))
+
+    return {
+        "search: all": (*search(), False),
+        "search: rating": (*search(rating="PG"), False),
+        "search: years": (*search(year_from=2000, year_to=2010), False),
+        "search: rating + years": (*search(rating="PG", year_from=2000, year_to=2010), False),
+        "search: genre": (*search(genre_id=genre_id), True),
+        "search: genre + years": (*search(genre_id=genre_id, year_from=2000, year_to=2010), True),
+        "page: rating": (*page_query(SearchFilters.from_params(rating="PG"), limit=11), False),
+        "count: rating": (*count_query(SearchFilters.from_params(rating="PG")), False),
+        "genre years": (GENRE_YEARS_QUERY, (genre_id,), False),
+        "genre count": (GENRE_COUNT_QUERY, (genre_id,), False),
+        "changed films": (*changed_rows_query("film", ("film_id",), "2100-01-01 00:00:00"), False),
+    }
+
+
+def profile_workload(runs: int = 3, genre_id: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Выполняет каждый запрос workload_queries runs раз и проверяет его план.
+
+    :return: имя запроса -> {"ms": медиана времени, "issues": проблемы плана (см. plan_issues)}
+    """
+    if genre_id is None:
+        rows = _execute("SELECT MIN(category_id) AS genre_id FROM film_category")
+        genre_id = rows[0]["genre_id"] if rows and rows[0]["genre_id"] is not None else 1
+    profile = {}
+    for name, (query, params, allow_filesort) in workload_queries(genre_id).items():
+        timings = []
+        for _ in range(max(1, runs)):
+            started = time.perf_counter()
+            _execute(query, params)
+            timings.append((time.perf_counter() - started) * 1000)
+        profile[name] = {
+            "ms": statistics.median(timings),
+            "issues": plan_issues(explain(query, params), allow_filesort),
+        }
+    return profile
+
+
+def provision_indexes(apply: bool = True, runs: int = 3) -> Dict[str, Any]:
+    """
+    Проверяет индексы поиска и (при apply) создаёт недостающие, замеряя запросы до и после.
+
+    :return: Словарь с рекомендациями (advice), созданными индексами (created)
+             и профилями запросов before/after (after — только если что-то создано)
+    """
+    advice = advise_indexes()
+    before = profile_workload(runs)
+    created: List[str] = []
+    after = None
+    if apply and any(item.missing for item in advice):
+        created = ensure_search_indexes()
+        # Свежая статистика, чтобы оптимизатор сразу учёл новые индексы
+        _execute("ANALYZE TABLE film, film_category")
+        after = profile_workload(runs)
+    return {"advice": advice, "created": created, "before": before, "after": after}
+
+
+def print_provision_report(report: Dict[str, Any]) -> bool:
+    """
+    Печатает рекомендации и замеры provision_indexes.
+
+    :return: True, если после изменений у всех запросов хорошие планы
+    """
+    for item in report["advice"]:
+        columns = f"{item.table}({', '.join(item.columns)})"
+        if item.name in report["created"]:
+            print(f"✅ Created {item.name} on {columns}")
+        elif item.missing:
+            print(f"⚠️ Missing {columns}: {item.ddl}")
+        else:
+            print(f"✅ {columns} covered by {item.covered_by}")
+
+    final = report["after"] or report["before"]
+    healthy = True
+    for name, result in final.items():
+        timing = f"{result['ms']:8.2f} ms"
+        if report["after"] is not None:
+            timing = f"{report['before'][name]['ms']:8.2f} ms -> {timing}"
+        status = "ok" if not result["issues"] else "; ".join(result["issues"])
+        healthy = healthy and not result["issues"]
+        print(f"{name:24} {timing} | {status}")
+    return healthy
+
+
+def explain(query: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+    """
+    План выполнения запроса (EXPLAIN в табличном формате).
+    """
+    return _execute("EXPLAIN " + query, params)
+
+
+def plan_issues(plan: List[Dict[str, Any]], allow_filesort: bool = False) -> List[str]:
+    """
+    Проблемы плана EXPLAIN: полный просмотр таблицы (type=ALL) и, если не разрешено, filesort.
+
+    :return: Описания проблем (пустой список — план в порядке)
+    """
+    issues = []
+    for row in plan:
+        table = row.get("table") or "?"
+        extra = row.get("Extra") or ""
+        if row.get("type") == "ALL":
+            issues.append(f"full scan of {table}")
+        if not allow_filesort and "Using filesort" in extra:
+            issues.append(f"filesort on {table}")
+    return issues
+
+
+def ensure_fulltext_index(columns: Optional[Sequence[str]] = None) -> bool:
+    """
+    Создаёт FULLTEXT-индекс по столбцам film, если индекса с такими столбцами ещё нет.
+    На больших таблицах построение занимает заметное время (InnoDB перестраивает таблицу).
+
+    :return: True, если индекс был создан
+    """
+    columns = tuple(columns or fulltext_columns())
+    if any(tuple(existing) == columns for existing in find_fulltext_indexes().values()):
+        return False
+    _execute(
+        f"ALTER TABLE film ADD FULLTEXT INDEX {fulltext_index_name(columns)} ({', '.join(columns)})"
+    )
+    return True
+
+
+def drop_fulltext_index(columns: Optional[Sequence[str]] = None) -> bool:
+    """
+    Удаляет FULLTEXT-индекс по указанным столбцам film.
+
+    :return: True, если индекс был удалён
+    """
+    columns = tuple(columns or fulltext_columns())
+    for name, existing in find_fulltext_indexes().items():
+        if tuple(existing) == columns:
+            _execute(f"ALTER TABLE film DROP INDEX {name}")
+            return True
+    return False
+
+
+def verify_fulltext_index(columns: Optional[Sequence[str]] = None, probe: str = "+academy*") -> Dict[str, Any]:
+    """
+    Проверяет, что индекс существует и что оптимизатор использует его для MATCH ... AGAINST.
+
+    :return: Словарь с именем индекса, признаками exists/used и планом EXPLAIN
+    """
+    columns = tuple(columns or fulltext_columns())
+    index = next(
+        (name for name, existing in find_fulltext_indexes().items() if tuple(existing) == columns),
+        None,
+    )
+    plan: List[Dict[str, Any]] = []
+    if index is not None:
+        plan = _execute(
+            f"EXPLAIN SELECT film_id FROM film "
+            f"WHERE MATCH({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)",
+            (probe,),
+        )
+    used = any(row.get("type") == "fulltext" and row.get("key") == index for row in plan)
+    return {"index": index, "columns": list(columns), "exists": index is not None, "used": used, "plan": plan}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки: python -m final_movies.schema_admin fulltext ensure
+    """
+    parser = argparse.ArgumentParser(description="MySQL schema maintenance for movie search")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    fulltext = subparsers.add_parser("fulltext", help="Manage the FULLTEXT index on film")
+    fulltext.add_argument("action", choices=("ensure", "verify", "drop"))
+    fulltext.add_argument(
+        "--description", action="store_true", help="Index title and description (default: title)"
+    )
+    indexes = subparsers.add_parser("indexes", help="Check and create the indexes search queries rely on")
+    indexes.add_argument("action", choices=("advise", "apply"))
+    indexes.add_argument("--runs", type=int, default=3, help="Timed runs per query (median is reported)")
+    args = parser.parse_args(argv)
+
+    if args.command == "indexes":
+        try:
+            report = provision_indexes(apply=args.action == "apply", runs=args.runs)
+        except (pymysql.MySQLError, ConnectionError) as e:
+            print(f"❌ Schema operation failed: {e}")
+            return 1
+        healthy = print_provision_report(report)
+        missing = [item for item in report["advice"] if item.missing and item.name not in report["created"]]
+        return 0 if healthy and not missing else 1
+
+    columns = ("title", "description") if args.description else None
+    try:
+        if args.action == "drop":
+            dropped = drop_fulltext_index(columns)
+            print("✅ FULLTEXT index dropped." if dropped else "⚠️ No matching FULLTEXT index.")
+            return 0
+        if args.action == "ensure" and ensure_fulltext_index(columns):
+            print("✅ FULLTEXT index created.")
+        result = verify_fulltext_index(columns)
+    except (pymysql.MySQLError, ConnectionError) as e:
+        print(f"❌ Schema operation failed: {e}")
+        return 1
+
+    columns_label = ", ".join(result["columns"])
+    if not result["exists"]:
+        print(f"❌ No FULLTEXT index on film ({columns_label}).")
+        return 1
+    if not result["used"]:
+        print(f"❌ FULLTEXT index {result['index']} exists but is not used by MATCH ... AGAINST.")
+        return 1
+    print(f"✅ FULLTEXT index {result['index']} on film ({columns_label}) is used by keyword search.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""
+Кэш результатов search_movies, страниц search_movies_page и подсчётов count_movies.
+
+Ключ — нормализованные параметры поиска (ключевое слово в нижнем регистре,
+жанры и рейтинги — упорядоченные наборы), поэтому «Academy» и «academy»
+попадают в одну запись. Записи вытесняются по LRU при превышении числа записей
+или бюджета памяти и устаревают через TTL. Одновременные одинаковые промахи
+объединяются: запрос к базе выполняет только первый поток, остальные ждут его результат.
+
+Кэш сбрасывается трекером изменений (см. change_tracker) при изменении film,
+film_category или category, а также явно через invalidate_search_cache().
+"""
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from final_movies.config import env_flag, env_float, env_int
+from final_movies.movie_row import MovieRow
+from final_movies.query_builder import GenreFilter, RatingFilter, genre_values, rating_values, year_value
+
+# Параметры поиска (ключевое слово, жанры, годы, рейтинги), режим поиска по ключевому слову
+# и источник данных; постраничные запросы и подсчёты дописывают в конец свои поля
+SearchKey = Tuple[Any, ...]
+# Строки search_movies, кортежи строк страницы или одиночные значения (подсчёт, курсор)
+Rows = List[Any]
+
+# Таблицы, от которых зависят результаты поиска
+SOURCE_TABLES = ("film", "film_category", "category")
+
+
+def make_search_key(
+    keyword: Optional[str] = None,
+    genre_id: GenreFilter = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    rating: RatingFilter = None,
+    mode: str = "like",
+    backend: str = "sql",
+) -> SearchKey:
+    """
+    Приводит параметры search_movies к каноническому ключу.
+    Параметры, которые search_movies игнорирует (пустые строки, genre_id=0),
+    в ключ не попадают; жанры и рейтинги — упорядоченные кортежи без повторов.
+    Ключевое слово только приводится к нижнему регистру: LIKE учитывает пробелы.
+    Режим (like/fulltext) и источник (sql/memory) меняют набор и порядок строк,
+    поэтому тоже входят в ключ.
+    """
+    return (
+        keyword.lower() if keyword else None,
+        genre_values(genre_id),
+        year_value(year_from),
+        year_value(year_to),
+        rating_values(rating),
+        mode,
+        backend,
+    )
+
+
+def estimate_size(rows: Rows) -> int:
+    """
+    Приблизительный объём результата в байтах (список, строки и их значения).
+    """
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        if isinstance(row, Mapping):
+            values = row.values()
+        elif isinstance(row, tuple):
+            values = row
+        else:
+            # Скалярные значения (подсчёты, курсоры) уже учтены целиком
+            continue
+        for value in values:
+            size += sys.getsizeof(value)
+    return size
+
+
+@dataclass
+class _Entry:
+    rows: Rows
+    size: int
+    expires_at: float
+
+
+@dataclass
+class _Flight:
+    """
+    Загрузка, выполняемая одним потоком для всех ожидающих того же ключа.
+    """
+
+    done: threading.Event = field(default_factory=threading.Event)
+    rows: Optional[Rows] = None
+    error: Optional[BaseException] = None
+
+
+class SearchCache:
+    """
+    LRU-кэш результатов поиска с TTL, ограничениями по числу записей и объёму
+    и объединением одновременных промахов.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024, ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[SearchKey, _Entry]" = OrderedDict()
+        self._flights: Dict[SearchKey, _Flight] = {}
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: SearchKey) -> Optional[Rows]:
+        """
+        Возвращает копию закэшированного результата или None.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+            self.hits += 1
+        return _copy_rows(entry.rows)
+
+    def get_or_load(self, key: SearchKey, loader: Callable[[], Rows]) -> Rows:
+        """
+        Возвращает результат из кэша или загружает его через loader.
+        Если тот же ключ уже загружается другим потоком, ждёт его результат
+        (или ту же ошибку) вместо повторного запроса к базе.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return _copy_rows(entry.rows)
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _copy_rows(flight.rows)
+
+        try:
+            rows = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            flight.rows = rows
+            # Результат, загруженный до сброса кэша, мог устареть — отдаём, но не сохраняем
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, rows)
+            return _copy_rows(rows)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def put(self, key: SearchKey, rows: Rows) -> None:
+        with self._lock:
+            self._store(key, rows)
+
+    def invalidate(self, predicate: Optional[Callable[[SearchKey], bool]] = None) -> int:
+        """
+        Удаляет записи, для ключей которых predicate истинен (по умолчанию — все).
+        Загрузки, начатые до любого сброса (в том числе выборочного), не попадут в кэш.
+
+        :return: Количество удалённых записей
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                keys = [key for key in self._entries if predicate(key)]
+                for key in keys:
+                    self._bytes -= self._entries.pop(key).size
+                removed = len(keys)
+            # Незавершённая загрузка могла прочитать уже устаревшие данные
+            self._generation += 1
+            self.invalidations += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "rejected": self.rejected,
+            }
+
+    def _lookup(self, key: SearchKey) -> Optional[_Entry]:
+        """
+        Находит живую запись и переносит её в конец LRU; вызывается под блокировкой.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            self._bytes -= entry.size
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: SearchKey, rows: Rows) -> None:
+        """
+        Сохраняет результат и вытесняет давно не использованные записи; вызывается под блокировкой.
+        """
+        if self.max_entries <= 0:
+            return
+        size = estimate_size(rows)
+        if size > self.max_bytes:
+            # Результат больше всего бюджета: кэшировать его значит вытеснить всё остальное
+            self.rejected += 1
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[key] = _Entry(rows, size, time.monotonic() + self.ttl)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+
+def _copy_rows(rows: Rows) -> Rows:
+    # Вызывающий код может изменять список и строки-словари, а закэшированный результат — нет;
+    # неизменяемые MovieRow, кортежи страниц и значения подсчётов копировать не нужно
+    return [dict(row) if isinstance(row, Mapping) and not isinstance(row, MovieRow) else row for row in rows]
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def is_search_cache_enabled() -> bool:
+    """
+    Кэш результатов включается настройкой SEARCH_CACHE=1.
+    """
+    return env_flag("SEARCH_CACHE", False)
+
+
+def get_search_cache() -> SearchCache:
+    """
+    Возвращает общий кэш результатов поиска (размеры и TTL — из окружения).
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SearchCache(
+                    max_entries=env_int("SEARCH_CACHE_MAX_ENTRIES", 256),
+                    max_bytes=env_int("SEARCH_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+                    ttl=env_float("SEARCH_CACHE_TTL", 300.0),
+                )
+    return _cache
+
+
+def set_search_cache(cache: Optional[SearchCache]) -> None:
+    """
+    Подменяет общий кэш (None — создать заново при следующем обращении).
+    """
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def invalidate_search_cache(**filters: Any) -> int:
+    """
+    Сбрасывает кэш поиска целиком или только записи с указанными параметрами
+    (например, invalidate_search_cache(genre_id=3)).
+
+    Выборочный сброс удаляет лишь записи, в фильтре которых есть это значение:
+    поиск без фильтра по жанру (все фильмы, по ключевому слову, годам или рейтингу)
+    тоже может содержать фильмы жанра 3, но остаётся в кэше. При изменении данных
+    каталога нужен полный сброс (его выполняет трекер изменений).
+
+    :return: Количество удалённых записей
+    """
+    if _cache is None:
+        return 0
+    if not filters:
+        return _cache.invalidate()
+    names = ("keyword", "genre_id", "year_from", "year_to", "rating")
+    unknown = set(filters) - set(names)
+    if unknown:
+        raise TypeError(f"Unknown search filters: {', '.join(sorted(unknown))}")
+    # Первые поля ключа — параметры поиска в порядке names
+    wanted = dict(zip(names, make_search_key(**filters)))
+    positions = [(names.index(name), wanted[name]) for name in filters]
+
+    def matches(key: SearchKey) -> bool:
+        for i, value in positions:
+            if isinstance(value, tuple) and value:
+                # Жанры и рейтинги: затронута любая запись, где встречается одно из значений
+                if not set(value) & set(key[i]):
+                    return False
+            elif key[i] != value:
+                return False
+        return True
+
+    return _cache.invalidate(matches)
+
+
+def get_search_cache_stats() -> Optional[Dict[str, Any]]:
+    """
+    Статистика кэша поиска или None, если он ещё не создавался.
+    """
+    return None if _cache is None else _cache.stats()
+
+
+def on_search_source_change(changes: List[Any], current: Dict[str, Any]) -> None:
+    """
+    Подписчик трекера изменений: результаты поиска зависят от всех таблиц каталога.
+    """
+    removed = invalidate_search_cache()
+    if removed:
+        logging.info(f"Search cache invalidated: {removed} entries")
@@ -0,0 +1,429 @@
+"""
+HTTP/JSON-сервис поиска фильмов для других приложений (без интерактивного меню).
+
+    python -m final_movies.service --port 8080 --workers 8
+
+Маршруты (только GET):
+    /search        — страница search_movies: keyword, genre_id, year_from, year_to, rating
+                     (genre_id и rating можно повторять), page_size, cursor, direction, total=1
+    /genres        — каталог жанров с годами и количеством фильмов
+    /ratings       — коды MPAA и их расшифровка
+    /stats/top     — ТОП поисковых запросов: limit, days (без days — за всё время)
+    /stats/recent  — последние уникальные запросы: limit
+    /health        — состояние сервиса и пула соединений MySQL
+
+Соединения обслуживает ограниченный пул потоков: SERVICE_WORKERS обработчиков и до
+SERVICE_QUEUE_SIZE ожидающих соединений, остальным сразу отвечает 503. Соединения
+держатся открытыми (HTTP/1.1 keep-alive) и закрываются после SERVICE_REQUEST_TIMEOUT
+секунд простоя или ожидания запроса; тот же срок ограничивает запросы MySQL при обработке
+(ожидание соединения пула и MAX_EXECUTION_TIME), по истечении которого ответ — 503. Пул соединений MySQL, клиент MongoDB, кэши
+и фоновый писатель логов общие для всех обработчиков. Время каждого запроса пишется
+в журнал и в метрики (операция «http <маршрут>»).
+"""
+import sys
+import json
+import time
+import signal
+import socket
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pymysql
+from pymongo.errors import PyMongoError
+
+from final_movies import log_writer, mysql_connector
+from final_movies.all_searches import available_ratings
+from final_movies.cache_warmup import start_cache_warmup
+from final_movies.change_tracker import start_change_polling
+from final_movies.config import env_float, env_int, get_env
+from final_movies.log_stats import get_genre_map, get_last_unique_searches, get_top_searches
+from final_movies.query_metrics import export_prometheus, get_registry
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 500
+MAX_STATS_LIMIT = 100
+
+Query = Dict[str, List[str]]
+
+
+class ServiceUnavailable(Exception):
+    """
+    Хранилище, нужное для ответа, недоступно (ответ 503).
+    """
+
+
+def _last(query: Query, name: str) -> Optional[str]:
+    values = query.get(name)
+    return values[-1] if values else None
+
+
+def _int_param(
+    query: Query, name: str, default: Optional[int] = None, minimum: int = 0, maximum: Optional[int] = None
+) -> Optional[int]:
+    """
+    Целочисленный параметр запроса в пределах [minimum, maximum].
+
+    :raises ValueError: если значение не число или вне пределов
+    """
+    value = _last(query, name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+    if number < minimum or (maximum is not None and number > maximum):
+        bound = f"between {minimum} and {maximum}" if maximum is not None else f">= {minimum}"
+        raise ValueError(f"{name} must be {bound}, got {number}")
+    return number
+
+
+def _list_param(query: Query, name: str) -> List[str]:
+    """
+    Параметр с несколькими значениями: ?rating=PG&rating=R или ?rating=PG,R.
+    """
+    return [item.strip() for value in query.get(name, []) for item in value.split(",") if item.strip()]
+
+
+def search_type_for(params: Dict[str, Any]) -> str:
+    """
+    Тип поиска для лога: совпадает с типами меню, если запрос повторяет один из его сценариев.
+    """
+    names = set(params)
+    if names == {"keyword"}:
+        return "keyword"
+    if names == {"rating"} and isinstance(params["rating"], str):
+        return "rating"
+    if "genre_id" in names and names <= {"genre_id", "year_from", "year_to"} and isinstance(params["genre_id"], int):
+        return "genre_year"
+    return "search"
+
+
+def handle_search(query: Query) -> Dict[str, Any]:
+    """
+    Страница результатов search_movies (keyset-пагинация по курсору).
+    Поиск с первой страницы записывается в поисковые логи вместе с общим количеством результатов.
+    Ошибки MySQL пробрасываются (ответ 503), и неудавшийся поиск в логи не попадает.
+    """
+    try:
+        genre_ids = [int(value) for value in _list_param(query, "genre_id")]
+    except ValueError:
+        raise ValueError("genre_id must be an integer") from None
+    ratings = _list_param(query, "rating")
+    unknown = [rating for rating in ratings if rating not in available_ratings]
+    if unknown:
+        raise ValueError(f"Unknown rating: {', '.join(unknown)}")
+    direction = _last(query, "direction") or "next"
+    cursor = _last(query, "cursor") or None
+
+    params: Dict[str, Any] = {
+        "keyword": (_last(query, "keyword") or "").strip() or None,
+        "genre_id": genre_ids[0] if len(genre_ids) == 1 else genre_ids or None,
+        "year_from": _int_param(query, "year_from"),
+        "year_to": _int_param(query, "year_to"),
+        "rating": ratings[0] if len(ratings) == 1 else ratings or None,
+    }
+    params = {name: value for name, value in params.items() if value is not None}
+    page = mysql_connector.search_movies_page(
+        **params,
+        cursor=cursor,
+        direction=direction,
+        page_size=_int_param(query, "page_size", 20, minimum=1, maximum=MAX_PAGE_SIZE),
+        with_total=cursor is None or _last(query, "total") == "1",
+        raise_errors=True,
+    )
+
+    if cursor is None:
+        search_type = search_type_for(params)
+        logged = dict(params, keyword=params["keyword"].lower()) if "keyword" in params else dict(params)
+        if search_type == "genre_year":
+            logged["genre_name"] = get_genre_map().get(params["genre_id"], "Unknown genre")
+        log_writer.log_search(search_type, logged, page.total)
+
+    return {
+        "rows": [dict(row) for row in page.rows],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+        "total": page.total,
+        "total_is_approximate": page.total_is_approximate,
+    }
+
+
+def handle_genres(query: Query) -> Dict[str, Any]:
+    return {"genres": mysql_connector.get_genre_catalog()}
+
+
+def handle_ratings(query: Query) -> Dict[str, Any]:
+    return {
+        "ratings": [{"code": code, "description": description} for code, description in available_ratings.items()]
+    }
+
+
+def _require_log_storage() -> None:
+    if log_writer.get_rollup_collection() is None:
+        raise ServiceUnavailable("MongoDB is not available")
+
+
+def handle_top_searches(query: Query) -> Dict[str, Any]:
+    limit = _int_param(query, "limit", 5, minimum=1, maximum=MAX_STATS_LIMIT)
+    days = _int_param(query, "days", minimum=1)
+    _require_log_storage()
+    return {"days": days, "searches": get_top_searches(limit, days)}
+
+
+def handle_recent_searches(query: Query) -> Dict[str, Any]:
+    limit = _int_param(query, "limit", 5, minimum=1, maximum=MAX_STATS_LIMIT)
+    _require_log_storage()
+    return {"searches": get_last_unique_searches(limit)}
+
+
+ROUTES: Dict[str, Callable[[Query], Dict[str, Any]]] = {
+    "/search": handle_search,
+    "/genres": handle_genres,
+    "/ratings": handle_ratings,
+    "/stats/top": handle_top_searches,
+    "/stats/recent": handle_recent_searches,
+}
+
+
+def _json_body(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов одного соединения (HTTP/1.1: несколько запросов подряд).
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "MovieFinder/1.0"
+
+    def setup(self) -> None:
+        # Таймаут сокета ограничивает и ожидание запроса, и простой keep-alive соединения
+        self.timeout = self.server.request_timeout
+        super().setup()
+
+    def do_GET(self) -> None:
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        route = "/health" if url.path == "/health" else url.path if url.path in ROUTES else None
+        headers: Dict[str, str] = {}
+        try:
+            if route is None:
+                status, payload = 404, {"error": f"Unknown path: {url.path}"}
+            elif route == "/health":
+                status, payload = 200, self.server.health()
+            else:
+                # Тот же таймаут ограничивает и запросы MySQL обработчика (ожидание пула и SELECT)
+                with mysql_connector.query_deadline(self.server.request_timeout):
+                    status, payload = 200, ROUTES[route](parse_qs(url.query))
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except (ServiceUnavailable, ConnectionError, TimeoutError, PyMongoError, pymysql.MySQLError) as e:
+            logger.error(f"❌ {url.path}: {e}")
+            status, payload = 503, {"error": str(e)}
+            headers["Retry-After"] = "1"
+        except Exception as e:
+            logger.exception(f"❌ {url.path} failed")
+            status, payload = 500, {"error": f"Internal error: {e}"}
+        self.send_json(status, payload, headers)
+        self.log_latency(route or "unknown", status, started)
+
+    def method_not_allowed(self) -> None:
+        started = time.perf_counter()
+        self.send_json(405, {"error": f"Method {self.command} is not allowed"}, {"Allow": "GET"})
+        self.log_latency("unknown", 405, started)
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = method_not_allowed
+
+    def send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = _json_body(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_latency(self, route: str, status: int, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        logger.info(f"{self.command} {self.path} {status} {elapsed * 1000:.1f} ms")
+        get_registry().observe(f"http {route}", elapsed)
+
+    def log_request(self, code: Any = "-", size: Any = "-") -> None:
+        # Запросы журналирует log_latency (со временем обработки)
+        pass
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.warning(f"{self.address_string()} {format % args}")
+
+
+class ServiceHTTPServer(HTTPServer):
+    """
+    HTTP-сервер с ограниченным пулом обработчиков вместо потока на каждое соединение.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        workers: int = 8,
+        queue_size: int = 32,
+        request_timeout: float = 10.0,
+        handler: type = ServiceRequestHandler,
+    ) -> None:
+        super().__init__(address, handler)
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.request_timeout = request_timeout
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="service")
+        # Обрабатываемые и ожидающие соединения вместе: сверх этого — отказ 503
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._stats = {"connections": 0, "rejected": 0, "open": 0, "active": 0}
+
+    def process_request(self, request: socket.socket, client_address: Any) -> None:
+        if not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+        with self._lock:
+            self._stats["connections"] += 1
+            self._stats["open"] += 1
+        try:
+            self._executor.submit(self._process, request, client_address)
+        except RuntimeError:
+            # Пул уже остановлен (сервер завершает работу)
+            self._done()
+            self.shutdown_request(request)
+
+    def _process(self, request: socket.socket, client_address: Any) -> None:
+        with self._lock:
+            self._stats["active"] += 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._lock:
+                self._stats["active"] -= 1
+            self._done()
+
+    def _done(self) -> None:
+        with self._lock:
+            self._stats["open"] -= 1
+        self._slots.release()
+
+    def _reject(self, request: socket.socket) -> None:
+        with self._lock:
+            self._stats["rejected"] += 1
+        body = _json_body({"error": "Service is busy, try again later"})
+        response = (
+            "HTTP/1.1 503 Service Unavailable\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Retry-After: 1\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("ascii") + body
+        try:
+            request.settimeout(1.0)
+            request.sendall(response)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["queued"] = snapshot.pop("open") - snapshot["active"]
+        snapshot.update(workers=self.workers, queue_size=self.queue_size)
+        return snapshot
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "service": self.stats(),
+            "mysql_pool": mysql_connector.get_pool_stats(),
+        }
+
+    def server_close(self) -> None:
+        super().server_close()
+        # Дожидаемся обработчиков: keep-alive соединения закрываются по таймауту простоя
+        self._executor.shutdown(wait=True)
+
+
+def create_server(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    request_timeout: Optional[float] = None,
+) -> ServiceHTTPServer:
+    """
+    Создаёт сервер; незаданные параметры берутся из SERVICE_HOST (127.0.0.1), SERVICE_PORT (8080),
+    SERVICE_WORKERS (8), SERVICE_QUEUE_SIZE (32) и SERVICE_REQUEST_TIMEOUT (10 сек.).
+    Порт 0 — любой свободный (фактический — server.server_address).
+    """
+    return ServiceHTTPServer(
+        (
+            host if host is not None else get_env("SERVICE_HOST", "127.0.0.1"),
+            port if port is not None else env_int("SERVICE_PORT", 8080),
+        ),
+        workers=workers if workers is not None else env_int("SERVICE_WORKERS", 8),
+        queue_size=queue_size if queue_size is not None else env_int("SERVICE_QUEUE_SIZE", 32),
+        request_timeout=request_timeout if request_timeout is not None else env_float("SERVICE_REQUEST_TIMEOUT", 10.0),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки: python -m final_movies.service
+    """
+    parser = argparse.ArgumentParser(description="Movie Finder HTTP/JSON service")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--workers", type=int, help="Connections served concurrently")
+    parser.add_argument("--queue-size", type=int, help="Connections waiting for a worker before 503")
+    parser.add_argument("--timeout", type=float, help="Request read / keep-alive idle / MySQL query timeout, seconds")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        server = create_server(args.host, args.port, args.workers, args.queue_size, args.timeout)
+    except OSError as e:
+        print(f"❌ Cannot start service: {e}")
+        return 1
+
+    def stop(signum: int, frame: Any) -> None:
+        raise KeyboardInterrupt
+
+    # SIGTERM (остановка сервиса) завершает работу так же, как Ctrl+C: логи дописываются
+    signal.signal(signal.SIGTERM, stop)
+    start_change_polling()
+    start_cache_warmup()
+    host, port = server.server_address[:2]
+    print(f"✅ Movie Finder service listening on http://{host}:{port} ({server.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping Movie Finder service.")
+    finally:
+        server.server_close()
+        # Дописываем накопленные поисковые логи и сохраняем метрики, как при выходе из меню
+        log_writer.shutdown_log_writer()
+        mysql_connector.set_connection_pool(None)
+        try:
+            export_prometheus()
+        except OSError as e:
+            print(f"❌ Error exporting metrics: {e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,14 @@ from final_movies import all_searches
 
 class TestAllSearches(unittest.TestCase):
 
-    @patch("final_movies.all_searches.get_all_genres")
+    @patch("final_movies.all_searches.get_genre_catalog")
     @patch("final_movies.all_searches.display_genre_table")
     @patch("final_movies.all_searches.get_user_input", side_effect=["1"])
-    def test_select_genre_valid(self, mock_input, mock_display, mock_get_all_genres):
+    def test_select_genre_valid(self, mock_input, mock_display, mock_get_catalog):
         # Мокаем возвращаемые данные display_genre_table (словари с жанрами)
-        mock_get_all_genres.return_value = [{"genre_id": 1, "name": "Comedy"}]
+        mock_get_catalog.return_value = [
+            {"genre_id": 1, "name": "Comedy", "min_year": 1980, "max_year": 2020, "film_count": 3}
+        ]
         mock_display.return_value = {1: (1980, 2020, "Comedy")}
 
         genre_id, years, name = all_searches.select_genre()
@@ -30,14 +32,14 @@ class TestAllSearches(unittest.TestCase):
         self.assertEqual(result, (1990, 2020))
 
     @patch("final_movies.all_searches.get_user_input", side_effect=[""])
-    @patch("final_movies.all_searches.search_movies", return_value=[])
+    @patch("final_movies.all_searches.search_movies_paged", return_value=[])
     def test_search_by_keyword_workflow_empty_keyword(self, mock_search, mock_input):
         with patch("builtins.print") as mock_print:
             all_searches.search_by_keyword_workflow()
             mock_print.assert_any_call("⚠️ Keyword cannot be empty.")
 
     @patch("final_movies.all_searches.get_user_input", side_effect=["star"])
-    @patch("final_movies.all_searches.search_movies", return_value=[{"title": "Star Movie"}])
+    @patch("final_movies.all_searches.search_movies_paged", return_value=[{"title": "Star Movie"}])
     @patch("final_movies.all_searches.log_search")
     @patch("final_movies.all_searches.paginate_results")
     def test_search_by_keyword_workflow_found(self, mock_paginate, mock_log, mock_search, mock_input):
@@ -45,9 +47,33 @@ class TestAllSearches(unittest.TestCase):
         mock_log.assert_called_once()
         mock_paginate.assert_called_once()
 
+    @patch("final_movies.all_searches.get_user_input", side_effect=["acadamy", "1"])
+    @patch("final_movies.all_searches.suggest_titles", return_value=[("ACADEMY DINOSAUR", 0.62)])
+    @patch("final_movies.all_searches.search_movies_paged", side_effect=[[], [{"title": "ACADEMY DINOSAUR"}]])
+    @patch("final_movies.all_searches.log_search")
+    @patch("final_movies.all_searches.paginate_results")
+    def test_search_by_keyword_workflow_suggestion(self, mock_paginate, mock_log, mock_search, mock_suggest, mock_input):
+        with patch("builtins.print") as mock_print:
+            all_searches.search_by_keyword_workflow()
+            mock_print.assert_any_call("1. ACADEMY DINOSAUR (62% match)")
+        # Выбранная подсказка ищется как новое ключевое слово
+        mock_search.assert_called_with(keyword="ACADEMY DINOSAUR")
+        self.assertEqual(mock_log.call_count, 2)
+        mock_paginate.assert_called_once()
+
+    @patch("final_movies.all_searches.get_user_input", side_effect=["qqq", ""])
+    @patch("final_movies.all_searches.suggest_titles", return_value=[("ACE GOLDFINGER", 0.4)])
+    @patch("final_movies.all_searches.search_movies_paged", return_value=[])
+    @patch("final_movies.all_searches.log_search")
+    @patch("final_movies.all_searches.paginate_results")
+    def test_search_by_keyword_workflow_suggestion_skipped(self, mock_paginate, mock_log, mock_search, mock_suggest, mock_input):
+        all_searches.search_by_keyword_workflow()
+        mock_search.assert_called_once()
+        mock_paginate.assert_not_called()
+
     @patch("final_movies.all_searches.select_genre", return_value=(1, (1990, 2025), "Action"))
     @patch("final_movies.all_searches.get_year_range", return_value=(1995, 2000))
-    @patch("final_movies.all_searches.search_movies", return_value=[{"title": "Action Movie"}])
+    @patch("final_movies.all_searches.search_movies_paged", return_value=[{"title": "Action Movie"}])
     @patch("final_movies.all_searches.log_search")
     @patch("final_movies.all_searches.paginate_results")
     def test_search_by_genre_and_year_workflow_found(self, mock_paginate, mock_log, mock_search, mock_year_range, mock_select):
@@ -57,7 +83,7 @@ class TestAllSearches(unittest.TestCase):
 
     @patch("final_movies.all_searches.display_ratings_table", return_value={1: "PG"})
     @patch("final_movies.all_searches.get_user_input", side_effect=["1"])
-    @patch("final_movies.all_searches.search_movies", return_value=[{"title": "PG Movie"}])
+    @patch("final_movies.all_searches.search_movies_paged", return_value=[{"title": "PG Movie"}])
     @patch("final_movies.all_searches.log_search")
     @patch("final_movies.all_searches.paginate_results")
     def test_search_by_rating_workflow_found(self, mock_paginate, mock_log, mock_search, mock_input, mock_display_ratings):
@@ -67,7 +93,7 @@ class TestAllSearches(unittest.TestCase):
 
     @patch("final_movies.all_searches.display_ratings_table", return_value={1: "PG"})
     @patch("final_movies.all_searches.get_user_input", side_effect=["a", "5", "1"])
-    @patch("final_movies.all_searches.search_movies", return_value=[{"title": "PG Movie"}])
+    @patch("final_movies.all_searches.search_movies_paged", return_value=[{"title": "PG Movie"}])
     @patch("final_movies.all_searches.log_search")
     @patch("final_movies.all_searches.paginate_results")
     def test_search_by_rating_workflow_invalid_then_valid(self, mock_paginate, mock_log, mock_search, mock_input, mock_display_ratings):
@@ -0,0 +1,108 @@
+import os
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+from final_movies import async_api, log_writer, mysql_connector
+from benchmarks import async_throughput
+from benchmarks.standins import SakilaStandIn, install_mongo_standin
+
+
+@patch.dict(os.environ, {"SEARCH_CACHE": "0", "MONGO_LOG_ASYNC": "0"})
+class TestAsyncApi(unittest.TestCase):
+    def setUp(self):
+        self.sakila = SakilaStandIn().populate(200, genres=4)
+        self.sakila.install()
+        self.logs, self.rollups = install_mongo_standin()
+
+    def tearDown(self):
+        async_api.close_async_pools()
+        mysql_connector.set_connection_pool(None)
+        mysql_connector.invalidate_genre_cache()
+        with log_writer._mongo_lock:
+            log_writer._mongo_ready = False
+            log_writer._collection = log_writer._rollup_collection = None
+        self.sakila.close()
+
+    def test_async_search_matches_sync(self):
+        async def main():
+            return await asyncio.gather(
+                async_api.search_movies(rating="PG"),
+                async_api.search_movies(genre_id=[1, 2], year_from=2000),
+                async_api.get_genre_catalog(),
+            )
+
+        by_rating, by_genre, catalog = asyncio.run(main())
+        self.assertEqual(by_rating, mysql_connector.search_movies(rating="PG"))
+        self.assertEqual(by_genre, mysql_connector.search_movies(genre_id=[1, 2], year_from=2000))
+        self.assertEqual(catalog, mysql_connector.get_genre_catalog())
+        stats = async_api.get_async_pool_stats()["mysql"]
+        self.assertEqual(stats["completed"], 3)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["max_workers"], mysql_connector.get_connection_pool().max_size)
+
+    def test_log_search_writes_entry(self):
+        saved = asyncio.run(async_api.log_search("rating", {"rating": "PG"}, 7))
+        self.assertTrue(saved)
+        entry = self.logs.find_one({"search_type": "rating"})
+        self.assertEqual(entry["params"], {"rating": "PG"})
+        self.assertEqual(entry["results_count"], 7)
+
+    def test_session_overlaps_log_with_next_search(self):
+        log_started = threading.Event()
+        release_log = threading.Event()
+        write_log_entry = log_writer.write_log_entry
+
+        def slow_write(entry):
+            log_started.set()
+            # Запись лога первого поиска ждёт, пока не выполнится второй поиск
+            release_log.wait(5)
+            return write_log_entry(entry)
+
+        search_movies = mysql_connector.search_movies
+
+        def search_then_release(**filters):
+            rows = search_movies(**filters)
+            if filters.get("keyword"):
+                # Второй поиск выполняется, пока запись лога первого ещё не завершена
+                self.assertTrue(log_started.wait(5))
+                release_log.set()
+            return rows
+
+        async def main():
+            async with async_api.AsyncSearchSession() as session:
+                first = await session.search("rating", rating="PG")
+                second = await session.search("keyword", keyword="a", rating=None)
+            return first, second
+
+        with patch.object(log_writer, "write_log_entry", slow_write), \
+                patch.object(mysql_connector, "search_movies", search_then_release):
+            first, second = asyncio.run(main())
+
+        self.assertTrue(release_log.is_set())
+        entries = list(self.logs.find({}))
+        self.assertEqual([e["search_type"] for e in entries], ["rating", "keyword"])
+        self.assertEqual(entries[0]["results_count"], len(first))
+        self.assertEqual(entries[1]["params"], {"keyword": "a"})
+        self.assertEqual(entries[1]["results_count"], len(second))
+
+    def test_session_survives_log_failure(self):
+        async def main():
+            async with async_api.AsyncSearchSession() as session:
+                await session.search("rating", rating="PG")
+                return await session.search("rating", rating="R")
+
+        with patch.object(log_writer, "write_log_entry", side_effect=RuntimeError("down")), \
+                self.assertLogs(level="ERROR"):
+            rows = asyncio.run(main())
+        self.assertEqual(rows, mysql_connector.search_movies(rating="R"))
+        self.assertEqual(async_api.get_async_pool_stats()["mongo"]["failed"], 2)
+
+
+class TestAsyncThroughputBenchmark(unittest.TestCase):
+    @patch.dict(os.environ, {})
+    def test_run_on_standins(self):
+        report = async_throughput.run(requests=20, concurrency=4, latency_ms=1, films=100)
+        self.assertEqual(set(report["results"]), {"sync", "async x4"})
+        for result in report["results"].values():
+            self.assertGreater(result["requests_per_second"], 0)
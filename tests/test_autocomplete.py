@@ -0,0 +1,76 @@
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+from final_movies import autocomplete, mysql_connector
+from final_movies.autocomplete import TitleCompleter
+from benchmarks import datagen
+from benchmarks.standins import SakilaStandIn
+
+TITLES = ["ACADEMY DINOSAUR", "ACE GOLDFINGER", "ADAPTATION HOLES", "AFRICAN EGG", "Dinosaur Secretary"]
+
+
+class TestTitleCompleter(unittest.TestCase):
+    def test_title_prefix_before_word_prefix(self):
+        completer = TitleCompleter(TITLES)
+        self.assertEqual(completer.complete("ac"), ["ACADEMY DINOSAUR", "ACE GOLDFINGER"])
+        self.assertEqual(completer.complete("dino"), ["Dinosaur Secretary", "ACADEMY DINOSAUR"])
+        self.assertEqual(completer.complete("egg"), ["AFRICAN EGG"])
+        self.assertEqual(completer.complete("ACADEMY D"), ["ACADEMY DINOSAUR"])
+        self.assertEqual(completer.complete("zz"), [])
+        self.assertEqual(completer.complete("  "), [])
+
+    def test_limit(self):
+        completer = TitleCompleter(TITLES)
+        self.assertEqual(completer.complete("a", limit=2), ["ACADEMY DINOSAUR", "ACE GOLDFINGER"])
+        self.assertEqual(len(completer.complete("a", limit=10)), 4)
+
+    def test_completion_is_sub_millisecond(self):
+        completer = TitleCompleter(datagen.generate_title(i) for i in range(100000))
+        prefixes = ["a", "ac", "academy d", "dino", "zz", "alaska s"] * 100
+        started = time.perf_counter()
+        for prefix in prefixes:
+            completer.complete(prefix, limit=10)
+        self.assertLess((time.perf_counter() - started) / len(prefixes), 0.001)
+
+
+class TestCompleteTitles(unittest.TestCase):
+    def setUp(self):
+        self.sakila = SakilaStandIn().populate(50, genres=4)
+        self.sakila.install()
+        autocomplete.invalidate_title_completer()
+
+    def tearDown(self):
+        autocomplete.invalidate_title_completer()
+        mysql_connector.set_connection_pool(None)
+        self.sakila.close()
+
+    def test_complete_titles_from_database(self):
+        titles = autocomplete.complete_titles("academy", limit=3)
+        self.assertEqual(len(titles), 3)
+        self.assertTrue(all(title.startswith("ACADEMY ") for title in titles))
+
+    def test_unavailable_database_gives_no_completions(self):
+        autocomplete.invalidate_title_completer()
+        with patch("final_movies.autocomplete.get_film_titles", side_effect=ConnectionError("down")):
+            self.assertEqual(autocomplete.complete_titles("ac"), [])
+
+
+class TestTitleCompletion(unittest.TestCase):
+    def test_readline_completer_is_installed_and_restored(self):
+        readline = MagicMock(__doc__="GNU readline")
+        readline.get_completer.return_value = "previous"
+        readline.get_completer_delims.return_value = " \t"
+        with patch("final_movies.autocomplete._load_readline", return_value=readline), \
+                patch("final_movies.autocomplete.complete_titles", return_value=["ACE GOLDFINGER"]):
+            with autocomplete.title_completion() as enabled:
+                self.assertTrue(enabled)
+                completer = readline.set_completer.call_args.args[0]
+                self.assertEqual(completer("ac", 0), "ACE GOLDFINGER")
+                self.assertIsNone(completer("ac", 1))
+        readline.set_completer.assert_called_with("previous")
+        readline.set_completer_delims.assert_called_with(" \t")
+
+    def test_without_terminal_completion_is_disabled(self):
+        with patch("final_movies.autocomplete._load_readline", return_value=None):
+            with autocomplete.title_completion() as enabled:
+                self.assertFalse(enabled)
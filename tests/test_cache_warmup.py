@@ -0,0 +1,92 @@
+import os
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import pymysql
+from final_movies import cache_warmup, mysql_connector, search_cache
+from final_movies.change_tracker import set_change_tracker
+from benchmarks.standins import SakilaStandIn, InMemoryCollection
+
+ROLLUPS = [
+    {"_id": "a", "search_type": "keyword", "params": {"keyword": "ace"}, "count": 9},
+    {"_id": "b", "search_type": "rating", "params": {"rating": "PG"}, "count": 7},
+    {
+        "_id": "c", "search_type": "genre_year", "count": 5,
+        "params": {"genre_name": "Action", "genre_id": 1, "year_from": 2000, "year_to": 2010},
+    },
+    {"_id": "d", "search_type": "unknown", "params": {}, "count": 3},
+]
+
+
+class TestCacheWarmup(unittest.TestCase):
+    def setUp(self):
+        self.sakila = SakilaStandIn().populate(100, genres=4)
+        self.sakila.install()
+        self.rollups = InMemoryCollection("rollups")
+        self.rollups.insert_many([dict(entry) for entry in ROLLUPS])
+        self.env = patch.dict(os.environ, {"SEARCH_CACHE": "1", "CHANGE_POLL_INTERVAL": "60"})
+        self.env.start()
+        set_change_tracker(None)
+        search_cache.set_search_cache(None)
+
+    def tearDown(self):
+        self.env.stop()
+        set_change_tracker(None)
+        search_cache.set_search_cache(None)
+        mysql_connector.set_connection_pool(None)
+        mysql_connector.invalidate_genre_cache()
+        self.sakila.close()
+
+    def test_search_filters_from_log_params(self):
+        self.assertEqual(cache_warmup.search_filters("keyword", {"keyword": "ace"}), {"keyword": "ace"})
+        self.assertEqual(
+            cache_warmup.search_filters("genre_year", ROLLUPS[2]["params"]),
+            {"genre_id": 1, "year_from": 2000, "year_to": 2010},
+        )
+        self.assertIsNone(cache_warmup.search_filters("keyword", {}))
+
+    @patch("final_movies.log_stats.get_genre_map", return_value={1: "Action"})
+    def test_popular_searches_are_warmed(self, mock_genres):
+        with patch("final_movies.cache_warmup.get_rollup_collection", return_value=self.rollups):
+            report = cache_warmup.warm_caches(top=10, concurrency=2, budget=10)
+
+        self.assertEqual(len(report.warmed), 3)
+        self.assertEqual(report.failed, [])
+        self.assertEqual(report.prefetched, ["genres"])
+        # Первая страница и количество в меню и в HTTP API обслуживаются из кэша
+        with patch("final_movies.mysql_connector.execute_select_query") as mock_query:
+            paged = mysql_connector.search_movies_paged(keyword="ACE")
+            paged.get_page(0)
+            self.assertIn(paged.total, [entry["rows"] for entry in report.warmed])
+            mysql_connector.search_movies_paged(genre_id=1, year_from=2000, year_to=2010).get_page(0)
+            page = mysql_connector.search_movies_page(rating="PG", page_size=20, with_total=True)
+            mock_query.assert_not_called()
+        self.assertTrue(page.rows)
+
+    def test_budget_skips_remaining_searches(self):
+        def slow_search(**filters):
+            time.sleep(0.2)
+            return mysql_connector.SearchPage([], total=0)
+
+        searches = [(f"Keyword: {i}", {"keyword": str(i)}) for i in range(6)]
+        with patch("final_movies.cache_warmup.search_movies_page", side_effect=slow_search):
+            report = cache_warmup.warm_caches(concurrency=1, budget=0.1, searches=searches)
+        self.assertEqual(len(report.warmed), 1)
+        self.assertEqual(len(report.skipped), 5)
+
+    def test_database_errors_are_reported_as_failed(self):
+        pool = MagicMock(max_size=5)
+        pool.connection.side_effect = pymysql.OperationalError(2013, "Lost connection")
+        for cache in ("0", "1"):
+            with self.subTest(cache=cache), patch.dict(os.environ, {"SEARCH_CACHE": cache}):
+                search_cache.set_search_cache(None)
+                with patch("final_movies.mysql_connector.get_connection_pool", return_value=pool), \
+                        patch("final_movies.cache_warmup.get_connection_pool", return_value=pool):
+                    with self.assertLogs(level="ERROR"):
+                        report = cache_warmup.warm_caches(searches=[("Rating: PG", {"rating": "PG"})])
+                self.assertEqual(report.warmed, [])
+                self.assertIn("Rating: PG", [f["search"] for f in report.failed])
+
+    def test_concurrency_leaves_a_pooled_connection(self):
+        self.assertEqual(cache_warmup._worker_limit(16), 4)  # пул SakilaStandIn — 5 соединений
+        self.assertEqual(cache_warmup._worker_limit(0), 1)
@@ -0,0 +1,153 @@
+import os
+import itertools
+import unittest
+from unittest.mock import patch
+from final_movies import mysql_connector
+from final_movies.catalog_engine import CatalogEngine
+from benchmarks.standins import SakilaStandIn
+
+KEYWORDS = [None, "ace", "a", "zz", "ACADEMY", "ac%my", "_ce ", "5"]
+GENRES = [None, 1, 3, 99, (1, 3)]
+YEARS = [(None, None), (2000, 2010), (2010, 2000), (1950, 2025), (2024, 2024), (2005, None), (None, 2003)]
+RATINGS = [None, "PG", "NC-17", "XX", ("PG", "G", "XX")]
+
+
+def filter_matrix():
+    for keyword, genre_id, (year_from, year_to), rating in itertools.product(
+        KEYWORDS, GENRES, YEARS, RATINGS
+    ):
+        yield {
+            "keyword": keyword, "genre_id": genre_id,
+            "year_from": year_from, "year_to": year_to, "rating": rating,
+        }
+
+
+class TestCatalogEngine(unittest.TestCase):
+    def test_filters_on_small_catalog(self):
+        engine = CatalogEngine.from_rows(
+            [(1, "ACE GOLDFINGER", 2001, "G"), (2, "ACADEMY DINOSAUR", 2000, "PG"),
+             (3, "ALIEN CENTER", 2001, "PG"), (4, "ACE GOLDFINGER", 2001, "G")],
+            [(1, 7), (2, 7), (3, 8), (4, 8)],
+        )
+        self.assertEqual(
+            [r["title"] for r in engine.search()],
+            ["ACADEMY DINOSAUR", "ACE GOLDFINGER", "ALIEN CENTER"],
+        )
+        # Повторы (title, release_year, rating) считаются один раз, как и в результате
+        self.assertEqual(engine.count(), 3)
+        self.assertEqual(engine.count(keyword="ace"), 1)
+        self.assertEqual(len(engine.search(keyword="ace")), 1)
+        self.assertEqual(engine.search(genre_id=8, rating="PG")[0]["title"], "ALIEN CENTER")
+        self.assertEqual(engine.search(year_from=2000, year_to=2000)[0]["release_year"], 2000)
+        self.assertEqual(engine.search(rating="R"), [])
+
+    def test_pages_cross_word_boundaries(self):
+        films = [(i, f"FILM {i:04d}", 2000, "G") for i in range(1, 200)]
+        engine = CatalogEngine.from_rows(films, [])
+        page = engine.page(after=(2000, "FILM 0063", 63), limit=3)
+        self.assertEqual([r[0] for r in page], ["FILM 0064", "FILM 0065", "FILM 0066"])
+        page = engine.page(before=(2000, "FILM 0065", 65), limit=3)
+        self.assertEqual([r[0] for r in page], ["FILM 0064", "FILM 0063", "FILM 0062"])
+        self.assertEqual(engine.key_at(128), (2000, "FILM 0129", 129))
+
+    def test_duplicates_ordered_by_film_id(self):
+        # Одинаковые (title, release_year) с разными рейтингами идут по film_id;
+        # повтор (title, release_year, rating) представляет фильм с меньшим film_id
+        engine = CatalogEngine.from_rows(
+            [(5, "TWIN", 2001, "PG"), (2, "TWIN", 2001, "R"), (9, "TWIN", 2001, "PG"), (7, "SOLO", 2001, "G")],
+            [(9, 1), (7, 1)],
+        )
+        self.assertEqual(
+            [(r[2], r[3]) for r in engine.page(limit=10)], [("G", 7), ("R", 2), ("PG", 5)]
+        )
+        self.assertEqual(engine.count(), 3)
+        # В жанре 1 из двух PG-фильмов есть только film_id 9 — он и представляет строку
+        self.assertEqual([r[3] for r in engine.page(limit=10, genre_id=1)], [7, 9])
+        self.assertEqual(engine.count(genre_id=1), 2)
+        self.assertEqual(
+            [r[3] for r in engine.page(before=(2001, "TWIN", 9), limit=10)], [5, 2, 7]
+        )
+
+
+class TestCatalogEngineEquivalence(unittest.TestCase):
+    """
+    Сравнение каталога в памяти с SQL-путём на одних и тех же данных (SQLite-заменитель MySQL).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sakila = SakilaStandIn().populate(600, genres=6, max_genres_per_film=3, seed=7)
+        with cls.sakila.connect() as connection:
+            # Дубликаты (title, release_year, rating) у разных film_id проверяют DISTINCT
+            connection.raw.execute(
+                "INSERT INTO film (film_id, title, release_year, rating) "
+                "SELECT film_id + 10000, title, release_year, rating FROM film WHERE film_id <= 20"
+            )
+            connection.raw.execute(
+                "INSERT INTO film_category (film_id, category_id) "
+                "SELECT film_id + 10000, category_id FROM film_category WHERE film_id <= 20"
+            )
+        cls.sakila.install()
+
+    @classmethod
+    def tearDownClass(cls):
+        mysql_connector.set_connection_pool(None)
+        mysql_connector.invalidate_catalog_engine()
+        cls.sakila.close()
+
+    def setUp(self):
+        mysql_connector.invalidate_catalog_engine()
+
+    def both(self, func, **kwargs):
+        results = []
+        for backend in ("sql", "memory"):
+            with patch.dict(os.environ, {"SEARCH_BACKEND": backend}):
+                results.append(func(**kwargs))
+        return results
+
+    def test_search_movies_equivalent(self):
+        for filters in filter_matrix():
+            with self.subTest(**filters):
+                sql, memory = self.both(mysql_connector.search_movies, **filters)
+                self.assertEqual(sql, memory)
+
+    def test_count_movies_equivalent(self):
+        for filters in filter_matrix():
+            with self.subTest(**filters):
+                sql, memory = self.both(mysql_connector.count_movies, **filters)
+                self.assertEqual(sql, memory)
+
+    def test_paging_equivalent(self):
+        for filters in ({}, {"rating": "PG"}, {"keyword": "a", "genre_id": 2},
+                        {"year_from": 2000, "year_to": 2020},
+                        {"genre_id": [1, 2], "year_to": 2010, "rating": ["PG", "R"]}):
+            with self.subTest(**filters):
+                sql, memory = self.both(self.walk_pages, **filters)
+                self.assertEqual(sql, memory)
+                self.assertEqual(
+                    [row for page in sql["forward"] for row in page],
+                    self.both(mysql_connector.search_movies, **filters)[0],
+                )
+
+    def test_seek_equivalent(self):
+        for offset in (1, 7, 50, 10000):
+            sql, memory = self.both(mysql_connector._seek_page_cursor, filters={"rating": "G"}, offset=offset)
+            self.assertEqual(sql, memory)
+
+    @staticmethod
+    def walk_pages(**filters):
+        forward, cursor = [], None
+        while True:
+            page = mysql_connector.search_movies_page(cursor=cursor, page_size=7, **filters)
+            forward.append(page.rows)
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        backward, cursor = [], page.prev_cursor
+        while cursor is not None:
+            page = mysql_connector.search_movies_page(
+                cursor=cursor, direction="prev", page_size=7, **filters
+            )
+            backward.append(page.rows)
+            cursor = page.prev_cursor
+        return {"forward": forward, "backward": backward}
@@ -0,0 +1,119 @@
+import os
+import mmap
+import tempfile
+import unittest
+from unittest.mock import patch
+from final_movies import catalog_snapshot, mysql_connector
+from final_movies.catalog_engine import CatalogEngine
+from final_movies.catalog_snapshot import (
+    SnapshotError,
+    open_snapshot,
+    snapshot_is_current,
+    write_snapshot,
+)
+from benchmarks.standins import SakilaStandIn
+
+FILMS = [
+    (1, "ACE GOLDFINGER", 2001, "G"),
+    (2, "ACADEMY DINOSAUR", 2000, "PG"),
+    (3, "ÉCOLE ÎLE", 2001, "PG"),
+    (4, "ALIEN CENTER", None, "R"),
+]
+LINKS = [(1, 7), (2, 7), (3, 8), (4, 8)]
+GENRES = {7: "Action", 8: "Drama", 9: "Empty"}
+
+
+class TestCatalogSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "catalog.snap")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        engine = CatalogEngine.from_rows(FILMS, LINKS, GENRES, watermark="w1")
+        write_snapshot(engine, self.path)
+        mapped = open_snapshot(self.path)
+
+        self.assertEqual(mapped.watermark, "w1")
+        self.assertEqual(mapped.search(), engine.search())
+        self.assertEqual(mapped.search(keyword="île"), engine.search(keyword="île"))
+        self.assertEqual(mapped.search(genre_id=8, rating="PG"), engine.search(genre_id=8, rating="PG"))
+        self.assertEqual(mapped.count(year_from=2001, year_to=2001), 2)
+        self.assertEqual(mapped.genre_catalog(), engine.genre_catalog())
+        self.assertEqual(
+            [g["name"] for g in mapped.genre_catalog()], ["Action", "Drama"]
+        )
+
+    def test_watermark_check_uses_header(self):
+        write_snapshot(CatalogEngine.from_rows(FILMS, LINKS, GENRES, watermark="w1"), self.path)
+        self.assertTrue(snapshot_is_current(self.path, "w1"))
+        self.assertFalse(snapshot_is_current(self.path, "w2"))
+        self.assertFalse(snapshot_is_current(self.path + ".missing", "w1"))
+
+    def test_corrupted_snapshot_is_rejected(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a snapshot at all, definitely not" * 4)
+        with self.assertRaises(SnapshotError):
+            open_snapshot(self.path)
+        self.assertFalse(snapshot_is_current(self.path, "w1"))
+
+    def test_failed_open_closes_mapping(self):
+        write_snapshot(CatalogEngine.from_rows(FILMS, LINKS, GENRES, watermark="w1"), self.path)
+        opened, real_mmap = [], mmap.mmap
+
+        def tracked_mmap(*args, **kwargs):
+            opened.append(real_mmap(*args, **kwargs))
+            return opened[-1]
+
+        # Сбой после того, как столбцы уже отображены
+        with patch.object(catalog_snapshot.mmap, "mmap", side_effect=tracked_mmap), \
+                patch.object(catalog_snapshot, "CatalogData", side_effect=TypeError("broken")):
+            with self.assertRaises(SnapshotError):
+                open_snapshot(self.path)
+        self.assertTrue(opened[0].closed)
+
+
+class TestCatalogSnapshotLoading(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "catalog.snap")
+        self.sakila = SakilaStandIn(os.path.join(self.tmp.name, "sakila.sqlite3")).populate(300, genres=5)
+        self.sakila.install()
+        self.env = patch.dict(os.environ, {"CATALOG_SNAPSHOT_PATH": self.path})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        mysql_connector.set_connection_pool(None)
+        mysql_connector.invalidate_catalog_engine()
+        self.tmp.cleanup()
+
+    def test_snapshot_reused_until_source_changes(self):
+        first = mysql_connector.load_catalog_engine()
+        self.assertTrue(os.path.exists(self.path))
+
+        # Источник не изменился — каталог берётся из снимка без чтения таблиц
+        with patch("final_movies.mysql_connector.build_catalog_engine") as mock_build:
+            second = mysql_connector.load_catalog_engine()
+            mock_build.assert_not_called()
+        self.assertEqual(second.search(rating="PG"), first.search(rating="PG"))
+
+        with self.sakila.connect() as connection:
+            connection.raw.execute(
+                "INSERT INTO film (film_id, title, release_year, rating, last_update) "
+                "VALUES (5000, 'ZZ TOP', 2020, 'PG', '2100-01-01 00:00:00')"
+            )
+        third = mysql_connector.load_catalog_engine(second)
+        self.assertEqual(len(third), len(second) + 1)
+        self.assertTrue(snapshot_is_current(self.path, third.watermark))
+
+    def test_snapshot_used_when_mysql_is_down(self):
+        mysql_connector.load_catalog_engine()
+        with patch(
+            "final_movies.mysql_connector.get_catalog_watermark",
+            side_effect=ConnectionError("down"),
+        ):
+            engine = mysql_connector.load_catalog_engine()
+        self.assertEqual(len(engine), 300)
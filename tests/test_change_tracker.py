@@ -0,0 +1,168 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+from final_movies import mysql_connector
+from final_movies.change_tracker import (
+    ChangeTracker,
+    Watermark,
+    format_watermark,
+    parse_watermark,
+    set_change_tracker,
+    start_change_polling,
+)
+from benchmarks.standins import SakilaStandIn
+
+
+class TestChangeTracker(unittest.TestCase):
+    def test_notifies_only_affected_listeners(self):
+        marks = {"film": Watermark(1, 1, "a"), "category": Watermark(1, 1, "a")}
+        tracker = ChangeTracker(reader=lambda: dict(marks))
+        film_listener, category_listener = MagicMock(), MagicMock()
+        tracker.subscribe(["film"], film_listener)
+        tracker.subscribe(["category"], category_listener)
+
+        self.assertEqual(tracker.poll(), [])  # первый опрос — исходное состояние
+        marks["film"] = Watermark(2, 3, "b")
+        changes = tracker.poll()
+
+        self.assertEqual([c.table for c in changes], ["film"])
+        film_listener.assert_called_once()
+        category_listener.assert_not_called()
+        self.assertEqual(film_listener.call_args.args[0][0].previous, Watermark(1, 1, "a"))
+
+    def test_maybe_poll_respects_interval(self):
+        reader = MagicMock(return_value={})
+        tracker = ChangeTracker(poll_interval=60, reader=reader)
+        tracker.maybe_poll()
+        tracker.maybe_poll()
+        self.assertEqual(reader.call_count, 1)
+
+    def test_background_polling_keeps_reads_off_the_caller(self):
+        polled = threading.Event()
+
+        def reader():
+            polled.set()
+            return {}
+
+        tracker = ChangeTracker(poll_interval=60, reader=reader)
+        thread = tracker.start_background()
+        self.assertTrue(polled.wait(5))
+        self.assertIsNone(tracker.start_background())
+        with patch.object(tracker, "poll") as mock_poll:
+            self.assertEqual(tracker.maybe_poll(), [])
+            mock_poll.assert_not_called()
+        tracker.stop_background(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(tracker.polls, 1)
+
+    def test_replaced_tracker_stops_polling(self):
+        tracker = ChangeTracker(poll_interval=60, reader=dict)
+        set_change_tracker(tracker)
+        thread = tracker.start_background()
+        set_change_tracker(None)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_probe_skips_full_read_until_last_update_changes(self):
+        marks = {"film": Watermark(2, 3, "a")}
+        latest = {"film": "a"}
+        reader = MagicMock(side_effect=lambda: dict(marks))
+        tracker = ChangeTracker(reader=reader, probe=lambda: dict(latest), full_interval=60)
+        tracker.poll()
+        marks["film"] = Watermark(1, 1, "a")  # удаление: last_update прежний
+        self.assertEqual(tracker.poll(), [])
+        self.assertEqual(reader.call_count, 1)
+
+        latest["film"] = "b"
+        marks["film"] = Watermark(2, 4, "b")
+        self.assertEqual([c.table for c in tracker.poll()], ["film"])
+        self.assertEqual(reader.call_count, 2)
+
+        tracker.full_interval = 0
+        marks["film"] = Watermark(1, 2, "b")
+        self.assertEqual([c.current for c in tracker.poll()], [Watermark(1, 2, "b")])
+        self.assertEqual(tracker.stats()["full_polls"], 3)
+
+    def test_background_polling_only_for_enabled_caches(self):
+        with patch("final_movies.change_tracker.get_change_tracker") as mock_tracker:
+            with patch.dict(os.environ, {"SEARCH_CACHE": "0", "SEARCH_BACKEND": "sql"}):
+                self.assertIsNone(start_change_polling())
+            with patch.dict(os.environ, {"SEARCH_CACHE": "1", "CHANGE_POLL_BACKGROUND": "0"}):
+                self.assertIsNone(start_change_polling())
+            mock_tracker.assert_not_called()
+            with patch.dict(os.environ, {"SEARCH_CACHE": "0", "SEARCH_BACKEND": "memory"}):
+                start_change_polling()
+            mock_tracker.return_value.start_background.assert_called_once()
+
+    def test_watermark_round_trip(self):
+        marks = {"film": Watermark(3, 6, "2006-02-15 05:03:42")}
+        self.assertEqual(parse_watermark(format_watermark(marks)), marks)
+        self.assertEqual(parse_watermark("not json"), {})
+
+
+class TestCatalogRefresh(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sakila = SakilaStandIn(os.path.join(self.tmp.name, "sakila.sqlite3")).populate(200, genres=4)
+        self.sakila.install()
+        self.env = patch.dict(os.environ, {"SEARCH_BACKEND": "memory", "CHANGE_POLL_INTERVAL": "0"})
+        self.env.start()
+        set_change_tracker(None)
+        mysql_connector.invalidate_catalog_engine()
+
+    def tearDown(self):
+        self.env.stop()
+        set_change_tracker(None)
+        mysql_connector.set_connection_pool(None)
+        mysql_connector.invalidate_catalog_engine()
+        mysql_connector.invalidate_genre_cache()
+        self.tmp.cleanup()
+
+    def execute(self, sql):
+        with self.sakila.connect() as connection:
+            connection.raw.execute(sql)
+
+    def test_updated_rows_are_applied_incrementally(self):
+        self.assertEqual(len(mysql_connector.get_genre_catalog()), 4)
+        self.assertEqual(mysql_connector.search_movies(keyword="zebra crossing"), [])
+
+        self.execute(
+            "UPDATE film SET title = 'ZEBRA CROSSING', last_update = '2100-01-01 00:00:00' "
+            "WHERE film_id = 1"
+        )
+        self.execute(
+            "INSERT INTO category (category_id, name, last_update) VALUES (50, 'Western', '2100-01-01')"
+        )
+        self.execute(
+            "INSERT INTO film_category (film_id, category_id, last_update) VALUES (1, 50, '2100-01-01')"
+        )
+        with patch("final_movies.mysql_connector.build_catalog_engine") as mock_build:
+            rows = mysql_connector.search_movies(keyword="zebra crossing")
+            mock_build.assert_not_called()
+
+        self.assertEqual([r["title"] for r in rows], ["ZEBRA CROSSING"])
+        self.assertEqual(len(mysql_connector.search_movies(genre_id=50)), 1)
+        # Кэш жанров сброшен и заполнен уже с новым жанром
+        self.assertIn("Western", [g["name"] for g in mysql_connector.get_genre_catalog()])
+        self.assertEqual(mysql_connector.search_movies(), self.sql_search())
+
+    @patch.dict(os.environ, {"CHANGE_FULL_POLL_INTERVAL": "0"})
+    def test_deleted_rows_trigger_full_reload(self):
+        # Удаления не меняют MAX(last_update) — их находит полное чтение водяных знаков
+        before = len(mysql_connector.search_movies())
+        self.execute("DELETE FROM film_category WHERE film_id = 2")
+        self.execute("DELETE FROM film WHERE film_id = 2")
+        with patch(
+            "final_movies.mysql_connector.build_catalog_engine",
+            wraps=mysql_connector.build_catalog_engine,
+        ) as mock_build:
+            after = mysql_connector.search_movies()
+            mock_build.assert_called_once()
+        self.assertEqual(len(after), before - 1)
+        self.assertEqual(after, self.sql_search())
+
+    def sql_search(self):
+        with patch.dict(os.environ, {"SEARCH_BACKEND": "sql"}):
+            return mysql_connector.search_movies()
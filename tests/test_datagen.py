@@ -0,0 +1,69 @@
+import random
+import unittest
+from unittest.mock import MagicMock
+from benchmarks import datagen
+
+
+class TestDatagen(unittest.TestCase):
+    def test_generation_is_deterministic(self):
+        first = list(datagen.generate_films(50, random.Random(1)))
+        second = list(datagen.generate_films(50, random.Random(1)))
+        self.assertEqual(first, second)
+
+    def test_titles_are_unique_beyond_vocabulary(self):
+        count = len(datagen.TITLE_ADJECTIVES) * len(datagen.TITLE_NOUNS) + 10
+        titles = {datagen.generate_title(i) for i in range(count)}
+        self.assertEqual(len(titles), count)
+
+    def test_films_have_valid_years_and_ratings(self):
+        for film_id, title, _, year, rating in datagen.generate_films(500, random.Random(2), 1001):
+            self.assertGreaterEqual(film_id, 1001)
+            self.assertTrue(title.isupper())
+            self.assertTrue(1950 <= year <= 2025)
+            self.assertIn(rating, datagen.RATING_WEIGHTS)
+
+    def test_film_categories_respect_limit(self):
+        links = list(datagen.generate_film_categories(range(1, 101), [1, 2, 3], random.Random(3), 2))
+        per_film = {}
+        for film_id, genre_id in links:
+            per_film.setdefault(film_id, []).append(genre_id)
+        self.assertEqual(len(per_film), 100)
+        self.assertTrue(all(1 <= len(g) <= 2 and len(set(g)) == len(g) for g in per_film.values()))
+
+    def test_genre_limit(self):
+        self.assertEqual(datagen.generate_genres(2), [(1, "Action"), (2, "Animation")])
+        self.assertEqual(len(datagen.generate_genres(40)), 40)
+        with self.assertRaises(ValueError):
+            datagen.generate_genres(300)
+
+    def test_search_logs_match_log_search_format(self):
+        genres = datagen.generate_genres(16)
+        docs = list(datagen.generate_search_logs(200, genres, random.Random(4), distinct_searches=50))
+        self.assertEqual(len(docs), 200)
+        for doc in docs:
+            self.assertEqual(set(doc), {"timestamp", "search_type", "params", "results_count"})
+            self.assertIn(doc["search_type"], ("keyword", "genre_year", "rating"))
+
+    def test_load_mongo_uses_insert_many_batches(self):
+        collection = MagicMock()
+        total = datagen.load_mongo(collection, 25, datagen.generate_genres(3), batch_size=10)
+        self.assertEqual(total, 25)
+        self.assertEqual(collection.insert_many.call_count, 3)
+
+    def test_load_mysql_appends_after_existing_films(self):
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.side_effect = [{"max_id": 1000}, {"language_id": 1}]
+
+        counts = datagen.load_mysql(connection, films=30, genres=4, batch_size=20)
+
+        self.assertEqual(counts, {"films": 30, "genres": 4, "links": 30})
+        film_batches = [
+            c.args[1] for c in cursor.executemany.call_args_list if "INTO film " in c.args[0]
+        ]
+        self.assertEqual([len(batch) for batch in film_batches], [20, 10])
+        self.assertEqual(film_batches[0][0][0], 1001)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import io
+import os
+import csv
+import gzip
+import json
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+from final_movies import export, mysql_connector
+from benchmarks.standins import SakilaStandIn
+
+
+class TestSearchMoviesIter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.sakila = SakilaStandIn().populate(3000, genres=4)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sakila.close()
+
+    def setUp(self):
+        self.pool = self.sakila.install()
+
+    def tearDown(self):
+        mysql_connector.set_connection_pool(None)
+
+    def test_iter_matches_search_movies(self):
+        for filters in ({}, {"rating": "PG"}, {"keyword": "ace", "genre_id": 2}):
+            with self.subTest(**filters):
+                self.assertEqual(
+                    list(mysql_connector.search_movies_iter(chunk_size=7, **filters)),
+                    mysql_connector.search_movies(**filters),
+                )
+        self.assertEqual(self.pool.stats()["in_use"], 0)
+
+    def test_iter_matches_catalog_engine(self):
+        with patch.dict(os.environ, {"SEARCH_BACKEND": "memory"}):
+            rows = list(mysql_connector.search_movies_iter(rating="G"))
+        mysql_connector.invalidate_catalog_engine()
+        self.assertEqual(rows, mysql_connector.search_movies(rating="G"))
+
+    def test_abandoned_iterator_discards_connection(self):
+        rows = mysql_connector.search_movies_iter(chunk_size=10)
+        next(rows)
+        self.assertEqual(self.pool.stats()["in_use"], 1)
+        rows.close()
+        stats = self.pool.stats()
+        self.assertEqual(stats["in_use"], 0)
+        self.assertEqual(stats["idle"], 0)
+
+
+class TestExport(unittest.TestCase):
+    ROWS = [
+        {"title": "ACADEMY DINOSAUR", "release_year": 2006, "rating": "PG"},
+        {"title": "ÉCOLE, \"ÎLE\"", "release_year": None, "rating": "G"},
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    @patch("final_movies.export.search_movies_iter")
+    def test_csv_gzip_round_trip(self, mock_iter):
+        mock_iter.return_value = iter(self.ROWS)
+        result = export.export_search(self.path("out.csv.gz"), rating="PG")
+
+        self.assertEqual((result["format"], result["compressed"], result["rows"]), ("csv", True, 2))
+        mock_iter.assert_called_once_with(chunk_size=1000, rating="PG")
+        with gzip.open(self.path("out.csv.gz"), "rt", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows[1]["title"], "ÉCOLE, \"ÎLE\"")
+        self.assertEqual(rows[1]["release_year"], "")
+
+    @patch("final_movies.export.search_movies_iter")
+    def test_jsonl(self, mock_iter):
+        mock_iter.return_value = iter(self.ROWS)
+        result = export.export_search(self.path("out.jsonl"))
+        self.assertEqual(result["format"], "jsonl")
+        with open(self.path("out.jsonl"), encoding="utf-8") as f:
+            self.assertEqual([json.loads(line) for line in f], self.ROWS)
+
+    @patch("final_movies.export.search_movies_iter")
+    def test_failed_export_leaves_no_file(self, mock_iter):
+        def rows():
+            yield self.ROWS[0]
+            raise ConnectionError("lost")
+
+        mock_iter.return_value = rows()
+        with self.assertRaises(ConnectionError):
+            export.export_search(self.path("out.csv"))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_memory_does_not_grow_with_rows(self):
+        def rows(count):
+            for n in range(count):
+                yield {"title": f"FILM {n}", "release_year": 2000, "rating": "PG"}
+
+        peaks = []
+        for count in (1000, 50000):
+            with open(os.devnull, "w", encoding="utf-8") as sink:
+                tracemalloc.start()
+                export.write_rows(rows(count), sink, "jsonl")
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+        self.assertLess(peaks[1], peaks[0] * 2)
+
+    def test_cli_reports_rate(self):
+        sakila = SakilaStandIn().populate(200, genres=4)
+        try:
+            sakila.install()
+            with patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                code = export.main(["--rating", "PG", "--output", self.path("pg.jsonl.gz")])
+            self.assertEqual(code, 0)
+            self.assertIn("rows/s", stderr.getvalue())
+            with gzip.open(self.path("pg.jsonl.gz"), "rt", encoding="utf-8") as f:
+                self.assertTrue(all(json.loads(line)["rating"] == "PG" for line in f))
+        finally:
+            mysql_connector.set_connection_pool(None)
+            sakila.close()
@@ -34,3 +34,29 @@ class TestFormatter(unittest.TestCase):
         result = formatter.display_ratings_table(ratings)
         self.assertIn(1, result)
         self.assertEqual(result[1], "G")
+
+    @patch("builtins.input", side_effect=["g 3", "q"])
+    def test_paginate_results_lazy_pages(self, mock_input):
+        paged = formatter.PagedSearch(page_size=2, rating="PG")
+        with patch.object(paged, "get_page", return_value=[{"title": "Movie"}]) as mock_get_page, \
+                patch("final_movies.mysql_connector.count_movies", return_value=(6, False)):
+            f = io.StringIO()
+            with contextlib.redirect_stdout(f):
+                formatter.paginate_results(paged)
+        # Загружаются только просмотренные страницы
+        self.assertEqual([c.args[0] for c in mock_get_page.call_args_list], [0, 2])
+        self.assertIn("Page 3 of 3", f.getvalue())
+
+    def test_display_genre_table_uses_catalog_without_extra_queries(self):
+        genres = [
+            {"genre_id": 2, "name": "Drama", "min_year": 2001, "max_year": 2006, "film_count": 7}
+        ]
+        with patch("final_movies.formatter.get_min_max_years_for_genre") as mock_years, \
+                patch("final_movies.formatter.get_genre_movie_count") as mock_count:
+            f = io.StringIO()
+            with contextlib.redirect_stdout(f):
+                result = formatter.display_genre_table(genres)
+        mock_years.assert_not_called()
+        mock_count.assert_not_called()
+        self.assertEqual(result, {2: (2001, 2006, "Drama")})
+        self.assertIn("2001-2006", f.getvalue())
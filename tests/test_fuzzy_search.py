@@ -0,0 +1,109 @@
+import os
+import time
+import threading
+import unittest
+from unittest.mock import patch
+from final_movies import fuzzy_search, mysql_connector
+from final_movies.fuzzy_search import TrigramIndex, trigrams
+from final_movies.change_tracker import set_change_tracker
+from benchmarks import datagen
+from benchmarks.standins import SakilaStandIn
+
+TITLES = ["ACADEMY DINOSAUR", "ACE GOLDFINGER", "ADAPTATION HOLES", "ACADEMY DINOSAUR 2"]
+
+
+class TestTrigramIndex(unittest.TestCase):
+    def test_trigrams_are_padded_per_word(self):
+        self.assertEqual(trigrams("Ace"), {"  a", " ac", "ace", "ce "})
+        self.assertEqual(trigrams("ace, ACE!"), trigrams("ace"))
+        self.assertEqual(trigrams("  "), frozenset())
+
+    def test_typo_ranks_closest_title_first(self):
+        index = TrigramIndex(TITLES + ["ACADEMY DINOSAUR"])
+        self.assertEqual(len(index), 4)
+        results = index.search("ACADAMY")
+        # Обе части «ACADEMY» совпадают одинаково, короче — выше
+        self.assertEqual([title for title, _ in results], ["ACADEMY DINOSAUR", "ACADEMY DINOSAUR 2"])
+        self.assertAlmostEqual(results[0][1], 5 / 8)
+
+    def test_threshold_and_candidate_cap(self):
+        index = TrigramIndex(TITLES)
+        self.assertEqual(index.search("zzzz"), [])
+        self.assertEqual(index.search("goldfinger", min_similarity=0.99), [("ACE GOLDFINGER", 1.0)])
+        self.assertEqual(len(index.search("academy", max_candidates=1)), 1)
+
+    def test_common_trigrams_do_not_generate_candidates(self):
+        index = TrigramIndex(TITLES + ["ACE HOLES"])
+        # «  a» и « ac» есть в четырёх названиях из пяти, «ace» и «ce » — в двух:
+        # кандидатов дают только две редкие, частые лишь проверяются у кандидатов
+        self.assertEqual(
+            index.search("ace", min_similarity=0.75, max_posting=2),
+            [("ACE HOLES", 1.0), ("ACE GOLDFINGER", 1.0)],
+        )
+        self.assertEqual(index.search("ace", min_similarity=0.75, max_posting=1), [])
+        self.assertEqual(index.search("ac", max_posting=3), [])
+
+    def test_search_is_fast_on_large_catalog(self):
+        index = TrigramIndex(datagen.generate_title(i) for i in range(50000))
+        started = time.perf_counter()
+        results = index.search("ACADAMY DINOSAUR")
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(results[0][0], "ACADEMY DINOSAUR")
+
+
+class TestSuggestTitles(unittest.TestCase):
+    def setUp(self):
+        self.sakila = SakilaStandIn().populate(100, genres=4)
+        self.sakila.install()
+        self.env = patch.dict(os.environ, {"CHANGE_POLL_INTERVAL": "0"})
+        self.env.start()
+        set_change_tracker(None)
+        fuzzy_search.invalidate_trigram_index()
+        fuzzy_search.build_trigram_index()
+
+    def tearDown(self):
+        self.env.stop()
+        set_change_tracker(None)
+        fuzzy_search.invalidate_trigram_index()
+        mysql_connector.set_connection_pool(None)
+        self.sakila.close()
+
+    def wait_for_build(self):
+        thread = fuzzy_search._build_thread
+        if thread is not None:
+            thread.join(5)
+
+    def test_suggestions_follow_catalog_changes(self):
+        self.assertTrue(fuzzy_search.suggest_titles("ACADAMY")[0][0].startswith("ACADEMY "))
+        with self.sakila.connect() as connection:
+            connection.raw.execute(
+                "INSERT INTO film (film_id, title, release_year, rating, last_update) "
+                "VALUES (5000, 'ZEBRA CROSSING', 2020, 'PG', '2100-01-01 00:00:00')"
+            )
+        # Изменение замечено, индекс перестраивается в фоне
+        fuzzy_search.suggest_titles("ZEBRA CROSING")
+        self.wait_for_build()
+        self.assertEqual(fuzzy_search.suggest_titles("ZEBRA CROSING")[0][0], "ZEBRA CROSSING")
+
+    def test_first_suggestion_does_not_wait_for_index(self):
+        fuzzy_search.invalidate_trigram_index()
+        release = threading.Event()
+
+        def slow_titles():
+            release.wait(5)
+            return ["ACADEMY DINOSAUR"]
+
+        with patch("final_movies.fuzzy_search.get_film_titles", side_effect=slow_titles):
+            self.assertEqual(fuzzy_search.suggest_titles("ACADAMY"), [])
+            self.assertIsNotNone(fuzzy_search._build_thread)
+            release.set()
+            self.wait_for_build()
+        self.assertEqual(fuzzy_search.suggest_titles("ACADAMY")[0][0], "ACADEMY DINOSAUR")
+
+    def test_unavailable_database_gives_no_suggestions(self):
+        fuzzy_search.invalidate_trigram_index()
+        with patch("final_movies.fuzzy_search.get_film_titles", side_effect=ConnectionError("down")):
+            with self.assertLogs(level="WARNING"):
+                self.assertEqual(fuzzy_search.suggest_titles("ACADAMY"), [])
+                self.wait_for_build()
+            self.assertIsNone(fuzzy_search._build_thread)
@@ -0,0 +1,61 @@
+import os
+import unittest
+from unittest.mock import patch
+from benchmarks import hotpaths
+from benchmarks.stats import summarize, find_regressions
+from benchmarks.standins import SakilaStandIn, InMemoryCollection
+
+
+class TestStandIns(unittest.TestCase):
+    def test_sakila_standin_serves_search(self):
+        from final_movies import mysql_connector
+
+        sakila = SakilaStandIn().populate(200, genres=4)
+        try:
+            sakila.install()
+            catalog = mysql_connector.get_genre_catalog()
+            self.assertEqual(len(catalog), 4)
+            self.assertEqual(sum(g["film_count"] for g in catalog), 200)
+            rows = mysql_connector.search_movies(rating="PG")
+            self.assertTrue(rows)
+            self.assertTrue(all(r["rating"] == "PG" for r in rows))
+        finally:
+            mysql_connector.set_connection_pool(None)
+            mysql_connector.invalidate_genre_cache()
+            sakila.close()
+
+    def test_in_memory_collection_aggregate(self):
+        logs = InMemoryCollection()
+        logs.insert_many([{"t": "a", "n": 1}, {"t": "b", "n": 2}, {"t": "a", "n": 3}])
+        result = list(logs.aggregate([
+            {"$match": {"n": {"$gte": 1}}},
+            {"$group": {"_id": "$t", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": 1},
+        ]))
+        self.assertEqual(result, [{"_id": "a", "count": 2}])
+
+
+class TestHotPaths(unittest.TestCase):
+    def test_summary_percentiles(self):
+        summary = summarize([i / 1000 for i in range(1, 101)])
+        self.assertAlmostEqual(summary["p50_ms"], 51)
+        self.assertAlmostEqual(summary["p99_ms"], 99)
+
+    def test_find_regressions(self):
+        current = {"a@1": {"p50_ms": 13.0}, "b@1": {"p50_ms": 10.0}}
+        baseline = {"a@1": {"p50_ms": 10.0}, "b@1": {"p50_ms": 10.0}}
+        regressions = find_regressions(current, baseline, 0.25, ("p50_ms",))
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("a@1"))
+
+    @patch.dict(os.environ, {})
+    def test_run_on_standins(self):
+        report = hotpaths.run([100], iterations=2, only=["search_rating", "stats_top", "log_search_sync"])
+        self.assertEqual(
+            set(report["results"]), {"search_rating@100", "stats_top@100", "log_search_sync@100"}
+        )
+        for summary in report["results"].values():
+            self.assertGreater(summary["throughput_ops"], 0)
+            self.assertIn("peak_memory_kb", summary)
+        self.assertEqual(hotpaths.compare(report, report, 0.25), 0)
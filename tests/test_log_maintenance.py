@@ -0,0 +1,81 @@
+import unittest
+from datetime import datetime, UTC
+from unittest.mock import MagicMock
+from final_movies import log_maintenance
+
+
+class TestLogMaintenance(unittest.TestCase):
+    def test_ensure_indexes_creates_ttl_index(self):
+        logs = MagicMock()
+        logs.index_information.return_value = {}
+
+        result = log_maintenance.ensure_log_indexes(logs, retention_days=30)
+
+        self.assertEqual(result["timestamp_index"], "created")
+        ttl_call = logs.create_index.call_args_list[0]
+        self.assertEqual(ttl_call.args[0], [("timestamp", 1)])
+        self.assertEqual(ttl_call.kwargs["expireAfterSeconds"], 30 * 86400)
+        search_type_call = logs.create_index.call_args_list[1]
+        self.assertEqual(search_type_call.args[0], [("search_type", 1), ("timestamp", 1)])
+
+    def test_ensure_indexes_updates_retention_with_collmod(self):
+        logs = MagicMock()
+        logs.name = "logs"
+        logs.index_information.return_value = {
+            log_maintenance.TIMESTAMP_INDEX: {"key": [("timestamp", 1)], "expireAfterSeconds": 86400}
+        }
+
+        result = log_maintenance.ensure_log_indexes(logs, retention_days=7)
+
+        self.assertEqual(result["timestamp_index"], "updated")
+        logs.database.command.assert_called_once_with(
+            "collMod", "logs",
+            index={"name": log_maintenance.TIMESTAMP_INDEX, "expireAfterSeconds": 7 * 86400},
+        )
+        logs.drop_index.assert_not_called()
+
+    def test_ensure_indexes_drops_ttl_when_retention_disabled(self):
+        logs = MagicMock()
+        logs.index_information.return_value = {
+            log_maintenance.TIMESTAMP_INDEX: {"key": [("timestamp", 1)], "expireAfterSeconds": 86400}
+        }
+        result = log_maintenance.ensure_log_indexes(logs, retention_days=None)
+        self.assertEqual(result["timestamp_index"], "recreated")
+        logs.drop_index.assert_called_once_with(log_maintenance.TIMESTAMP_INDEX)
+        self.assertNotIn("expireAfterSeconds", logs.create_index.call_args_list[0].kwargs)
+
+    def test_ensure_indexes_keeps_ttl_when_not_managed(self):
+        logs = MagicMock()
+        logs.index_information.return_value = {
+            log_maintenance.TIMESTAMP_INDEX: {"key": [("timestamp", 1)], "expireAfterSeconds": 86400}
+        }
+        result = log_maintenance.ensure_log_indexes(logs, retention_days=None, manage_ttl=False)
+        self.assertEqual(result, {"timestamp_index": "unchanged", "expire_after_seconds": 86400})
+        logs.drop_index.assert_not_called()
+        logs.database.command.assert_not_called()
+
+    def test_parse_timestamp(self):
+        parsed = log_maintenance.parse_timestamp("2025-07-30T12:00:00.123456+00:00")
+        self.assertEqual(parsed, datetime(2025, 7, 30, 12, 0, 0, 123456, tzinfo=UTC))
+        self.assertEqual(log_maintenance.parse_timestamp("2025-07-30T12:00:00").tzinfo, UTC)
+        self.assertIsNone(log_maintenance.parse_timestamp("yesterday"))
+
+    def test_migrate_timestamps_in_batches(self):
+        collection = MagicMock()
+        collection.find.return_value.batch_size.return_value = [
+            {"_id": 1, "timestamp": "2025-01-01T00:00:00+00:00"},
+            {"_id": 2, "timestamp": "broken"},
+            {"_id": 3, "timestamp": "2025-01-02T00:00:00+00:00"},
+        ]
+        collection.bulk_write.return_value.modified_count = 1
+
+        result = log_maintenance.migrate_timestamps(collection, batch_size=1)
+
+        self.assertEqual(result, {"converted": 2, "skipped": 1})
+        self.assertEqual(collection.bulk_write.call_count, 2)
+        query = collection.find.call_args.args[0]
+        self.assertEqual(query, {"timestamp": {"$type": "string"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
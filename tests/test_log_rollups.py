@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import MagicMock
+from final_movies import log_rollups
+
+
+class TestLogRollups(unittest.TestCase):
+    def test_fingerprint_ignores_param_order(self):
+        first = log_rollups.search_fingerprint("genre_year", {"genre_id": 1, "year_from": 2000})
+        second = log_rollups.search_fingerprint("genre_year", {"year_from": 2000, "genre_id": 1})
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, log_rollups.search_fingerprint("rating", {"genre_id": 1}))
+
+    def test_build_rollup_updates_collapses_duplicates(self):
+        entries = [
+            {"search_type": "rating", "params": {"rating": "PG"},
+             "timestamp": "2025-01-01T00:00:00", "results_count": 5},
+            {"search_type": "rating", "params": {"rating": "PG"},
+             "timestamp": "2025-01-02T00:00:00", "results_count": 7},
+            {"search_type": "keyword", "params": {"keyword": "love"},
+             "timestamp": "2025-01-01T00:00:00", "results_count": 2},
+        ]
+        updates = log_rollups.build_rollup_updates(entries)
+        self.assertEqual(len(updates), 2)
+
+        rating_update = updates[0]._doc
+        self.assertEqual(rating_update["$inc"], {"count": 2})
+        self.assertEqual(rating_update["$max"], {"last_seen": "2025-01-02T00:00:00"})
+        self.assertEqual(rating_update["$set"], {"results_count": 7})
+        self.assertTrue(updates[0]._upsert)
+
+    def test_top_rollups_reads_sorted_limited(self):
+        rollups = MagicMock()
+        rollups.find.return_value.sort.return_value.limit.return_value = [{"count": 3}]
+        self.assertEqual(log_rollups.top_rollups(rollups, 5), [{"count": 3}])
+        rollups.find.return_value.sort.return_value.limit.assert_called_once_with(5)
+
+    def test_backfill_rollups(self):
+        logs = MagicMock()
+        logs.aggregate.return_value = [
+            {
+                "_id": {"search_type": "rating", "params": {"rating": "R"}},
+                "count": 4,
+                "last_seen": "2025-01-03T00:00:00",
+                "results_count": 195,
+            }
+        ]
+        rollups = MagicMock()
+
+        written = log_rollups.backfill_rollups(logs, rollups, batch_size=10)
+
+        self.assertEqual(written, 1)
+        rollups.create_index.assert_called()
+        replace = rollups.bulk_write.call_args.args[0][0]
+        self.assertEqual(replace._doc["count"], 4)
+        self.assertEqual(
+            replace._doc["_id"], log_rollups.search_fingerprint("rating", {"rating": "R"})
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,10 +20,11 @@ class TestLogStats(unittest.TestCase):
         label = log_stats.format_search_label("rating", {"rating": "R"})
         self.assertEqual(label, "Rating: Restricted")
 
-    @patch("final_movies.log_stats.collection.aggregate")
-    def test_display_top_searches(self, mock_aggregate):
-        mock_aggregate.return_value = [
-            {"_id": {"search_type": "keyword", "params": {"keyword": "test"}}, "count": 3}
+    @patch("final_movies.log_stats.get_rollup_collection")
+    @patch("final_movies.log_stats.top_rollups")
+    def test_display_top_searches(self, mock_top, mock_get_rollups):
+        mock_top.return_value = [
+            {"search_type": "keyword", "params": {"keyword": "test"}, "count": 3}
         ]
         with patch('builtins.print') as mock_print:
             log_stats.display_top_searches(limit=1)
@@ -33,12 +34,14 @@ class TestLogStats(unittest.TestCase):
             # Теперь assert (на основе реального вывода)
             self.assertTrue(any("Keyword: test" in call for call in print_calls))
 
-    @patch("final_movies.log_stats.collection.aggregate")
-    def test_display_last_unique_searches(self, mock_aggregate):
-        mock_aggregate.return_value = [
+    @patch("final_movies.log_stats.get_rollup_collection")
+    @patch("final_movies.log_stats.recent_rollups")
+    def test_display_last_unique_searches(self, mock_recent, mock_get_rollups):
+        mock_recent.return_value = [
             {
-                "_id": {"search_type": "keyword", "params": {"keyword": "test"}},
-                "latest_timestamp": 123456789,
+                "search_type": "keyword",
+                "params": {"keyword": "test"},
+                "last_seen": 123456789,
                 "results_count": 10,
             }
         ]
@@ -46,6 +49,23 @@ class TestLogStats(unittest.TestCase):
             log_stats.display_last_unique_searches(limit=1)
             mock_print.assert_any_call("1. Keyword: test, 10 results")
 
+    @patch("final_movies.log_stats.get_collection")
+    def test_display_top_searches_for_period_filters_by_time(self, mock_get_collection):
+        mock_get_collection.return_value.aggregate.return_value = [
+            {"_id": {"search_type": "rating", "params": {"rating": "R"}}, "count": 2}
+        ]
+        with patch('builtins.print') as mock_print:
+            log_stats.display_top_searches_for_period(days=7, limit=1)
+        stage = mock_get_collection.return_value.aggregate.call_args.args[0]
+        # Первая стадия — диапазон по индексу timestamp
+        self.assertIn("$gte", stage[0]["$match"]["timestamp"])
+        self.assertTrue(any("count: 2" in c.args[0] for c in mock_print.call_args_list))
+
+    @patch("final_movies.log_stats.get_all_genres")
+    def test_get_genre_map(self, mock_genres):
+        mock_genres.return_value = [{"genre_id": 1, "name": "Action"}]
+        self.assertEqual(log_stats.get_genre_map(), {1: "Action"})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,12 +1,20 @@
+import os
 import unittest
-from unittest.mock import patch
-from pymongo.errors import PyMongoError
-from final_movies import log_writer
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+from bson.errors import InvalidDocument
+from pymongo.errors import BulkWriteError, PyMongoError
+from final_movies import log_writer, log_maintenance
+from benchmarks.standins import install_mongo_standin
 
 
 class TestLogWriter(unittest.TestCase):
-    @patch("final_movies.log_writer.collection.insert_one")
-    def test_log_search_success(self, mock_insert):
+    @patch.dict(os.environ, {"MONGO_LOG_ASYNC": "0"})
+    @patch("final_movies.log_writer.get_rollup_collection")
+    @patch("final_movies.log_writer.get_collection")
+    def test_log_search_success(self, mock_get_collection, mock_get_rollups):
+        mock_insert = mock_get_collection.return_value.insert_one
+        mock_rollups = mock_get_rollups.return_value
         mock_insert.return_value.inserted_id = "mocked_id"
 
         # Вызов функции
@@ -16,11 +24,15 @@ class TestLogWriter(unittest.TestCase):
             results_count=3,
         )
 
-        # Проверка, что insert_one был вызван
+        # Проверка, что insert_one был вызван и агрегаты обновлены
         mock_insert.assert_called_once()
+        mock_rollups.bulk_write.assert_called_once()
 
-    @patch("final_movies.log_writer.collection.insert_one", side_effect=PyMongoError("Mongo error"))
-    def test_log_search_failure(self, mock_insert):
+    @patch.dict(os.environ, {"MONGO_LOG_ASYNC": "0"})
+    @patch("final_movies.log_writer.get_rollup_collection")
+    @patch("final_movies.log_writer.get_collection")
+    def test_log_search_failure(self, mock_get_collection, mock_get_rollups):
+        mock_get_collection.return_value.insert_one.side_effect = PyMongoError("Mongo error")
         # Проверяем, что функция не выбрасывает ошибку
         try:
             log_writer.log_search(
@@ -29,4 +41,151 @@ class TestLogWriter(unittest.TestCase):
                 results_count=5,
             )
         except Exception:
-            self.fail("log_search() raised an exception unexpectedly")
\ No newline at end of file
+            self.fail("log_search() raised an exception unexpectedly")
+
+    @patch("final_movies.log_writer.get_collection", side_effect=EnvironmentError("missing"))
+    def test_log_search_without_mongo_settings(self, mock_get_collection):
+        # Отсутствие настроек MongoDB не должно ломать поиск
+        try:
+            log_writer.log_search("keyword", {"keyword": "test"}, 1)
+        except Exception:
+            self.fail("log_search() raised an exception unexpectedly")
+
+    @patch.dict(os.environ, {"MONGO_LOG_ASYNC": "1"})
+    @patch("final_movies.log_writer.get_log_writer")
+    @patch("final_movies.log_writer.get_collection")
+    def test_log_search_async_does_not_insert_inline(self, mock_get_collection, mock_get_writer):
+        log_writer.log_search("rating", {"rating": "PG"}, 10)
+        mock_get_collection.return_value.insert_one.assert_not_called()
+        entry = mock_get_writer.return_value.submit.call_args.args[0]
+        self.assertIsInstance(entry["timestamp"], datetime)
+        self.assertEqual(entry["search_type"], "rating")
+        self.assertEqual(entry["results_count"], 10)
+
+
+class TestLogIndexes(unittest.TestCase):
+    def setUp(self):
+        self.logs, self.rollups = install_mongo_standin()
+
+    def tearDown(self):
+        with log_writer._mongo_lock:
+            log_writer._mongo_ready = False
+            log_writer._collection = log_writer._rollup_collection = None
+
+    @patch.dict(os.environ, {"MONGO_LOG_ASYNC": "0", "MONGO_LOG_RETENTION_DAYS": ""})
+    def test_sync_logging_creates_indexes_once_and_keeps_ttl(self):
+        # TTL, заданный администратором через ensure-indexes, не сбрасывается без MONGO_LOG_RETENTION_DAYS
+        log_maintenance.ensure_log_indexes(self.logs, retention_days=30)
+        with patch.object(self.logs, "index_information", wraps=self.logs.index_information) as info:
+            log_writer.log_search("rating", {"rating": "PG"}, 1)
+            log_writer.log_search("rating", {"rating": "G"}, 2)
+        info.assert_called_once()
+        indexes = self.logs.index_information()
+        self.assertEqual(indexes[log_maintenance.TIMESTAMP_INDEX]["expireAfterSeconds"], 30 * 86400)
+        self.assertIn(log_maintenance.SEARCH_TYPE_INDEX, indexes)
+        self.assertTrue(self.rollups.index_information())
+
+    @patch.dict(os.environ, {"MONGO_LOG_ASYNC": "0", "MONGO_LOG_RETENTION_DAYS": "0"})
+    def test_explicit_retention_is_applied(self):
+        log_maintenance.ensure_log_indexes(self.logs, retention_days=30)
+        log_writer.log_search("rating", {"rating": "PG"}, 1)
+        timestamp_index = self.logs.index_information()[log_maintenance.TIMESTAMP_INDEX]
+        self.assertNotIn("expireAfterSeconds", timestamp_index)
+
+
+class TestSearchLogWriter(unittest.TestCase):
+    def test_flushes_batch_with_insert_many(self):
+        target = MagicMock()
+        writer = log_writer.SearchLogWriter(target, batch_size=2, flush_interval=10)
+        writer.start()
+        writer.submit({"n": 1})
+        writer.submit({"n": 2})
+        self.assertTrue(writer.flush(timeout=2))
+        writer.shutdown()
+
+        target.insert_many.assert_called_once_with([{"n": 1}, {"n": 2}], ordered=False)
+        stats = writer.stats()
+        self.assertEqual(stats["queued"], 2)
+        self.assertEqual(stats["flushed"], 2)
+        self.assertEqual(stats["flushes"], 1)
+
+    def test_shutdown_drains_queue(self):
+        target = MagicMock()
+        writer = log_writer.SearchLogWriter(target, batch_size=100, flush_interval=10)
+        writer.start()
+        for n in range(5):
+            writer.submit({"n": n})
+        writer.shutdown(timeout=2)
+
+        written = [doc for c in target.insert_many.call_args_list for doc in c.args[0]]
+        self.assertEqual(written, [{"n": n} for n in range(5)])
+        # После остановки записи больше не принимаются
+        self.assertFalse(writer.submit({"n": 6}))
+
+    def test_full_queue_drops_entries(self):
+        writer = log_writer.SearchLogWriter(MagicMock(), max_queue_size=1)
+        self.assertTrue(writer.submit({"n": 1}))
+        self.assertFalse(writer.submit({"n": 2}))
+        self.assertEqual(writer.stats()["dropped"], 1)
+
+    def test_failed_flush_is_counted(self):
+        target = MagicMock()
+        target.insert_many.side_effect = PyMongoError("Mongo error")
+        writer = log_writer.SearchLogWriter(target)
+        writer.submit({"n": 1})
+        writer.shutdown()
+        self.assertEqual(writer.stats()["failed"], 1)
+        self.assertEqual(writer.stats()["flushed"], 0)
+
+    def test_write_concern_is_applied(self):
+        target = MagicMock()
+        concern = log_writer.parse_write_concern("majority")
+        writer = log_writer.SearchLogWriter(target, write_concern=concern)
+        writer.submit({"n": 1})
+        writer.shutdown()
+        target.with_options.assert_called_once_with(write_concern=concern)
+        target.with_options.return_value.insert_many.assert_called_once()
+
+    def test_parse_write_concern(self):
+        self.assertIsNone(log_writer.parse_write_concern(""))
+        self.assertEqual(log_writer.parse_write_concern("0").document, {"w": 0})
+        self.assertEqual(log_writer.parse_write_concern("majority").document, {"w": "majority"})
+
+    def test_rollups_updated_with_batch(self):
+        target, rollups = MagicMock(), MagicMock()
+        writer = log_writer.SearchLogWriter(target, rollups)
+        writer.submit({"search_type": "rating", "params": {"rating": "PG"},
+                       "timestamp": "2025-01-01T00:00:00", "results_count": 1})
+        writer.shutdown()
+        target.insert_many.assert_called_once()
+        self.assertEqual(len(rollups.bulk_write.call_args.args[0]), 1)
+
+    def test_unexpected_error_does_not_stop_writer(self):
+        target = MagicMock()
+        target.insert_many.side_effect = [InvalidDocument("cannot encode object"), None]
+        writer = log_writer.SearchLogWriter(target, batch_size=1, flush_interval=10)
+        writer.start()
+        with self.assertLogs(log_writer.logger, level="ERROR"):
+            writer.submit({"n": object()})
+            self.assertTrue(writer.flush(timeout=2))
+        writer.submit({"n": 2})
+        self.assertTrue(writer.flush(timeout=2))
+        writer.shutdown()
+        self.assertEqual(writer.stats()["failed"], 1)
+        self.assertEqual(writer.stats()["flushed"], 1)
+
+    def test_partial_bulk_write_is_counted(self):
+        target, rollups = MagicMock(), MagicMock()
+        target.insert_many.side_effect = BulkWriteError(
+            {"nInserted": 2, "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}]}
+        )
+        writer = log_writer.SearchLogWriter(target, rollups)
+        for n in range(3):
+            writer.submit({"search_type": "rating", "params": {"rating": "PG"},
+                           "timestamp": f"2025-01-0{n + 1}T00:00:00", "results_count": n})
+        writer.shutdown()
+        self.assertEqual(writer.stats()["flushed"], 2)
+        self.assertEqual(writer.stats()["failed"], 1)
+        # Агрегаты обновляются только по сохранённым записям
+        (update,) = rollups.bulk_write.call_args.args[0]
+        self.assertEqual(update._doc["$inc"], {"count": 2})
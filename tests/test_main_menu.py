@@ -1,8 +1,24 @@
+import os
+import sys
+import subprocess
 import unittest
 from unittest.mock import patch
 from final_movies import main
 
 class TestMainMenu(unittest.TestCase):
+    def setUp(self):
+        # Индекс подсказок и опрос изменений запускаются в фоне при старте меню; здесь MySQL нет
+        self.background = [
+            patch("final_movies.main.start_trigram_index_build"),
+            patch("final_movies.main.start_change_polling"),
+        ]
+        for patcher in self.background:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.background:
+            patcher.stop()
+
     @patch("builtins.input", side_effect=["5"])
     def test_main_exits_on_5(self, mock_input):
         # Проверяем, что программа корректно завершилась на выборе 5
@@ -33,3 +49,31 @@ class TestMainMenu(unittest.TestCase):
         except EOFError:
             self.fail("main() did not handle EOFError")
 
+    @patch("builtins.input", side_effect=["4", "4", "5", "5"])
+    @patch("final_movies.main.display_query_metrics")
+    def test_search_activity_shows_query_metrics(self, mock_display, mock_input):
+        main.main()
+        mock_display.assert_called_once()
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_has_no_side_effects(self):
+        # Импорт без настроек БД не должен подключаться к MySQL/MongoDB и падать
+        env = {
+            key: value for key, value in os.environ.items()
+            if not key.startswith(("MYSQL_", "MONGO_"))
+        }
+        env["MYSQL_HOST"] = "192.0.2.1"  # Недоступный адрес: сетевой запрос привёл бы к ошибке
+        code = (
+            "import final_movies.main, final_movies.log_stats, final_movies.log_writer as lw; "
+            "assert lw._client is None"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=20,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
@@ -0,0 +1,98 @@
+import json
+import pickle
+import unittest
+import tracemalloc
+from final_movies import mysql_connector
+from final_movies.movie_row import MovieRow
+from final_movies.formatter import paginate_results
+from final_movies.search_cache import SearchCache
+from benchmarks.standins import SakilaStandIn
+from unittest.mock import patch
+
+ROW = {"title": "ACADEMY DINOSAUR", "release_year": 2006, "rating": "PG"}
+
+
+def allocated_per_row(build, count=20000):
+    """
+    Сколько байт в среднем выделяется на одну строку, построенную build(i).
+    Значения общие для всех строк, поэтому измеряется только сам контейнер.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        rows = [build(i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert len(rows) == count
+    return (after - before) / count
+
+
+class TestMovieRow(unittest.TestCase):
+    def test_mapping_access(self):
+        row = MovieRow.from_tuple(("ACADEMY DINOSAUR", 2006, "PG", 1.5))
+        self.assertEqual(row["title"], "ACADEMY DINOSAUR")
+        self.assertEqual(row.release_year, 2006)
+        self.assertEqual(row.get("rating"), "PG")
+        self.assertEqual(row.get("relevance", "N/A"), "N/A")
+        self.assertEqual(list(row.keys()), ["title", "release_year", "rating"])
+        self.assertIn("title", row)
+        self.assertEqual(dict(row), ROW)
+        with self.assertRaises(KeyError):
+            row["relevance"]
+
+    def test_equal_to_dict_and_immutable(self):
+        row = MovieRow("ACADEMY DINOSAUR", 2006, "PG")
+        self.assertEqual(row, ROW)
+        self.assertEqual([ROW], [row])
+        self.assertNotEqual(row, dict(ROW, rating="G"))
+        self.assertEqual(hash(row), hash(MovieRow(**ROW)))
+        with self.assertRaises(AttributeError):
+            row.title = "CHANGED"
+        self.assertEqual(pickle.loads(pickle.dumps(row)), row)
+        self.assertEqual(json.loads(json.dumps(dict(row))), ROW)
+
+    def test_memory_per_row_smaller_than_dict(self):
+        title, rating = ROW["title"], ROW["rating"]
+        dict_bytes = allocated_per_row(
+            lambda i: {"title": title, "release_year": 2006, "rating": rating}
+        )
+        row_bytes = allocated_per_row(lambda i: MovieRow(title, 2006, rating))
+        # Словарь из трёх ключей — около 180 байт, строка со __slots__ — меньше 80
+        self.assertLess(row_bytes, 100)
+        self.assertLess(row_bytes * 2, dict_bytes)
+
+    @patch("builtins.input", return_value="q")
+    @patch("builtins.print")
+    def test_formatter_reads_rows(self, mock_print, mock_input):
+        paginate_results([MovieRow("ACADEMY DINOSAUR", 2006, "PG")], page_size=5)
+        table = str(mock_print.call_args_list[1].args[0])
+        self.assertIn("ACADEMY DINOSAUR", table)
+        self.assertIn("2006", table)
+
+    def test_cache_does_not_copy_immutable_rows(self):
+        cache = SearchCache()
+        rows = [MovieRow(**ROW)]
+        cache.put(("a",), rows)
+        self.assertIs(cache.get(("a",))[0], rows[0])
+
+
+class TestSearchRows(unittest.TestCase):
+    def setUp(self):
+        self.sakila = SakilaStandIn()
+        self.sakila.populate(50, genres=4)
+        self.sakila.install()
+
+    def tearDown(self):
+        mysql_connector.set_connection_pool(None)
+        self.sakila.close()
+
+    def test_search_paths_return_movie_rows(self):
+        rows = mysql_connector.search_movies(rating="PG")
+        page = mysql_connector.search_movies_page(rating="PG", page_size=5)
+        streamed = list(mysql_connector.search_movies_iter(rating="PG", chunk_size=7))
+
+        self.assertTrue(rows)
+        self.assertTrue(all(isinstance(row, MovieRow) for row in rows + page.rows + streamed))
+        self.assertEqual(streamed, rows)
+        self.assertEqual(page.rows, rows[:5])
@@ -1,4 +1,10 @@
+import time
+import threading
 import unittest
+from unittest.mock import patch, MagicMock
+
+import pymysql
+
 from final_movies import mysql_connector
 
 
@@ -86,3 +92,369 @@ class TestMySQLConnector(unittest.TestCase):
     def test_execute_select_query_invalid_sql(self):
         result = mysql_connector.execute_select_query("SELECT * FROM nonexistent_table")
         self.assertEqual(result, [])
+
+
+class TestMySQLConnectionPool(unittest.TestCase):
+    def setUp(self):
+        # Фабрика фейковых соединений вместо настоящего MySQL
+        self.factory = MagicMock(side_effect=lambda: MagicMock())
+
+    def test_connection_is_reused(self):
+        pool = mysql_connector.MySQLConnectionPool(self.factory, min_size=0, max_size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        self.assertIs(first, second)
+        stats = pool.stats()
+        self.assertEqual(stats["creations"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+
+    def test_pool_is_bounded(self):
+        pool = mysql_connector.MySQLConnectionPool(
+            self.factory, min_size=0, max_size=1, checkout_timeout=0.05
+        )
+        conn = pool.acquire()
+        with self.assertRaises(ConnectionError):
+            pool.acquire()
+        pool.release(conn)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        self.assertEqual(pool.stats()["waits"], 1)
+
+    def test_query_deadline_bounds_checkout_and_execution(self):
+        pool = mysql_connector.MySQLConnectionPool(self.factory, min_size=0, max_size=1)
+        with patch("final_movies.mysql_connector.get_connection_pool", return_value=pool):
+            with mysql_connector.query_deadline(5):
+                mysql_connector.execute_select_query("SELECT 1 AS one")
+            cursor = pool.acquire().cursor.return_value.__enter__.return_value
+            self.assertRegex(cursor.execute.call_args.args[0], r"^SELECT /\*\+ MAX_EXECUTION_TIME\(\d+\) \*/ 1")
+
+            # Пул занят: ожидание ограничено оставшимся временем, а не checkout_timeout
+            started = time.perf_counter()
+            with mysql_connector.query_deadline(0.05), self.assertRaises(ConnectionError):
+                mysql_connector.execute_select_query("SELECT 1 AS one")
+            self.assertLess(time.perf_counter() - started, 1)
+
+            with mysql_connector.query_deadline(-1), self.assertRaises(TimeoutError):
+                mysql_connector.execute_select_query("SELECT 1 AS one")
+
+    def test_max_execution_time_hint(self):
+        self.assertEqual(
+            mysql_connector.with_max_execution_time("\n  select a FROM t UNION ALL SELECT b FROM t", 0.25),
+            "\n  select /*+ MAX_EXECUTION_TIME(250) */ a FROM t UNION ALL SELECT b FROM t",
+        )
+        self.assertEqual(mysql_connector.with_max_execution_time("SHOW TABLES", 1), "SHOW TABLES")
+
+    def test_waiting_thread_gets_released_connection(self):
+        pool = mysql_connector.MySQLConnectionPool(self.factory, min_size=0, max_size=1)
+        conn = pool.acquire()
+        received = []
+        worker = threading.Thread(target=lambda: received.append(pool.acquire()))
+        worker.start()
+        time.sleep(0.05)
+        pool.release(conn)
+        worker.join(timeout=1)
+        self.assertEqual(received, [conn])
+        self.assertEqual(pool.stats()["creations"], 1)
+
+    def test_failed_health_check_replaces_connection(self):
+        pool = mysql_connector.MySQLConnectionPool(
+            self.factory, min_size=0, max_size=1, health_check_after=0
+        )
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.ping.side_effect = pymysql.OperationalError("gone away")
+        new_conn = pool.acquire()
+        self.assertIsNot(new_conn, conn)
+        conn.close.assert_called_once()
+        self.assertEqual(pool.stats()["health_check_failures"], 1)
+
+    def test_expired_connection_is_recycled(self):
+        pool = mysql_connector.MySQLConnectionPool(
+            self.factory, min_size=0, max_size=1, max_lifetime=0.01
+        )
+        conn = pool.acquire()
+        time.sleep(0.02)
+        pool.release(conn)
+        conn.close.assert_called_once()
+        self.assertEqual(pool.stats()["recycled"], 1)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_operational_error_discards_connection(self):
+        pool = mysql_connector.MySQLConnectionPool(self.factory, min_size=0, max_size=1)
+        with self.assertRaises(pymysql.OperationalError):
+            with pool.connection() as conn:
+                raise pymysql.OperationalError("lost connection")
+        conn.close.assert_called_once()
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_execute_select_query_uses_pool(self):
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [{"x": 1}]
+        pool = mysql_connector.MySQLConnectionPool(lambda: connection, min_size=0)
+        with patch("final_movies.mysql_connector.get_connection_pool", return_value=pool):
+            self.assertEqual(mysql_connector.execute_select_query("SELECT 1"), [{"x": 1}])
+            self.assertEqual(mysql_connector.execute_select_query("SELECT 1"), [{"x": 1}])
+        self.assertEqual(pool.stats()["creations"], 1)
+        connection.close.assert_not_called()
+
+
+class TestPagedSearch(unittest.TestCase):
+    def test_page_cursor_roundtrip(self):
+        cursor = mysql_connector.encode_page_cursor((2006, "ACADEMY DINOSAUR", 1))
+        self.assertEqual(mysql_connector.decode_page_cursor(cursor), (2006, "ACADEMY DINOSAUR", 1))
+
+    def test_decode_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            mysql_connector.decode_page_cursor("not-a-cursor")
+        # Курсор без film_id (старый формат) не принимается
+        with self.assertRaises(ValueError):
+            mysql_connector.decode_page_cursor(mysql_connector.encode_page_cursor((2006, "A")))
+
+    @patch("final_movies.mysql_connector.execute_select_query")
+    def test_search_movies_page_uses_keyset(self, mock_query):
+        # Строки страницы — (title, release_year, rating, film_id)
+        mock_query.return_value = [
+            ("B", 2006, "PG", 12), ("C", 2006, "PG", 4), ("C", 2006, "PG", 13),
+        ]
+        cursor = mysql_connector.encode_page_cursor((2006, "A", 7))
+        page = mysql_connector.search_movies_page(rating="PG", cursor=cursor, page_size=2)
+
+        query, params = mock_query.call_args.args
+        self.assertIn("(f.release_year, f.title, f.film_id) > (%s, %s, %s)", query)
+        self.assertIn("ORDER BY f.release_year, f.title, f.film_id LIMIT %s", query)
+        self.assertNotIn("OFFSET", query)
+        self.assertEqual(params, ("PG", 2006, "A", 7, 3))
+        self.assertEqual([row["title"] for row in page.rows], ["B", "C"])
+        self.assertEqual(mysql_connector.decode_page_cursor(page.next_cursor), (2006, "C", 4))
+        self.assertEqual(mysql_connector.decode_page_cursor(page.prev_cursor), (2006, "B", 12))
+
+    @patch("final_movies.mysql_connector.execute_select_query")
+    def test_search_movies_page_backwards(self, mock_query):
+        # При движении назад строки приходят в обратном порядке
+        mock_query.return_value = [("B", 2006, "PG", 2), ("A", 2006, "PG", 1)]
+        cursor = mysql_connector.encode_page_cursor((2006, "C", 3))
+        page = mysql_connector.search_movies_page(cursor=cursor, direction="prev", page_size=2)
+
+        query = mock_query.call_args.args[0]
+        self.assertIn("(f.release_year, f.title, f.film_id) < (%s, %s, %s)", query)
+        self.assertIn("ORDER BY f.release_year DESC, f.title DESC, f.film_id DESC", query)
+        self.assertEqual([row["title"] for row in page.rows], ["A", "B"])
+        self.assertIsNone(page.prev_cursor)
+        self.assertEqual(mysql_connector.decode_page_cursor(page.next_cursor), (2006, "B", 2))
+
+    @patch("final_movies.mysql_connector.count_movies", return_value=(25, False))
+    @patch("final_movies.mysql_connector._seek_page_cursor", return_value="seek")
+    @patch("final_movies.mysql_connector.search_movies_page")
+    def test_paged_search_fetches_on_demand(self, mock_page, mock_seek, mock_count):
+        mock_page.return_value = mysql_connector.SearchPage([{"title": "X"}], next_cursor="next")
+        paged = mysql_connector.search_movies_paged(rating="PG", page_size=2)
+
+        mock_page.assert_not_called()
+        self.assertEqual(len(paged), 25)
+        self.assertEqual(paged.page_count, 13)
+
+        paged.get_page(0)
+        paged.get_page(0)
+        self.assertEqual(mock_page.call_count, 1)
+
+        # Дальний переход выполняется через поиск позиции, без загрузки промежуточных страниц
+        paged.get_page(10)
+        mock_seek.assert_called_once_with(paged.filters, 20)
+        self.assertEqual(mock_page.call_count, 2)
+        self.assertEqual(mock_page.call_args.kwargs["cursor"], "seek")
+
+    @patch("final_movies.mysql_connector.execute_select_query")
+    def test_count_movies_approximate_without_filters(self, mock_query):
+        mock_query.return_value = [{"total": 1000}]
+        self.assertEqual(mysql_connector.count_movies(approximate=True), (1000, True))
+        self.assertIn("information_schema", mock_query.call_args.args[0])
+
+    def test_search_movies_page_live(self):
+        page = mysql_connector.search_movies_page(rating="PG", page_size=5, with_total=True)
+        self.assertLessEqual(len(page.rows), 5)
+        self.assertIsInstance(page.total, int)
+        if page.next_cursor:
+            next_page = mysql_connector.search_movies_page(
+                rating="PG", page_size=5, cursor=page.next_cursor
+            )
+            self.assertNotIn(next_page.rows[0], page.rows)
+
+
+class TestGenreCatalog(unittest.TestCase):
+    def setUp(self):
+        mysql_connector.invalidate_genre_cache()
+
+    def tearDown(self):
+        mysql_connector.invalidate_genre_cache()
+
+    @patch("final_movies.mysql_connector.execute_select_query")
+    def test_catalog_is_single_cached_query(self, mock_query):
+        mock_query.return_value = [
+            {"genre_id": 1, "name": "Action", "min_year": 2000, "max_year": 2006, "film_count": 64}
+        ]
+        catalog = mysql_connector.get_genre_catalog()
+        genres = mysql_connector.get_all_genres()
+
+        self.assertEqual(catalog[0]["film_count"], 64)
+        self.assertEqual(genres, [{"genre_id": 1, "name": "Action"}])
+        self.assertIn("GROUP BY", mock_query.call_args.args[0])
+        mock_query.assert_called_once()
+
+    @patch("final_movies.mysql_connector.execute_select_query", return_value=[])
+    def test_invalidate_genre_cache(self, mock_query):
+        mysql_connector.get_all_genres()
+        mysql_connector.invalidate_genre_cache()
+        mysql_connector.get_all_genres()
+        self.assertEqual(mock_query.call_count, 2)
+
+
+class TestSearchMoviesMany(unittest.TestCase):
+    CRITERIA = [
+        {"rating": "PG"},
+        {"genre_id": 2, "year_from": 2000, "year_to": 2010},
+        {"keyword": "a", "rating": ["G", "R"]},
+        {"rating": "PG"},
+        {"genre_id": 99},
+        {"year_to": 1990},
+    ]
+
+    def setUp(self):
+        from benchmarks.standins import SakilaStandIn
+
+        self.sakila = SakilaStandIn().populate(300, genres=4, max_genres_per_film=2)
+        self.sakila.install()
+
+    def tearDown(self):
+        mysql_connector.set_connection_pool(None)
+        mysql_connector.invalidate_catalog_engine()
+        self.sakila.close()
+
+    def test_batch_matches_individual_searches(self):
+        expected = [mysql_connector.search_movies(**criteria) for criteria in self.CRITERIA]
+        with patch(
+            "final_movies.mysql_connector.execute_select_query",
+            wraps=mysql_connector.execute_select_query,
+        ) as mock_query:
+            results = mysql_connector.search_movies_many(self.CRITERIA)
+
+        self.assertEqual(results, expected)
+        self.assertTrue(expected[0] and expected[1])
+        # Один запрос, повторный критерий не дублирует ветку UNION ALL
+        mock_query.assert_called_once()
+        self.assertEqual(mock_query.call_args.args[0].count("UNION ALL"), 4)
+
+    def test_batch_size_splits_queries(self):
+        with patch(
+            "final_movies.mysql_connector.execute_select_query",
+            wraps=mysql_connector.execute_select_query,
+        ) as mock_query:
+            results = mysql_connector.search_movies_many(self.CRITERIA, batch_size=2)
+        self.assertEqual(mock_query.call_count, 3)
+        self.assertEqual(results[0], results[3])
+        self.assertIsNot(results[0], results[3])
+
+    def test_memory_backend_and_validation(self):
+        expected = mysql_connector.search_movies_many(self.CRITERIA)
+        with patch.dict("os.environ", {"SEARCH_BACKEND": "memory"}):
+            self.assertEqual(mysql_connector.search_movies_many(self.CRITERIA), expected)
+        self.assertEqual(mysql_connector.search_movies_many([]), [])
+        with self.assertRaises(TypeError):
+            mysql_connector.search_movies_many([{"title": "x"}])
+
+
+@patch.dict("os.environ", {"KEYWORD_SEARCH_MODE": "fulltext"})
+class TestFulltextSearch(unittest.TestCase):
+    def test_fulltext_query_uses_word_prefixes(self):
+        self.assertEqual(mysql_connector.build_fulltext_query("Academy  Dino"), "+academy* +dino*")
+        # Короткие слова и стоп-слова не попадают в индекс — поиск через LIKE
+        self.assertIsNone(mysql_connector.build_fulltext_query("ac"))
+        self.assertIsNone(mysql_connector.build_fulltext_query("the academy"))
+        with patch.dict("os.environ", {"KEYWORD_SEARCH_MODE": "like"}):
+            self.assertIsNone(mysql_connector.build_fulltext_query("academy"))
+
+    @patch("final_movies.mysql_connector.execute_select_query")
+    def test_search_movies_ranked_by_relevance(self, mock_query):
+        # Строки приходят из кортежного курсора вместе со столбцом relevance
+        raw_rows = [("ACADEMY DINOSAUR", 2006, "PG", 1.5)]
+        mock_query.side_effect = lambda query, params, row_factory, **kwargs: [row_factory(r) for r in raw_rows]
+        rows = mysql_connector.search_movies(keyword="academy", rating="PG")
+
+        query, params = mock_query.call_args.args
+        self.assertIn("MATCH(f.title) AGAINST (%s IN BOOLEAN MODE)", query)
+        self.assertIn("ORDER BY relevance DESC", query)
+        self.assertNotIn("LIKE", query)
+        self.assertEqual(params, ("+academy*", "+academy*", "PG"))
+        self.assertEqual(rows, [{"title": "ACADEMY DINOSAUR", "release_year": 2006, "rating": "PG"}])
+
+    @patch("final_movies.mysql_connector.execute_select_query", return_value=[])
+    def test_batch_keeps_relevance_order(self, mock_query):
+        mysql_connector.search_movies_many([{"keyword": "academy"}, {"keyword": "ac"}])
+        query, params = mock_query.call_args.args
+        fulltext, like = query.split(" UNION ALL ")
+        self.assertIn("MATCH(f.title) AGAINST (%s IN BOOLEAN MODE) AS relevance", fulltext)
+        self.assertIn("0 AS relevance", like)
+        self.assertTrue(query.endswith("ORDER BY tag, relevance DESC, release_year, title, film_id"))
+        self.assertEqual(params, (0, "+academy*", "+academy*", 1, "%ac%"))
+
+    @patch("final_movies.mysql_connector.execute_select_query", return_value=[])
+    def test_short_keyword_falls_back_to_like(self, mock_query):
+        mysql_connector.search_movies(keyword="ac")
+        query, params = mock_query.call_args.args
+        self.assertIn("LOWER(f.title) LIKE %s", query)
+        self.assertEqual(params, ("%ac%",))
+
+    @patch.dict("os.environ", {"FULLTEXT_INCLUDE_DESCRIPTION": "1"})
+    @patch("final_movies.mysql_connector.execute_select_query", return_value=[{"total": 3}])
+    def test_count_uses_description_index(self, mock_query):
+        self.assertEqual(mysql_connector.count_movies(keyword="shark"), (3, False))
+        self.assertIn("MATCH(f.title, f.description)", mock_query.call_args.args[0])
+
+    @patch("final_movies.mysql_connector.execute_select_query")
+    def test_first_interactive_page_is_ranked(self, mock_query):
+        # Строки страницы — (title, release_year, rating, film_id, relevance) по убыванию релевантности
+        mock_query.return_value = [
+            ("ACADEMY DINOSAUR", 2006, "PG", 1, 2.5),
+            ("ACE ACADEMY", 2001, "G", 7, 1.25),
+            ("ZORRO ACADEMY", 1999, "R", 3, 1.25),
+        ]
+        paged = mysql_connector.search_movies_paged(keyword="academy", page_size=2)
+        rows = paged.get_page(0)
+
+        query, params = mock_query.call_args.args
+        self.assertIn("MATCH(f.title) AGAINST (%s IN BOOLEAN MODE) AS relevance", query)
+        self.assertIn("ORDER BY relevance DESC, f.release_year, f.title, f.film_id LIMIT %s", query)
+        self.assertEqual(params, ("+academy*", "+academy*", 3))
+        self.assertEqual([row["title"] for row in rows], ["ACADEMY DINOSAUR", "ACE ACADEMY"])
+        # Курсор следующей страницы продолжает ранжированный порядок
+        cursor = paged._cursors[1]
+        self.assertEqual(mysql_connector.decode_page_cursor(cursor, ranked=True), (1.25, 2001, "ACE ACADEMY", 7))
+
+        mock_query.return_value = [("ZORRO ACADEMY", 1999, "R", 3, 1.25)]
+        self.assertEqual([row["title"] for row in paged.get_page(1)], ["ZORRO ACADEMY"])
+        query, params = mock_query.call_args.args
+        self.assertIn(
+            "(MATCH(f.title) AGAINST (%s IN BOOLEAN MODE) < %s OR (MATCH(f.title) AGAINST (%s IN BOOLEAN MODE) = %s "
+            "AND (f.release_year, f.title, f.film_id) > (%s, %s, %s)))",
+            query,
+        )
+        self.assertEqual(
+            params,
+            ("+academy*", "+academy*", "+academy*", 1.25, "+academy*", 1.25, 2001, "ACE ACADEMY", 7, 3),
+        )
+        # Курсор без релевантности не подходит для ранжированного поиска
+        with self.assertRaises(ValueError):
+            mysql_connector.search_movies_page(
+                keyword="academy", cursor=mysql_connector.encode_page_cursor((2001, "ACE ACADEMY", 7))
+            )
+
+    @patch("final_movies.mysql_connector.execute_select_query")
+    def test_ranked_seek_cursor(self, mock_query):
+        mock_query.return_value = [(1.25, 2001, "ACE ACADEMY", 7)]
+        cursor = mysql_connector._seek_page_cursor({"keyword": "academy"}, 20)
+        query, params = mock_query.call_args.args
+        self.assertTrue(query.startswith("SELECT MATCH(f.title) AGAINST (%s IN BOOLEAN MODE) AS relevance,"))
+        self.assertIn("ORDER BY relevance DESC, f.release_year, f.title, f.film_id LIMIT 1 OFFSET %s", query)
+        self.assertEqual(params, ("+academy*", "+academy*", 19))
+        self.assertEqual(mysql_connector.decode_page_cursor(cursor, ranked=True), (1.25, 2001, "ACE ACADEMY", 7))
@@ -0,0 +1,163 @@
+import itertools
+import unittest
+from final_movies.config import env_flag
+from final_movies.query_builder import (
+    SearchFilters,
+    count_query,
+    duplicate_condition,
+    page_query,
+    seek_query,
+    select_query,
+)
+
+# Матрица фильтров для проверки планов: жанры × годы × рейтинги × ключевое слово
+GENRES = [(), (3,), (3, 5)]
+YEARS = [(None, None), (2000, None), (None, 2010), (2000, 2010)]
+RATINGS = [(), ("PG",), ("PG", "R")]
+KEYWORDS = [None, "academy"]
+
+
+class TestQueryBuilder(unittest.TestCase):
+    def test_no_join_without_genre(self):
+        query, params = select_query(SearchFilters.from_params(rating="PG"))
+        self.assertNotIn("film_category", query)
+        self.assertNotIn("JOIN", query)
+        self.assertEqual(
+            query,
+            "SELECT f.title, f.release_year, f.rating FROM film f "
+            "WHERE f.rating = %s AND NOT EXISTS (SELECT 1 FROM film d WHERE "
+            "d.release_year <=> f.release_year AND d.title = f.title AND d.rating <=> f.rating "
+            "AND d.film_id < f.film_id) ORDER BY f.release_year, f.title, f.film_id",
+        )
+        self.assertEqual(params, ("PG",))
+
+    def test_genre_filter_is_semijoin(self):
+        query, params = select_query(SearchFilters.from_params(genre_id=[5, 3, 5]))
+        self.assertIn(
+            "f.film_id IN (SELECT fc.film_id FROM film_category fc WHERE fc.category_id IN (%s, %s))",
+            query,
+        )
+        self.assertNotIn("JOIN", query)
+        # Повтор ключа учитывается, только если он тоже из выбранных жанров
+        self.assertIn(
+            "d.film_id IN (SELECT fc.film_id FROM film_category fc WHERE fc.category_id IN (%s, %s))",
+            query,
+        )
+        self.assertEqual(params, (3, 5, 3, 5))
+
+    def test_open_ended_years_and_many_ratings(self):
+        filters = SearchFilters.from_params(year_from=2000, rating=["R", "PG"])
+        query, params = count_query(filters)
+        # Считаются строки результата, а не фильмы: повторы ключа отбрасываются так же
+        self.assertEqual(
+            query,
+            "SELECT COUNT(*) AS total FROM film f WHERE f.rating IN (%s, %s) AND f.release_year >= %s AND "
+            + duplicate_condition(filters)[0],
+        )
+        self.assertEqual(params, ("PG", "R", 2000))
+        query, params = count_query(SearchFilters.from_params(year_to=2010))
+        self.assertIn("f.release_year <= %s", query)
+        self.assertEqual(params, (2010,))
+
+    def test_empty_filters(self):
+        filters = SearchFilters.from_params(keyword="", genre_id=0, rating=[])
+        self.assertTrue(filters.is_empty())
+        self.assertEqual(
+            count_query(filters),
+            ("SELECT COUNT(*) AS total FROM film f WHERE " + duplicate_condition(filters)[0], ()),
+        )
+
+    def test_fulltext_relevance_column_is_last(self):
+        filters = SearchFilters.from_params(keyword="academy", fulltext="+academy*", genre_id=3)
+        query, params = select_query(filters)
+        self.assertTrue(query.startswith(
+            "SELECT f.title, f.release_year, f.rating, MATCH(f.title) AGAINST (%s IN BOOLEAN MODE) AS relevance"
+        ))
+        self.assertIn("ORDER BY relevance DESC, f.release_year, f.title, f.film_id", query)
+        self.assertEqual(params, ("+academy*", "+academy*", 3, 3))
+
+    def test_duplicates_recheck_only_filters_that_differ(self):
+        # FULLTEXT по названию у повторов совпадает, по описанию — нет
+        title_only = SearchFilters.from_params(keyword="shark", fulltext="+shark*")
+        self.assertEqual(duplicate_condition(title_only)[1], ())
+        with_description = SearchFilters.from_params(
+            keyword="shark", fulltext="+shark*", fulltext_columns=("title", "description")
+        )
+        condition, params = duplicate_condition(with_description)
+        self.assertIn("MATCH(d.title, d.description) AGAINST (%s IN BOOLEAN MODE)", condition)
+        self.assertEqual(params, ("+shark*",))
+
+    def test_page_and_seek_queries(self):
+        filters = SearchFilters.from_params(rating="PG")
+        query, params = page_query(filters, position=(2006, "C", 42), backwards=True, limit=11)
+        self.assertTrue(query.startswith("SELECT f.title, f.release_year, f.rating, f.film_id FROM film f"))
+        self.assertIn("AND (f.release_year, f.title, f.film_id) < (%s, %s, %s)", query)
+        self.assertIn("ORDER BY f.release_year DESC, f.title DESC, f.film_id DESC LIMIT %s", query)
+        self.assertEqual(params, ("PG", 2006, "C", 42, 11))
+        query, params = seek_query(filters, 20)
+        self.assertTrue(query.startswith("SELECT f.release_year, f.title, f.film_id FROM film f"))
+        self.assertTrue(query.endswith("LIMIT 1 OFFSET %s"))
+        self.assertEqual(params, ("PG", 20))
+
+
+    def test_ranked_page_backwards(self):
+        filters = SearchFilters.from_params(keyword="academy", fulltext="+academy*")
+        query, params = page_query(filters, position=(1.5, 2006, "C", 42), backwards=True, limit=11)
+        self.assertIn("AGAINST (%s IN BOOLEAN MODE) > %s OR (", query)
+        self.assertIn("(f.release_year, f.title, f.film_id) < (%s, %s, %s)", query)
+        self.assertIn(
+            "ORDER BY relevance ASC, f.release_year DESC, f.title DESC, f.film_id DESC LIMIT %s", query
+        )
+        self.assertEqual(
+            params, ("+academy*", "+academy*", "+academy*", 1.5, "+academy*", 1.5, 2006, "C", 42, 11)
+        )
+
+
+@unittest.skipUnless(
+    env_flag("EXPLAIN_TESTS", False),
+    "EXPLAIN plan checks need MySQL with the benchmark dataset (set EXPLAIN_TESTS=1)",
+)
+class TestSearchQueryPlans(unittest.TestCase):
+    """
+    Планы запросов поиска на реальном MySQL: ни одна комбинация фильтров не читает
+    таблицу целиком, а без жанра, FULLTEXT и нескольких рейтингов нет и filesort
+    (порядок берётся из составных индексов). Поиск подстроки через LIKE '%...%'
+    не проверяется: он по определению просматривает все названия.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        from final_movies import schema_admin
+
+        cls.schema_admin = schema_admin
+        schema_admin.ensure_search_indexes()
+        schema_admin._execute("ANALYZE TABLE film, film_category")
+        cls.has_fulltext = bool(schema_admin.find_fulltext_indexes())
+
+    def combinations(self):
+        for genres, (year_from, year_to), ratings, keyword in itertools.product(
+            GENRES, YEARS, RATINGS, KEYWORDS
+        ):
+            if keyword and not self.has_fulltext:
+                continue
+            yield SearchFilters.from_params(
+                keyword, genres, year_from, year_to, ratings,
+                fulltext=f"+{keyword}*" if keyword else None,
+            )
+
+    def test_no_full_scans_or_filesorts(self):
+        for filters in self.combinations():
+            # Порядок (release_year, title) нельзя взять из индекса после полусоединения,
+            # объединения нескольких рейтингов или ранжирования по релевантности
+            allow_filesort = bool(filters.genre_ids or filters.fulltext or len(filters.ratings) > 1)
+            shapes = {
+                "select": select_query(filters),
+                "page": page_query(filters, position=(1.0,) * bool(filters.fulltext) + (2005, "M", 1), limit=11),
+                "count": count_query(filters),
+            }
+            for shape, (query, params) in shapes.items():
+                with self.subTest(shape=shape, filters=filters):
+                    plan = self.schema_admin.explain(query, params)
+                    self.assertEqual(
+                        self.schema_admin.plan_issues(plan, allow_filesort), [], f"{query}\n{plan}"
+                    )
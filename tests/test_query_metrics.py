@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from final_movies import query_metrics
+from final_movies.query_metrics import MetricsRegistry, Histogram
+
+
+class TestQueryFingerprint(unittest.TestCase):
+    def test_normalize_query(self):
+        normalized = query_metrics.normalize_query(
+            "SELECT *  FROM film\n WHERE title = 'ACE' AND film_id IN (1, 2, 3) AND rating = %s"
+        )
+        self.assertEqual(
+            normalized, "SELECT * FROM film WHERE title = ? AND film_id IN (?+) AND rating = ?"
+        )
+
+    def test_fingerprint_ignores_literals(self):
+        first, _ = query_metrics.fingerprint_query("SELECT * FROM film WHERE film_id = 1")
+        second, _ = query_metrics.fingerprint_query("SELECT * FROM film   WHERE film_id = 42")
+        self.assertEqual(first, second)
+
+    def test_params_are_hashed(self):
+        digest = query_metrics.hash_params(("secret",))
+        self.assertNotIn("secret", digest)
+        self.assertEqual(digest, query_metrics.hash_params(("secret",)))
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_histogram_quantiles(self):
+        histogram = Histogram((0.001, 0.01, 0.1))
+        for value in [0.0005] * 90 + [0.05] * 10:
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 0.001)
+        self.assertEqual(histogram.quantile(0.95), 0.05)  # не больше максимума
+        self.assertEqual(histogram.cumulative()[-1], ("+Inf", 100))
+
+    def test_record_query_and_slow_log(self):
+        registry = MetricsRegistry(slow_threshold=0.1)
+        registry.record_query("SELECT 1", (), 0.001, 0.002, 0.003, rows=1)
+        with self.assertLogs("final_movies.query_metrics", level="WARNING"):
+            registry.record_query("SELECT 2", ("x",), 0.0, 0.2, 0.0, rows=5)
+        summary = registry.query_summary()
+        self.assertEqual(len(summary), 1)
+        self.assertEqual(summary[0]["calls"], 2)
+        self.assertEqual(summary[0]["rows"], 6)
+        self.assertEqual(summary[0]["slow"], 1)
+        slow = registry.slow_queries()
+        self.assertEqual(len(slow), 1)
+        self.assertNotIn("x", slow[0]["query"])
+
+    def test_prometheus_export(self):
+        registry = MetricsRegistry(slow_threshold=1)
+        registry.record_query("SELECT * FROM film WHERE rating = %s", ("PG",), 0.001, 0.002, 0.003, 10)
+        registry.observe("page_render", 0.004)
+        text = registry.to_prometheus()
+        self.assertIn("# TYPE movie_finder_query_duration_seconds histogram", text)
+        self.assertIn('phase="execute",le="+Inf"} 1', text)
+        self.assertIn('operation="page_render"', text)
+        self.assertIn('query="SELECT * FROM film WHERE rating = ?"', text)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.prom")
+            with patch.object(query_metrics, "_registry", registry):
+                self.assertEqual(query_metrics.export_prometheus(path), path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), text)
+
+    @patch("final_movies.mysql_connector.get_registry")
+    @patch("final_movies.mysql_connector.get_connection_pool")
+    def test_execute_select_query_is_instrumented(self, mock_get_pool, mock_get_registry):
+        from final_movies.mysql_connector import execute_select_query
+
+        connection = MagicMock()
+        connection.cursor.return_value.__enter__.return_value.fetchall.return_value = [{"a": 1}]
+        mock_get_pool.return_value.connection.return_value.__enter__.return_value = connection
+
+        self.assertEqual(execute_select_query("SELECT a FROM t WHERE b = %s", (1,)), [{"a": 1}])
+        kwargs = mock_get_registry.return_value.record_query.call_args.kwargs
+        self.assertEqual(kwargs["rows"], 1)
+        self.assertFalse(kwargs["error"])
+        self.assertGreaterEqual(kwargs["execute"], 0)
@@ -0,0 +1,135 @@
+import unittest
+from unittest.mock import patch
+from final_movies import schema_admin
+
+
+class TestFulltextIndex(unittest.TestCase):
+    @patch("final_movies.schema_admin._execute")
+    def test_ensure_creates_missing_index(self, mock_execute):
+        mock_execute.return_value = []
+        self.assertTrue(schema_admin.ensure_fulltext_index(("title",)))
+        self.assertEqual(
+            mock_execute.call_args.args[0],
+            "ALTER TABLE film ADD FULLTEXT INDEX ft_film_title (title)",
+        )
+
+    @patch("final_movies.schema_admin._execute")
+    def test_ensure_skips_existing_index(self, mock_execute):
+        mock_execute.return_value = [{"index_name": "idx_title", "column_name": "title"}]
+        self.assertFalse(schema_admin.ensure_fulltext_index(("title",)))
+        mock_execute.assert_called_once()
+
+    @patch("final_movies.schema_admin._execute")
+    def test_verify_checks_explain_plan(self, mock_execute):
+        mock_execute.side_effect = [
+            [
+                {"index_name": "ft_film_title_description", "column_name": "title"},
+                {"index_name": "ft_film_title_description", "column_name": "description"},
+            ],
+            [{"table": "film", "type": "fulltext", "key": "ft_film_title_description"}],
+        ]
+        result = schema_admin.verify_fulltext_index(("title", "description"))
+        self.assertTrue(result["exists"])
+        self.assertTrue(result["used"])
+        self.assertIn("MATCH(title, description)", mock_execute.call_args.args[0])
+
+    @patch("final_movies.schema_admin._execute", return_value=[])
+    def test_cli_reports_missing_index(self, mock_execute):
+        with patch("builtins.print") as mock_print:
+            self.assertEqual(schema_admin.main(["fulltext", "verify"]), 1)
+        self.assertIn("No FULLTEXT index", mock_print.call_args.args[0])
+
+
+FILM_INDEXES = [
+    {"index_name": "PRIMARY", "column_name": "film_id"},
+    # Индекс с нужными столбцами уже есть под другим именем (film_id — неявное продолжение)
+    {"index_name": "year_title", "column_name": "release_year"},
+    {"index_name": "year_title", "column_name": "title"},
+]
+# Индекс Sakila по category_id неявно продолжается первичным ключом (film_id, category_id)
+FILM_CATEGORY_INDEXES = [
+    {"index_name": "PRIMARY", "column_name": "film_id"},
+    {"index_name": "PRIMARY", "column_name": "category_id"},
+    {"index_name": "fk_film_category_category", "column_name": "category_id"},
+]
+
+# Индексы, которых нет в FakeSchema, в порядке создания
+CREATED = ["idx_film_rating_year_title", "idx_film_last_update", "idx_film_category_last_update"]
+
+
+class FakeSchema:
+    """
+    Подмена _execute: индексы из information_schema, планы EXPLAIN и журнал DDL.
+    """
+
+    def __init__(self, plan=None):
+        self.indexes = {"film": list(FILM_INDEXES), "film_category": list(FILM_CATEGORY_INDEXES)}
+        self.plan = plan if plan is not None else [{"table": "f", "type": "ref", "Extra": ""}]
+        self.ddl = []
+
+    def __call__(self, query, params=()):
+        if "information_schema.STATISTICS" in query:
+            return self.indexes[params[0]]
+        if query.startswith("EXPLAIN"):
+            return self.plan
+        if query.startswith("CREATE INDEX"):
+            name, table = query.split()[2], query.split()[4]
+            columns = query[query.index("(") + 1:-1].split(", ")
+            self.indexes[table] += [{"index_name": name, "column_name": c} for c in columns]
+            self.ddl.append(query)
+        if query.startswith("SELECT MIN(category_id)"):
+            return [{"genre_id": 3}]
+        return []
+
+
+class TestSearchIndexes(unittest.TestCase):
+    def test_advice_accounts_for_implicit_primary_key(self):
+        with patch("final_movies.schema_admin._execute", FakeSchema()):
+            advice = {item.name: item for item in schema_admin.advise_indexes()}
+        self.assertEqual(advice["idx_film_year_title"].covered_by, "year_title")
+        self.assertEqual(
+            advice["idx_film_category_category_film"].covered_by, "fk_film_category_category"
+        )
+        self.assertTrue(advice["idx_film_rating_year_title"].missing)
+        self.assertTrue(advice["idx_film_last_update"].missing)
+
+    def test_ensure_is_idempotent(self):
+        schema = FakeSchema()
+        with patch("final_movies.schema_admin._execute", schema):
+            self.assertEqual(schema_admin.ensure_search_indexes(), CREATED)
+            self.assertEqual(schema_admin.ensure_search_indexes(), [])
+        self.assertEqual(
+            schema.ddl,
+            [
+                "CREATE INDEX idx_film_rating_year_title ON film (rating, release_year, title, film_id)",
+                "CREATE INDEX idx_film_last_update ON film (last_update)",
+                "CREATE INDEX idx_film_category_last_update ON film_category (last_update)",
+            ],
+        )
+
+    def test_provision_reports_before_and_after(self):
+        schema = FakeSchema()
+        with patch("final_movies.schema_admin._execute", schema):
+            report = schema_admin.provision_indexes(runs=1)
+        self.assertEqual(report["created"], CREATED)
+        self.assertEqual(set(report["before"]), set(report["after"]))
+        self.assertEqual(report["after"]["genre count"]["issues"], [])
+        self.assertIn("changed films", report["after"])
+        self.assertIsInstance(report["after"]["search: rating"]["ms"], float)
+
+    def test_advise_cli_fails_on_bad_plan(self):
+        schema = FakeSchema(plan=[{"table": "f", "type": "ALL", "Extra": "Using filesort"}])
+        with patch("final_movies.schema_admin._execute", schema), patch("builtins.print") as mock_print:
+            self.assertEqual(schema_admin.main(["indexes", "advise", "--runs", "1"]), 1)
+        output = "\n".join(str(call.args[0]) for call in mock_print.call_args_list)
+        self.assertIn("Missing film(rating, release_year, title, film_id)", output)
+        self.assertIn("full scan of f", output)
+        self.assertEqual(schema.ddl, [])
+
+    def test_plan_issues(self):
+        plan = [
+            {"table": "fc", "type": "ref", "Extra": "Using index; Using filesort"},
+            {"table": "f", "type": "ALL", "Extra": "Using where"},
+        ]
+        self.assertEqual(schema_admin.plan_issues(plan), ["filesort on fc", "full scan of f"])
+        self.assertEqual(schema_admin.plan_issues(plan, allow_filesort=True), ["full scan of f"])
@@ -0,0 +1,222 @@
+import os
+import time
+import threading
+import unittest
+import pymysql
+from unittest.mock import patch, MagicMock
+from final_movies import mysql_connector, search_cache
+from final_movies.search_cache import SearchCache, make_search_key
+from final_movies.change_tracker import set_change_tracker
+from benchmarks.standins import SakilaStandIn
+
+ROWS = [{"title": "ACADEMY DINOSAUR", "release_year": 2006, "rating": "PG"}]
+
+
+class TestSearchCache(unittest.TestCase):
+    def test_key_normalization(self):
+        self.assertEqual(make_search_key(keyword="Academy"), make_search_key(keyword="academy"))
+        # LIKE учитывает пробелы — «ace » и «ace» ищут разное
+        self.assertNotEqual(make_search_key(keyword="ace "), make_search_key(keyword="ace"))
+        self.assertEqual(make_search_key(keyword="", genre_id=0), make_search_key())
+        # Одна граница диапазона — тоже фильтр
+        self.assertNotEqual(make_search_key(year_from=2000), make_search_key())
+        self.assertNotEqual(make_search_key(year_from=2000, year_to=2005), make_search_key())
+        # Несколько жанров и рейтингов — без учёта порядка и повторов
+        self.assertEqual(make_search_key(genre_id=[3, 1, 3]), make_search_key(genre_id=(1, 3)))
+        self.assertEqual(make_search_key(rating=["R", "PG"]), make_search_key(rating=("PG", "R")))
+        self.assertEqual(make_search_key(genre_id=3), make_search_key(genre_id=[3]))
+        # Режим поиска и источник данных меняют результат
+        self.assertNotEqual(make_search_key(keyword="ace", mode="fulltext"), make_search_key(keyword="ace"))
+        self.assertNotEqual(make_search_key(backend="memory"), make_search_key())
+
+    def test_hit_returns_copy(self):
+        cache = SearchCache()
+        loader = MagicMock(return_value=ROWS)
+        first = cache.get_or_load(("a",), loader)
+        first[0]["title"] = "CHANGED"
+        second = cache.get_or_load(("a",), loader)
+
+        loader.assert_called_once()
+        self.assertEqual(second, ROWS)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction_by_entries_and_bytes(self):
+        cache = SearchCache(max_entries=2)
+        cache.put(("a",), ROWS)
+        cache.put(("b",), ROWS)
+        cache.get(("a",))
+        cache.put(("c",), ROWS)
+        self.assertIsNone(cache.get(("b",)))  # давно не использовалась
+        self.assertIsNotNone(cache.get(("a",)))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        budget = search_cache.estimate_size(ROWS) * 2
+        cache = SearchCache(max_bytes=budget)
+        for key in "abc":
+            cache.put((key,), ROWS)
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.stats()["bytes"], budget)
+        cache.put(("big",), ROWS * 10)
+        self.assertEqual(cache.stats()["rejected"], 1)
+
+    def test_ttl_expiration(self):
+        cache = SearchCache(ttl=0.01)
+        cache.put(("a",), ROWS)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(("a",)))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_concurrent_misses_are_coalesced(self):
+        cache = SearchCache()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ROWS
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get_or_load(("k",), loader)))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load(("k",), loader)))
+            for _ in range(4)
+        ]
+        for thread in followers:
+            thread.start()
+        while cache.stats()["coalesced"] < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [ROWS] * 5)
+
+    def test_failed_load_is_not_cached(self):
+        cache = SearchCache()
+        with self.assertRaises(ConnectionError):
+            cache.get_or_load(("k",), MagicMock(side_effect=ConnectionError("down")))
+        self.assertEqual(cache.get_or_load(("k",), lambda: ROWS), ROWS)
+
+    def test_load_racing_invalidation_is_not_stored(self):
+        cache = SearchCache()
+
+        def loader():
+            cache.invalidate()
+            return ROWS
+
+        self.assertEqual(cache.get_or_load(("k",), loader), ROWS)
+        self.assertIsNone(cache.get(("k",)))
+
+    def test_load_racing_selective_invalidation_is_not_stored(self):
+        cache = SearchCache()
+        cache.put(("other",), ROWS)
+
+        def loader():
+            cache.invalidate(lambda key: key == ("other",))
+            return ROWS
+
+        self.assertEqual(cache.get_or_load(("k",), loader), ROWS)
+        self.assertIsNone(cache.get(("k",)))
+        self.assertEqual(len(cache), 0)
+
+    def test_selective_invalidation(self):
+        cache = SearchCache()
+        search_cache.set_search_cache(cache)
+        try:
+            cache.put(make_search_key(genre_id=3), ROWS)
+            cache.put(make_search_key(genre_id=3, year_from=2000, year_to=2005), ROWS)
+            cache.put(make_search_key(keyword="ace"), ROWS)
+            cache.put(make_search_key(genre_id=[1, 3]), ROWS)
+            self.assertEqual(search_cache.invalidate_search_cache(genre_id=3), 3)
+            self.assertEqual(len(cache), 1)
+            with self.assertRaises(TypeError):
+                search_cache.invalidate_search_cache(title="x")
+        finally:
+            search_cache.set_search_cache(None)
+
+
+class TestSearchMoviesCache(unittest.TestCase):
+    def setUp(self):
+        self.sakila = SakilaStandIn().populate(100, genres=4)
+        self.sakila.install()
+        self.env = patch.dict(os.environ, {"SEARCH_CACHE": "1", "CHANGE_POLL_INTERVAL": "0"})
+        self.env.start()
+        set_change_tracker(None)
+        search_cache.set_search_cache(None)
+
+    def tearDown(self):
+        self.env.stop()
+        set_change_tracker(None)
+        search_cache.set_search_cache(None)
+        mysql_connector.set_connection_pool(None)
+        self.sakila.close()
+
+    def test_repeated_search_skips_database(self):
+        first = mysql_connector.search_movies(keyword="A", rating="PG")
+        with patch("final_movies.mysql_connector.execute_select_query") as mock_query:
+            second = mysql_connector.search_movies(keyword="a", rating="PG")
+            mock_query.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(search_cache.get_search_cache_stats()["hits"], 1)
+
+    def test_repeated_interactive_search_skips_database(self):
+        first = mysql_connector.search_movies_paged(keyword="A", page_size=10)
+        pages = [first.get_page(0), first.get_page(1), first.get_page(3)]
+        self.assertTrue(all(pages))
+        total = first.total
+        with patch("final_movies.mysql_connector.execute_select_query") as mock_query:
+            again = mysql_connector.search_movies_paged(keyword="a", page_size=10)
+            self.assertEqual([again.get_page(0), again.get_page(1), again.get_page(3)], pages)
+            self.assertEqual(again.total, total)
+            page = mysql_connector.search_movies_page(keyword="A", page_size=10, with_total=True)
+            mock_query.assert_not_called()
+        self.assertEqual(page.rows, pages[0])
+        self.assertEqual(page.total, total)
+
+    def test_mysql_error_is_not_cached(self):
+        pool = MagicMock()
+        pool.connection.side_effect = pymysql.OperationalError(2013, "Lost connection")
+        with patch("final_movies.mysql_connector.get_connection_pool", return_value=pool):
+            with self.assertLogs(level="ERROR"):
+                self.assertEqual(mysql_connector.search_movies(rating="PG"), [])
+                self.assertEqual(mysql_connector.search_movies_many([{"rating": "G"}]), [[]])
+        self.assertEqual(search_cache.get_search_cache_stats()["entries"], 0)
+        self.assertTrue(mysql_connector.search_movies(rating="PG"))
+
+    def test_keyword_mode_is_part_of_key(self):
+        mysql_connector.search_movies(keyword="academy")
+        with patch.dict(os.environ, {"KEYWORD_SEARCH_MODE": "fulltext"}):
+            with patch(
+                "final_movies.mysql_connector.execute_select_query", return_value=[]
+            ) as mock_query:
+                mysql_connector.search_movies(keyword="academy")
+                mock_query.assert_called_once()
+
+    def test_batch_search_shares_cache(self):
+        single = mysql_connector.search_movies(rating="PG")
+        with patch(
+            "final_movies.mysql_connector.execute_select_query",
+            wraps=mysql_connector.execute_select_query,
+        ) as mock_query:
+            batch = mysql_connector.search_movies_many([{"rating": "PG"}, {"rating": "G"}])
+            # Из базы загружается только отсутствующий в кэше результат
+            self.assertEqual(mock_query.call_args.args[0].count("UNION ALL"), 0)
+            self.assertEqual(mysql_connector.search_movies(rating="G"), batch[1])
+            mock_query.assert_called_once()
+        self.assertEqual(batch[0], single)
+
+    def test_source_change_invalidates_cache(self):
+        before = mysql_connector.search_movies(rating="PG")
+        with self.sakila.connect() as connection:
+            connection.raw.execute(
+                "INSERT INTO film (film_id, title, release_year, rating, last_update) "
+                "VALUES (5000, 'ZZ TOP', 2020, 'PG', '2100-01-01 00:00:00')"
+            )
+        after = mysql_connector.search_movies(rating="PG")
+        self.assertEqual(len(after), len(before) + 1)
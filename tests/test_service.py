@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import socket
+import threading
+import unittest
+from http.client import HTTPConnection
+from unittest.mock import MagicMock, patch
+import pymysql
+from final_movies import log_writer, mysql_connector, search_cache, service
+from final_movies.change_tracker import set_change_tracker
+from final_movies.query_metrics import get_registry
+from benchmarks.standins import SakilaStandIn, install_mongo_standin
+
+
+@patch.dict(os.environ, {"SEARCH_CACHE": "0", "MONGO_LOG_ASYNC": "0"})
+class TestService(unittest.TestCase):
+    def setUp(self):
+        self.sakila = SakilaStandIn().populate(200, genres=4)
+        self.sakila.install()
+        self.logs, self.rollups = install_mongo_standin()
+        self.start(workers=4, queue_size=4)
+
+    def start(self, request_timeout=2, **options):
+        self.server = service.create_server("127.0.0.1", 0, request_timeout=request_timeout, **options)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.addCleanup(self.stop)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def tearDown(self):
+        mysql_connector.set_connection_pool(None)
+        mysql_connector.invalidate_genre_cache()
+        with log_writer._mongo_lock:
+            log_writer._mongo_ready = False
+            log_writer._collection = log_writer._rollup_collection = None
+        self.sakila.close()
+
+    def connect(self):
+        connection = HTTPConnection(*self.server.server_address[:2], timeout=5)
+        self.addCleanup(connection.close)
+        return connection
+
+    def get(self, path, connection=None, method="GET"):
+        if connection is None:
+            # Отдельный запрос закрывает соединение, чтобы не занимать обработчик до таймаута
+            connection = self.connect()
+            connection.request(method, path, headers={"Connection": "close"})
+        else:
+            connection.request(method, path)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_search_pages_match_search_movies(self):
+        expected = mysql_connector.search_movies(rating="PG")
+        connection = self.connect()
+        status, first = self.get("/search?rating=PG&page_size=5", connection)
+        self.assertEqual(status, 200)
+        self.assertEqual(first["rows"], [dict(row) for row in expected[:5]])
+        self.assertEqual(first["total"], len(expected))
+
+        # Следующая страница идёт по тому же соединению (keep-alive)
+        sock = connection.sock
+        status, second = self.get(f"/search?rating=PG&page_size=5&cursor={first['next_cursor']}", connection)
+        self.assertIs(connection.sock, sock)
+        self.assertEqual(second["rows"], [dict(row) for row in expected[5:10]])
+
+        # В логи попадает только сам поиск, а не переходы по страницам
+        entries = list(self.logs.find({}))
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["search_type"], "rating")
+        self.assertEqual(entries[0]["results_count"], len(expected))
+
+    def test_multi_value_filters(self):
+        status, body = self.get("/search?genre_id=1,2&rating=PG&rating=R&year_from=2000&page_size=500")
+        self.assertEqual(status, 200)
+        expected = mysql_connector.search_movies(genre_id=[1, 2], rating=["PG", "R"], year_from=2000)
+        self.assertEqual(body["rows"], [dict(row) for row in expected])
+        self.assertEqual(self.logs.find_one({})["search_type"], "search")
+
+    def test_catalog_and_ratings(self):
+        status, body = self.get("/genres")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["genres"], json.loads(json.dumps(mysql_connector.get_genre_catalog())))
+        status, body = self.get("/ratings")
+        self.assertEqual([r["code"] for r in body["ratings"]], ["G", "PG", "PG-13", "R", "NC-17"])
+
+    def test_stats_reports(self):
+        self.get("/search?keyword=A")
+        self.get("/search?keyword=a")
+        self.get("/search?genre_id=1&year_from=2000&year_to=2010")
+
+        status, top = self.get("/stats/top?limit=1")
+        self.assertEqual(status, 200)
+        self.assertEqual(top["searches"][0]["label"], "Keyword: a")
+        self.assertEqual(top["searches"][0]["count"], 2)
+        status, period = self.get("/stats/top?days=7")
+        self.assertEqual(period["searches"][0]["count"], 2)
+        status, recent = self.get("/stats/recent")
+        self.assertEqual(recent["searches"][0]["search_type"], "genre_year")
+        self.assertTrue(recent["searches"][0]["label"].startswith("Genre: "))
+
+    def test_errors(self):
+        self.assertEqual(self.get("/nowhere")[0], 404)
+        self.assertEqual(self.get("/search?page_size=0")[0], 400)
+        self.assertEqual(self.get("/search?rating=XXX")[0], 400)
+        self.assertEqual(self.get("/search?cursor=broken")[0], 400)
+        self.assertEqual(self.get("/stats/top?limit=many")[0], 400)
+        self.assertEqual(self.get("/search", method="POST")[0], 405)
+        with patch.object(log_writer, "get_rollup_collection", return_value=None):
+            self.assertEqual(self.get("/stats/recent")[0], 503)
+        with patch.object(mysql_connector, "search_movies_page", side_effect=ConnectionError("exhausted")):
+            self.assertEqual(self.get("/search?rating=PG")[0], 503)
+
+    def test_mysql_failure_is_503_and_not_logged(self):
+        pool = MagicMock()
+        pool.connection.side_effect = pymysql.OperationalError(2013, "Lost connection")
+        for cache in ("0", "1"):
+            with self.subTest(cache=cache), patch.dict(os.environ, {"SEARCH_CACHE": cache}):
+                search_cache.set_search_cache(None)
+                set_change_tracker(None)
+                self.addCleanup(search_cache.set_search_cache, None)
+                self.addCleanup(set_change_tracker, None)
+                with patch("final_movies.mysql_connector.get_connection_pool", return_value=pool):
+                    with self.assertLogs(level="ERROR"):
+                        connection = self.connect()
+                        connection.request("GET", "/search?rating=PG", headers={"Connection": "close"})
+                        response = connection.getresponse()
+                        response.read()
+                self.assertEqual(response.status, 503)
+                self.assertEqual(response.getheader("Retry-After"), "1")
+        self.assertEqual(list(self.logs.find({})), [])
+        self.assertEqual(list(self.rollups.find({})), [])
+
+    def test_request_timeout_bounds_pool_wait(self):
+        self.stop()
+        self.start(request_timeout=0.3)
+        pool = self.sakila.install(max_size=1)
+        held = pool.acquire()
+        self.addCleanup(pool.release, held)
+        started = time.perf_counter()
+        with self.assertLogs(level="ERROR"):
+            status, body = self.get("/search?rating=PG")
+        self.assertEqual(status, 503)
+        self.assertIn("exhausted", body["error"])
+        self.assertLess(time.perf_counter() - started, 2)
+
+    def test_latency_log_and_metrics(self):
+        with self.assertLogs("final_movies.service", level="INFO") as logs:
+            self.get("/ratings")
+            # Время записывается после отправки ответа — ждём, пока обработчик его запишет
+            for _ in range(50):
+                if logs.output:
+                    break
+                threading.Event().wait(0.02)
+        self.assertRegex(logs.output[0], r"GET /ratings 200 \d+\.\d ms")
+        self.assertIn("http /ratings", get_registry().operation_summary())
+
+    def test_rejects_connections_beyond_pool_and_queue(self):
+        self.stop()
+        self.start(workers=1, queue_size=0)
+        # Открытое keep-alive соединение занимает единственный обработчик
+        busy = self.connect()
+        self.assertEqual(self.get("/health", busy)[0], 200)
+
+        status, body = self.get("/ratings")
+        self.assertEqual(status, 503)
+        self.assertEqual(self.server.stats()["rejected"], 1)
+
+        busy.close()
+        for _ in range(50):
+            if self.server.stats()["active"] == 0:
+                break
+            threading.Event().wait(0.05)
+        self.assertEqual(self.get("/ratings")[0], 200)
+
+    def test_idle_connection_times_out(self):
+        self.stop()
+        self.start(request_timeout=0.2)
+        sock = socket.create_connection(self.server.server_address[:2])
+        self.addCleanup(sock.close)
+        sock.settimeout(5)
+        # Сервер закрывает соединение без запроса после request_timeout
+        self.assertEqual(sock.recv(1), b"")